@@ -3,7 +3,7 @@ API v1 라우터
 """
 
 from fastapi import APIRouter
-from app.api.v1.routes import generation, services, health, models
+from app.api.v1.routes import generation, services, health, models, queue, jobs, profiles, metrics, images
 
 api_router = APIRouter()
 
@@ -12,4 +12,9 @@ api_router.include_router(generation.router, prefix="/generate", tags=["generati
 api_router.include_router(services.router, prefix="/services", tags=["services"])
 api_router.include_router(health.router, prefix="", tags=["health"])
 api_router.include_router(models.router, prefix="/models", tags=["models"])
+api_router.include_router(queue.router, prefix="/queue", tags=["queue"])
+api_router.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
+api_router.include_router(profiles.router, prefix="/profiles", tags=["profiles"])
+api_router.include_router(metrics.router, prefix="/metrics", tags=["metrics"])
+api_router.include_router(images.router, prefix="/images", tags=["images"])
 
@@ -1,12 +1,28 @@
 """
 이미지 생성 라우터
 """
-from fastapi import APIRouter, HTTPException, status
+import json
+import asyncio
+from typing import Any, Iterator, List, Optional
+from fastapi import APIRouter, Header, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from app.core.config import BATCH_MAX_ITEMS, DISCONNECT_POLL_INTERVAL
 from app.models.requests import PromptRequest
 from app.models.responses import ImageGenerationResponse
 from app.services.image_generation import ImageGenerationService
+from app.services.image_store import get_image_store
+from app.services.admission import AdmissionRejected
+from app.services.deadline import Deadline, DeadlineExceeded, activate, job_budget
+from app.services.model_index import MissingModelsError
+from app.services.graph_validator import GraphValidationError, get_object_info_cache
+from app.services.scheduler import get_scheduler
+from app.services.gpu_placement import get_gpu_placement
+from app.services.batch import Batch, get_batch_manager
+from app.services.job_store import get_job_store
 from app.dependencies.service_manager import ServiceManagerDep
-from service_manager import ServiceManager
+from app.core.tracing import span
 
 router = APIRouter()
 
@@ -18,44 +34,258 @@ router = APIRouter()
     summary="이미지 생성",
     description="프롬프트를 기반으로 이미지를 생성합니다"
 )
-def generate_image(
+async def generate_image(
     request: PromptRequest,
-    service_manager: ServiceManagerDep
+    http_request: Request,
+    service_manager: ServiceManagerDep,
+    x_api_key: Optional[str] = Header(None, description="API 키 (테넌트별 우선순위/공정성 구분)")
 ) -> ImageGenerationResponse:
     """
     이미지 생성 요청
     
+    생성은 스레드 풀에서 실행하고, 그동안 클라이언트 연결을 확인해 끊기면 작업을 중단합니다.
+    
     Args:
         request: 이미지 생성 요청 데이터
+        http_request: HTTP 요청 (연결 끊김 확인용)
         service_manager: 서비스 매니저 의존성
+        x_api_key: 요청자 API 키
         
     Returns:
         생성된 이미지 정보
         
     Raises:
-        HTTPException: ComfyUI가 실행 중이 아니거나 생성 실패 시
+        HTTPException: ComfyUI가 실행 중이 아니거나 생성 실패 시,
+            입장 대기열이 가득 찬 경우 429 (Retry-After 포함),
+            워크플로가 참조하는 모델 파일이 없거나 ComfyUI 노드 정의와 맞지 않는 경우 422,
+            작업 시간 예산을 넘긴 경우 504 (시간을 넘긴 단계 포함)
     """
-    # ComfyUI 상태 확인
-    status_info = service_manager.get_status()
-    if not status_info["comfyui"]["running"]:
+    # 시간 예산은 요청을 받은 시점부터 셈
+    deadline = Deadline(job_budget(request.mode, request.timeout))
+    watcher = asyncio.create_task(_cancel_on_disconnect(http_request, deadline))
+    try:
+        return await run_in_threadpool(_run_generation, request, service_manager, x_api_key, deadline)
+    finally:
+        watcher.cancel()
+
+
+async def _cancel_on_disconnect(http_request: Request, deadline: Deadline):
+    """클라이언트 연결이 끊기면 작업 중단 (진행 중인 단계가 다음 확인 시점에 끝남)"""
+    while not await http_request.is_disconnected():
+        await asyncio.sleep(DISCONNECT_POLL_INTERVAL)
+    deadline.cancel()
+
+
+def _run_generation(
+    request: PromptRequest,
+    service_manager: Any,
+    x_api_key: Optional[str],
+    deadline: Deadline
+) -> ImageGenerationResponse:
+    """이미지 생성 실행 (스레드 풀에서 deadline을 건 채로 실행)"""
+    # 요청당 하나의 트레이스 (하위 단계는 자식 스팬으로 기록됨)
+    with activate(deadline), span("generate_image", {
+        "generation.mode": request.mode,
+        "generation.prompt_chars": len(request.prompt),
+        "generation.timeout": deadline.budget,
+    }):
+        # ComfyUI 상태 확인 (로컬 ComfyUI가 없어도 /system_stats에 응답하는 다른 백엔드가 있으면 진행)
+        status_info = service_manager.get_status()
+        if not status_info["comfyui"]["running"] and not get_gpu_placement().healthy():
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="ComfyUI 서비스가 실행 중이지 않습니다. 잠시 후 다시 시도해주세요."
+            )
+        # ComfyUI가 다시 시작되었으면 노드 정의 캐시 갱신
+        get_object_info_cache().observe_backend(status_info["comfyui"].get("started_at"))
+        
+        job_id = None
+        try:
+            # LLM 호출에 시간을 쓰기 전에 ComfyUI 대기열 여유부터 확인
+            get_scheduler().check()
+            
+            # 재시작 후에도 이어갈 수 있도록 작업 저장소에 기록
+            job_id = get_job_store().create({
+                **request.model_dump(),
+                "priority": get_scheduler().classify(request.mode, x_api_key)
+            })
+            
+            # 이미지 생성 서비스 호출
+            service = ImageGenerationService(api_key=x_api_key, job_id=job_id)
+            files = service.generate_product_image(request.prompt, mode=request.mode)
+            get_job_store().complete(job_id, files)
+            
+            return ImageGenerationResponse(
+                success=True,
+                images=files,
+                variants=[get_image_store().variants(f) for f in files],
+                message=f"{len(files)}개의 이미지가 생성되었습니다",
+                job_id=job_id
+            )
+        except AdmissionRejected as e:
+            if job_id:
+                get_job_store().fail(job_id, str(e))
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"요청이 너무 많습니다 ({e.resource}: {e.reason}). 잠시 후 다시 시도해주세요.",
+                headers={"Retry-After": str(e.retry_after)}
+            )
+        except MissingModelsError as e:
+            if job_id:
+                get_job_store().fail(job_id, str(e))
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail={"message": str(e), "missing_models": e.missing}
+            )
+        except GraphValidationError as e:
+            if job_id:
+                get_job_store().fail(job_id, str(e))
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail={"message": str(e), "errors": e.errors}
+            )
+        except DeadlineExceeded as e:
+            if job_id:
+                get_job_store().fail(job_id, str(e))
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail={"message": str(e), "stage": e.stage, "reason": e.reason, "timeout": e.budget}
+            )
+        except Exception as e:
+            if job_id:
+                get_job_store().fail(job_id, str(e))
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"이미지 생성 실패: {str(e)}"
+            )
+
+
+def _parse_batch_body(body: bytes, content_type: str) -> List[PromptRequest]:
+    """JSON 배열, {"requests": [...]} 또는 NDJSON 본문을 PromptRequest 목록으로 변환"""
+    try:
+        if "ndjson" in content_type or "jsonl" in content_type:
+            items: List[Any] = [json.loads(line) for line in body.decode().splitlines() if line.strip()]
+        else:
+            data = json.loads(body or b"null")
+            items = data.get("requests") if isinstance(data, dict) else data
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"요청 본문을 파싱할 수 없습니다: {e}"
+        )
+    
+    if not isinstance(items, list) or not items:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="요청 목록이 비어 있거나 형식이 올바르지 않습니다"
+        )
+    
+    if len(items) > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"배치당 최대 {BATCH_MAX_ITEMS}개까지 요청할 수 있습니다 (요청: {len(items)}개)"
+        )
+    
+    requests = []
+    for index, item in enumerate(items):
+        try:
+            requests.append(PromptRequest.model_validate(item))
+        except ValidationError as e:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail={"index": index, "errors": e.errors(include_url=False)}
+            )
+    return requests
+
+
+def _stream_batch(batch: Batch, after: int = 0) -> Iterator[str]:
+    """배치 요약 → 결과 (완료 순서) → 최종 요약을 NDJSON 줄로 반환"""
+    yield json.dumps({"type": "batch", **batch.summary()}, ensure_ascii=False) + "\n"
+    for result in batch.iter_results(after=after):
+        yield json.dumps({"type": "result", **result}, ensure_ascii=False) + "\n"
+    yield json.dumps({"type": "summary", **batch.summary()}, ensure_ascii=False) + "\n"
+
+
+@router.post(
+    "/batch",
+    summary="배치 이미지 생성",
+    description=(
+        "PromptRequest 목록(JSON 배열, {\"requests\": [...]} 또는 application/x-ndjson)을 받아 "
+        "중복을 제거하고 실행하며, 끝나는 순서대로 결과를 NDJSON으로 스트리밍합니다. "
+        "연결이 끊겨도 배치는 계속 진행되며 GET /generate/batch/{batch_id}로 이어서 받을 수 있습니다."
+    ),
+    response_class=StreamingResponse
+)
+async def generate_batch(
+    request: Request,
+    service_manager: ServiceManagerDep,
+    x_api_key: Optional[str] = Header(None, description="API 키 (테넌트별 우선순위/공정성 구분)")
+) -> StreamingResponse:
+    """
+    배치 이미지 생성 요청
+    
+    Args:
+        request: HTTP 요청 (본문은 JSON 배열 또는 NDJSON)
+        service_manager: 서비스 매니저 의존성
+        x_api_key: 요청자 API 키
+        
+    Returns:
+        NDJSON 결과 스트림 (X-Batch-Id 헤더 포함)
+        
+    Raises:
+        HTTPException: 본문 형식 오류, ComfyUI 미실행 시
+    """
+    requests = _parse_batch_body(await request.body(), request.headers.get("content-type", ""))
+    
+    status_info = await run_in_threadpool(service_manager.get_status)
+    if not status_info["comfyui"]["running"] and not get_gpu_placement().healthy():
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="ComfyUI 서비스가 실행 중이지 않습니다. 잠시 후 다시 시도해주세요."
         )
+    get_object_info_cache().observe_backend(status_info["comfyui"].get("started_at"))
     
-    try:
-        # 이미지 생성 서비스 호출
-        service = ImageGenerationService()
-        files = service.generate_product_image(request.prompt, mode=request.mode)
+    # 작업 저장소 기록(SQLite)이 이벤트 루프를 막지 않도록 스레드 풀에서 접수
+    batch = await run_in_threadpool(get_batch_manager().submit, requests, api_key=x_api_key)
+    return StreamingResponse(
+        _stream_batch(batch),
+        media_type="application/x-ndjson",
+        headers={"X-Batch-Id": batch.id}
+    )
+
+
+@router.get(
+    "/batch/{batch_id}",
+    summary="배치 결과 이어받기",
+    description="배치 결과를 NDJSON으로 스트리밍합니다. after로 이미 받은 결과 수를 지정하면 그 이후부터 보냅니다.",
+    response_class=StreamingResponse
+)
+def resume_batch(
+    batch_id: str,
+    after: int = Query(0, ge=0, description="이미 받은 result 줄 수")
+) -> StreamingResponse:
+    """
+    배치 결과 이어받기
+    
+    Args:
+        batch_id: 배치 ID
+        after: 건너뛸 결과 수
         
-        return ImageGenerationResponse(
-            success=True,
-            images=files,
-            message=f"{len(files)}개의 이미지가 생성되었습니다"
-        )
-    except Exception as e:
+    Returns:
+        NDJSON 결과 스트림
+        
+    Raises:
+        HTTPException: 배치를 찾을 수 없는 경우
+    """
+    batch = get_batch_manager().get(batch_id)
+    if batch is None:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"이미지 생성 실패: {str(e)}"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"배치를 찾을 수 없습니다: {batch_id}"
         )
-
+    
+    return StreamingResponse(
+        _stream_batch(batch, after=after),
+        media_type="application/x-ndjson",
+        headers={"X-Batch-Id": batch.id}
+    )
@@ -1,13 +1,35 @@
 """
 헬스체크 라우터
+
+`/livez`, `/readyz`, `/status`는 오케스트레이터 프로브용으로 백엔드에 HTTP 확인을 하지 않으며,
+스레드풀이 생성 요청으로 가득 차도 응답하도록 이벤트 루프에서 직접 처리합니다.
 """
-from fastapi import APIRouter
+import asyncio
+from typing import Any, Dict, Optional
+from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
+from app.core.config import READINESS_TIMEOUT
 from app.models.responses import HealthResponse
 from app.dependencies.service_manager import ServiceManagerDep
+from app.services.readiness import evaluate_readiness, build_status
 
 router = APIRouter()
 
 
+async def _cached_status() -> Optional[Dict[str, Any]]:
+    """서비스 매니저의 캐시된 상태 (READINESS_TIMEOUT 안에 못 가져오면 None)"""
+    import service_manager as service_manager_module
+    
+    manager = service_manager_module._service_manager
+    if manager is None:
+        return None
+    try:
+        # 멀티 워커 모드에서는 슈퍼바이저 IPC 호출이므로 별도 스레드에서 실행
+        return await asyncio.wait_for(asyncio.to_thread(manager.get_cached_status), READINESS_TIMEOUT)
+    except Exception:
+        return None
+
+
 @router.get(
     "/",
     response_model=HealthResponse,
@@ -33,3 +55,52 @@ def health_check(
         services=status_info
     )
 
+
+@router.get(
+    "/livez",
+    summary="Liveness 프로브",
+    description="프로세스와 이벤트 루프가 살아 있는지 확인합니다 (백엔드 상태와 무관)"
+)
+async def livez() -> Dict[str, str]:
+    """
+    Liveness 프로브
+    
+    Returns:
+        항상 {"status": "alive"} (이벤트 루프가 응답하면 성공)
+    """
+    return {"status": "alive"}
+
+
+@router.get(
+    "/readyz",
+    summary="Readiness 프로브",
+    description="캐시된 백엔드 상태와 작업 대기열 여유로 요청을 받을 준비가 되었는지 확인합니다 (준비 안 됨: 503)"
+)
+async def readyz() -> JSONResponse:
+    """
+    Readiness 프로브
+    
+    Returns:
+        판단 결과 (준비되지 않았으면 503)
+    """
+    result = evaluate_readiness(await _cached_status())
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if result["ready"] else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content=result
+    )
+
+
+@router.get(
+    "/status",
+    summary="상세 상태",
+    description="readiness, 캐시된 서비스 상태, 스케줄러/입장 제어 요약을 조회합니다 (백엔드 HTTP 확인 없음)"
+)
+async def get_status() -> Dict[str, Any]:
+    """
+    상세 상태 조회
+    
+    Returns:
+        readiness, 프로세스, 서비스, 스케줄러, 리소스 상태
+    """
+    return build_status(await _cached_status())
+
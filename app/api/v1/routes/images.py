@@ -0,0 +1,114 @@
+"""
+이미지 제공 라우터
+"""
+import os
+from typing import Any, Dict, Optional
+from fastapi import APIRouter, Header, HTTPException, Query, Response, status
+from fastapi.responses import FileResponse
+from app.core.config import IMAGE_SENDFILE_HEADER, IMAGE_SENDFILE_PREFIX
+from app.services.image_store import FORMAT_MEDIA_TYPES, get_image_store
+from app.services.retention import get_retention_manager
+
+router = APIRouter()
+
+# 파일 이름이 내용 해시에서 결정되므로 한 번 받은 응답은 바뀌지 않음
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+@router.get(
+    "",
+    summary="이미지 저장소 상태",
+    description="저장된 이미지 수와 전체 용량, 보관 정책(용량/기간 한도), 마지막 정리 결과를 조회합니다"
+)
+def get_image_store_status() -> Dict[str, Any]:
+    """
+    이미지 저장소 상태 조회
+    
+    Returns:
+        색인 합계, 보관 정책, 마지막 정리 결과
+    """
+    return get_retention_manager().stats()
+
+
+@router.post(
+    "/sweep",
+    summary="이미지 정리 실행",
+    description="보관 정책에 따른 정리를 즉시 한 번 실행합니다"
+)
+def sweep_images() -> Dict[str, Any]:
+    """
+    이미지 정리 즉시 실행
+    
+    Returns:
+        삭제한 이미지 수, 확보한 바이트, 정리 후 합계
+    """
+    return get_retention_manager().sweep()
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+@router.api_route(
+    "/{image_hash}",
+    methods=["GET", "HEAD"],
+    summary="이미지 조회",
+    description=(
+        "내용 해시로 결과 이미지를 전송합니다. format/size를 지정하면 변환/축소본을 만들어 디스크에 캐시합니다. "
+        "강한 ETag(If-None-Match → 304), Cache-Control: immutable, Range 요청을 지원합니다."
+    ),
+    response_class=FileResponse,
+    responses={304: {"description": "변경 없음"}, 206: {"description": "부분 전송 (Range)"}}
+)
+def get_image(
+    image_hash: str,
+    format: str = Query("png", description="형식 (png, webp, avif, jpeg)"),
+    size: Optional[int] = Query(None, description="긴 변 길이 (IMAGE_RESIZE_SIZES 중 하나, 생략하면 원본 크기)"),
+    if_none_match: Optional[str] = Header(None)
+) -> Response:
+    """
+    이미지 조회
+
+    Args:
+        image_hash: 이미지 SHA-256 (생성 응답의 variants[].hash)
+        format: 형식
+        size: 긴 변 길이
+        if_none_match: 클라이언트가 가진 ETag
+
+    Returns:
+        이미지 파일 (IMAGE_SENDFILE_HEADER가 있으면 프록시가 전송하도록 경로만 반환)
+
+    Raises:
+        HTTPException: 이미지가 없으면 404, 지원하지 않는 형식/크기면 422
+    """
+    store = get_image_store()
+    try:
+        path = store.variant(image_hash, format, size)
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"이미지를 찾을 수 없습니다: {image_hash}"
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+
+    etag = f'"{os.path.splitext(os.path.basename(path))[0]}.{format}"'
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    media_type = FORMAT_MEDIA_TYPES[format]
+    if IMAGE_SENDFILE_HEADER:
+        # 리버스 프록시(nginx X-Accel-Redirect 등)가 sendfile로 직접 전송
+        relative = os.path.relpath(path, store.root).replace(os.sep, "/")
+        headers[IMAGE_SENDFILE_HEADER] = IMAGE_SENDFILE_PREFIX.rstrip("/") + "/" + relative
+        return Response(media_type=media_type, headers=headers)
+
+    # 서버가 http.response.pathsend를 지원하면 파일 경로만 넘겨 서버가 직접 전송
+    return FileResponse(path, media_type=media_type, headers=headers)
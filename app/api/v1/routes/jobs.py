@@ -0,0 +1,37 @@
+"""
+작업 조회 라우터
+"""
+from fastapi import APIRouter, HTTPException, status
+from app.models.responses import JobResponse
+from app.services.job_store import get_job_store
+
+router = APIRouter()
+
+
+@router.get(
+    "/{job_id}",
+    response_model=JobResponse,
+    summary="작업 조회",
+    description="생성 작업의 진행 단계와 결과를 조회합니다 (API 재시작 후 복구된 작업 포함)"
+)
+def get_job(job_id: str) -> JobResponse:
+    """
+    작업 조회
+    
+    Args:
+        job_id: 작업 ID
+        
+    Returns:
+        작업 상태
+        
+    Raises:
+        HTTPException: 작업을 찾을 수 없는 경우
+    """
+    job = get_job_store().get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"작업을 찾을 수 없습니다: {job_id}"
+        )
+    
+    return JobResponse(**job)
@@ -0,0 +1,33 @@
+"""
+지표 조회 라우터
+"""
+from fastapi import APIRouter
+from typing import Dict, Any
+from app.services.metrics import get_metrics
+
+router = APIRouter()
+
+
+@router.get(
+    "",
+    summary="소요 시간 지표",
+    description=(
+        "프로필별 구간(total, prompt, queue_wait, comfyui, download, encode)과 "
+        "LLM 모델별 구간(total, load, prompt_eval, generate, first_token) 소요 시간과 "
+        "스트리밍 호출의 초당 생성 토큰 수(tokens_per_second), 배치 프롬프트 확장(call, per_prompt), "
+        "ComfyUI 백엔드 GPU 메모리(gpu: vram_free_gb, vram_used_gb, external_used_gb)와 GPU 배치(placement) "
+        "지표를 조회합니다 (프로세스별 집계)"
+    )
+)
+def get_metrics_snapshot() -> Dict[str, Any]:
+    """
+    소요 시간 지표 조회
+    
+    Returns:
+        집계 범위와 그룹별 지표
+    """
+    metrics = get_metrics()
+    return {
+        **metrics.info(),
+        **metrics.snapshot()
+    }
@@ -1,37 +1,54 @@
 """
 모델 관리 라우터
 """
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Query, status
 from typing import List, Dict, Any
 from app.services.model_checker import ModelChecker
+from app.services.model_index import MODEL_TYPES, get_model_index
+from app.services.model_verifier import get_model_verifier
 
 router = APIRouter()
 
 
+def _public_entry(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """인덱스 내부 필드(mtime_ns, 절대 경로) 제거"""
+    entry.pop("mtime_ns", None)
+    entry.pop("path", None)
+    return entry
+
+
+def _check_model_type(model_type: str):
+    if model_type not in MODEL_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"지원하지 않는 모델 유형입니다: {model_type} (가능: {', '.join(MODEL_TYPES)})"
+        )
+
+
 @router.get(
     "/available",
     summary="사용 가능한 모델 목록",
-    description="ComfyUI에 설치된 체크포인트 모델 목록을 조회합니다"
+    description="ComfyUI에 설치된 모델 목록을 유형별로 조회합니다 (하위 폴더와 extra_model_paths.yaml 포함)"
 )
-def get_available_models() -> Dict[str, Any]:
+def get_available_models(
+    type: str = Query("checkpoints", description="모델 유형 (checkpoints, loras, vae, upscale_models 등)")
+) -> Dict[str, Any]:
     """
     사용 가능한 모델 목록 조회
     
+    Args:
+        type: 모델 유형
+        
     Returns:
-        모델 목록 및 정보
+        모델 목록 및 정보 (아키텍처, dtype, 텐서 수, 부분 해시 포함)
     """
+    _check_model_type(type)
     try:
-        checker = ModelChecker()
-        models = checker.get_available_models()
-        
-        model_info = []
-        for model_name in models:
-            info = checker.get_model_info(model_name)
-            if info:
-                model_info.append(info)
+        model_info = [_public_entry(info) for info in get_model_index().list(type)]
         
         return {
             "success": True,
+            "type": type,
             "models": model_info,
             "count": len(model_info)
         }
@@ -42,28 +59,59 @@ def get_available_models() -> Dict[str, Any]:
         )
 
 
+@router.get(
+    "/inventory",
+    summary="모델 인벤토리",
+    description="모든 ComfyUI 모델 유형의 모델 이름 목록과 유형별 디렉토리를 조회합니다"
+)
+def get_inventory() -> Dict[str, Any]:
+    """
+    모델 인벤토리 조회
+    
+    Returns:
+        유형별 디렉토리, 모델 이름 목록, 개수
+    """
+    index = get_model_index()
+    inventory = index.inventory()
+    return {
+        "success": True,
+        "roots": index.roots,
+        "models": {
+            model_type: [entry["name"] for entry in inventory.get(model_type, [])]
+            for model_type in index.types()
+        },
+        "counts": {model_type: len(inventory.get(model_type, [])) for model_type in index.types()}
+    }
+
+
 @router.get(
     "/check/{model_name:path}",
     summary="모델 파일 검증",
     description="특정 모델 파일의 존재 여부 및 유효성을 검증합니다"
 )
-def check_model(model_name: str) -> Dict[str, Any]:
+def check_model(
+    model_name: str,
+    type: str = Query("checkpoints", description="모델 유형")
+) -> Dict[str, Any]:
     """
     모델 파일 검증
     
     Args:
-        model_name: 모델 파일명
+        model_name: 모델 이름 (모델 디렉토리 기준 상대 경로)
+        type: 모델 유형
         
     Returns:
         검증 결과
     """
+    _check_model_type(type)
     try:
         checker = ModelChecker()
-        result = checker.validate_model_file(model_name)
+        result = checker.validate_model_file(model_name, type)
         
         return {
             "success": True,
             "model": model_name,
+            "type": type,
             **result
         }
     except Exception as e:
@@ -72,3 +120,66 @@ def check_model(model_name: str) -> Dict[str, Any]:
             detail=f"모델 검증 실패: {str(e)}"
         )
 
+
+
+@router.get(
+    "/verify",
+    summary="모델 검증 진행률",
+    description="모델 파일 무결성 검증(오프셋 표, 선택적 SHA-256) 진행률과 모델별 결과를 조회합니다"
+)
+def get_verification() -> Dict[str, Any]:
+    """
+    모델 검증 진행률 조회
+    
+    Returns:
+        진행률과 모델별 검증 결과
+    """
+    return {
+        "progress": get_model_verifier().progress(),
+        "models": [
+            {
+                "name": entry["name"],
+                "type": entry["type"],
+                "size": entry["size"],
+                "layout_valid": entry.get("header_valid"),
+                "error": entry.get("error"),
+                "verification": entry.get("verification")
+            }
+            for entries in get_model_index().inventory().values()
+            for entry in entries
+        ]
+    }
+
+
+@router.post(
+    "/verify",
+    summary="모델 검증 시작",
+    description="모델 파일 무결성 검증을 백그라운드에서 시작합니다 (결과는 파일 크기/mtime과 함께 캐시됨)"
+)
+def start_verification(
+    sha256: bool = Query(False, description="전체 SHA-256 계산 여부"),
+    force: bool = Query(False, description="이미 검증된 파일도 다시 검증")
+) -> Dict[str, Any]:
+    """
+    모델 검증 시작
+    
+    Args:
+        sha256: 전체 SHA-256 계산 여부
+        force: 이미 검증된 파일도 다시 검증
+        
+    Returns:
+        시작 여부와 진행률
+        
+    Raises:
+        HTTPException: 이미 검증이 실행 중인 경우 (409)
+    """
+    verifier = get_model_verifier()
+    if not verifier.start(sha256=sha256, force=force):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="모델 검증이 이미 실행 중입니다"
+        )
+    return {
+        "success": True,
+        "progress": verifier.progress()
+    }
@@ -0,0 +1,66 @@
+"""
+생성 프로필 라우터
+"""
+from fastapi import APIRouter, HTTPException, status
+from typing import Dict, Any
+from app.core.config import DEFAULT_MODE
+from app.services.metrics import get_metrics
+from app.services.profiles import get_profile_registry
+
+router = APIRouter()
+
+
+@router.get(
+    "",
+    summary="생성 프로필 목록",
+    description="프로필 설정 파일에서 읽은 생성 프로필과 프로필별 소요 시간 지표를 조회합니다"
+)
+def list_profiles() -> Dict[str, Any]:
+    """
+    생성 프로필 목록 조회
+    
+    Returns:
+        프로필 설정, 프로필별 지표, 설정 파일 상태
+    """
+    registry = get_profile_registry()
+    metrics = get_metrics().snapshot("profiles")["profiles"]
+    profiles = registry.all()
+    return {
+        "default": DEFAULT_MODE,
+        "path": registry.path,
+        "version": registry.version,
+        "loaded_at": registry.loaded_at,
+        "error": registry.last_error,
+        "profiles": [
+            {**profile, "metrics": metrics.get(name, {})}
+            for name, profile in profiles.items()
+        ]
+    }
+
+
+@router.post(
+    "/reload",
+    summary="생성 프로필 다시 읽기",
+    description="프로필 설정 파일을 즉시 다시 읽습니다 (파일 변경은 주기적으로도 자동 반영됨)"
+)
+def reload_profiles() -> Dict[str, Any]:
+    """
+    생성 프로필 다시 읽기
+    
+    Returns:
+        프로필 이름 목록과 버전
+        
+    Raises:
+        HTTPException: 설정 파일이 잘못된 경우 (422, 이전 프로필 유지)
+    """
+    registry = get_profile_registry()
+    if not registry.reload():
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"프로필 설정 파일 오류 (이전 프로필 유지): {registry.last_error}"
+        )
+    return {
+        "success": True,
+        "version": registry.version,
+        "profiles": registry.names()
+    }
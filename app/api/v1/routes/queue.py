@@ -0,0 +1,27 @@
+"""
+작업 큐 조회 라우터
+"""
+from fastapi import APIRouter
+from typing import Dict, Any
+from app.services.admission import get_admission_status
+from app.services.scheduler import get_scheduler
+
+router = APIRouter()
+
+
+@router.get(
+    "",
+    summary="작업 큐 조회",
+    description="ComfyUI 제출 스케줄러의 실행/대기 작업, 디스패치 예정 순서, 최근 스케줄링 결정을 조회합니다"
+)
+def get_queue() -> Dict[str, Any]:
+    """
+    작업 큐 조회
+    
+    Returns:
+        스케줄러 상태와 리소스별 입장 제어 상태
+    """
+    return {
+        "scheduler": get_scheduler().snapshot(),
+        "resources": get_admission_status()
+    }
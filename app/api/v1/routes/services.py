@@ -1,9 +1,11 @@
 """
 서비스 제어 라우터
 """
+from typing import Any, Dict
 from fastapi import APIRouter, HTTPException, status
 from app.models.responses import ServiceStatusResponse, ServiceControlResponse
 from app.services.service_control import ServiceControlService
+from app.services.gpu_placement import get_gpu_placement
 from app.dependencies.service_manager import ServiceManagerDep
 
 router = APIRouter()
@@ -33,6 +35,24 @@ def get_service_status(
     return ServiceStatusResponse(**status_info)
 
 
+@router.get(
+    "/gpus",
+    summary="ComfyUI 백엔드 GPU 상태",
+    description=(
+        "ComfyUI 백엔드(COMFYUI_URLS)별로 주기적으로 수집한 /system_stats(장치, VRAM 전체/여유, ComfyUI 예약량), "
+        "쓸 수 있는 VRAM, 진행 중 작업 수, 최근 VRAM 여유 추이와 배치 정책을 조회합니다"
+    )
+)
+def get_gpu_status() -> Dict[str, Any]:
+    """
+    ComfyUI 백엔드 GPU 상태 조회
+    
+    Returns:
+        배치 정책과 백엔드별 GPU 통계
+    """
+    return get_gpu_placement().snapshot()
+
+
 @router.post(
     "/comfyui/start",
     response_model=ServiceControlResponse,
@@ -3,18 +3,30 @@
 """
 import os
 from pathlib import Path
-from typing import Optional
-
-# .env 파일 로드
-try:
-    from dotenv import load_dotenv
-    load_dotenv()
-except ImportError:
-    pass
+from typing import Dict, Optional
 
 # 프로젝트 루트 경로
 PROJECT_ROOT = Path(__file__).parent.parent.parent.absolute()
 
+# .env 파일 로드 (파일이 없으면 dotenv 임포트도 생략)
+if (PROJECT_ROOT / ".env").exists():
+    try:
+        from dotenv import load_dotenv
+        load_dotenv(PROJECT_ROOT / ".env")
+    except ImportError:
+        pass
+
+
+def _parse_mapping(value: str) -> Dict[str, str]:
+    """"a=1,b=2" 형식의 환경 변수를 dict로 변환"""
+    mapping = {}
+    for item in value.split(","):
+        if "=" in item:
+            key, _, val = item.partition("=")
+            mapping[key.strip()] = val.strip()
+    return mapping
+
+
 # ============================================
 # ComfyUI 설정
 # ============================================
@@ -24,6 +36,15 @@ _comfyui_default = os.getenv("COMFYUI_PATH") or (
 COMFYUI_PATH = _comfyui_default
 COMFYUI_PORT = int(os.getenv("COMFYUI_PORT", "8188"))
 COMFYUI_URL = os.getenv("COMFYUI_URL", f"http://127.0.0.1:{COMFYUI_PORT}")
+# 제출 전 /object_info 기준 워크플로 검증 (노드 타입, 입력 이름, 선택지, 링크 타입)
+COMFYUI_VALIDATE_GRAPHS = os.getenv("COMFYUI_VALIDATE_GRAPHS", "true").lower() == "true"
+# 캐시에 없는 노드/선택지가 나왔을 때 /object_info를 다시 받는 최소 간격 (초)
+OBJECT_INFO_REFRESH_INTERVAL = float(os.getenv("OBJECT_INFO_REFRESH_INTERVAL", "30"))
+# ComfyUI HTTP 호출 제한 시간 (초, 작업 시간 예산이 더 적게 남았으면 남은 시간까지만)
+COMFYUI_SUBMIT_TIMEOUT = float(os.getenv("COMFYUI_SUBMIT_TIMEOUT", "30"))  # /prompt 제출
+COMFYUI_POLL_TIMEOUT = float(os.getenv("COMFYUI_POLL_TIMEOUT", "10"))  # /history, /queue 조회
+COMFYUI_WAIT_TIMEOUT = float(os.getenv("COMFYUI_WAIT_TIMEOUT", "300"))  # 제출 후 완료까지 최대 대기
+COMFYUI_DOWNLOAD_TIMEOUT = float(os.getenv("COMFYUI_DOWNLOAD_TIMEOUT", "60"))  # 결과 이미지 다운로드
 
 # ============================================
 # Stable Diffusion WebUI 설정
@@ -40,6 +61,12 @@ WEBUI_URL = os.getenv("WEBUI_URL", f"http://127.0.0.1:{WEBUI_PORT}")
 # ============================================
 AUTO_START_SERVICES = os.getenv("AUTO_START_SERVICES", "true").lower() == "true"
 HEALTH_CHECK_INTERVAL = int(os.getenv("HEALTH_CHECK_INTERVAL", "10"))
+# readiness 판단 시 허용하는 마지막 헬스체크 결과의 최대 나이 (초, 기본: 헬스체크 간격의 3배)
+READINESS_MAX_STATUS_AGE = float(os.getenv("READINESS_MAX_STATUS_AGE", str(HEALTH_CHECK_INTERVAL * 3)))
+# /readyz, /status가 서비스 매니저 상태를 기다리는 최대 시간 (초)
+READINESS_TIMEOUT = float(os.getenv("READINESS_TIMEOUT", "1.0"))
+# true면 ComfyUI/WebUI 시작이 끝날 때까지 API가 요청을 받지 않음 (기본: 백그라운드에서 시작)
+STARTUP_WAIT_FOR_SERVICES = os.getenv("STARTUP_WAIT_FOR_SERVICES", "false").lower() == "true"
 
 # ============================================
 # API 서버 설정
@@ -53,23 +80,193 @@ API_DESCRIPTION = os.getenv(
 )
 API_VERSION = os.getenv("API_VERSION", "0.1.0")
 
+# 멀티 워커 모드 (API_WORKERS > 1이면 슈퍼바이저 프로세스가 서비스 매니저를 소유하고
+# 워커들은 Unix 소켓으로 접근)
+API_WORKERS = int(os.getenv("API_WORKERS", "1"))
+API_ROLE = os.getenv("API_ROLE", "standalone")  # standalone, worker (워커는 슈퍼바이저가 설정)
+SUPERVISOR_SOCKET = os.getenv("SUPERVISOR_SOCKET", str(PROJECT_ROOT / "data" / "supervisor.sock"))
+
 # ============================================
 # 이미지 생성 설정
 # ============================================
-DEFAULT_MODE = os.getenv("DEFAULT_MODE", "high_quality")  # fast, balanced, high_quality
+DEFAULT_MODE = os.getenv("DEFAULT_MODE", "high_quality")  # 프로필 설정 파일에 있는 프로필 이름
+# 생성 프로필 설정 파일 (없으면 내장 기본 프로필 fast, balanced, high_quality 사용)
+PROFILES_PATH = os.getenv("PROFILES_PATH", str(PROJECT_ROOT / "profiles.json"))
+PROFILES_RELOAD_INTERVAL = float(os.getenv("PROFILES_RELOAD_INTERVAL", "5"))  # 파일 변경 확인 최소 간격 (초)
+METRICS_WINDOW = int(os.getenv("METRICS_WINDOW", "500"))  # p50/p95 계산에 사용하는 최근 기록 수
 DOWNLOAD_DIR = os.getenv("DOWNLOAD_DIR", str(PROJECT_ROOT / "downloads"))
+# 결과 이미지 변환 형식 (쉼표 구분: webp, avif, jpeg, 비우면 원본 PNG만 저장, Pillow 필요)
+IMAGE_FORMATS = [f.strip().lower() for f in os.getenv("IMAGE_FORMATS", "webp").split(",") if f.strip()]
+IMAGE_QUALITY = int(os.getenv("IMAGE_QUALITY", "85"))  # WebP/AVIF/JPEG 인코딩 품질 (1~100)
+# 썸네일 긴 변 길이 (쉼표 구분, 비우면 썸네일 없음)
+IMAGE_THUMBNAIL_SIZES = [int(s) for s in os.getenv("IMAGE_THUMBNAIL_SIZES", "256,512").split(",") if s.strip()]
+IMAGE_THUMBNAIL_FORMAT = os.getenv("IMAGE_THUMBNAIL_FORMAT", "webp").lower()  # 썸네일 형식
+# /api/v1/images/{hash}?size=에서 허용하는 긴 변 길이 (썸네일 크기 포함, 처음 요청 시 만들어 캐시)
+IMAGE_RESIZE_SIZES = [int(s) for s in os.getenv("IMAGE_RESIZE_SIZES", "128,256,512,1024").split(",") if s.strip()]
+# 이미지 전송을 리버스 프록시에 맡기는 헤더 (예: X-Accel-Redirect, X-Sendfile, 비우면 API가 직접 전송)
+IMAGE_SENDFILE_HEADER = os.getenv("IMAGE_SENDFILE_HEADER", "")
+IMAGE_SENDFILE_PREFIX = os.getenv("IMAGE_SENDFILE_PREFIX", "/protected-images/")  # 프록시 내부 경로 (DOWNLOAD_DIR에 매핑)
+IMAGE_ENCODE_WORKERS = int(os.getenv("IMAGE_ENCODE_WORKERS", "2"))  # 이미지 인코딩 프로세스 수 (0이면 요청 스레드에서 처리)
 
 # ============================================
-# Ollama 설정
+# 결과 이미지 보관 설정
+# ============================================
+IMAGE_INDEX_PATH = os.getenv("IMAGE_INDEX_PATH", str(PROJECT_ROOT / "data" / "images.db"))  # 접근 색인 (SQLite)
+# DOWNLOAD_DIR 전체 용량 한도 (GB, 0이면 제한 없음, 넘으면 오래 접근하지 않은 이미지부터 삭제)
+IMAGE_RETENTION_MAX_BYTES = int(float(os.getenv("IMAGE_RETENTION_MAX_GB", "0")) * 1024 ** 3)
+IMAGE_RETENTION_MAX_AGE = float(os.getenv("IMAGE_RETENTION_MAX_AGE", "0"))  # 보관 기간 (초, 0이면 제한 없음)
+IMAGE_RETENTION_INTERVAL = float(os.getenv("IMAGE_RETENTION_INTERVAL", "300"))  # 정리 간격 (초)
+IMAGE_RETENTION_LOW_WATERMARK = float(os.getenv("IMAGE_RETENTION_LOW_WATERMARK", "0.9"))  # 용량 초과 시 정리 목표 비율
+# 저장소에 넣은 뒤 ComfyUI output 디렉토리의 원본 삭제 (ComfyUI와 같은 호스트일 때)
+IMAGE_DELETE_COMFYUI_OUTPUT = os.getenv("IMAGE_DELETE_COMFYUI_OUTPUT", "false").lower() == "true"
+COMFYUI_OUTPUT_DIR = os.getenv(
+    "COMFYUI_OUTPUT_DIR",
+    str(Path(COMFYUI_PATH) / "output") if COMFYUI_PATH else ""
+)
+UPSCALE_MODEL = os.getenv("UPSCALE_MODEL", "")  # 업스케일러 모델 파일명 (비우면 models/upscale_models에서 자동 선택)
+
+# ============================================
+# 모델 인덱스 설정
+# ============================================
+MODEL_INDEX_PATH = os.getenv("MODEL_INDEX_PATH", str(PROJECT_ROOT / "data" / "model_index.json"))
+MODEL_INDEX_TTL = float(os.getenv("MODEL_INDEX_TTL", "5"))  # 모델 디렉토리 재확인 최소 간격 (초)
+MODEL_SCAN_WORKERS = int(os.getenv("MODEL_SCAN_WORKERS", "8"))  # 모델 디렉토리를 동시에 훑는 스레드 수
+# ComfyUI 추가 모델 경로 설정 파일 (기본: COMFYUI_PATH/extra_model_paths.yaml, PyYAML 필요)
+COMFYUI_EXTRA_MODEL_PATHS = os.getenv(
+    "COMFYUI_EXTRA_MODEL_PATHS",
+    str(Path(COMFYUI_PATH) / "extra_model_paths.yaml") if COMFYUI_PATH else ""
+)
+MODEL_VERIFY_ON_STARTUP = os.getenv("MODEL_VERIFY_ON_STARTUP", "true").lower() == "true"  # 시작 시 백그라운드 검증
+MODEL_VERIFY_SHA256 = os.getenv("MODEL_VERIFY_SHA256", "false").lower() == "true"  # 검증 시 전체 SHA-256 계산
+MODEL_VERIFY_WORKERS = int(os.getenv("MODEL_VERIFY_WORKERS", "2"))  # 동시에 해시하는 파일 수
+MODEL_VERIFY_CHUNK_MB = int(os.getenv("MODEL_VERIFY_CHUNK_MB", "16"))  # 해시 청크 크기 (MB)
+
+# ============================================
+# LLM 백엔드 설정
+# ============================================
+# 프롬프트 생성/이미지 평가에 쓰는 LLM 백엔드 (ollama, openai: OpenAI 호환 HTTP 서버, fake: 결정적 가짜 응답)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "ollama").lower()
+# OpenAI 호환 서버 URL (vLLM, llama.cpp server 등, /v1까지 포함)
+LLM_BASE_URL = os.getenv("LLM_BASE_URL", "http://127.0.0.1:8080/v1")
+LLM_API_KEY = os.getenv("LLM_API_KEY", "")  # OpenAI 호환 서버 API 키 (없으면 인증 헤더 생략)
+LLM_FAKE_TOKEN_LATENCY = float(os.getenv("LLM_FAKE_TOKEN_LATENCY", "0"))  # fake 백엔드의 토큰당 지연 (초)
+
+# ============================================
+# Ollama 설정 (모델 이름/제한 시간은 모든 LLM 백엔드에 적용)
 # ============================================
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3.1")
 OLLAMA_VISION_MODEL = os.getenv("OLLAMA_VISION_MODEL", "llava")
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://127.0.0.1:11434")
+# 모델을 메모리에 유지하는 시간 (Ollama 형식: "30m", "1h", 초 숫자, -1이면 계속 유지)
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+OLLAMA_TIMEOUT = float(os.getenv("OLLAMA_TIMEOUT", "120"))  # 텍스트 모델 호출 제한 시간 (초)
+OLLAMA_VISION_TIMEOUT = float(os.getenv("OLLAMA_VISION_TIMEOUT", "180"))  # 비전 모델 호출 제한 시간 (초)
+OLLAMA_PRELOAD = os.getenv("OLLAMA_PRELOAD", "true").lower() == "true"  # 시작 시 텍스트/비전 모델 미리 로드
+# 프롬프트 생성 응답의 최대 LLM 토큰 수 (num_predict, CLIP 예산을 넘는 장황한 응답 차단용 상한)
+OLLAMA_PROMPT_NUM_PREDICT = int(os.getenv("OLLAMA_PROMPT_NUM_PREDICT", "160"))
+# 프롬프트를 {"prompt": "..."} JSON 구조화 출력으로 요청 (false면 일반 텍스트에서 추출)
+OLLAMA_STRUCTURED_OUTPUT = os.getenv("OLLAMA_STRUCTURED_OUTPUT", "true").lower() == "true"
+
+# ============================================
+# CLIP 토큰 예산 설정
+# ============================================
+# SDXL 프롬프트 최대 CLIP 토큰 수 (77 - 시작/끝 토큰), 넘으면 LLM 스트리밍을 멈추고 잘라냄
+CLIP_TOKEN_BUDGET = int(os.getenv("CLIP_TOKEN_BUDGET", "75"))
+# CLIP 토크나이저 파일 (tokenizer.json, tokenizers 패키지 필요, 비우면 근사값)
+CLIP_TOKENIZER_PATH = os.getenv("CLIP_TOKENIZER_PATH", "")
+
+# ============================================
+# 동시성 제한 / 입장 제어 설정
+# ============================================
+COMFYUI_MAX_CONCURRENCY = int(os.getenv("COMFYUI_MAX_CONCURRENCY", "2"))  # 동시에 ComfyUI에 제출된 작업 수
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))  # 동시 텍스트 LLM 호출 수
+VISION_MAX_CONCURRENCY = int(os.getenv("VISION_MAX_CONCURRENCY", "1"))  # 동시 비전 평가 호출 수
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "32"))  # 리소스별 최대 대기 작업 수
+ADMISSION_MAX_WAIT = float(os.getenv("ADMISSION_MAX_WAIT", "120"))  # 리소스별 최대 대기 시간 (초)
+
+# ============================================
+# 재시도 설정 (ComfyUI/LLM 호출의 연결 오류, 시간 초과, 5xx)
+# ============================================
+RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "4"))  # 호출당 최대 시도 수 (1이면 재시도 없음)
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "0.5"))  # 첫 재시도 백오프 상한 (초, 시도마다 2배, 그 안에서 무작위)
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "10"))  # 백오프 상한 (초)
+# 재시도 예산 (성공한 호출마다 RATIO만큼 적립, 재시도마다 1 사용, 백엔드 장애 시 재시도가 부하를 키우지 않게)
+RETRY_BUDGET_RATIO = float(os.getenv("RETRY_BUDGET_RATIO", "0.2"))
+RETRY_BUDGET_CAPACITY = float(os.getenv("RETRY_BUDGET_CAPACITY", "10"))  # 최대 적립량 (시작 값)
+# 서비스 매니저가 ComfyUI를 재시작하는 중일 때 준비 신호를 기다리는 최대 시간 (초)
+RETRY_READY_WAIT = float(os.getenv("RETRY_READY_WAIT", "60"))
+
+# ============================================
+# 작업 시간 예산 설정
+# ============================================
+# 작업 하나의 전체 시간 예산 (초, 요청의 timeout이나 프로필의 timeout이 없을 때, 모든 단계의 대기가 이 안에서 끝남)
+JOB_TIMEOUT = float(os.getenv("JOB_TIMEOUT", "600"))
+JOB_TIMEOUT_MAX = float(os.getenv("JOB_TIMEOUT_MAX", "3600"))  # 요청/프로필에서 정할 수 있는 최대 시간 예산 (초)
+# 클라이언트 연결이 끊겼는지 확인하는 간격 (초, 끊기면 작업을 중단하고 ComfyUI 프롬프트를 취소)
+DISCONNECT_POLL_INTERVAL = float(os.getenv("DISCONNECT_POLL_INTERVAL", "0.5"))
+
+# ============================================
+# GPU 배치 설정 (ComfyUI /system_stats 기반)
+# ============================================
+# ComfyUI 백엔드 목록 (쉼표 구분, GPU/호스트마다 ComfyUI 하나, 비우면 COMFYUI_URL 하나)
+COMFYUI_URLS = [
+    url.strip().rstrip("/") for url in os.getenv("COMFYUI_URLS", "").split(",") if url.strip()
+] or [COMFYUI_URL]
+GPU_STATS_INTERVAL = float(os.getenv("GPU_STATS_INTERVAL", "5"))  # /system_stats 수집 간격 (초)
+GPU_STATS_MAX_AGE = float(os.getenv("GPU_STATS_MAX_AGE", "30"))  # 이보다 오래된 통계의 백엔드는 배치에서 제외 (초)
+GPU_VRAM_HEADROOM_GB = float(os.getenv("GPU_VRAM_HEADROOM_GB", "1.0"))  # 프로필 추정 VRAM 위에 남겨 둘 여유 (GB)
+# VRAM이 부족하면 프로필의 fallback(더 작은 프로필)으로 생성
+GPU_PLACEMENT_FALLBACK = os.getenv("GPU_PLACEMENT_FALLBACK", "true").lower() == "true"
+
+# ============================================
+# 스케줄러 설정 (우선순위 클래스 / 가중 공정 큐잉)
+# ============================================
+# 클래스별 가중치 (urgent는 항상 먼저 처리되고 ComfyUI 큐 맨 앞에 제출됨)
+SCHEDULER_CLASS_WEIGHTS = {
+    k: float(v) for k, v in _parse_mapping(
+        os.getenv("SCHEDULER_CLASS_WEIGHTS", "urgent=8,interactive=4,batch=1")
+    ).items()
+}
+# 모드별 기본 클래스
+SCHEDULER_MODE_CLASSES = _parse_mapping(
+    os.getenv("SCHEDULER_MODE_CLASSES", "fast=interactive,balanced=interactive,high_quality=batch")
+)
+# API 키별 클래스 (모드 설정보다 우선)
+SCHEDULER_TENANT_CLASSES = _parse_mapping(os.getenv("SCHEDULER_TENANT_CLASSES", ""))
+# 에이징 속도 (대기 1초당 줄어드는 가상 시간, 클수록 오래 기다린 작업이 빨리 앞으로 옴)
+SCHEDULER_AGING_RATE = float(os.getenv("SCHEDULER_AGING_RATE", "0.05"))
+
+# ============================================
+# 배치 생성 설정
+# ============================================
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "10000"))  # 배치당 최대 요청 수
+BATCH_MAX_WORKERS = int(os.getenv("BATCH_MAX_WORKERS", "4"))  # 배치 전체에서 동시에 진행하는 작업 수
+BATCH_RETENTION_SECONDS = int(os.getenv("BATCH_RETENTION_SECONDS", "3600"))  # 완료된 배치 결과 보관 시간
+# 배치 프롬프트 확장 방식 (grouped: 여러 요청을 LLM 호출 하나로, concurrent: 요청별 호출 + 지시문 context 재사용,
+# off: 작업마다 개별 생성)
+PROMPT_EXPANSION_MODE = os.getenv("PROMPT_EXPANSION_MODE", "concurrent")
+PROMPT_EXPANSION_GROUP_SIZE = int(os.getenv("PROMPT_EXPANSION_GROUP_SIZE", "8"))  # grouped 모드에서 호출 하나에 묶는 요청 수
+
+# ============================================
+# 작업 저장소 설정 (재시작 후 작업 복구)
+# ============================================
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", str(PROJECT_ROOT / "data" / "jobs.db"))
+JOB_RETENTION_SECONDS = int(os.getenv("JOB_RETENTION_SECONDS", str(7 * 24 * 3600)))  # 완료 작업 보관 기간
+JOB_RECOVERY_WORKERS = int(os.getenv("JOB_RECOVERY_WORKERS", "4"))  # 시작 시 동시에 복구하는 작업 수
 
 # ============================================
 # 로깅 설정
 # ============================================
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 
+# ============================================
+# 트레이싱 설정 (OpenTelemetry)
+# ============================================
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() == "true"
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "file")  # console, file, otlp
+TRACING_FILE = os.getenv("TRACING_FILE", str(PROJECT_ROOT / "logs" / "traces.jsonl"))
+TRACING_SERVICE_NAME = os.getenv("TRACING_SERVICE_NAME", "hyperwise-agent")
+
 # 설정 검증
 def validate_config(strict: bool = False):
     """
@@ -110,8 +307,79 @@ def validate_config(strict: bool = False):
     if WEBUI_PORT < 1024 or WEBUI_PORT > 65535:
         errors.append(f"WebUI 포트가 유효하지 않습니다: {WEBUI_PORT}")
     
-    if DEFAULT_MODE not in ["fast", "balanced", "high_quality"]:
-        errors.append(f"기본 모드가 유효하지 않습니다: {DEFAULT_MODE}")
+    from app.services.profiles import get_profile_registry
+    profile_registry = get_profile_registry()
+    if profile_registry.last_error:
+        errors.append(f"프로필 설정 파일 오류 ({PROFILES_PATH}): {profile_registry.last_error}")
+    if DEFAULT_MODE not in profile_registry.names():
+        errors.append(f"기본 모드가 유효하지 않습니다: {DEFAULT_MODE} (프로필: {', '.join(profile_registry.names())})")
+    
+    for name, value in [
+        ("COMFYUI_MAX_CONCURRENCY", COMFYUI_MAX_CONCURRENCY),
+        ("LLM_MAX_CONCURRENCY", LLM_MAX_CONCURRENCY),
+        ("VISION_MAX_CONCURRENCY", VISION_MAX_CONCURRENCY),
+    ]:
+        if value < 1:
+            errors.append(f"{name}는 1 이상이어야 합니다: {value}")
+    
+    if LLM_BACKEND not in ["ollama", "openai", "fake"]:
+        errors.append(f"LLM_BACKEND가 유효하지 않습니다: {LLM_BACKEND}")
+    if LLM_FAKE_TOKEN_LATENCY < 0:
+        errors.append(f"LLM_FAKE_TOKEN_LATENCY는 0 이상이어야 합니다: {LLM_FAKE_TOKEN_LATENCY}")
+    
+    for name, value in [
+        ("COMFYUI_SUBMIT_TIMEOUT", COMFYUI_SUBMIT_TIMEOUT),
+        ("COMFYUI_POLL_TIMEOUT", COMFYUI_POLL_TIMEOUT),
+        ("COMFYUI_WAIT_TIMEOUT", COMFYUI_WAIT_TIMEOUT),
+        ("COMFYUI_DOWNLOAD_TIMEOUT", COMFYUI_DOWNLOAD_TIMEOUT),
+        ("JOB_TIMEOUT", JOB_TIMEOUT),
+        ("DISCONNECT_POLL_INTERVAL", DISCONNECT_POLL_INTERVAL),
+    ]:
+        if value <= 0:
+            errors.append(f"{name}는 0보다 커야 합니다: {value}")
+    if RETRY_MAX_ATTEMPTS < 1:
+        errors.append(f"RETRY_MAX_ATTEMPTS는 1 이상이어야 합니다: {RETRY_MAX_ATTEMPTS}")
+    if RETRY_BASE_DELAY < 0 or RETRY_MAX_DELAY < RETRY_BASE_DELAY:
+        errors.append(f"RETRY_BASE_DELAY({RETRY_BASE_DELAY})는 0 이상, RETRY_MAX_DELAY({RETRY_MAX_DELAY}) 이하여야 합니다")
+    if RETRY_BUDGET_RATIO < 0 or RETRY_BUDGET_CAPACITY < 0:
+        errors.append("RETRY_BUDGET_RATIO와 RETRY_BUDGET_CAPACITY는 0 이상이어야 합니다")
+    if JOB_TIMEOUT > JOB_TIMEOUT_MAX:
+        errors.append(f"JOB_TIMEOUT({JOB_TIMEOUT})이 JOB_TIMEOUT_MAX({JOB_TIMEOUT_MAX})보다 큽니다")
+    
+    if GPU_STATS_INTERVAL <= 0:
+        errors.append(f"GPU_STATS_INTERVAL은 0보다 커야 합니다: {GPU_STATS_INTERVAL}")
+    if GPU_STATS_MAX_AGE < GPU_STATS_INTERVAL:
+        warnings.append(
+            f"GPU_STATS_MAX_AGE({GPU_STATS_MAX_AGE})가 수집 간격({GPU_STATS_INTERVAL})보다 짧아 백엔드가 자주 제외됩니다"
+        )
+    
+    if CLIP_TOKEN_BUDGET < 1:
+        errors.append(f"CLIP_TOKEN_BUDGET는 1 이상이어야 합니다: {CLIP_TOKEN_BUDGET}")
+    if CLIP_TOKENIZER_PATH and not os.path.exists(CLIP_TOKENIZER_PATH):
+        warnings.append(f"CLIP 토크나이저 파일이 없어 토큰 수를 근사값으로 계산합니다: {CLIP_TOKENIZER_PATH}")
+    
+    if not 1 <= IMAGE_QUALITY <= 100:
+        errors.append(f"IMAGE_QUALITY는 1~100이어야 합니다: {IMAGE_QUALITY}")
+    
+    if not 0 < IMAGE_RETENTION_LOW_WATERMARK <= 1:
+        errors.append(f"IMAGE_RETENTION_LOW_WATERMARK는 0보다 크고 1 이하여야 합니다: {IMAGE_RETENTION_LOW_WATERMARK}")
+    
+    if IMAGE_DELETE_COMFYUI_OUTPUT and not COMFYUI_OUTPUT_DIR:
+        warnings.append("IMAGE_DELETE_COMFYUI_OUTPUT=true지만 COMFYUI_OUTPUT_DIR(또는 COMFYUI_PATH)가 없어 ComfyUI 출력을 지우지 않습니다")
+    
+    if API_WORKERS < 1:
+        errors.append(f"API_WORKERS는 1 이상이어야 합니다: {API_WORKERS}")
+    
+    if API_ROLE not in ["standalone", "worker"]:
+        errors.append(f"API_ROLE이 유효하지 않습니다: {API_ROLE}")
+    
+    if PROMPT_EXPANSION_MODE not in ["grouped", "concurrent", "off"]:
+        errors.append(f"PROMPT_EXPANSION_MODE가 유효하지 않습니다: {PROMPT_EXPANSION_MODE}")
+    if PROMPT_EXPANSION_GROUP_SIZE < 1:
+        errors.append(f"PROMPT_EXPANSION_GROUP_SIZE는 1 이상이어야 합니다: {PROMPT_EXPANSION_GROUP_SIZE}")
+    
+    if TRACING_EXPORTER not in ["console", "file", "otlp"]:
+        errors.append(f"트레이싱 익스포터가 유효하지 않습니다: {TRACING_EXPORTER}")
     
     # 경고 출력
     if warnings:
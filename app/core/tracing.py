@@ -0,0 +1,148 @@
+"""
+분산 트레이싱 (OpenTelemetry)
+
+TRACING_ENABLED=true 이고 opentelemetry-sdk가 설치되어 있으면 요청마다 하나의 트레이스를 만들고
+LLM 호출, ComfyUI 제출/대기/다운로드, 개선 반복을 자식 스팬으로 기록합니다.
+비활성화되어 있거나 패키지가 없으면 모든 함수가 no-op으로 동작합니다.
+"""
+import os
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from app.core.config import (
+    TRACING_ENABLED,
+    TRACING_EXPORTER,
+    TRACING_FILE,
+    TRACING_SERVICE_NAME
+)
+
+try:
+    from opentelemetry import trace, propagate
+except ImportError:
+    trace = None
+    propagate = None
+
+logger = logging.getLogger(__name__)
+
+_tracer = None
+_provider = None
+_initialized = False
+_lock = threading.Lock()
+
+
+def _build_exporter():
+    """설정된 익스포터 생성 (console, file, otlp)"""
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+
+    if TRACING_EXPORTER == "console":
+        return ConsoleSpanExporter()
+
+    if TRACING_EXPORTER == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter()
+
+    # file: 한 줄에 스팬 하나 (JSON Lines) - 오프라인 환경에서도 동작
+    os.makedirs(os.path.dirname(TRACING_FILE) or ".", exist_ok=True)
+    out = open(TRACING_FILE, "a", encoding="utf-8")
+    return ConsoleSpanExporter(
+        out=out,
+        formatter=lambda span: span.to_json(indent=None) + os.linesep
+    )
+
+
+def setup_tracing() -> bool:
+    """
+    트레이서 프로바이더 초기화 (한 번만 수행)
+
+    Returns:
+        트레이싱 활성화 여부
+    """
+    global _tracer, _provider, _initialized
+
+    with _lock:
+        if _initialized:
+            return _tracer is not None
+        _initialized = True
+
+        if not TRACING_ENABLED:
+            return False
+
+        if trace is None:
+            logger.warning("opentelemetry가 설치되지 않아 트레이싱을 사용할 수 없습니다")
+            return False
+
+        try:
+            from opentelemetry.sdk.resources import Resource
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+            _provider = TracerProvider(
+                resource=Resource.create({"service.name": TRACING_SERVICE_NAME})
+            )
+            _provider.add_span_processor(BatchSpanProcessor(_build_exporter()))
+            trace.set_tracer_provider(_provider)
+            _tracer = trace.get_tracer("hyperwise.agent")
+        except ImportError as e:
+            logger.warning(f"opentelemetry-sdk를 불러올 수 없어 트레이싱을 비활성화합니다: {e}")
+            return False
+
+        logger.info(f"트레이싱이 활성화되었습니다 (exporter: {TRACING_EXPORTER})")
+        return True
+
+
+def shutdown_tracing():
+    """남은 스팬을 내보내고 프로바이더 종료"""
+    if _provider is not None:
+        _provider.shutdown()
+
+
+def _get_tracer():
+    if not _initialized:
+        setup_tracing()
+    return _tracer
+
+
+@contextmanager
+def span(name: str, attributes: Optional[Dict[str, Any]] = None) -> Iterator[Optional[Any]]:
+    """
+    현재 컨텍스트의 자식 스팬 생성
+
+    Args:
+        name: 스팬 이름 (예: "ollama.chat", "comfyui.submit")
+        attributes: 스팬 속성
+
+    Yields:
+        스팬 객체 (트레이싱 비활성화 시 None)
+    """
+    tracer = _get_tracer()
+    if tracer is None:
+        yield None
+        return
+
+    with tracer.start_as_current_span(name) as current:
+        set_attributes(current, attributes)
+        yield current
+
+
+def set_attributes(current: Optional[Any], attributes: Optional[Dict[str, Any]]):
+    """스팬 속성 설정 (None 값은 무시)"""
+    if current is None or not attributes:
+        return
+    for key, value in attributes.items():
+        if value is not None:
+            current.set_attribute(key, value)
+
+
+def inject_context() -> Dict[str, str]:
+    """
+    현재 트레이스 컨텍스트를 W3C traceparent 형식으로 직렬화
+
+    Returns:
+        전파용 캐리어 (트레이싱 비활성화 시 빈 dict)
+    """
+    carrier: Dict[str, str] = {}
+    if _get_tracer() is not None:
+        propagate.inject(carrier)
+    return carrier
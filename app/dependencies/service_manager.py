@@ -1,12 +1,16 @@
 """
 서비스 매니저 의존성
+
+service_manager 모듈은 API 시작 시간을 줄이기 위해 첫 요청 시 임포트합니다.
 """
-from typing import Annotated
+from typing import TYPE_CHECKING, Annotated, Any
 from fastapi import Depends, HTTPException, status
-from service_manager import ServiceManager, get_service_manager as _get_service_manager
+
+if TYPE_CHECKING:
+    from service_manager import ServiceManager
 
 
-def get_service_manager() -> ServiceManager:
+def get_service_manager() -> "ServiceManager":
     """
     서비스 매니저 인스턴스를 반환하는 의존성
     
@@ -16,6 +20,8 @@ def get_service_manager() -> ServiceManager:
     Raises:
         HTTPException: 서비스 매니저가 초기화되지 않은 경우
     """
+    from service_manager import get_service_manager as _get_service_manager
+    
     manager = _get_service_manager()
     if manager is None:
         raise HTTPException(
@@ -25,6 +31,6 @@ def get_service_manager() -> ServiceManager:
     return manager
 
 
-# 타입 별칭
-ServiceManagerDep = Annotated[ServiceManager, Depends(get_service_manager)]
+# 타입 별칭 (ServiceManager 또는 멀티 워커 모드의 RemoteServiceManager)
+ServiceManagerDep = Annotated[Any, Depends(get_service_manager)]
 
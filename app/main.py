@@ -1,6 +1,14 @@
 """
 FastAPI 애플리케이션 메인 진입점
+
+API_WORKERS > 1이면 이 프로세스가 슈퍼바이저가 되어 서비스 매니저를 소유하고,
+uvicorn 워커들은 Unix 소켓으로 서비스 매니저와 ComfyUI/LLM/비전 슬롯(스케줄러/리미터)에 접근합니다.
+
+API가 빨리 요청을 받을 수 있도록 service_manager는 lifespan에서 임포트하고,
+ComfyUI/WebUI 시작은 기본적으로 백그라운드에서 진행합니다 (STARTUP_WAIT_FOR_SERVICES).
 """
+import os
+import threading
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -9,26 +17,30 @@ from app.core.config import (
     API_TITLE,
     API_DESCRIPTION,
     API_VERSION,
+    API_ROLE,
+    COMFYUI_URL,
+    SUPERVISOR_SOCKET,
+    MODEL_VERIFY_ON_STARTUP,
+    MODEL_VERIFY_SHA256,
+    OLLAMA_PRELOAD,
+    STARTUP_WAIT_FOR_SERVICES,
     validate_config
 )
 from app.api.v1.routes import api_router
-from service_manager import get_service_manager
+from app.core.tracing import setup_tracing, shutdown_tracing
+from app.services.job_recovery import recover_jobs
+from app.services.image_store import shutdown_image_store
+from app.services.supervisor import SupervisorServer, RemoteServiceManager, RemoteScheduler, RemoteLimiter
+from app.services.retry import register_readiness
 
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    """애플리케이션 생명주기 관리"""
-    # 설정 검증 (경고만 출력, 에러는 발생시키지 않음)
-    try:
-        validate_config(strict=False)
-    except ValueError as e:
-        print(f"⚠️ 설정 오류: {e}")
-        print("일부 기능이 작동하지 않을 수 있습니다.")
-    
-    # 시작 시 서비스 매니저 초기화 및 서비스 시작
-    print("🚀 서비스 매니저 초기화 중...")
-    service_manager = get_service_manager()
+def start_services(service_manager):
+    """
+    서비스 시작, 헬스체크, 작업 복구 (단일 프로세스 모드 또는 슈퍼바이저에서 호출)
     
+    Args:
+        service_manager: ServiceManager 인스턴스
+    """
     # 서비스 시작 (WebUI는 선택사항이므로 실패해도 계속 진행)
     results = service_manager.start_all()
     
@@ -45,9 +57,35 @@ async def lifespan(app: FastAPI):
     service_manager.start_health_check()
     print("✅ 서비스 매니저가 준비되었습니다")
     
-    yield
+    # ComfyUI 호출 재시도가 재시작 중에는 서비스 매니저의 준비 신호를 기다리도록 등록
+    register_readiness(COMFYUI_URL, service_manager)
     
-    # 종료 시 서비스 정리
+    # 이전 실행에서 끝나지 않은 작업 복구 (백그라운드, 워커가 여러 개여도 한 번만)
+    recovering = recover_jobs()
+    if recovering:
+        print(f"♻️ 미완료 작업 {recovering}개를 복구합니다")
+    
+    # 텍스트/비전 모델 미리 로드 (백그라운드, 첫 요청이 모델 로드를 기다리지 않도록)
+    if OLLAMA_PRELOAD:
+        from app.services.llm_client import get_llm_client
+        get_llm_client().preload_in_background()
+    
+    # ComfyUI 백엔드 GPU 통계 수집 (백그라운드, 워커 프로세스는 첫 배치 때 각자 시작)
+    from app.services.gpu_placement import get_gpu_placement
+    get_gpu_placement().start()
+    
+    # 결과 이미지 보관 정책 (백그라운드, 워커가 여러 개여도 한 번만)
+    from app.services.retention import get_retention_manager
+    get_retention_manager().start()
+    
+    # 체크포인트 무결성 검증 (백그라운드, 결과는 모델 인덱스에 캐시됨)
+    if MODEL_VERIFY_ON_STARTUP:
+        from app.services.model_verifier import get_model_verifier
+        get_model_verifier().start(sha256=MODEL_VERIFY_SHA256)
+
+
+def stop_services(service_manager):
+    """서비스 정리"""
     print("🛑 서비스 종료 중...")
     if service_manager:
         service_manager.stop_health_check()
@@ -55,6 +93,58 @@ async def lifespan(app: FastAPI):
     print("✅ 모든 서비스가 종료되었습니다")
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """애플리케이션 생명주기 관리"""
+    # 설정 검증 (경고만 출력, 에러는 발생시키지 않음)
+    try:
+        validate_config(strict=False)
+    except ValueError as e:
+        print(f"⚠️ 설정 오류: {e}")
+        print("일부 기능이 작동하지 않을 수 있습니다.")
+    
+    # 트레이싱 초기화 (TRACING_ENABLED=true 인 경우에만)
+    if setup_tracing():
+        print("🔭 트레이싱이 활성화되었습니다")
+    
+    import service_manager as service_manager_module
+    
+    if API_ROLE == "worker":
+        # 멀티 워커 모드: 서비스 매니저는 슈퍼바이저가 소유
+        service_manager_module._service_manager = RemoteServiceManager(SUPERVISOR_SOCKET)
+        # 동시 실행 한도와 WFQ 공정성이 워커 전체에 걸쳐 적용되도록 슬롯도 슈퍼바이저에서 빌림
+        import app.services.scheduler as scheduler_module
+        import app.services.admission as admission_module
+        scheduler_module._scheduler = RemoteScheduler(SUPERVISOR_SOCKET)
+        for resource in admission_module._LIMITS:
+            admission_module._limiters[resource] = RemoteLimiter(resource, SUPERVISOR_SOCKET)
+        register_readiness(COMFYUI_URL, service_manager_module._service_manager)
+        print(f"🔗 워커 {os.getpid()}: 슈퍼바이저에 연결합니다 ({SUPERVISOR_SOCKET})")
+        yield
+        shutdown_image_store()
+        shutdown_tracing()
+        return
+    
+    # 서비스 매니저 생성은 가볍고, 라우터가 같은 인스턴스를 쓰도록 여기서 먼저 만듦
+    print("🚀 서비스 매니저 초기화 중...")
+    service_manager = service_manager_module.get_service_manager()
+    
+    if STARTUP_WAIT_FOR_SERVICES:
+        start_services(service_manager)
+    else:
+        # ComfyUI 시작(최대 60초)을 기다리지 않고 바로 요청을 받음
+        threading.Thread(
+            target=start_services, args=(service_manager,), daemon=True, name="service-startup"
+        ).start()
+    
+    yield
+    
+    # 종료 시 서비스 정리
+    stop_services(service_manager)
+    shutdown_image_store()
+    shutdown_tracing()
+
+
 def create_application() -> FastAPI:
     """
     FastAPI 애플리케이션 생성
@@ -88,15 +178,53 @@ def create_application() -> FastAPI:
 app = create_application()
 
 
+def run_supervisor(host: str, port: int, workers: int):
+    """
+    멀티 워커 모드 실행
+    
+    이 프로세스가 서비스 매니저와 작업 복구를 맡고, uvicorn 워커 프로세스들은
+    API_ROLE=worker로 시작되어 슈퍼바이저 소켓으로 서비스 매니저에 접근합니다.
+    """
+    import uvicorn
+    from service_manager import get_service_manager
+    
+    setup_tracing()
+    service_manager = get_service_manager()
+    start_services(service_manager)
+    server = SupervisorServer(service_manager, SUPERVISOR_SOCKET).start()
+    
+    # 워커 프로세스는 환경 변수를 상속받음
+    os.environ["API_ROLE"] = "worker"
+    os.environ["SUPERVISOR_SOCKET"] = SUPERVISOR_SOCKET
+    print(f"👥 API 워커 {workers}개를 시작합니다")
+    
+    try:
+        uvicorn.run(
+            "app.main:app",
+            host=host,
+            port=port,
+            workers=workers,
+            reload=False,
+            log_level="info"
+        )
+    finally:
+        server.stop()
+        stop_services(service_manager)
+        shutdown_tracing()
+
+
 if __name__ == "__main__":
     import uvicorn
-    from app.core.config import API_HOST, API_PORT
-    
-    uvicorn.run(
-        "app.main:app",
-        host=API_HOST,
-        port=API_PORT,
-        reload=False,
-        log_level="info"
-    )
+    from app.core.config import API_HOST, API_PORT, API_WORKERS
+    
+    if API_WORKERS > 1:
+        run_supervisor(API_HOST, API_PORT, API_WORKERS)
+    else:
+        uvicorn.run(
+            "app.main:app",
+            host=API_HOST,
+            port=API_PORT,
+            reload=False,
+            log_level="info"
+        )
 
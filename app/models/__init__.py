@@ -5,6 +5,7 @@ Pydantic 모델
 from app.models.requests import PromptRequest
 from app.models.responses import (
     ImageGenerationResponse,
+    JobResponse,
     ServiceStatusResponse,
     ServiceControlResponse,
     HealthResponse
@@ -13,6 +14,7 @@ from app.models.responses import (
 __all__ = [
     "PromptRequest",
     "ImageGenerationResponse",
+    "JobResponse",
     "ServiceStatusResponse",
     "ServiceControlResponse",
     "HealthResponse",
@@ -1,8 +1,15 @@
 """
 요청 모델
 """
-from pydantic import BaseModel, Field
-from app.core.config import DEFAULT_MODE
+from typing import Optional
+from pydantic import BaseModel, Field, field_validator
+from app.core.config import DEFAULT_MODE, JOB_TIMEOUT_MAX
+from app.services.profiles import get_profile_registry
+
+
+def _profile_enum(schema: dict):
+    """OpenAPI 스키마에 현재 프로필 목록을 enum으로 표시"""
+    schema["enum"] = get_profile_registry().names()
 
 
 class PromptRequest(BaseModel):
@@ -10,10 +17,25 @@ class PromptRequest(BaseModel):
     prompt: str = Field(..., description="이미지 생성 프롬프트", min_length=1)
     mode: str = Field(
         default=DEFAULT_MODE,
-        description="생성 모드",
-        pattern="^(fast|balanced|high_quality)$"
+        description="생성 프로필 (프로필 설정 파일 PROFILES_PATH 기준)",
+        json_schema_extra=_profile_enum
+    )
+    timeout: Optional[float] = Field(
+        default=None,
+        gt=0,
+        le=JOB_TIMEOUT_MAX,
+        description="작업 전체 시간 예산 (초, 생략하면 프로필의 timeout 또는 JOB_TIMEOUT, 넘으면 504)"
     )
-    
+
+    @field_validator("mode")
+    @classmethod
+    def check_profile(cls, value: str) -> str:
+        """프로필 레지스트리에 있는 프로필인지 확인 (설정 파일을 바꾸면 재시작 없이 반영)"""
+        names = get_profile_registry().names()
+        if value not in names:
+            raise ValueError(f"알 수 없는 생성 프로필입니다: {value} (가능: {', '.join(names)})")
+        return value
+
     class Config:
         json_schema_extra = {
             "example": {
@@ -21,4 +43,3 @@ class PromptRequest(BaseModel):
                 "mode": "high_quality"
             }
         }
-
@@ -22,7 +22,26 @@ class ImageGenerationResponse(BaseModel):
     """이미지 생성 응답"""
     success: bool = Field(..., description="성공 여부")
     images: List[str] = Field(..., description="생성된 이미지 경로 목록")
+    variants: List[Dict[str, str]] = Field(
+        default_factory=list,
+        description="이미지별 변형 경로 (hash, png, webp, avif, thumb_<크기>, 설정한 형식만 포함)"
+    )
     message: str = Field(..., description="응답 메시지")
+    job_id: Optional[str] = Field(None, description="작업 ID (GET /api/v1/jobs/{job_id}로 조회)")
+
+
+class JobResponse(BaseModel):
+    """작업 상태 응답"""
+    id: str = Field(..., description="작업 ID")
+    batch_id: Optional[str] = Field(None, description="배치 ID")
+    stage: str = Field(..., description="진행 단계 (queued, prompt, submitted, downloading, done, failed)")
+    request: Dict[str, Any] = Field(..., description="요청 내용")
+    prompt_id: Optional[str] = Field(None, description="ComfyUI prompt_id")
+    outputs: List[str] = Field(default_factory=list, description="생성된 이미지 경로 목록")
+    error: Optional[str] = Field(None, description="실패 사유")
+    attempts: int = Field(0, description="ComfyUI 제출 횟수")
+    created_at: float = Field(..., description="생성 시각 (epoch)")
+    updated_at: float = Field(..., description="마지막 갱신 시각 (epoch)")
 
 
 class ServiceControlResponse(BaseModel):
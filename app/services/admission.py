@@ -0,0 +1,191 @@
+"""
+백엔드 리소스별 동시성 제한 및 입장 제어 (admission control)
+
+LLM 호출, 비전 호출마다 FIFO 세마포어를 두어 동시에 백엔드에 도달하는 작업 수를 제한합니다.
+대기열이 가득 차거나 최대 대기 시간을 넘기면 AdmissionRejected를 발생시키고,
+라우터는 이를 429 + Retry-After 응답으로 변환합니다.
+작업에 마감(app.services.deadline)이 있으면 남은 시간까지만 기다리고, 마감 때문에 못 기다리면 DeadlineExceeded를 올립니다.
+ComfyUI 제출은 우선순위를 고려하는 app.services.scheduler가 같은 방식으로 제한합니다.
+멀티 워커 모드에서는 슈퍼바이저 프로세스의 리미터가 전체 한도를 관리하고 워커는 소켓으로 슬롯을 빌립니다
+(app.services.supervisor.RemoteLimiter).
+"""
+import math
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, Optional
+
+from app.core.config import (
+    LLM_MAX_CONCURRENCY,
+    VISION_MAX_CONCURRENCY,
+    ADMISSION_MAX_QUEUE,
+    ADMISSION_MAX_WAIT
+)
+from app.core.tracing import span
+from app.services.deadline import bounded_timeout, check_deadline, wait_event
+
+
+class AdmissionRejected(Exception):
+    """입장 제어에 의해 거절됨 (대기열 초과 또는 대기 시간 초과)"""
+
+    def __init__(self, resource: str, reason: str, retry_after: int):
+        self.resource = resource
+        self.reason = reason
+        self.retry_after = retry_after
+        super().__init__(f"{resource} 대기열 거절: {reason} (retry after {retry_after}s)")
+
+
+class ResourceLimiter:
+    """
+    FIFO 공정 세마포어
+
+    슬롯이 반납되면 대기열 맨 앞의 대기자에게 직접 넘겨주므로 늦게 온 요청이 앞지르지 못합니다.
+    """
+
+    def __init__(self, name: str, limit: int, max_queue: int, max_wait: float):
+        """
+        Args:
+            name: 리소스 이름 (llm, vision)
+            limit: 동시 실행 가능한 작업 수
+            max_queue: 최대 대기 작업 수 (초과 시 즉시 거절)
+            max_wait: 최대 대기 시간 (초)
+        """
+        self.name = name
+        self.limit = max(1, limit)
+        self.max_queue = max(0, max_queue)
+        self.max_wait = max_wait
+        self.in_use = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._waiters: Deque[threading.Event] = deque()
+        self._lock = threading.Lock()
+        # 슬롯 점유 시간 이동 평균 (Retry-After 추정용)
+        self._avg_hold = 1.0
+
+    def _retry_after(self) -> int:
+        """대기열이 한 칸 빌 때까지의 예상 시간 (초)"""
+        return max(1, math.ceil(self._avg_hold * (len(self._waiters) + 1) / self.limit))
+
+    def check(self):
+        """
+        대기열에 자리가 있는지 확인만 함 (슬롯은 점유하지 않음)
+
+        Raises:
+            AdmissionRejected: 대기열이 가득 찬 경우
+        """
+        with self._lock:
+            if self.in_use >= self.limit and len(self._waiters) >= self.max_queue:
+                self.rejected += 1
+                raise AdmissionRejected(self.name, "queue full", self._retry_after())
+
+    def acquire(self, timeout: Optional[float] = None):
+        """
+        슬롯 획득 (FIFO 순서로 대기)
+
+        Args:
+            timeout: 최대 대기 시간 (None이면 max_wait)
+
+        Raises:
+            AdmissionRejected: 대기열이 가득 찼거나 대기 시간이 초과된 경우
+            DeadlineExceeded: 작업 마감이 먼저 지난 경우
+        """
+        check_deadline(f"{self.name}_queue")
+        timeout = bounded_timeout(self.max_wait if timeout is None else timeout)
+
+        with self._lock:
+            if self.in_use < self.limit and not self._waiters:
+                self.in_use += 1
+                self.admitted += 1
+                return
+            if len(self._waiters) >= self.max_queue:
+                self.rejected += 1
+                raise AdmissionRejected(self.name, "queue full", self._retry_after())
+            event = threading.Event()
+            self._waiters.append(event)
+
+        if not wait_event(event, timeout):
+            with self._lock:
+                if event in self._waiters:
+                    self._waiters.remove(event)
+                    self.rejected += 1
+                    # 작업 마감 때문에 못 기다린 경우는 어느 대기에서 시간을 넘겼는지 알림
+                    check_deadline(f"{self.name}_queue")
+                    raise AdmissionRejected(self.name, "wait timeout", self._retry_after())
+            # 타임아웃 직후 슬롯을 넘겨받은 경우 그대로 진행
+
+        with self._lock:
+            self.admitted += 1
+
+    def release(self, held: Optional[float] = None):
+        """
+        슬롯 반납 (대기자가 있으면 맨 앞 대기자에게 넘김)
+
+        Args:
+            held: 슬롯을 점유한 시간 (초)
+        """
+        with self._lock:
+            if held is not None:
+                self._avg_hold = 0.8 * self._avg_hold + 0.2 * held
+            if self._waiters:
+                self._waiters.popleft().set()
+            else:
+                self.in_use -= 1
+
+    @contextmanager
+    def slot(self, timeout: Optional[float] = None) -> Iterator[None]:
+        """슬롯을 점유하는 컨텍스트 매니저 (대기 구간은 트레이스 스팬으로 기록)"""
+        with span(f"admission.{self.name}", {"admission.waiting": len(self._waiters)}):
+            self.acquire(timeout)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - started)
+
+    def headroom(self) -> int:
+        """추가로 받아들일 수 있는 작업 수 (빈 슬롯 + 빈 대기열)"""
+        with self._lock:
+            return (self.limit - self.in_use) + (self.max_queue - len(self._waiters))
+
+    def snapshot(self) -> Dict[str, int]:
+        """현재 상태"""
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "in_use": self.in_use,
+                "waiting": len(self._waiters),
+                "max_queue": self.max_queue,
+                "admitted": self.admitted,
+                "rejected": self.rejected
+            }
+
+
+_LIMITS = {
+    "llm": LLM_MAX_CONCURRENCY,
+    "vision": VISION_MAX_CONCURRENCY
+}
+
+# 전역 리미터 인스턴스
+_limiters: Dict[str, ResourceLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(resource: str) -> ResourceLimiter:
+    """리소스별 리미터 반환 (싱글톤)"""
+    with _limiters_lock:
+        limiter = _limiters.get(resource)
+        if limiter is None:
+            limiter = ResourceLimiter(
+                resource,
+                _LIMITS[resource],
+                ADMISSION_MAX_QUEUE,
+                ADMISSION_MAX_WAIT
+            )
+            _limiters[resource] = limiter
+        return limiter
+
+
+def get_admission_status() -> Dict[str, Dict[str, int]]:
+    """모든 리소스의 현재 상태"""
+    return {name: get_limiter(name).snapshot() for name in _LIMITS}
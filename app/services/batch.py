@@ -0,0 +1,312 @@
+"""
+배치 이미지 생성 서비스
+
+여러 PromptRequest를 한 번에 받아 중복을 제거하고, 제한된 수의 워커로 ComfyUI 용량에 맞춰
+실행합니다. 결과는 끝나는 순서대로 배치에 쌓이며, 클라이언트 연결과 무관하게 백그라운드에서
+계속 진행되므로 연결이 끊겨도 배치 ID로 이어서 받을 수 있습니다.
+각 작업은 작업 저장소에 기록되므로 API가 재시작된 뒤에도 배치를 복원해 이어받을 수 있습니다.
+기본 프롬프트는 작업마다 LLM을 따로 호출하지 않고 프롬프트 확장기로 묶어서 만듭니다 (PROMPT_EXPANSION_MODE).
+작업마다 시간 예산(요청의 timeout → 프로필의 timeout → JOB_TIMEOUT)은 워커가 작업을 시작할 때부터 셉니다.
+"""
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.core.config import BATCH_MAX_WORKERS, BATCH_RETENTION_SECONDS
+from app.models.requests import PromptRequest
+from app.services.admission import AdmissionRejected
+from app.services.deadline import Deadline, activate, job_budget, sleep
+from app.services.image_generation import ImageGenerationService
+from app.services.image_store import get_image_store
+from app.services.job_store import get_job_store, FINAL_STAGES, STAGE_DONE
+from app.services.prompt_expansion import BatchPromptExpansion, get_prompt_expander
+
+logger = logging.getLogger(__name__)
+
+BATCH_PRIORITY = "batch"
+
+
+class BatchItem:
+    """중복 제거된 배치 작업 하나 (같은 요청이 여러 번 들어오면 indices에 모두 기록)"""
+
+    def __init__(self, key: Tuple[str, str], request: PromptRequest, index: int):
+        self.key = key
+        self.request = request
+        self.indices = [index]
+        self.job_id: Optional[str] = None
+
+
+class Batch:
+    """배치 상태 (결과는 완료 순서대로 append만 됨)"""
+
+    def __init__(self, batch_id: str, total: int, items: List[BatchItem], api_key: Optional[str]):
+        self.id = batch_id
+        self.total = total
+        self.items = items
+        self.api_key = api_key
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.results: List[Dict[str, Any]] = []
+        self.expansion: Optional[BatchPromptExpansion] = None
+        self._cond = threading.Condition()
+
+    @property
+    def done(self) -> bool:
+        return self.finished_at is not None
+
+    def add_result(self, result: Dict[str, Any]):
+        with self._cond:
+            self.results.append(result)
+            if len(self.results) == len(self.items):
+                self.finished_at = time.time()
+            self._cond.notify_all()
+
+    def summary(self) -> Dict[str, Any]:
+        with self._cond:
+            succeeded = sum(1 for r in self.results if r["success"])
+            return {
+                "batch_id": self.id,
+                "total": self.total,
+                "unique": len(self.items),
+                "completed": len(self.results),
+                "succeeded": succeeded,
+                "failed": len(self.results) - succeeded,
+                "done": self.done
+            }
+
+    def iter_results(self, after: int = 0, poll_interval: float = 1.0) -> Iterator[Dict[str, Any]]:
+        """
+        결과를 완료 순서대로 반환 (아직 끝나지 않은 결과는 나올 때까지 대기)
+
+        Args:
+            after: 이미 받은 결과 수 (재개 시 건너뛸 개수)
+            poll_interval: 대기 중 깨어나는 간격 (초)
+        """
+        position = max(0, after)
+        while True:
+            with self._cond:
+                while position >= len(self.results) and not self.done:
+                    self._cond.wait(poll_interval)
+                if position >= len(self.results):
+                    return
+                result = self.results[position]
+            position += 1
+            yield result
+
+
+class BatchManager:
+    """배치 생성/실행/조회 관리"""
+
+    def __init__(self, max_workers: int, retention_seconds: int):
+        self.retention_seconds = retention_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="batch")
+        self._batches: Dict[str, Batch] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def dedupe(requests: List[PromptRequest]) -> List[BatchItem]:
+        """(prompt, mode)가 같은 요청을 하나로 합침"""
+        items: Dict[Tuple[str, str], BatchItem] = {}
+        for index, request in enumerate(requests):
+            key = (request.prompt.strip(), request.mode)
+            if key in items:
+                items[key].indices.append(index)
+            else:
+                items[key] = BatchItem(key, request, index)
+        return list(items.values())
+
+    def submit(self, requests: List[PromptRequest], api_key: Optional[str] = None) -> Batch:
+        """
+        배치 생성 후 백그라운드 실행 시작 (작업 기록과 프롬프트 확장 준비가 블로킹이므로 이벤트 루프 밖에서 호출)
+
+        Args:
+            requests: 생성 요청 목록
+            api_key: 요청자 API 키
+
+        Returns:
+            생성된 배치
+        """
+        self._evict_expired()
+        batch = Batch(uuid.uuid4().hex, len(requests), self.dedupe(requests), api_key)
+        batch.expansion = get_prompt_expander().for_batch([item.request.prompt for item in batch.items])
+        job_ids = get_job_store().create_many([
+            {**item.request.model_dump(), "priority": BATCH_PRIORITY, "indices": item.indices}
+            for item in batch.items
+        ], batch_id=batch.id)
+        for item, job_id in zip(batch.items, job_ids):
+            item.job_id = job_id
+        with self._lock:
+            self._batches[batch.id] = batch
+        for item in batch.items:
+            self._executor.submit(self._run_item, batch, item)
+        logger.info(f"배치 시작: {batch.id} (요청 {batch.total}개, 중복 제거 후 {len(batch.items)}개)")
+        return batch
+
+    def get(self, batch_id: str) -> Optional[Batch]:
+        """배치 조회 (메모리에 없으면 작업 저장소에서 복원)"""
+        self._evict_expired()
+        with self._lock:
+            batch = self._batches.get(batch_id)
+        if batch is None:
+            batch = self._restore(batch_id)
+        return batch
+
+    @staticmethod
+    def _result_from_job(batch_id: str, job: Dict[str, Any]) -> Dict[str, Any]:
+        """작업 기록을 배치 결과 줄로 변환"""
+        request = job["request"]
+        return {
+            "batch_id": batch_id,
+            "job_id": job["id"],
+            "indices": request.get("indices", []),
+            "prompt": request["prompt"],
+            "mode": request["mode"],
+            "success": job["stage"] == STAGE_DONE,
+            "images": job["outputs"],
+            "variants": [get_image_store().variants(path) for path in job["outputs"]],
+            "error": job["error"],
+            "elapsed_seconds": round(job["updated_at"] - job["created_at"], 3)
+        }
+
+    @staticmethod
+    def _missing_result(batch_id: str, job_id: str, item: Optional[BatchItem] = None) -> Dict[str, Any]:
+        """작업 기록이 없어진 작업의 실패 결과 줄"""
+        return {
+            "batch_id": batch_id,
+            "job_id": job_id,
+            "indices": item.indices if item else [],
+            "prompt": item.request.prompt if item else None,
+            "mode": item.request.mode if item else None,
+            "success": False,
+            "images": [],
+            "variants": [],
+            "error": "작업 기록을 찾을 수 없습니다",
+            "elapsed_seconds": None
+        }
+
+    def _restore(self, batch_id: str) -> Optional[Batch]:
+        """
+        작업 저장소에서 배치 복원 (API 재시작 후 이어받기)
+        
+        끝난 작업은 바로 결과로 채우고, 남은 작업(복구 중)은 끝날 때까지 저장소를 감시합니다.
+        """
+        jobs = get_job_store().list_batch(batch_id)
+        if not jobs:
+            return None
+        
+        items = []
+        for job in jobs:
+            # 저장된 요청은 이미 검증되었으므로 (그 사이 프로필이 바뀌었어도) 다시 검증하지 않음
+            request = PromptRequest.model_construct(prompt=job["request"]["prompt"], mode=job["request"]["mode"])
+            item = BatchItem((request.prompt.strip(), request.mode), request, 0)
+            item.indices = job["request"].get("indices", [])
+            item.job_id = job["id"]
+            items.append(item)
+        
+        batch = Batch(batch_id, sum(len(item.indices) for item in items), items, None)
+        pending = []
+        for job in jobs:
+            if job["stage"] in FINAL_STAGES:
+                batch.add_result(self._result_from_job(batch_id, job))
+            else:
+                pending.append(job["id"])
+        
+        with self._lock:
+            # 동시에 복원된 경우 먼저 등록된 쪽 사용
+            existing = self._batches.get(batch_id)
+            if existing is not None:
+                return existing
+            self._batches[batch_id] = batch
+        
+        if pending:
+            threading.Thread(target=self._watch, args=(batch, pending), daemon=True).start()
+        return batch
+
+    def _watch(self, batch: Batch, job_ids: List[str], interval: float = 1.0):
+        """
+        복구 중인 작업이 끝나면 배치 결과에 추가
+
+        작업마다 시간 예산(감시 시작 또는 마지막 진행 시각부터) 안에 끝나지 않거나 BATCH_RETENTION_SECONDS가
+        지나면 실패로 기록해 배치가 끝나지 않은 채 남지 않게 합니다.
+        """
+        store = get_job_store()
+        items = {item.job_id: item for item in batch.items}
+        started = time.time()
+        give_up = started + self.retention_seconds
+        remaining = list(job_ids)
+        while remaining:
+            time.sleep(interval)
+            now = time.time()
+            for job_id in list(remaining):
+                job = store.get(job_id)
+                if job is not None and job["stage"] not in FINAL_STAGES:
+                    request = job["request"]
+                    limit = max(started, job["updated_at"]) + job_budget(request["mode"], request.get("timeout"))
+                    if now < min(limit, give_up):
+                        continue
+                    logger.warning(f"복구 중인 배치 작업이 시간 안에 끝나지 않았습니다 ({batch.id}, {job_id})")
+                    store.fail(job_id, "복구된 작업이 시간 예산 안에 끝나지 않았습니다")
+                    job = store.get(job_id)
+                remaining.remove(job_id)
+                if job is None:
+                    batch.add_result(self._missing_result(batch.id, job_id, items.get(job_id)))
+                else:
+                    batch.add_result(self._result_from_job(batch.id, job))
+
+    def _generate(self, batch: Batch, item: BatchItem) -> List[str]:
+        """작업 하나 실행 (입장 거절 시 Retry-After만큼 기다렸다가 다시 시도)"""
+        base_prompt = batch.expansion.get(item.request.prompt) if batch.expansion else None
+        while True:
+            try:
+                service = ImageGenerationService(
+                    api_key=batch.api_key,
+                    priority=BATCH_PRIORITY,
+                    job_id=item.job_id
+                )
+                return service.generate_product_image(
+                    item.request.prompt, mode=item.request.mode, base_prompt=base_prompt
+                )
+            except AdmissionRejected as e:
+                sleep(e.retry_after, "queue")
+
+    def _run_item(self, batch: Batch, item: BatchItem):
+        store = get_job_store()
+        try:
+            with activate(Deadline(job_budget(item.request.mode, item.request.timeout))):
+                store.complete(item.job_id, self._generate(batch, item))
+        except Exception as e:
+            logger.warning(f"배치 작업 실패 ({batch.id}, index {item.indices[0]}): {e}")
+            store.fail(item.job_id, str(e))
+        job = store.get(item.job_id)
+        if job is None:
+            # 보관 기간 정리 등으로 기록이 사라진 경우에도 배치가 끝나도록 실패 결과를 남김
+            batch.add_result(self._missing_result(batch.id, item.job_id, item))
+            return
+        batch.add_result(self._result_from_job(batch.id, job))
+
+    def _evict_expired(self):
+        cutoff = time.time() - self.retention_seconds
+        with self._lock:
+            expired = [
+                batch_id for batch_id, batch in self._batches.items()
+                if batch.finished_at is not None and batch.finished_at < cutoff
+            ]
+            for batch_id in expired:
+                del self._batches[batch_id]
+
+
+# 전역 배치 매니저 인스턴스
+_batch_manager: Optional[BatchManager] = None
+_batch_manager_lock = threading.Lock()
+
+
+def get_batch_manager() -> BatchManager:
+    """전역 배치 매니저 인스턴스 반환 (싱글톤)"""
+    global _batch_manager
+    with _batch_manager_lock:
+        if _batch_manager is None:
+            _batch_manager = BatchManager(BATCH_MAX_WORKERS, BATCH_RETENTION_SECONDS)
+        return _batch_manager
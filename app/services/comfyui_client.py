@@ -0,0 +1,303 @@
+"""
+ComfyUI HTTP 클라이언트
+
+프롬프트 제출, 완료 대기, 결과 다운로드 등 ComfyUI 서버와의 통신을 담당합니다.
+생성 서비스와 작업 복구(재시작 후 /history 재연결)가 같은 코드를 사용합니다.
+호출 제한 시간(COMFYUI_*_TIMEOUT)은 작업 마감(app.services.deadline)이 있으면 남은 시간까지로 줄어듭니다.
+제출/완료 확인/다운로드의 일시적인 실패(연결 끊김, 시간 초과, 5xx)는 재시도 정책(app.services.retry)으로 다시 시도하며,
+ComfyUI를 재시작하는 중이면 서비스 매니저의 준비 신호를 기다립니다.
+requests는 API 시작 시간을 줄이기 위해 첫 호출 시 임포트합니다.
+"""
+import os
+import time
+import uuid
+import logging
+from typing import Any, Dict, List, Optional
+from app.core.config import (
+    COMFYUI_SUBMIT_TIMEOUT, COMFYUI_POLL_TIMEOUT, COMFYUI_WAIT_TIMEOUT, COMFYUI_DOWNLOAD_TIMEOUT
+)
+from app.core.tracing import span
+from app.services.deadline import DeadlineExceeded, bounded_timeout, check_deadline, sleep
+from app.services.retry import RETRYABLE, classify, get_readiness, get_retry_policy
+
+logger = logging.getLogger(__name__)
+
+# 완료 확인 간격 (초)
+_POLL_INTERVAL = 0.25
+# 완료 대기 중 프롬프트가 큐에 남아 있는지 확인하는 간격 (초, 연결 오류 뒤에는 바로 확인)
+_LOST_CHECK_INTERVAL = 5.0
+
+
+class ComfyUIError(Exception):
+    """ComfyUI가 요청을 거부했거나 실행에 실패한 경우 (HTTP 오류면 status_code 포함)"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class ComfyUIClient:
+    """ComfyUI 서버 클라이언트"""
+
+    def __init__(self, base_url: str, download_dir: str):
+        """
+        Args:
+            base_url: ComfyUI 서버 URL
+            download_dir: 결과 이미지 저장 디렉토리
+        """
+        self.base_url = base_url
+        self.download_dir = download_dir
+
+    def submit(self, graph: Dict[str, Any]) -> str:
+        """
+        그래프 제출
+
+        prompt_id를 클라이언트에서 정해 그래프에 넣어 두므로(이미 있으면 그대로 사용) 응답을 받지 못한 제출을
+        다시 시도하거나 재시작 후 재제출해도 ComfyUI에 같은 작업이 두 번 들어가지 않습니다.
+        재시도 전에는 같은 prompt_id가 이미 큐나 히스토리에 있는지 먼저 확인합니다.
+
+        Args:
+            graph: /prompt 요청 본문 ({"prompt": {...}, "extra_data": {...}, ...})
+
+        Returns:
+            prompt_id
+
+        Raises:
+            ComfyUIError: 재시도할 수 없는 오류(워크플로 검증 오류 등)이거나 재시도를 다 쓴 경우
+        """
+        import requests
+
+        prompt_id = graph.setdefault("prompt_id", uuid.uuid4().hex)
+
+        def attempt(number: int) -> str:
+            if number > 1 and self._known(prompt_id):
+                logger.info(f"ComfyUI가 이미 받은 프롬프트입니다 ({prompt_id}), 다시 제출하지 않습니다")
+                return prompt_id
+            return self._post_prompt(graph)
+
+        with span("comfyui.submit", {"comfyui.nodes": len(graph["prompt"]), "comfyui.prompt_id": prompt_id}):
+            try:
+                return get_retry_policy("comfyui").call(
+                    "comfyui.submit", attempt, readiness=get_readiness(self.base_url)
+                )
+            except requests.exceptions.RequestException as e:
+                raise ComfyUIError(f"ComfyUI 통신 오류: {e}") from e
+
+    def _post_prompt(self, graph: Dict[str, Any]) -> str:
+        """/prompt 요청 한 번 (4xx/5xx는 상태 코드를 담은 ComfyUIError)"""
+        import requests
+
+        response = requests.post(
+            f"{self.base_url}/prompt", json=graph, timeout=bounded_timeout(COMFYUI_SUBMIT_TIMEOUT)
+        )
+        try:
+            res = response.json() if response.text and response.text.strip() else None
+        except requests.exceptions.JSONDecodeError:
+            res = None
+        if response.status_code >= 400:
+            error = res.get("error") if isinstance(res, dict) else None
+            message = error.get("message") if isinstance(error, dict) else (error or response.text[:200])
+            raise ComfyUIError(f"ComfyUI 오류 ({response.status_code}): {message}", response.status_code)
+
+        # 빈 응답 체크
+        if res is None:
+            raise ComfyUIError(f"ComfyUI 응답 파싱 오류. 응답 내용: {response.text[:200]}")
+        if "prompt_id" not in res:
+            error_msg = res.get("error", {}).get("message", str(res)) if isinstance(res, dict) else str(res)
+            raise ComfyUIError(f"ComfyUI 오류: {error_msg}")
+        return res["prompt_id"]
+
+    def _known(self, prompt_id: str) -> bool:
+        """프롬프트가 ComfyUI 큐나 히스토리에 있는지"""
+        return self.is_queued(prompt_id) or self.get_history(prompt_id) is not None
+
+    def get_history(self, prompt_id: str) -> Optional[Dict[str, Any]]:
+        """
+        히스토리 조회
+
+        Returns:
+            완료된 프롬프트의 히스토리 항목 (아직 완료되지 않았으면 None)
+        """
+        import requests
+
+        response = requests.get(
+            f"{self.base_url}/history/{prompt_id}", timeout=bounded_timeout(COMFYUI_POLL_TIMEOUT)
+        )
+        response.raise_for_status()
+        if not response.text or not response.text.strip():
+            return None
+        return response.json().get(prompt_id)
+
+    def is_queued(self, prompt_id: str) -> bool:
+        """프롬프트가 ComfyUI 큐에서 실행 중이거나 대기 중인지 확인"""
+        import requests
+
+        response = requests.get(f"{self.base_url}/queue", timeout=bounded_timeout(COMFYUI_POLL_TIMEOUT))
+        response.raise_for_status()
+        queue = response.json()
+        for item in queue.get("queue_running", []) + queue.get("queue_pending", []):
+            if len(item) > 1 and item[1] == prompt_id:
+                return True
+        return False
+
+    def cancel(self, prompt_id: str) -> bool:
+        """
+        프롬프트 취소 (실행 중이면 중단, 대기 중이면 큐에서 삭제)
+
+        작업 마감이 지난 뒤 GPU를 바로 비우려고 호출하므로 마감과 무관한 제한 시간을 씁니다.
+
+        Returns:
+            요청을 보냈는지 (ComfyUI에 연결할 수 없으면 False)
+        """
+        import requests
+
+        try:
+            response = requests.get(f"{self.base_url}/queue", timeout=COMFYUI_POLL_TIMEOUT)
+            response.raise_for_status()
+            running = any(
+                len(item) > 1 and item[1] == prompt_id for item in response.json().get("queue_running", [])
+            )
+            if running:
+                # 다른 프롬프트를 중단하지 않도록 prompt_id 지정 (이를 모르는 ComfyUI는 실행 중인 프롬프트를 중단)
+                requests.post(f"{self.base_url}/interrupt", json={"prompt_id": prompt_id}, timeout=COMFYUI_POLL_TIMEOUT)
+            else:
+                requests.post(f"{self.base_url}/queue", json={"delete": [prompt_id]}, timeout=COMFYUI_POLL_TIMEOUT)
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"ComfyUI 프롬프트를 취소할 수 없습니다 ({prompt_id}): {e}")
+            return False
+        logger.info(f"ComfyUI 프롬프트 취소: {prompt_id} ({'실행 중단' if running else '대기열 삭제'})")
+        return True
+
+    @staticmethod
+    def output_filenames(entry: Dict[str, Any]) -> List[str]:
+        """히스토리 항목에서 SaveImage 출력 파일명 추출"""
+        imgs = entry["outputs"]["save"]["images"]
+        return [img["filename"] for img in imgs]
+
+    def wait_for_images(
+        self,
+        prompt_id: str,
+        max_wait: float = COMFYUI_WAIT_TIMEOUT,
+        graph: Optional[Dict[str, Any]] = None
+    ) -> List[str]:
+        """
+        이미지 생성 완료 대기
+
+        연결 끊김/시간 초과/5xx는 재시도 정책의 백오프(재시작 중이면 준비 신호)로 기다렸다가 다시 확인하고,
+        그 밖의 오류와 ComfyUI가 보고한 실행 오류는 바로 올립니다. 다시 연결했을 때 프롬프트가 큐에도 히스토리에도
+        없으면(ComfyUI 재시작으로 사라짐) graph를 같은 prompt_id로 다시 제출합니다.
+
+        Args:
+            prompt_id: 프롬프트 ID
+            max_wait: 최대 대기 시간 (초, 작업 마감이 먼저 오면 DeadlineExceeded)
+            graph: 제출한 그래프 (ComfyUI 재시작으로 프롬프트가 사라지면 재제출, None이면 ComfyUIError)
+
+        Raises:
+            ComfyUIError: 실행 오류/중단, 출력이 없는 경우, 사라진 프롬프트를 재제출할 수 없는 경우
+            TimeoutError: max_wait 안에 끝나지 않은 경우
+        """
+        policy = get_retry_policy("comfyui")
+        readiness = get_readiness(self.base_url)
+        end = time.monotonic() + max_wait
+        failures = 0
+        next_queue_check = time.monotonic() + _LOST_CHECK_INTERVAL
+
+        with span("comfyui.wait", {"comfyui.prompt_id": prompt_id}) as s:
+            while time.monotonic() < end:
+                check_deadline()
+                try:
+                    entry = self.get_history(prompt_id)
+                    if entry is None and (failures or time.monotonic() >= next_queue_check):
+                        next_queue_check = time.monotonic() + _LOST_CHECK_INTERVAL
+                        # 큐 → 히스토리 순서로 확인해 그 사이 끝난 프롬프트를 사라진 것으로 보지 않음
+                        lost = not self._known(prompt_id)
+                    else:
+                        lost = False
+                    if lost:
+                        # 연결이 끊긴 사이(또는 폴링 사이) ComfyUI가 재시작되어 프롬프트가 사라짐
+                        if graph is None:
+                            raise ComfyUIError(f"ComfyUI에서 프롬프트가 사라졌습니다 (prompt_id: {prompt_id})")
+                        logger.info(f"ComfyUI에서 사라진 프롬프트를 다시 제출합니다 ({prompt_id})")
+                        graph["prompt_id"] = prompt_id
+                        self._post_prompt(graph)
+                except DeadlineExceeded:
+                    raise
+                except Exception as e:
+                    category = classify(e)
+                    if category not in RETRYABLE:
+                        raise
+                    # 대기 중 폴링은 작업마다 한 번씩 끝나야 하므로 재시도 예산을 쓰지 않고 마감까지 기다림
+                    failures += 1
+                    logger.debug(f"ComfyUI 완료 확인 실패 ({category}, {failures}번째): {e}")
+                    policy.pause("comfyui.wait", category, failures, readiness)
+                    continue
+                failures = 0
+
+                if entry is not None:
+                    files = self._entry_files(prompt_id, entry)
+                    if s is not None:
+                        s.set_attribute("comfyui.images", len(files))
+                    return files
+
+                sleep(min(_POLL_INTERVAL, max(0.0, end - time.monotonic())))
+
+        raise TimeoutError(f"이미지 생성 시간 초과 (prompt_id: {prompt_id})")
+
+    def _entry_files(self, prompt_id: str, entry: Dict[str, Any]) -> List[str]:
+        """완료된 히스토리 항목의 출력 파일명 (실행 오류/중단이면 ComfyUIError)"""
+        status = entry.get("status") or {}
+        if status.get("status_str") == "error":
+            messages = [m[0] for m in status.get("messages", []) if isinstance(m, (list, tuple)) and m]
+            reason = next((m for m in messages if m in ("execution_error", "execution_interrupted")), "error")
+            raise ComfyUIError(f"ComfyUI 실행 실패: {reason} (prompt_id: {prompt_id})")
+        try:
+            return self.output_filenames(entry)
+        except (KeyError, TypeError):
+            raise ComfyUIError(f"ComfyUI 출력에 이미지가 없습니다 (prompt_id: {prompt_id})")
+
+    def download_image(self, filename: str, save_dir: str = None, save_name: str = None) -> str:
+        """
+        이미지 다운로드
+
+        Args:
+            filename: ComfyUI 출력 파일명
+            save_dir: 저장 디렉토리 (None이면 download_dir)
+            save_name: 저장 파일명 (None이면 ComfyUI 파일명)
+
+        Returns:
+            저장된 파일 경로
+        """
+        import requests
+
+        if save_dir is None:
+            save_dir = self.download_dir
+
+        with span("comfyui.download", {"comfyui.filename": filename}) as s:
+            os.makedirs(save_dir, exist_ok=True)
+            url = f"{self.base_url}/view/{filename}"
+
+            def fetch(_: int) -> bytes:
+                response = requests.get(url, timeout=bounded_timeout(COMFYUI_DOWNLOAD_TIMEOUT))
+                response.raise_for_status()
+                return response.content
+
+            img = get_retry_policy("comfyui").call("comfyui.download", fetch, readiness=get_readiness(self.base_url))
+            path = os.path.join(save_dir, save_name or filename)
+
+            with open(path, "wb") as f:
+                f.write(img)
+                f.flush()
+                os.fsync(f.fileno())
+
+            # Wait until file is fully saved
+            for _ in range(20):
+                if os.path.exists(path) and os.path.getsize(path) > 1000:
+                    break
+                time.sleep(0.1)
+
+            if os.path.getsize(path) < 1000:
+                raise Exception(f"Image incomplete: {path}")
+
+            if s is not None:
+                s.set_attribute("comfyui.bytes", os.path.getsize(path))
+        return path
@@ -0,0 +1,216 @@
+"""
+작업 마감 시간
+
+작업마다 전체 시간 예산(요청의 timeout → 프로필의 timeout → JOB_TIMEOUT)을 정하고, 프롬프트 생성, 스케줄러/리소스 대기,
+ComfyUI 제출/완료 대기/다운로드, 비전 평가가 모두 남은 시간 안에서만 기다리게 합니다.
+마감은 contextvar로 작업을 실행하는 스레드에 걸리므로 하위 호출은 `bounded_timeout(기본값)`으로
+기본 제한 시간과 남은 시간 중 짧은 값을 씁니다 (마감이 없으면 기본값 그대로).
+시간이 다 되거나 클라이언트 연결이 끊기면(cancel) 진행 중인 단계가 DeadlineExceeded로 끝나고 슬롯을 바로 놓습니다.
+
+초과는 지표 그룹 deadline(키: 단계, 구간: timeout / client_disconnected, 값은 작업 경과 시간)에 기록됩니다.
+"""
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from app.core.config import JOB_TIMEOUT, JOB_TIMEOUT_MAX
+from app.services.metrics import get_metrics
+from app.services.profiles import get_profile_registry
+
+# 마감 초과 사유
+REASON_TIMEOUT = "timeout"
+REASON_DISCONNECTED = "client_disconnected"
+
+# 마감을 확인하며 기다릴 때의 최대 간격 (초, 취소에 반응하는 시간)
+_WAIT_SLICE = 0.25
+
+
+class DeadlineExceeded(Exception):
+    """작업 시간 예산 초과 또는 클라이언트 연결 끊김"""
+
+    def __init__(self, stage: str, budget: float, elapsed: float, reason: str = REASON_TIMEOUT):
+        self.stage = stage
+        self.budget = budget
+        self.elapsed = elapsed
+        self.reason = reason
+        if reason == REASON_DISCONNECTED:
+            message = f"클라이언트 연결이 끊겨 작업을 중단했습니다 (단계: {stage}, {elapsed:.1f}초 경과)"
+        else:
+            message = f"작업 시간 예산 {budget:g}초를 넘었습니다 (단계: {stage}, {elapsed:.1f}초 경과)"
+        super().__init__(message)
+
+
+class Deadline:
+    """작업 하나의 마감 시간 (단조 시계 기준)"""
+
+    def __init__(self, seconds: float):
+        """
+        Args:
+            seconds: 전체 시간 예산 (초)
+        """
+        self.budget = seconds
+        self.started = time.monotonic()
+        self.expires_at = self.started + seconds
+        self.stage = "start"
+        self.cancelled: Optional[str] = None
+        self._recorded = False
+        self._lock = threading.Lock()
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def remaining(self) -> float:
+        """남은 시간 (초, 0 이상)"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.cancelled is not None or time.monotonic() >= self.expires_at
+
+    def cancel(self, reason: str = REASON_DISCONNECTED):
+        """작업 중단 (다음 확인 시점에 진행 중인 단계가 DeadlineExceeded로 끝남)"""
+        if self.cancelled is None:
+            self.cancelled = reason
+
+    def error(self, stage: Optional[str] = None) -> DeadlineExceeded:
+        """현재 상태의 DeadlineExceeded (처음 한 번만 지표에 기록)"""
+        stage = stage or self.stage
+        reason = self.cancelled or REASON_TIMEOUT
+        elapsed = self.elapsed()
+        with self._lock:
+            first = not self._recorded
+            self._recorded = True
+        if first:
+            get_metrics().observe("deadline", stage, reason, elapsed, ok=False)
+        return DeadlineExceeded(stage, self.budget, elapsed, reason)
+
+    def check(self, stage: Optional[str] = None):
+        """
+        Raises:
+            DeadlineExceeded: 마감이 지났거나 취소된 경우
+        """
+        if self.expired:
+            raise self.error(stage)
+
+    def timeout(self, default: Optional[float] = None, stage: Optional[str] = None) -> float:
+        """기본 제한 시간과 남은 시간 중 짧은 값 (마감이 지났으면 DeadlineExceeded)"""
+        self.check(stage)
+        remaining = self.remaining()
+        return remaining if default is None else min(default, remaining)
+
+
+# 현재 작업의 마감 (작업을 실행하는 스레드/태스크 단위)
+_current: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar("deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    """현재 작업의 마감 (없으면 None)"""
+    return _current.get()
+
+
+@contextmanager
+def activate(deadline: Optional[Deadline]) -> Iterator[Optional[Deadline]]:
+    """블록 안의 호출에 마감 적용"""
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+def bounded_timeout(default: float) -> float:
+    """
+    하위 호출 제한 시간 (마감이 있으면 남은 시간으로 줄임)
+
+    Raises:
+        DeadlineExceeded: 마감이 이미 지난 경우
+    """
+    deadline = _current.get()
+    return default if deadline is None else deadline.timeout(default)
+
+
+def check_deadline(stage: Optional[str] = None):
+    """
+    마감 확인 (마감이 없으면 아무것도 하지 않음)
+
+    Raises:
+        DeadlineExceeded: 마감이 지났거나 취소된 경우
+    """
+    deadline = _current.get()
+    if deadline is not None:
+        deadline.check(stage)
+
+
+def wait_event(event: threading.Event, timeout: float) -> bool:
+    """
+    이벤트 대기 (마감이 있으면 짧게 나눠 기다리며 취소되면 바로 돌아옴)
+
+    Returns:
+        이벤트가 설정되었는지
+    """
+    deadline = _current.get()
+    if deadline is None:
+        return event.wait(timeout)
+    end = time.monotonic() + timeout
+    while True:
+        left = end - time.monotonic()
+        if left <= 0 or deadline.expired:
+            return event.is_set()
+        if event.wait(min(left, _WAIT_SLICE)):
+            return True
+
+
+def sleep(seconds: float, stage: Optional[str] = None):
+    """
+    마감을 확인하며 대기 (남은 시간보다 길게 자지 않고, 취소되면 바로 돌아옴)
+
+    Args:
+        seconds: 대기 시간 (초)
+        stage: 마감을 넘겼을 때 보고할 단계 (None이면 현재 단계)
+
+    Raises:
+        DeadlineExceeded: 기다리는 사이 마감이 지났거나 취소된 경우
+    """
+    deadline = _current.get()
+    if deadline is None:
+        time.sleep(seconds)
+        return
+    wait_event(threading.Event(), min(seconds, deadline.remaining()))
+    deadline.check(stage)
+
+
+@contextmanager
+def deadline_stage(name: str) -> Iterator[None]:
+    """
+    작업 단계 표시 (마감을 넘겨 실패한 예외는 이 단계의 DeadlineExceeded로 바꿈)
+
+    남은 시간으로 줄인 제한 시간 때문에 하위 호출이 연결/읽기 시간 초과 등으로 실패하면
+    원래 예외 대신 어느 단계에서 시간을 넘겼는지 알 수 있는 DeadlineExceeded를 올립니다.
+    """
+    deadline = _current.get()
+    if deadline is None:
+        yield
+        return
+    deadline.check(name)
+    previous = deadline.stage
+    deadline.stage = name
+    try:
+        yield
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        if deadline.expired:
+            raise deadline.error(name) from e
+        raise
+    finally:
+        deadline.stage = previous
+
+
+def job_budget(mode: str, requested: Optional[float] = None) -> float:
+    """작업 시간 예산 (요청 값 → 프로필의 timeout → JOB_TIMEOUT, JOB_TIMEOUT_MAX 이하)"""
+    if requested is None:
+        profile = get_profile_registry().get(mode)
+        requested = profile.get("timeout") if profile else None
+    return min(requested or JOB_TIMEOUT, JOB_TIMEOUT_MAX)
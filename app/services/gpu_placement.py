@@ -0,0 +1,286 @@
+"""
+GPU 인식 배치
+
+ComfyUI 백엔드(COMFYUI_URLS, GPU/호스트마다 하나)의 `/system_stats`를 주기적으로(GPU_STATS_INTERVAL) 수집하고,
+작업마다 프로필의 필요 VRAM(프로필의 vram_gb 또는 추정값 + GPU_VRAM_HEADROOM_GB)이 들어가는 백엔드를 고릅니다.
+
+백엔드가 쓸 수 있는 VRAM은 `vram_free + torch_vram_total - torch_vram_free`(ComfyUI가 이미 잡아 둔 메모리 포함,
+같은 GPU의 Ollama 같은 다른 프로세스가 쓰는 몫만 제외)로 봅니다. ComfyUI의 `vram_free`에는 torch 캐시의 여유분
+(`torch_vram_free`)이 이미 들어 있으므로 예약분에서 그만큼 빼서 두 번 세지 않습니다. ComfyUI는 프롬프트를 하나씩 실행하므로
+같은 백엔드의 작업끼리는 VRAM을 더하지 않고, 진행 중인 작업 수로 백엔드 사이에 작업을 나눕니다.
+들어가는 백엔드가 없으면 프로필의 fallback 프로필을 차례로 시도하고(GPU_PLACEMENT_FALLBACK),
+그래도 없으면 가장 작은 프로필을 여유가 가장 큰 백엔드에 보냅니다 (ComfyUI가 모델을 내려 가며 처리).
+통계가 없거나 오래된(GPU_STATS_MAX_AGE) 백엔드는 제외하며, 모든 백엔드의 통계가 없으면 진행 중 작업이 가장 적은 곳에 보냅니다.
+
+수집한 값은 지표 그룹 gpu(키: 백엔드 URL, 구간: vram_free_gb, vram_used_gb, external_used_gb, poll)에,
+배치 결과는 그룹 placement(키: 요청 프로필, 구간: placed, fallback, 값은 필요 VRAM GB)에 기록됩니다.
+"""
+import time
+import logging
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from app.core.config import (
+    COMFYUI_URLS, GPU_STATS_INTERVAL, GPU_STATS_MAX_AGE, GPU_VRAM_HEADROOM_GB, GPU_PLACEMENT_FALLBACK
+)
+from app.services.metrics import get_metrics
+from app.services.profiles import get_profile_registry
+from app.services.workflow import estimate_vram
+
+logger = logging.getLogger(__name__)
+
+GB = 1024 ** 3
+# 백엔드별로 보관하는 VRAM 추이 샘플 수
+_HISTORY_SAMPLES = 120
+
+
+class Placement:
+    """작업 하나의 배치 결과 (끝나면 release, with 블록으로 사용 가능)"""
+
+    def __init__(self, manager: "GpuPlacement", url: str, mode: str, requested: str, vram_gb: Optional[float]):
+        self.manager = manager
+        self.url = url
+        self.mode = mode
+        self.requested = requested
+        self.vram_gb = vram_gb
+        self._released = False
+
+    @property
+    def fallback(self) -> bool:
+        """요청과 다른(더 작은) 프로필로 바뀌었는지"""
+        return self.mode != self.requested
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self.manager._release(self.url)
+
+    def __enter__(self) -> "Placement":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+class GpuPlacement:
+    """ComfyUI 백엔드별 GPU 통계 수집과 작업 배치"""
+
+    def __init__(
+        self,
+        urls: List[str] = COMFYUI_URLS,
+        interval: float = GPU_STATS_INTERVAL,
+        max_age: float = GPU_STATS_MAX_AGE,
+        headroom_gb: float = GPU_VRAM_HEADROOM_GB,
+        fallback: bool = GPU_PLACEMENT_FALLBACK
+    ):
+        """
+        Args:
+            urls: ComfyUI 백엔드 URL 목록
+            interval: /system_stats 수집 간격 (초)
+            max_age: 배치에 쓰는 통계의 최대 나이 (초)
+            headroom_gb: 필요 VRAM 위에 남겨 둘 여유 (GB)
+            fallback: VRAM이 부족하면 fallback 프로필 사용
+        """
+        self.urls = list(dict.fromkeys(urls))
+        self.interval = interval
+        self.max_age = max_age
+        self.headroom_gb = headroom_gb
+        self.fallback = fallback
+        self._stats: Dict[str, Dict[str, Any]] = {url: {"checked_at": None, "error": None} for url in self.urls}
+        self._history: Dict[str, Deque[Tuple[float, float]]] = {
+            url: deque(maxlen=_HISTORY_SAMPLES) for url in self.urls
+        }
+        self._inflight: Dict[str, int] = {url: 0 for url in self.urls}
+        self._placed: Dict[str, int] = {url: 0 for url in self.urls}
+        self._fallbacks = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def poll(self, url: str) -> Dict[str, Any]:
+        """
+        백엔드 하나의 /system_stats 수집 (첫 번째 장치 기준)
+
+        Returns:
+            갱신된 백엔드 통계 (실패하면 error 포함)
+        """
+        import requests
+
+        metrics = get_metrics()
+        started = time.perf_counter()
+        try:
+            response = requests.get(f"{url}/system_stats", timeout=5)
+            response.raise_for_status()
+            devices = response.json().get("devices") or []
+            if not devices:
+                raise ValueError("장치 정보가 없습니다")
+            device = devices[0]
+            stats = {
+                "device": device.get("name"),
+                "type": device.get("type"),
+                "vram_total": int(device.get("vram_total") or 0),
+                "vram_free": int(device.get("vram_free") or 0),
+                "torch_vram_total": int(device.get("torch_vram_total") or 0),
+                "torch_vram_free": int(device.get("torch_vram_free") or 0),
+                "checked_at": time.time(),
+                "error": None,
+            }
+        except Exception as e:
+            metrics.observe("gpu", url, "poll", time.perf_counter() - started, ok=False)
+            with self._lock:
+                self._stats[url] = {**self._stats[url], "error": str(e)}
+            logger.debug(f"GPU 통계를 가져올 수 없습니다 ({url}): {e}")
+            return self._stats[url]
+
+        metrics.observe("gpu", url, "poll", time.perf_counter() - started)
+        used = stats["vram_total"] - stats["vram_free"]
+        torch_used = stats["torch_vram_total"] - stats["torch_vram_free"]
+        metrics.observe("gpu", url, "vram_free_gb", stats["vram_free"] / GB)
+        metrics.observe("gpu", url, "vram_used_gb", used / GB)
+        metrics.observe("gpu", url, "external_used_gb", max(0, used - torch_used) / GB)
+        with self._lock:
+            self._stats[url] = stats
+            self._history[url].append((stats["checked_at"], round(stats["vram_free"] / GB, 3)))
+        return stats
+
+    def refresh(self):
+        """모든 백엔드 통계 수집"""
+        for url in self.urls:
+            self.poll(url)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"GPU 통계 수집 실패: {e}")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """백그라운드 수집 시작"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, daemon=True, name="gpu-stats")
+        self._thread.start()
+
+    def stop(self):
+        """백그라운드 수집 중지"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    @staticmethod
+    def usable_gb(stats: Dict[str, Any]) -> float:
+        """ComfyUI가 쓸 수 있는 VRAM (GB, 다른 프로세스가 쓰는 몫 제외, vram_free에 든 torch 캐시 여유분은 한 번만 셈)"""
+        return (stats["vram_free"] + stats["torch_vram_total"] - stats["torch_vram_free"]) / GB
+
+    def _fresh(self, now: float) -> List[Tuple[str, float]]:
+        """최근 통계가 있는 백엔드와 쓸 수 있는 VRAM"""
+        return [
+            (url, self.usable_gb(stats))
+            for url, stats in self._stats.items()
+            if stats["error"] is None and stats["checked_at"] is not None and now - stats["checked_at"] <= self.max_age
+        ]
+
+    def healthy(self) -> List[str]:
+        """최근 /system_stats에 응답한 백엔드 URL"""
+        with self._lock:
+            return [url for url, _ in self._fresh(time.time())]
+
+    def place(self, mode: str) -> Placement:
+        """
+        프로필을 실행할 백엔드 고르기 (VRAM이 부족하면 fallback 프로필)
+
+        Args:
+            mode: 요청한 프로필 이름
+
+        Returns:
+            배치 결과 (작업이 끝나면 release)
+        """
+        if self._thread is None:
+            # 이 프로세스에서 처음 배치하면 수집을 시작하고 한 번은 기다림
+            self.start()
+            if all(stats["checked_at"] is None for stats in self._stats.values()):
+                self.refresh()
+
+        registry = get_profile_registry()
+        chain = [mode] + (registry.fallbacks(mode) if self.fallback else [])
+        needs = []
+        for name in chain:
+            profile = registry.get(name)
+            if profile is not None:
+                needs.append((name, estimate_vram(profile) + self.headroom_gb))
+
+        with self._lock:
+            fresh = self._fresh(time.time())
+            if not fresh or not needs:
+                url = min(self.urls, key=lambda u: self._inflight[u])
+                return self._reserve(url, mode, mode, None)
+            for name, need in needs:
+                fits = [(url, usable) for url, usable in fresh if usable >= need]
+                if fits:
+                    url = min(fits, key=lambda f: (self._inflight[f[0]], -f[1]))[0]
+                    return self._reserve(url, name, mode, need)
+            # 어느 프로필도 들어가지 않으면 가장 작은 프로필을 여유가 가장 큰 백엔드에
+            name, need = needs[-1]
+            url = max(fresh, key=lambda f: f[1])[0]
+            logger.warning(f"VRAM이 부족합니다: {mode} → {name} ({need:.1f}GB 필요, {url})")
+            return self._reserve(url, name, mode, need)
+
+    def _reserve(self, url: str, mode: str, requested: str, need: Optional[float]) -> Placement:
+        """잠금 안에서 호출"""
+        self._inflight[url] += 1
+        self._placed[url] += 1
+        if mode != requested:
+            self._fallbacks += 1
+            logger.info(f"VRAM 부족으로 프로필을 바꿉니다: {requested} → {mode} ({url})")
+        if need is not None:
+            get_metrics().observe("placement", requested, "fallback" if mode != requested else "placed", need)
+        return Placement(self, url, mode, requested, need)
+
+    def _release(self, url: str):
+        with self._lock:
+            self._inflight[url] = max(0, self._inflight[url] - 1)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """백엔드별 GPU 통계, 쓸 수 있는 VRAM, 진행 중 작업 수, VRAM 추이"""
+        now = time.time()
+        with self._lock:
+            backends = []
+            for url in self.urls:
+                stats = dict(self._stats[url])
+                checked_at = stats.get("checked_at")
+                if stats.get("vram_total"):
+                    stats["usable_gb"] = round(self.usable_gb(stats), 3)
+                backends.append({
+                    "url": url,
+                    **stats,
+                    "age_seconds": round(now - checked_at, 3) if checked_at else None,
+                    "inflight": self._inflight[url],
+                    "placed": self._placed[url],
+                    "vram_free_gb_history": list(self._history[url]),
+                })
+            return {
+                "interval": self.interval,
+                "max_age": self.max_age,
+                "headroom_gb": self.headroom_gb,
+                "fallback": self.fallback,
+                "fallbacks": self._fallbacks,
+                "backends": backends,
+            }
+
+
+# 전역 GPU 배치 인스턴스
+_gpu_placement: Optional[GpuPlacement] = None
+_gpu_placement_lock = threading.Lock()
+
+
+def get_gpu_placement() -> GpuPlacement:
+    """전역 GPU 배치 인스턴스 반환 (싱글톤)"""
+    global _gpu_placement
+    with _gpu_placement_lock:
+        if _gpu_placement is None:
+            _gpu_placement = GpuPlacement()
+        return _gpu_placement
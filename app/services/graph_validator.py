@@ -0,0 +1,295 @@
+"""
+ComfyUI 워크플로 사전 검증
+
+백엔드가 시작될 때마다 ComfyUI `/object_info`(노드 정의)를 한 번 받아 캐시하고, 제출할 워크플로의
+노드 타입, 입력 이름, 선택지(enum) 값, 숫자 범위, 링크 타입을 로컬에서 확인합니다.
+잘못된 노드나 샘플러 이름은 ComfyUI 큐를 거치지 않고 바로 구조화된 오류로 거절됩니다.
+
+캐시에 없는 노드나 선택지 값이 나오면 커스텀 노드나 모델이 새로 추가되었을 수 있으므로
+최소 간격(OBJECT_INFO_REFRESH_INTERVAL)을 두고 한 번 다시 받아 확인합니다.
+/object_info를 받을 수 없으면 검증을 건너뛰고 ComfyUI의 검증에 맡깁니다.
+백엔드(COMFYUI_URLS)마다 설치된 커스텀 노드와 모델이 다를 수 있으므로 캐시는 백엔드 URL별로 따로 둡니다.
+"""
+import time
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+from app.core.config import COMFYUI_URL, OBJECT_INFO_REFRESH_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+# 다시 받으면 해결될 수 있는 오류 (새 커스텀 노드, 새 모델 파일)
+_REFRESHABLE_CODES = ("invalid_node_type", "value_not_in_list")
+# 오류 메시지에 포함하는 선택지 최대 개수
+_MAX_ALLOWED_VALUES = 50
+
+
+class GraphValidationError(ValueError):
+    """워크플로가 ComfyUI 노드 정의와 맞지 않음 (제출 전에 거절)"""
+
+    def __init__(self, errors: List[Dict[str, Any]]):
+        self.errors = errors
+        summary = "; ".join(error["message"] for error in errors[:3])
+        if len(errors) > 3:
+            summary += f" 외 {len(errors) - 3}개"
+        super().__init__(f"워크플로 검증 실패: {summary}")
+
+
+def _input_spec(definition: Dict[str, Any], name: str) -> Optional[list]:
+    inputs = definition.get("input", {})
+    for group in ("required", "optional", "hidden"):
+        spec = (inputs.get(group) or {}).get(name)
+        if spec is not None:
+            return spec if isinstance(spec, (list, tuple)) else [spec]
+    return None
+
+
+def _options(spec: list) -> Optional[list]:
+    """선택지 입력이면 선택지 목록 (구형 [[...]] 형식과 COMBO 형식 모두 지원)"""
+    if not spec:
+        return None
+    if isinstance(spec[0], list):
+        return spec[0]
+    if spec[0] == "COMBO" and len(spec) > 1 and isinstance(spec[1], dict):
+        return spec[1].get("options")
+    return None
+
+
+def _is_link(value: Any) -> bool:
+    return (
+        isinstance(value, list) and len(value) == 2
+        and isinstance(value[0], str) and isinstance(value[1], int) and not isinstance(value[1], bool)
+    )
+
+
+def _types_match(expected: str, actual: str) -> bool:
+    if expected == "*" or actual == "*":
+        return True
+    return bool(set(expected.split(",")) & set(actual.split(",")))
+
+
+def _check_value(spec: list, value: Any) -> Optional[Dict[str, Any]]:
+    """리터럴 입력 값 확인 (오류가 없으면 None)"""
+    options = _options(spec)
+    if options is not None:
+        if value not in options:
+            return {
+                "code": "value_not_in_list",
+                "message": f"허용되지 않는 값입니다: {value!r}",
+                "value": value,
+                "allowed": options[:_MAX_ALLOWED_VALUES]
+            }
+        return None
+
+    kind = spec[0] if spec else None
+    extra = spec[1] if len(spec) > 1 and isinstance(spec[1], dict) else {}
+    if kind == "INT":
+        valid = isinstance(value, int) and not isinstance(value, bool)
+    elif kind == "FLOAT":
+        valid = isinstance(value, (int, float)) and not isinstance(value, bool)
+    elif kind == "STRING":
+        valid = isinstance(value, str)
+    elif kind == "BOOLEAN":
+        valid = isinstance(value, bool)
+    else:
+        # 링크로만 받는 타입(MODEL, LATENT 등)에 리터럴이 들어온 경우
+        return {
+            "code": "invalid_input_type",
+            "message": f"{kind} 입력은 다른 노드의 출력과 연결해야 합니다",
+            "value": value
+        }
+
+    if not valid:
+        return {"code": "invalid_input_type", "message": f"{kind} 값이 아닙니다: {value!r}", "value": value}
+    if kind in ("INT", "FLOAT"):
+        if extra.get("min") is not None and value < extra["min"]:
+            return {"code": "value_smaller_than_min", "message": f"최솟값 {extra['min']}보다 작습니다: {value}", "value": value}
+        if extra.get("max") is not None and value > extra["max"]:
+            return {"code": "value_bigger_than_max", "message": f"최댓값 {extra['max']}보다 큽니다: {value}", "value": value}
+    return None
+
+
+def validate_graph(graph: Dict[str, Any], object_info: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    워크플로(API 형식) 검증
+
+    Args:
+        graph: 노드 ID → {"class_type", "inputs"}
+        object_info: ComfyUI /object_info 응답
+
+    Returns:
+        오류 목록 (각 항목: node, class_type, input, code, message 및 선택적으로 value, allowed)
+    """
+    errors: List[Dict[str, Any]] = []
+
+    def error(node_id, class_type, input_name, **details):
+        errors.append({"node": node_id, "class_type": class_type, "input": input_name, **details})
+
+    has_output = False
+    for node_id, node in graph.items():
+        class_type = node.get("class_type") if isinstance(node, dict) else None
+        if not isinstance(class_type, str):
+            error(node_id, None, None, code="invalid_node", message=f"노드 {node_id}에 class_type이 없습니다")
+            continue
+        definition = object_info.get(class_type)
+        if definition is None:
+            error(node_id, class_type, None, code="invalid_node_type",
+                  message=f"ComfyUI에 없는 노드 타입입니다: {class_type}")
+            continue
+        has_output = has_output or bool(definition.get("output_node"))
+
+        inputs = node.get("inputs") or {}
+        for name in (definition.get("input", {}).get("required") or {}):
+            if name not in inputs:
+                error(node_id, class_type, name, code="required_input_missing",
+                      message=f"{class_type}.{name} 입력이 없습니다")
+
+        for name, value in inputs.items():
+            spec = _input_spec(definition, name)
+            if spec is None:
+                error(node_id, class_type, name, code="unknown_input",
+                      message=f"{class_type}에 {name} 입력이 없습니다")
+                continue
+
+            if not _is_link(value):
+                problem = _check_value(spec, value)
+                if problem:
+                    problem["message"] = f"{class_type}.{name}: {problem['message']}"
+                    error(node_id, class_type, name, **problem)
+                continue
+
+            source_id, output_index = value
+            source = graph.get(source_id)
+            source_definition = object_info.get(source.get("class_type")) if isinstance(source, dict) else None
+            if source is None:
+                error(node_id, class_type, name, code="invalid_link",
+                      message=f"{class_type}.{name}: 연결된 노드 {source_id}가 없습니다")
+                continue
+            if source_definition is None:
+                # 원본 노드 자체의 오류로 이미 보고됨
+                continue
+            outputs = source_definition.get("output", [])
+            if not 0 <= output_index < len(outputs):
+                error(node_id, class_type, name, code="invalid_link",
+                      message=f"{class_type}.{name}: {source_id} 노드에 출력 {output_index}이(가) 없습니다")
+                continue
+            expected = spec[0] if isinstance(spec[0], str) else None
+            if expected and expected != "COMBO" and not _types_match(expected, outputs[output_index]):
+                error(node_id, class_type, name, code="return_type_mismatch",
+                      message=f"{class_type}.{name}: {expected} 입력에 {outputs[output_index]} 출력이 연결되었습니다",
+                      value=value)
+
+    if graph and not has_output and not any(e["code"] == "invalid_node_type" for e in errors):
+        error(None, None, None, code="prompt_no_outputs", message="출력 노드(SaveImage 등)가 없습니다")
+    return errors
+
+
+class ObjectInfoCache:
+    """ComfyUI /object_info 캐시 (백엔드 시작마다 한 번 받음)"""
+
+    def __init__(self, base_url: str, refresh_interval: float = OBJECT_INFO_REFRESH_INTERVAL):
+        """
+        Args:
+            base_url: ComfyUI 서버 URL
+            refresh_interval: 다시 받는 최소 간격 (초)
+        """
+        self.base_url = base_url
+        self.refresh_interval = refresh_interval
+        self._object_info: Optional[Dict[str, Any]] = None
+        self._fetched_at: Optional[float] = None
+        self._backend_id: Any = None
+        self._lock = threading.Lock()
+
+    def observe_backend(self, backend_id: Any):
+        """
+        백엔드 식별자(시작 시각 등) 기록. 바뀌면 캐시를 버림
+
+        Args:
+            backend_id: 서비스 상태의 ComfyUI started_at (알 수 없으면 None)
+        """
+        with self._lock:
+            if backend_id is not None and backend_id != self._backend_id:
+                if self._backend_id is not None:
+                    logger.info("ComfyUI가 다시 시작되어 노드 정의 캐시를 비웁니다")
+                self._backend_id = backend_id
+                self._object_info = None
+                self._fetched_at = None
+
+    def invalidate(self):
+        """캐시 비우기"""
+        with self._lock:
+            self._object_info = None
+            self._fetched_at = None
+
+    def _fetch(self) -> Optional[Dict[str, Any]]:
+        import requests
+
+        try:
+            response = requests.get(f"{self.base_url}/object_info", timeout=10)
+            response.raise_for_status()
+            object_info = response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.warning(f"ComfyUI 노드 정의를 가져올 수 없어 워크플로 사전 검증을 건너뜁니다: {e}")
+            return None
+        logger.info(f"ComfyUI 노드 정의 캐시: {len(object_info)}개")
+        return object_info
+
+    def get(self, refresh: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        노드 정의 조회
+
+        Args:
+            refresh: 최소 간격이 지났으면 다시 받음
+
+        Returns:
+            /object_info 응답 (받을 수 없으면 None)
+        """
+        with self._lock:
+            now = time.monotonic()
+            stale = self._fetched_at is None or now - self._fetched_at >= self.refresh_interval
+            if (self._object_info is None or refresh) and stale:
+                # 실패한 경우에도 시각을 기록해 요청마다 다시 시도하지 않음
+                self._fetched_at = now
+                object_info = self._fetch()
+                if object_info is not None:
+                    self._object_info = object_info
+            return self._object_info
+
+    def validate(self, graph: Dict[str, Any]):
+        """
+        워크플로 검증
+
+        Raises:
+            GraphValidationError: 노드 정의와 맞지 않는 경우
+        """
+        object_info = self.get()
+        if object_info is None:
+            return
+        errors = validate_graph(graph, object_info)
+        if any(error["code"] in _REFRESHABLE_CODES for error in errors):
+            refreshed = self.get(refresh=True)
+            if refreshed is not object_info:
+                errors = validate_graph(graph, refreshed)
+        if errors:
+            raise GraphValidationError(errors)
+
+
+# 백엔드 URL별 노드 정의 캐시 인스턴스
+_object_info_caches: Dict[str, ObjectInfoCache] = {}
+_object_info_cache_lock = threading.Lock()
+
+
+def get_object_info_cache(url: Optional[str] = None) -> ObjectInfoCache:
+    """
+    백엔드의 노드 정의 캐시 인스턴스 반환 (URL별 싱글톤)
+
+    Args:
+        url: ComfyUI 백엔드 URL (None이면 COMFYUI_URL)
+    """
+    url = (url or COMFYUI_URL).rstrip("/")
+    with _object_info_cache_lock:
+        cache = _object_info_caches.get(url)
+        if cache is None:
+            cache = _object_info_caches[url] = ObjectInfoCache(url)
+        return cache
@@ -1,73 +1,106 @@
 """
 이미지 생성 서비스
+
+LLM 호출은 공유 LLM 클라이언트(app.services.llm_client, 백엔드는 LLM_BACKEND)를 사용합니다.
+프롬프트 생성/개선은 스트리밍으로 받으면서 CLIP 토큰 예산(CLIP_TOKEN_BUDGET)을 넘는 순간 생성을 멈추고,
+구조화 출력({"prompt": "..."})에서 프롬프트만 추출합니다.
+ComfyUI 백엔드는 스케줄러 슬롯을 얻은 뒤 GPU 배치(app.services.gpu_placement)가 VRAM 여유를 보고 고릅니다.
+작업 마감(app.services.deadline)이 걸려 있으면 단계마다 남은 시간 안에서만 기다리고, 완료 대기 중에 마감이 지나면
+ComfyUI 프롬프트를 취소해 GPU를 바로 비웁니다.
 """
 import os
 import time
 import base64
-import requests
-import ollama
 from typing import List, Optional
-from app.core.config import COMFYUI_URL, DOWNLOAD_DIR, OLLAMA_MODEL, OLLAMA_VISION_MODEL
+from app.core.config import (
+    COMFYUI_URL, COMFYUI_VALIDATE_GRAPHS, DOWNLOAD_DIR, UPSCALE_MODEL, OLLAMA_MODEL, OLLAMA_VISION_MODEL,
+    OLLAMA_VISION_TIMEOUT, OLLAMA_PROMPT_NUM_PREDICT, OLLAMA_STRUCTURED_OUTPUT, CLIP_TOKEN_BUDGET
+)
+from app.core.tracing import span, inject_context
 from app.services.model_checker import ModelChecker
+from app.services.model_index import get_model_index
+from app.services.graph_validator import get_object_info_cache
+from app.services.admission import get_limiter
+from app.services.scheduler import get_scheduler
+from app.services.comfyui_client import ComfyUIClient
+from app.services.deadline import DeadlineExceeded, deadline_stage
+from app.services.gpu_placement import get_gpu_placement
+from app.services.image_store import get_image_store
+from app.services.job_store import get_job_store, STAGE_PROMPT, STAGE_DOWNLOADING
+from app.services.metrics import get_metrics
+from app.services.llm_client import get_llm_client
+from app.services.prompt_budget import PROMPT_SCHEMA, extract_prompt, get_clip_tokenizer
+from app.services.profiles import get_profile_registry
+from app.services.workflow import build_workflow, estimate_cost
+
+# 생성된 프롬프트 뒤에 붙이는 HyperWise 스타일 키워드
+HYPERWISE_STYLE = (
+    "8k uhd, ultra-sharp detail, crisp edges, micro-texture, "
+    "premium cinematic lighting, 100mm macro lens, soft rim light, "
+    "studio-grade commercial photography, realistic reflections"
+)
+# 스타일 키워드를 빼고 LLM 프롬프트에 남기는 최소 CLIP 토큰 수
+MIN_PROMPT_TOKENS = 24
+
+# 프롬프트 생성 지시문
+CREATIVE_DIRECTOR = """
+        You are a world-class creative director.
+        Generate cinematic, premium SDXL prompts with ultra sharp detail.
+        Include: lighting, texture, lens, mood. Keep it compact.
+        """
+
 
+def prompt_rules(budget: int, structured: bool = OLLAMA_STRUCTURED_OUTPUT) -> str:
+    """프롬프트 길이/출력 형식 지시문"""
+    rules = f"Use at most {budget} CLIP tokens (about {budget * 2 // 3} words) of comma-separated phrases."
+    if structured:
+        rules += ' Respond only with JSON: {"prompt": "<prompt>"}.'
+    return rules
 
-# MODE SETTINGS (Karras + Refiner + UpScale)
-MODES = {
-    "fast": {
-        "width": 832,
-        "height": 832,
-        "steps": 28,
-        "cfg": 6.5,
-        "sampler": "dpmpp_sde_karras",
-        "refiner_steps": 10,
-        "upscale": False
-    },
-    "balanced": {
-        "width": 1024,
-        "height": 1024,
-        "steps": 40,
-        "cfg": 7.5,
-        "sampler": "dpmpp_sde_karras",
-        "refiner_steps": 15,
-        "upscale": False
-    },
-    "high_quality": {
-        "width": 1024,
-        "height": 1024,
-        "steps": 50,
-        "cfg": 8.0,
-        "sampler": "dpmpp_sde_karras",
-        "refiner_steps": 20,
-        "upscale": True
-    }
-}
+
+def base_prompt_budget() -> int:
+    """생성 프롬프트의 CLIP 토큰 예산 (스타일 키워드가 들어갈 자리를 뺀 값)"""
+    style_tokens = get_clip_tokenizer().count(", " + HYPERWISE_STYLE)
+    return max(MIN_PROMPT_TOKENS, CLIP_TOKEN_BUDGET - style_tokens)
 
 
 class ImageGenerationService:
     """이미지 생성 서비스"""
     
-    def __init__(self, base_model: Optional[str] = None, refiner_model: Optional[str] = None):
+    def __init__(
+        self,
+        base_model: Optional[str] = None,
+        refiner_model: Optional[str] = None,
+        api_key: Optional[str] = None,
+        priority: Optional[str] = None,
+        job_id: Optional[str] = None
+    ):
         """
         Args:
             base_model: 기본 모델 파일명 (None이면 기본값 사용)
             refiner_model: 리파이너 모델 파일명 (None이면 기본값 사용)
+            api_key: 요청자 API 키 (스케줄러의 테넌트/우선순위 구분용)
+            priority: 스케줄러 우선순위 클래스 (None이면 모드로 결정)
+            job_id: 작업 저장소의 작업 ID (지정하면 진행 단계를 기록)
         """
         self.comfy_url = COMFYUI_URL
+        self.api_key = api_key
+        self.priority = priority
+        self.job_id = job_id
         self.download_dir = DOWNLOAD_DIR
         self.ollama_model = OLLAMA_MODEL
         self.ollama_vision_model = OLLAMA_VISION_MODEL
+        self.comfy = ComfyUIClient(self.comfy_url, self.download_dir)
         
         # 모델 검증기 초기화
         self.model_checker = ModelChecker()
         
-        # 모델 파일명 설정 (사용 가능한 모델 자동 탐지)
+        # 모델 파일명 설정 (safetensors 헤더로 판별한 아키텍처 기준 자동 탐지)
         if base_model:
             self.base_model = base_model
         else:
             # 기본 모델 자동 탐지
-            available = self.model_checker.get_available_models()
-            # sdxl-base, sdxl_base, sdxl-base-1.0 등 다양한 이름 패턴 시도
-            base_candidates = [m for m in available if "sdxl" in m.lower() and ("base" in m.lower() or "1.0" in m.lower()) and "refiner" not in m.lower()]
+            base_candidates = self.model_checker.find_models("sdxl_base")
             if base_candidates:
                 self.base_model = base_candidates[0]
             else:
@@ -77,13 +110,19 @@ class ImageGenerationService:
             self.refiner_model = refiner_model
         else:
             # 리파이너 모델 자동 탐지
-            available = self.model_checker.get_available_models()
-            refiner_candidates = [m for m in available if "sdxl" in m.lower() and "refiner" in m.lower()]
+            refiner_candidates = self.model_checker.find_models("sdxl_refiner")
             if refiner_candidates:
                 self.refiner_model = refiner_candidates[0]
             else:
                 self.refiner_model = "sdxl_refiner_1.0.safetensors"  # 기본값
         
+        # 업스케일러 모델 (업스케일 프로필에서 모델을 지정하지 않은 경우, models/upscale_models에서 자동 탐지)
+        if UPSCALE_MODEL:
+            self.upscale_model = UPSCALE_MODEL
+        else:
+            upscale_candidates = self.model_checker.get_available_models("upscale_models")
+            self.upscale_model = upscale_candidates[0] if upscale_candidates else "RealESRGAN_x2plus.pth"
+        
         # 모델 검증
         self._validate_models()
     
@@ -115,200 +154,164 @@ class ImageGenerationService:
             logger.warning(f"리파이너 모델 파일 오류: {refiner_result.get('error', '알 수 없는 오류')}. 리파이너 없이 진행합니다.")
             self.refiner_model = None
     
-    def _llama_call(self, prompt: str, model: str = None) -> str:
-        """LLaMA 모델 호출"""
+    def _llama_call(self, prompt: str, budget: int, fallback: str = "", model: str = None) -> str:
+        """
+        LLaMA 모델 호출 (프롬프트 생성용)
+        
+        스트리밍으로 받으면서 추출한 프롬프트가 budget CLIP 토큰을 넘으면 생성을 멈추고 잘라냅니다.
+        
+        Args:
+            prompt: LLM 지시문
+            budget: 결과 프롬프트 최대 CLIP 토큰 수
+            fallback: 응답에서 프롬프트를 찾지 못한 경우 사용할 텍스트
+            model: 모델 이름 (None이면 기본값)
+            
+        Returns:
+            추출한 프롬프트
+        """
         if model is None:
             model = self.ollama_model
+        tokenizer = get_clip_tokenizer()
         
-        res = ollama.chat(
-            model=model,
-            messages=[{"role": "user", "content": prompt}]
-        )
-        return res["message"]["content"]
+        attributes = {"llm.model": model, "llm.prompt_chars": len(prompt), "llm.clip_budget": budget}
+        with get_limiter("llm").slot(), span("ollama.chat", attributes) as s:
+            res = get_llm_client().stream_chat(
+                model=model,
+                messages=[{"role": "user", "content": prompt}],
+                stop=lambda content: tokenizer.count(extract_prompt(content)) > budget,
+                options={"num_predict": OLLAMA_PROMPT_NUM_PREDICT},
+                format=PROMPT_SCHEMA if OLLAMA_STRUCTURED_OUTPUT else None
+            )
+            result = tokenizer.truncate(extract_prompt(res["content"]) or fallback, budget)
+            if s is not None:
+                s.set_attribute("llm.response_chars", len(res["content"]))
+                s.set_attribute("llm.eval_count", res["eval_count"] or 0)
+                s.set_attribute("llm.stopped_early", res["stopped"])
+                s.set_attribute("llm.clip_tokens", tokenizer.count(result))
+        return result
     
     def _build_prompt(self, user_text: str) -> str:
-        """프롬프트 빌드"""
-        system = """
-        You are a world-class creative director.
-        Generate cinematic, premium SDXL prompts with ultra sharp detail.
-        Include: lighting, texture, lens, mood. Keep it compact.
-        """
-        return self._llama_call(system + "\nUser request: " + user_text)
+        """프롬프트 빌드 (스타일 키워드가 들어갈 자리를 남긴 CLIP 토큰 예산)"""
+        budget = base_prompt_budget()
+        system = CREATIVE_DIRECTOR + prompt_rules(budget)
+        with deadline_stage("prompt"):
+            return self._llama_call(system + "\nUser request: " + user_text, budget, fallback=user_text)
     
     def _apply_hyperwise_style(self, prompt_text: str) -> str:
         """HyperWise 스타일 적용"""
-        enhance = (
-            "8k uhd, ultra-sharp detail, crisp edges, micro-texture, "
-            "premium cinematic lighting, 100mm macro lens, soft rim light, "
-            "studio-grade commercial photography, realistic reflections"
-        )
-        return f"{prompt_text}, {enhance}"
+        return f"{prompt_text}, {HYPERWISE_STYLE}"
     
-    def _wait_for_images(self, prompt_id: str) -> List[str]:
-        """이미지 생성 완료 대기"""
-        max_wait = 300  # 최대 5분 대기
-        wait_time = 0
-        
-        while wait_time < max_wait:
-            try:
-                response = requests.get(f"{self.comfy_url}/history/{prompt_id}", timeout=10)
-                response.raise_for_status()  # HTTP 오류 확인
-                
-                # 빈 응답 체크
-                if not response.text or not response.text.strip():
-                    time.sleep(0.25)
-                    wait_time += 0.25
-                    continue
-                
-                res = response.json()
-                if prompt_id in res:
-                    try:
-                        imgs = res[prompt_id]["outputs"]["save"]["images"]
-                        return [img["filename"] for img in imgs]
-                    except (KeyError, TypeError) as e:
-                        # 출력 구조가 예상과 다를 수 있음
-                        time.sleep(0.25)
-                        wait_time += 0.25
-                        continue
-            except requests.exceptions.JSONDecodeError as e:
-                # JSON 파싱 오류 - 빈 응답이나 HTML 응답일 수 있음
-                time.sleep(0.25)
-                wait_time += 0.25
-                continue
-            except requests.exceptions.RequestException as e:
-                # 네트워크 오류
-                time.sleep(0.25)
-                wait_time += 0.25
-                continue
-            except Exception as e:
-                # 기타 오류
-                time.sleep(0.25)
-                wait_time += 0.25
-                continue
-            
-            time.sleep(0.25)
-            wait_time += 0.25
+    def _profile(self, mode: str) -> dict:
+        """
+        생성 프로필 조회
         
-        raise TimeoutError(f"이미지 생성 시간 초과 (prompt_id: {prompt_id})")
+        Raises:
+            ValueError: 프로필이 없는 경우
+        """
+        profile = get_profile_registry().get(mode)
+        if profile is None:
+            raise ValueError(f"알 수 없는 생성 프로필입니다: {mode} (가능: {', '.join(get_profile_registry().names())})")
+        return profile
     
-    def _download_image(self, filename: str, save_dir: str = None) -> str:
-        """이미지 다운로드"""
-        if save_dir is None:
-            save_dir = self.download_dir
-        
-        os.makedirs(save_dir, exist_ok=True)
-        url = f"{self.comfy_url}/view/{filename}"
-        
-        img = requests.get(url).content
-        path = os.path.join(save_dir, filename)
-        
-        with open(path, "wb") as f:
-            f.write(img)
-            f.flush()
-            os.fsync(f.fileno())
+    def _build_graph(self, prompt: str, profile: dict, prefix: str = "hyperwise") -> dict:
+        """ComfyUI 워크플로 구성 (API 형식)"""
+        return {
+            "prompt": build_workflow(
+                profile,
+                prompt,
+                base_model=self.base_model,
+                refiner_model=self.refiner_model,
+                upscale_model=self.upscale_model,
+                prefix=prefix
+            )
+        }
+    
+    @staticmethod
+    def _validate_graph(graph: dict, url: Optional[str] = None):
+        """
+        워크플로 사전 검증 (LLM 호출과 ComfyUI 제출 전에 실패하도록)
         
-        # Wait until file is fully saved
-        for _ in range(20):
-            if os.path.exists(path) and os.path.getsize(path) > 1000:
-                break
-            time.sleep(0.1)
+        모델 인벤토리와 대조한 뒤, 캐시된 ComfyUI 노드 정의로 노드 타입/입력/선택지/링크 타입을 확인합니다.
         
-        if os.path.getsize(path) < 1000:
-            raise Exception(f"Image incomplete: {path}")
+        Args:
+            graph: 워크플로
+            url: 노드 정의를 대조할 ComfyUI 백엔드 (None이면 COMFYUI_URL)
         
-        return path
+        Raises:
+            MissingModelsError: 누락된 모델이 있는 경우
+            GraphValidationError: 노드 정의와 맞지 않는 경우
+        """
+        get_model_index().check_graph(graph)
+        if COMFYUI_VALIDATE_GRAPHS:
+            with span("comfyui.validate", {"comfyui.nodes": len(graph)}):
+                get_object_info_cache(url).validate(graph)
     
     def _generate_image(self, prompt: str, mode: str = "high_quality", prefix: str = "hyperwise") -> List[str]:
         """이미지 생성 (내부 메서드)"""
-        cfg = MODES[mode]
-        
-        graph = {
-            "prompt": {
-                "base_model": {
-                    "class_type": "CheckpointLoaderSimple",
-                    "inputs": {"ckpt_name": self.base_model}
-                },
-                "latent": {
-                    "class_type": "EmptyLatentImage",
-                    "inputs": {
-                        "width": cfg["width"],
-                        "height": cfg["height"],
-                        "batch_size": 1
-                    }
-                },
-                "positive": {
-                    "class_type": "CLIPTextEncode",
-                    "inputs": {"text": prompt, "clip": ["base_model", 1]}
-                },
-                "negative": {
-                    "class_type": "CLIPTextEncode",
-                    "inputs": {
-                        "text": "blurry, low-resolution, messy, smudged",
-                        "clip": ["base_model", 1]
-                    }
-                },
-                "sampler_base": {
-                    "class_type": "KSampler",
-                    "inputs": {
-                        "model": ["base_model", 0],
-                        "seed": 1234,
-                        "steps": cfg["steps"],
-                        "cfg": cfg["cfg"],
-                        "scheduler": "karras",
-                        "sampler_name": cfg["sampler"],
-                        "denoise": 1.0,
-                        "latent_image": ["latent", 0],
-                        "positive": ["positive", 0],
-                        "negative": ["negative", 0]
-                    }
-                },
-                "decode": {
-                    "class_type": "VAEDecode",
-                    "inputs": {"samples": ["sampler_base", 0], "vae": ["base_model", 2]}
-                },
-                "upscale": {
-                    "class_type": "ESRGANUpscale",
-                    "inputs": {
-                        "image": ["decode", 0],
-                        "scale": 2
-                    }
-                } if cfg["upscale"] else None,
-                "save": {
-                    "class_type": "SaveImage",
-                    "inputs": {
-                        "images": ["upscale", 0] if cfg["upscale"] else ["decode", 0],
-                        "filename_prefix": prefix
-                    }
-                }
-            }
-        }
+        profile = self._profile(mode)
+        graph = self._build_graph(prompt, profile, prefix)
+        self._validate_graph(graph["prompt"])
+        metrics = get_metrics()
         
-        # Remove None (if upscale is disabled)
-        graph["prompt"] = {k: v for k, v in graph["prompt"].items() if v is not None}
+        # 트레이스 컨텍스트를 ComfyUI로 전파 (extra_data는 히스토리에 그대로 보존됨)
+        trace_context = inject_context()
+        if trace_context:
+            graph["extra_data"] = {"trace_context": trace_context}
         
-        try:
-            response = requests.post(f"{self.comfy_url}/prompt", json=graph, timeout=30)
-            response.raise_for_status()
-            
-            # 빈 응답 체크
-            if not response.text or not response.text.strip():
-                raise Exception("ComfyUI가 빈 응답을 반환했습니다")
+        # 스케줄러가 허락한 뒤 VRAM이 충분한 백엔드에 제출 → 대기 → 다운로드 (동시 제출 수 제한 + 우선순위)
+        with get_scheduler().slot(
+            mode,
+            api_key=self.api_key,
+            cost=estimate_cost(profile),
+            priority=self.priority
+        ) as ticket, get_gpu_placement().place(mode) as placement:
+            metrics.observe("profiles", mode, "queue_wait", ticket.waited())
+            if placement.fallback:
+                # VRAM이 부족해 더 작은 프로필로 다시 구성
+                extra_data = graph.get("extra_data")
+                graph = self._build_graph(prompt, self._profile(placement.mode), prefix)
+                self._validate_graph(graph["prompt"], placement.url)
+                if extra_data:
+                    graph["extra_data"] = extra_data
+            elif placement.url != self.comfy_url:
+                # 실제로 제출할 백엔드의 노드 정의로 다시 확인 (백엔드마다 커스텀 노드/모델이 다를 수 있음)
+                self._validate_graph(graph["prompt"], placement.url)
+            if ticket.front:
+                graph["front"] = True
+            comfy = self.comfy if placement.url == self.comfy_url else ComfyUIClient(placement.url, self.download_dir)
+            with span("comfyui.execute", {
+                "comfyui.url": placement.url,
+                "comfyui.profile": placement.mode,
+                "comfyui.fallback": placement.fallback,
+            }), metrics.timer("profiles", placement.mode, "comfyui"):
+                with deadline_stage("submit"):
+                    prompt_id = comfy.submit(graph)
+                self._record_submission(prompt_id, graph, placement.url)
+                try:
+                    with deadline_stage("wait"):
+                        files = comfy.wait_for_images(prompt_id, graph=graph)
+                except DeadlineExceeded:
+                    # 결과를 기다릴 사람이 없으므로 ComfyUI에서도 지워 다음 작업에 GPU를 넘김
+                    comfy.cancel(prompt_id)
+                    raise
             
-            res = response.json()
-            
-            if "prompt_id" not in res:
-                error_msg = res.get("error", {}).get("message", str(res)) if isinstance(res, dict) else str(res)
-                raise Exception(f"ComfyUI 오류: {error_msg}")
-                
-        except requests.exceptions.JSONDecodeError as e:
-            raise Exception(f"ComfyUI 응답 파싱 오류: {e}. 응답 내용: {response.text[:200]}")
-        except requests.exceptions.RequestException as e:
-            raise Exception(f"ComfyUI 통신 오류: {e}")
-        
-        prompt_id = res["prompt_id"]
-        files = self._wait_for_images(prompt_id)
+            self._record_stage(STAGE_DOWNLOADING)
+            with deadline_stage("download"), metrics.timer("profiles", placement.mode, "download"):
+                downloaded = [get_image_store().download(comfy, f) for f in files]
         
-        return [self._download_image(f) for f in files]
+        # 인코딩은 GPU를 쓰지 않으므로 스케줄러 슬롯을 놓은 뒤 처리
+        with metrics.timer("profiles", mode, "encode"):
+            return [get_image_store().ingest(path, source=f) for f, path in zip(files, downloaded)]
+    
+    def _record_stage(self, stage: str):
+        """작업 저장소에 진행 단계 기록"""
+        if self.job_id:
+            get_job_store().set_stage(self.job_id, stage)
+    
+    def _record_submission(self, prompt_id: str, graph: dict, comfy_url: str):
+        """작업 저장소에 ComfyUI 제출 정보 기록 (복구 시 같은 백엔드에 다시 연결)"""
+        if self.job_id:
+            get_job_store().record_submission(self.job_id, prompt_id, comfy_url, graph)
     
     def _evaluate_image(self, path: str) -> str:
         """이미지 평가 (비전 피드백)"""
@@ -318,14 +321,16 @@ class ImageGenerationService:
             time.sleep(0.1)
         
         img = base64.b64encode(open(path, "rb").read()).decode()
-        res = ollama.chat(
-            model=self.ollama_vision_model,
-            messages=[{
-                "role": "user",
-                "content": "Analyze image clarity and suggest improvements.",
-                "images": [img]
-            }]
-        )
+        with deadline_stage("vision"), get_limiter("vision").slot(), span("ollama.chat", {"llm.model": self.ollama_vision_model, "llm.vision": True}):
+            res = get_llm_client().chat(
+                model=self.ollama_vision_model,
+                messages=[{
+                    "role": "user",
+                    "content": "Analyze image clarity and suggest improvements.",
+                    "images": [img]
+                }],
+                timeout=OLLAMA_VISION_TIMEOUT
+            )
         return res["message"]["content"]
     
     def _improve_prompt(self, prompt: str, feedback: str) -> str:
@@ -339,9 +344,12 @@ Prompt:
 Feedback:
 {feedback}
 
+{prompt_rules(CLIP_TOKEN_BUDGET)}
+
 Improved Prompt:
 """
-        return self._llama_call(p)
+        with deadline_stage("improve"):
+            return self._llama_call(p, CLIP_TOKEN_BUDGET, fallback=prompt)
     
     def _refine_loop(self, prompt: str, mode: str = "high_quality", rounds: int = 1, use_vision: bool = True) -> List[str]:
         """반복 개선 루프"""
@@ -349,26 +357,45 @@ Improved Prompt:
         
         for i in range(rounds):
             print(f"♻️ Refining Iteration {i+1}")
-            images = self._generate_image(current, mode=mode)
-            
-            if use_vision:
-                feedback = self._evaluate_image(images[0])
-                current = self._improve_prompt(current, feedback)
+            with span("refine.iteration", {"refine.iteration": i + 1, "refine.mode": mode}):
+                images = self._generate_image(current, mode=mode)
+                
+                if use_vision:
+                    feedback = self._evaluate_image(images[0])
+                    current = self._improve_prompt(current, feedback)
         
         return images
     
-    def generate_product_image(self, user_text: str, mode: str = "high_quality") -> List[str]:
+    def generate_product_image(
+        self,
+        user_text: str,
+        mode: str = "high_quality",
+        base_prompt: Optional[str] = None
+    ) -> List[str]:
         """
         제품 이미지 생성
         
         Args:
             user_text: 사용자 입력 텍스트
-            mode: 생성 모드 (fast, balanced, high_quality)
+            mode: 생성 프로필 이름 (프로필 설정 파일 기준)
+            base_prompt: 미리 만든 프롬프트 (배치 프롬프트 확장 결과, None이면 LLM으로 생성)
             
         Returns:
             생성된 이미지 파일 경로 목록
+            
+        Raises:
+            ValueError: 알 수 없는 프로필인 경우
+            MissingModelsError: 워크플로가 참조하는 모델 파일이 없는 경우
+            GraphValidationError: 워크플로가 ComfyUI 노드 정의와 맞지 않는 경우
+            DeadlineExceeded: 작업 마감이 지났거나 클라이언트 연결이 끊긴 경우 (마감은 호출자가 activate로 설정)
         """
-        base = self._build_prompt(user_text)
-        styled = self._apply_hyperwise_style(base)
-        return self._refine_loop(styled, mode=mode)
+        metrics = get_metrics()
+        with metrics.timer("profiles", mode, "total"):
+            self._validate_graph(self._build_graph("", self._profile(mode))["prompt"])
+            self._record_stage(STAGE_PROMPT)
+            if base_prompt is None:
+                with metrics.timer("profiles", mode, "prompt"):
+                    base_prompt = self._build_prompt(user_text)
+            styled = self._apply_hyperwise_style(base_prompt)
+            return self._refine_loop(styled, mode=mode)
 
@@ -0,0 +1,443 @@
+"""
+결과 이미지 저장소 (내용 주소 기반)
+
+ComfyUI에서 받은 이미지를 SHA-256 해시 이름으로 DOWNLOAD_DIR에 저장합니다 (`<hash[:2]>/<hash[2:4]>/<hash>.png`).
+ComfyUI의 자동 번호 파일명과 달리 여러 복제본이 같은 디렉토리를 써도 충돌하지 않고, 같은 이미지는 한 번만 저장됩니다.
+해시 접두사로 하위 디렉토리를 나눠 한 디렉토리의 항목 수가 수십만 개로 늘어나지 않게 합니다.
+저장/변형 생성/조회는 접근 색인(app.services.retention)에 기록되어 용량 기반 정리에 쓰입니다.
+
+저장 후 설정한 형식(IMAGE_FORMATS, 예: webp, avif)으로 다시 인코딩하고 썸네일(IMAGE_THUMBNAIL_SIZES)을 만듭니다.
+인코딩은 CPU를 많이 쓰므로 프로세스 풀(IMAGE_ENCODE_WORKERS)에서 병렬로 처리하며, 변형 파일 이름은
+해시에서 결정되므로(`<hash>.webp`, `<hash>_t256.webp`) 이미 있으면 다시 만들지 않습니다.
+변환에는 Pillow가 필요하며, 없으면 원본 PNG만 저장합니다. AVIF는 Pillow가 AVIF를 지원할 때만 만듭니다.
+
+이미지 제공 API(/api/v1/images/{hash})가 요청하는 다른 크기(IMAGE_RESIZE_SIZES)/형식은 처음 요청될 때 만들어
+같은 이름 규칙으로 디스크에 캐시합니다.
+"""
+import os
+import re
+import uuid
+import hashlib
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import (
+    DOWNLOAD_DIR, IMAGE_FORMATS, IMAGE_QUALITY, IMAGE_THUMBNAIL_SIZES, IMAGE_THUMBNAIL_FORMAT, IMAGE_ENCODE_WORKERS,
+    IMAGE_RESIZE_SIZES, IMAGE_DELETE_COMFYUI_OUTPUT, COMFYUI_OUTPUT_DIR
+)
+
+logger = logging.getLogger(__name__)
+
+# 지원하는 변환 형식 → 확장자
+FORMAT_EXTENSIONS = {"webp": "webp", "avif": "avif", "jpeg": "jpg", "png": "png"}
+# 형식 → MIME 타입
+FORMAT_MEDIA_TYPES = {"webp": "image/webp", "avif": "image/avif", "jpeg": "image/jpeg", "png": "image/png"}
+# 다운로드 중인 파일을 두는 하위 디렉토리 (저장소 밖으로 드러나지 않음)
+INCOMING_DIR = ".incoming"
+# 이미지 해시 형식 (SHA-256 16진수)
+HASH_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+# 저장소 파일 이름 (해시 + 선택적 썸네일 크기 + 확장자)
+FILE_PATTERN = re.compile(r"^([0-9a-f]{64})(_t\d+)?\.[a-z]+$")
+
+
+def _pillow_formats() -> Optional[set]:
+    """Pillow가 저장할 수 있는 형식 (Pillow가 없으면 None)"""
+    try:
+        from PIL import features
+    except ImportError:
+        return None
+    formats = {"jpeg", "png"}
+    if features.check("webp"):
+        formats.add("webp")
+    # Pillow 11.2부터 AVIF 내장 (libavif로 빌드된 경우), 이전 버전은 pillow-avif-plugin
+    if "avif" in features.modules and features.check_module("avif"):
+        formats.add("avif")
+    else:
+        try:
+            import pillow_avif  # noqa: F401 (플러그인 등록)
+            formats.add("avif")
+        except ImportError:
+            pass
+    return formats
+
+
+def encode_variant(source: str, target: str, fmt: str, quality: int, size: Optional[int] = None) -> int:
+    """
+    이미지 변환 (프로세스 풀에서 실행)
+
+    Args:
+        source: 원본 경로
+        target: 저장 경로 (임시 파일에 쓴 뒤 교체)
+        fmt: 저장 형식 (webp, avif, jpeg, png)
+        quality: 인코딩 품질 (1~100)
+        size: 썸네일 긴 변 길이 (None이면 원본 크기)
+
+    Returns:
+        저장된 파일 크기 (바이트)
+    """
+    from PIL import Image
+
+    if fmt == "avif":
+        try:
+            import pillow_avif  # noqa: F401
+        except ImportError:
+            pass
+
+    with Image.open(source) as image:
+        image.load()
+        if size:
+            image.thumbnail((size, size), Image.LANCZOS)
+        if fmt == "jpeg" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        options = {"quality": quality}
+        if fmt == "webp":
+            options["method"] = 4
+        temp = f"{target}.{uuid.uuid4().hex}.tmp"
+        try:
+            image.save(temp, format=fmt.upper(), **options)
+            os.replace(temp, target)
+        finally:
+            if os.path.exists(temp):
+                os.remove(temp)
+    return os.path.getsize(target)
+
+
+class ImageStore:
+    """내용 주소 기반 이미지 저장소"""
+
+    def __init__(
+        self,
+        root: str,
+        formats: List[str],
+        quality: int = IMAGE_QUALITY,
+        thumbnail_sizes: List[int] = (),
+        thumbnail_format: str = IMAGE_THUMBNAIL_FORMAT,
+        workers: int = IMAGE_ENCODE_WORKERS,
+        resize_sizes: List[int] = (),
+        index=None,
+        comfyui_output_dir: Optional[str] = None
+    ):
+        """
+        Args:
+            root: 저장 디렉토리
+            formats: 원본 크기로 만들 변환 형식 목록
+            quality: 인코딩 품질
+            thumbnail_sizes: 썸네일 긴 변 길이 목록
+            thumbnail_format: 썸네일 형식
+            workers: 인코딩 프로세스 수 (0이면 호출 스레드에서 처리)
+            resize_sizes: 요청 시 만들 수 있는 긴 변 길이 목록 (썸네일 크기 포함)
+            index: 접근 색인 (AccessIndex, None이면 기록하지 않음)
+            comfyui_output_dir: 지정하면 저장소에 넣은 뒤 ComfyUI 출력 디렉토리의 원본 파일 삭제
+        """
+        self.root = root
+        self.index = index
+        self.comfyui_output_dir = comfyui_output_dir
+        self.quality = quality
+        self.workers = workers
+        self.incoming_dir = os.path.join(root, INCOMING_DIR)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+        requested = [fmt for fmt in formats if fmt]
+        unknown = [fmt for fmt in requested + [thumbnail_format] if fmt not in FORMAT_EXTENSIONS]
+        if unknown:
+            raise ValueError(f"지원하지 않는 이미지 형식입니다: {', '.join(unknown)} (가능: {', '.join(FORMAT_EXTENSIONS)})")
+
+        supported = _pillow_formats()
+        if supported is None and (requested or thumbnail_sizes):
+            logger.warning("Pillow가 설치되어 있지 않아 이미지 변환과 썸네일을 건너뜁니다 (원본 PNG만 저장)")
+            supported = set()
+        elif requested:
+            for fmt in requested:
+                if fmt not in supported:
+                    logger.warning(f"Pillow가 {fmt} 저장을 지원하지 않아 건너뜁니다")
+        self.supported = (supported or set()) | {"png"}
+        self.formats = [fmt for fmt in requested if fmt in supported and fmt != "png"]
+        self.thumbnail_format = thumbnail_format if thumbnail_format in supported else None
+        self.thumbnail_sizes = sorted(set(thumbnail_sizes)) if self.thumbnail_format else []
+        self.resize_sizes = sorted(set(resize_sizes) | set(self.thumbnail_sizes)) if supported else []
+
+    def shard_of(self, image_hash: str) -> str:
+        """해시의 하위 디렉토리 (해시 앞 2+2자리)"""
+        return os.path.join(self.root, image_hash[:2], image_hash[2:4])
+
+    def path_of(self, image_hash: str, ext: str = "png", size: Optional[int] = None) -> str:
+        """해시와 형식으로 파일 경로 계산"""
+        suffix = f"_t{size}" if size else ""
+        return os.path.join(self.shard_of(image_hash), f"{image_hash}{suffix}.{ext}")
+
+    def files_of(self, image_hash: str) -> List[str]:
+        """해시의 원본과 변형 파일 경로"""
+        shard = self.shard_of(image_hash)
+        try:
+            names = os.listdir(shard)
+        except FileNotFoundError:
+            return []
+        return [os.path.join(shard, name) for name in names if name.startswith(image_hash) and FILE_PATTERN.match(name)]
+
+    def size_of(self, image_hash: str) -> int:
+        """해시의 원본과 변형 전체 바이트"""
+        total = 0
+        for path in self.files_of(image_hash):
+            try:
+                total += os.path.getsize(path)
+            except FileNotFoundError:
+                pass
+        return total
+
+    def delete(self, image_hash: str) -> int:
+        """
+        원본과 변형 삭제
+
+        Returns:
+            삭제한 바이트
+        """
+        freed = 0
+        for path in self.files_of(image_hash):
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+                freed += size
+            except FileNotFoundError:
+                pass
+        return freed
+
+    def scan(self) -> Dict[str, Tuple[int, float]]:
+        """
+        하위 디렉토리 전체 훑기
+
+        Returns:
+            해시 → (전체 바이트, 가장 이른 mtime)
+        """
+        found: Dict[str, Tuple[int, float]] = {}
+        for first in os.scandir(self.root) if os.path.isdir(self.root) else ():
+            if not first.is_dir() or len(first.name) != 2:
+                continue
+            for second in os.scandir(first.path):
+                if not second.is_dir():
+                    continue
+                for entry in os.scandir(second.path):
+                    match = FILE_PATTERN.match(entry.name)
+                    if not match or not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                    size, mtime = found.get(match.group(1), (0, stat.st_mtime))
+                    found[match.group(1)] = (size + stat.st_size, min(mtime, stat.st_mtime))
+        return found
+
+    def migrate_flat(self) -> int:
+        """
+        예전 평면 구조(DOWNLOAD_DIR/<hash>.png) 파일을 하위 디렉토리로 이동
+
+        Returns:
+            이동한 파일 수
+        """
+        moved = 0
+        for entry in os.scandir(self.root) if os.path.isdir(self.root) else ():
+            match = FILE_PATTERN.match(entry.name)
+            if not match or not entry.is_file():
+                continue
+            shard = self.shard_of(match.group(1))
+            os.makedirs(shard, exist_ok=True)
+            os.replace(entry.path, os.path.join(shard, entry.name))
+            moved += 1
+        return moved
+
+    def _record(self, image_hash: str):
+        if self.index is not None:
+            self.index.record(image_hash, self.size_of(image_hash))
+
+    def _planned(self, image_hash: str) -> List[Tuple[str, str, str, Optional[int]]]:
+        """만들 변형 목록 (이름, 경로, 형식, 썸네일 크기)"""
+        planned = [
+            (fmt, self.path_of(image_hash, FORMAT_EXTENSIONS[fmt]), fmt, None)
+            for fmt in self.formats
+        ]
+        planned += [
+            (f"thumb_{size}", self.path_of(image_hash, FORMAT_EXTENSIONS[self.thumbnail_format], size),
+             self.thumbnail_format, size)
+            for size in self.thumbnail_sizes
+        ]
+        return planned
+
+    def _executor(self) -> Optional[ProcessPoolExecutor]:
+        if self.workers <= 0:
+            return None
+        with self._lock:
+            if self._pool is None:
+                import multiprocessing
+                # 스레드가 많은 API 프로세스를 fork하지 않도록 spawn 사용
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
+
+    def download(self, client, filename: str) -> str:
+        """
+        ComfyUI 출력을 임시 디렉토리로 다운로드 (ComfyUI 파일명이 복제본 사이에 충돌하지 않도록 고유 이름 사용)
+
+        Args:
+            client: ComfyUIClient
+            filename: ComfyUI 출력 파일명
+
+        Returns:
+            임시 파일 경로 (ingest로 저장소에 넣음)
+        """
+        os.makedirs(self.incoming_dir, exist_ok=True)
+        name = f"{uuid.uuid4().hex}_{os.path.basename(filename)}"
+        return client.download_image(filename, save_dir=self.incoming_dir, save_name=name)
+
+    def _release_comfyui_output(self, filename: str):
+        """ComfyUI 출력 디렉토리의 원본 삭제 (저장소에 넣은 뒤)"""
+        output_dir = os.path.realpath(self.comfyui_output_dir)
+        path = os.path.realpath(os.path.join(output_dir, filename))
+        if not path.startswith(output_dir + os.sep):
+            return
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"ComfyUI 출력 파일을 삭제할 수 없습니다 ({path}): {e}")
+
+    def ingest(self, path: str, source: Optional[str] = None) -> str:
+        """
+        파일을 저장소로 옮기고 변형 생성
+
+        Args:
+            path: 받은 이미지 파일 (저장소 밖이나 incoming 디렉토리, 옮겨진 뒤 삭제됨)
+            source: ComfyUI 출력 파일명 (comfyui_output_dir가 있으면 저장 후 삭제)
+
+        Returns:
+            원본 경로 (`<root>/<hash[:2]>/<hash[2:4]>/<hash>.png`)
+        """
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        image_hash = digest.hexdigest()
+
+        os.makedirs(self.shard_of(image_hash), exist_ok=True)
+        original = self.path_of(image_hash)
+        if os.path.exists(original):
+            # 같은 이미지가 이미 있음 (재시도, 같은 시드의 재생성)
+            os.remove(path)
+        else:
+            os.replace(path, original)
+
+        if source and self.comfyui_output_dir:
+            self._release_comfyui_output(source)
+
+        pending = [item for item in self._planned(image_hash) if not os.path.exists(item[1])]
+        executor = self._executor() if pending else None
+        if executor is None:
+            for name, target, fmt, size in pending:
+                self._encode(name, original, target, fmt, size)
+        else:
+            futures = [
+                (name, executor.submit(encode_variant, original, target, fmt, self.quality, size))
+                for name, target, fmt, size in pending
+            ]
+            for name, future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.warning(f"이미지 변형 {name} 생성 실패 ({image_hash}): {e}")
+        self._record(image_hash)
+        return original
+
+    def _encode(self, name: str, source: str, target: str, fmt: str, size: Optional[int]):
+        try:
+            encode_variant(source, target, fmt, self.quality, size)
+        except Exception as e:
+            logger.warning(f"이미지 변형 {name} 생성 실패 ({os.path.basename(source)}): {e}")
+
+    def variant(self, image_hash: str, fmt: str = "png", size: Optional[int] = None) -> str:
+        """
+        요청한 형식/크기의 파일 경로 (없으면 만들어 디스크에 캐시)
+
+        Args:
+            image_hash: 원본 SHA-256
+            fmt: 형식 (png, webp, avif, jpeg)
+            size: 긴 변 길이 (None이면 원본 크기)
+
+        Raises:
+            FileNotFoundError: 원본 이미지가 없는 경우
+            ValueError: 지원하지 않는 형식이나 크기인 경우
+        """
+        if not HASH_PATTERN.match(image_hash):
+            raise FileNotFoundError(image_hash)
+        original = self.path_of(image_hash)
+        if not os.path.exists(original):
+            raise FileNotFoundError(image_hash)
+        if fmt not in self.supported:
+            raise ValueError(f"지원하지 않는 형식입니다: {fmt} (가능: {', '.join(sorted(self.supported))})")
+        if size is not None and size not in self.resize_sizes:
+            sizes = ", ".join(map(str, self.resize_sizes)) or "없음"
+            raise ValueError(f"지원하지 않는 크기입니다: {size} (가능: {sizes})")
+        if self.index is not None:
+            self.index.touch(image_hash)
+        if fmt == "png" and size is None:
+            return original
+
+        target = self.path_of(image_hash, FORMAT_EXTENSIONS[fmt], size)
+        if not os.path.exists(target):
+            executor = self._executor()
+            if executor is None:
+                encode_variant(original, target, fmt, self.quality, size)
+            else:
+                executor.submit(encode_variant, original, target, fmt, self.quality, size).result()
+            self._record(image_hash)
+        return target
+
+    def variants(self, path: str) -> Dict[str, str]:
+        """
+        원본 경로의 변형 경로 (디스크에 있는 것만)
+
+        Returns:
+            {"hash", "url", "png", "webp", "avif", "thumb_256", ...} (url은 이미지 제공 API 경로)
+        """
+        image_hash = os.path.splitext(os.path.basename(path))[0]
+        result = {"hash": image_hash, "url": f"/api/v1/images/{image_hash}", "png": path}
+        for name, target, _, _ in self._planned(image_hash):
+            if os.path.exists(target):
+                result[name] = target
+        return result
+
+    def close(self):
+        """인코딩 프로세스 풀 종료"""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+
+# 전역 이미지 저장소 인스턴스
+_image_store: Optional[ImageStore] = None
+_image_store_lock = threading.Lock()
+
+
+def get_image_store() -> ImageStore:
+    """전역 이미지 저장소 인스턴스 반환 (싱글톤)"""
+    global _image_store
+    with _image_store_lock:
+        if _image_store is None:
+            from app.services.retention import get_access_index
+            _image_store = ImageStore(
+                DOWNLOAD_DIR,
+                IMAGE_FORMATS,
+                thumbnail_sizes=IMAGE_THUMBNAIL_SIZES,
+                resize_sizes=IMAGE_RESIZE_SIZES,
+                index=get_access_index(),
+                comfyui_output_dir=COMFYUI_OUTPUT_DIR if IMAGE_DELETE_COMFYUI_OUTPUT else None
+            )
+        return _image_store
+
+
+def shutdown_image_store():
+    """이미지 저장소를 만든 경우 인코딩 프로세스 풀 종료"""
+    with _image_store_lock:
+        if _image_store is not None:
+            _image_store.close()
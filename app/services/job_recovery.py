@@ -0,0 +1,150 @@
+"""
+작업 복구 (API 재시작 후 작업 재개)
+
+작업 저장소에 남아 있는 미완료 작업을 불러와 다음과 같이 처리합니다.
+
+- ComfyUI에 제출된 작업: /history에 결과가 있으면 다운로드만 하고, 큐에 있으면 완료를 기다립니다.
+  ComfyUI도 재시작되어 작업이 사라졌다면 저장된 그래프를 그대로 재제출합니다 (LLM 단계는 다시 하지 않음).
+  재제출 대기, 완료 대기, 다운로드도 요청/프로필의 작업 시간 예산 안에서만 기다립니다.
+- 제출 전 단계의 배치 작업: 저장된 요청으로 처음부터 다시 실행합니다 (요청/프로필의 작업 시간 예산 안에서).
+- 제출 전 단계의 단건 작업: 결과를 기다리던 HTTP 클라이언트가 재시작으로 끊겼으므로 다시 생성하지 않고
+  client_disconnected로 실패 처리합니다.
+"""
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict
+
+from app.core.config import COMFYUI_URL, DOWNLOAD_DIR, JOB_RECOVERY_WORKERS, JOB_RETENTION_SECONDS
+from app.services.comfyui_client import ComfyUIClient
+from app.services.deadline import (
+    REASON_DISCONNECTED,
+    Deadline,
+    DeadlineExceeded,
+    activate,
+    deadline_stage,
+    job_budget
+)
+from app.services.image_generation import ImageGenerationService
+from app.services.image_store import get_image_store
+from app.services.job_store import get_job_store, STAGE_DOWNLOADING
+from app.services.scheduler import get_scheduler
+
+logger = logging.getLogger(__name__)
+
+
+def _find_prompt(job: Dict[str, Any]):
+    """
+    제출 기록의 ComfyUI 서버에서 프롬프트 조회
+
+    Returns:
+        (클라이언트, ComfyUI에 작업이 남아 있는지 여부)
+        기록된 서버에 연결할 수 없으면 현재 설정된 서버의 클라이언트를 반환합니다.
+    """
+    import requests
+
+    client = ComfyUIClient(job["comfy_url"] or COMFYUI_URL, DOWNLOAD_DIR)
+    prompt_id = job["prompt_id"]
+    try:
+        known = client.get_history(prompt_id) is not None or client.is_queued(prompt_id)
+        return client, known
+    except requests.exceptions.ConnectionError:
+        if client.base_url == COMFYUI_URL:
+            raise
+        logger.info(f"작업 {job['id']}: 기록된 ComfyUI({client.base_url})에 연결할 수 없어 {COMFYUI_URL}을 사용합니다")
+        return ComfyUIClient(COMFYUI_URL, DOWNLOAD_DIR), False
+
+
+def _reattach(job: Dict[str, Any]):
+    """
+    ComfyUI에 제출된 작업 재연결 (요청/프로필의 작업 시간 예산 안에서)
+
+    Raises:
+        DeadlineExceeded: 재제출 대기, 완료 대기, 다운로드가 작업 시간 예산을 넘긴 경우
+    """
+    store = get_job_store()
+    request = job["request"]
+    with activate(Deadline(job_budget(request["mode"], request.get("timeout")))):
+        client, known = _find_prompt(job)
+        prompt_id = job["prompt_id"]
+        graph = job["graph"]
+
+        try:
+            if not known:
+                # ComfyUI에서도 사라진 작업 → 저장된 그래프 재제출
+                logger.info(f"작업 {job['id']}: ComfyUI에 기록이 없어 그래프를 재제출합니다")
+                with get_scheduler().slot(request.get("mode", ""), priority=request.get("priority")):
+                    with deadline_stage("submit"):
+                        prompt_id = client.submit(graph)
+                    store.record_submission(job["id"], prompt_id, client.base_url, graph)
+                    with deadline_stage("wait"):
+                        files = client.wait_for_images(prompt_id, graph=graph)
+            else:
+                with deadline_stage("wait"):
+                    files = client.wait_for_images(prompt_id, graph=graph)
+        except DeadlineExceeded:
+            # 결과를 기다릴 수 없으므로 ComfyUI에서도 지워 다음 작업에 GPU를 넘김
+            client.cancel(prompt_id)
+            raise
+
+        store.set_stage(job["id"], STAGE_DOWNLOADING)
+        image_store = get_image_store()
+        with deadline_stage("download"):
+            downloaded = [image_store.download(client, f) for f in files]
+    store.complete(job["id"], [image_store.ingest(path, source=f) for f, path in zip(files, downloaded)])
+
+
+def _rerun(job: Dict[str, Any]):
+    """
+    제출 전 단계 작업을 처음부터 다시 실행 (배치 작업만)
+
+    Raises:
+        DeadlineExceeded: 단건 작업이거나(client_disconnected) 작업 시간 예산을 넘긴 경우
+    """
+    request = job["request"]
+    deadline = Deadline(job_budget(request["mode"], request.get("timeout")))
+    if not job["batch_id"]:
+        # 결과를 받을 클라이언트가 없으므로 LLM/ComfyUI를 다시 쓰지 않음
+        deadline.cancel(REASON_DISCONNECTED)
+        raise deadline.error("recovery")
+    with activate(deadline):
+        service = ImageGenerationService(priority=request.get("priority"), job_id=job["id"])
+        files = service.generate_product_image(request["prompt"], mode=request["mode"])
+    get_job_store().complete(job["id"], files)
+
+
+def _recover(job: Dict[str, Any]):
+    try:
+        if job["prompt_id"] and job["graph"]:
+            _reattach(job)
+        else:
+            _rerun(job)
+        logger.info(f"작업 복구 완료: {job['id']}")
+    except Exception as e:
+        logger.warning(f"작업 복구 실패 ({job['id']}): {e}")
+        get_job_store().fail(job["id"], f"복구 실패: {e}")
+
+
+def recover_jobs() -> int:
+    """
+    미완료 작업 복구 시작 (백그라운드에서 진행)
+
+    Returns:
+        복구 대상 작업 수
+    """
+    store = get_job_store()
+    purged = store.purge(time.time() - JOB_RETENTION_SECONDS)
+    if purged:
+        logger.info(f"오래된 작업 {purged}개를 정리했습니다")
+
+    jobs = store.list_unfinished()
+    if not jobs:
+        return 0
+
+    def run():
+        with ThreadPoolExecutor(max_workers=max(1, JOB_RECOVERY_WORKERS), thread_name_prefix="recovery") as pool:
+            list(pool.map(_recover, jobs))
+
+    threading.Thread(target=run, daemon=True, name="job-recovery").start()
+    return len(jobs)
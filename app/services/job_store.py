@@ -0,0 +1,204 @@
+"""
+영속 작업 저장소 (SQLite WAL)
+
+생성 작업의 요청, 진행 단계, ComfyUI prompt_id/그래프, 출력 경로를 기록합니다.
+API가 재시작되어도 진행 중이던 작업을 다시 불러와 ComfyUI /history에 재연결할 수 있습니다.
+"""
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.core.config import JOB_STORE_PATH
+
+# 작업 단계
+STAGE_QUEUED = "queued"            # 접수됨
+STAGE_PROMPT = "prompt"            # LLM 프롬프트 생성 중
+STAGE_SUBMITTED = "submitted"      # ComfyUI에 제출됨 (prompt_id 있음)
+STAGE_DOWNLOADING = "downloading"  # 결과 다운로드 중
+STAGE_DONE = "done"
+STAGE_FAILED = "failed"
+
+FINAL_STAGES = (STAGE_DONE, STAGE_FAILED)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    batch_id TEXT,
+    request TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    prompt_id TEXT,
+    comfy_url TEXT,
+    graph TEXT,
+    outputs TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_stage ON jobs(stage);
+CREATE INDEX IF NOT EXISTS idx_jobs_batch ON jobs(batch_id);
+"""
+
+
+class JobStore:
+    """작업 저널"""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: SQLite 파일 경로
+        """
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA busy_timeout=30000")
+            self._conn.executescript(_SCHEMA)
+
+    @staticmethod
+    def _row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job["request"] = json.loads(job["request"])
+        job["graph"] = json.loads(job["graph"]) if job["graph"] else None
+        job["outputs"] = json.loads(job["outputs"]) if job["outputs"] else []
+        return job
+
+    def _update(self, job_id: str, **fields):
+        fields["updated_at"] = time.time()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+    def create(self, request: Dict[str, Any], batch_id: Optional[str] = None) -> str:
+        """
+        작업 생성
+
+        Args:
+            request: 요청 내용 (prompt, mode 등)
+            batch_id: 배치 ID (배치 작업인 경우)
+
+        Returns:
+            작업 ID
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, batch_id, request, stage, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, batch_id, json.dumps(request, ensure_ascii=False), STAGE_QUEUED, now, now)
+            )
+        return job_id
+
+    def create_many(self, requests: List[Dict[str, Any]], batch_id: Optional[str] = None) -> List[str]:
+        """
+        작업 여러 개를 한 트랜잭션으로 생성 (배치 접수용)
+
+        Args:
+            requests: 요청 내용 목록
+            batch_id: 배치 ID
+
+        Returns:
+            requests 순서대로 작업 ID
+        """
+        now = time.time()
+        job_ids = [uuid.uuid4().hex for _ in requests]
+        rows = [
+            (job_id, batch_id, json.dumps(request, ensure_ascii=False), STAGE_QUEUED, now, now)
+            for job_id, request in zip(job_ids, requests)
+        ]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO jobs (id, batch_id, request, stage, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        return job_ids
+
+    def set_stage(self, job_id: str, stage: str):
+        """진행 단계 기록"""
+        self._update(job_id, stage=stage)
+
+    def record_submission(self, job_id: str, prompt_id: str, comfy_url: str, graph: Dict[str, Any]):
+        """ComfyUI 제출 기록 (재시작 후 재연결/재제출에 필요한 정보)"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET stage = ?, prompt_id = ?, comfy_url = ?, graph = ?, "
+                "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (STAGE_SUBMITTED, prompt_id, comfy_url, json.dumps(graph, ensure_ascii=False), time.time(), job_id)
+            )
+
+    def complete(self, job_id: str, outputs: List[str]):
+        """작업 완료 기록"""
+        self._update(job_id, stage=STAGE_DONE, outputs=json.dumps(outputs, ensure_ascii=False), error=None)
+
+    def fail(self, job_id: str, error: str):
+        """작업 실패 기록"""
+        self._update(job_id, stage=STAGE_FAILED, error=error)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """작업 조회"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_dict(row) if row else None
+
+    def list_unfinished(self) -> List[Dict[str, Any]]:
+        """완료/실패하지 않은 작업 목록 (생성 순)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE stage NOT IN (?, ?) ORDER BY created_at",
+                FINAL_STAGES
+            ).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    def list_batch(self, batch_id: str) -> List[Dict[str, Any]]:
+        """배치에 속한 작업 목록 (생성 순)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE batch_id = ? ORDER BY created_at",
+                (batch_id,)
+            ).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    def purge(self, older_than: float) -> int:
+        """
+        오래된 완료/실패 작업 삭제
+
+        Args:
+            older_than: 이 시각(epoch) 이전에 갱신된 작업 삭제
+
+        Returns:
+            삭제된 작업 수
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM jobs WHERE stage IN (?, ?) AND updated_at < ?",
+                (*FINAL_STAGES, older_than)
+            )
+        return cursor.rowcount
+
+
+# 전역 작업 저장소 인스턴스
+_job_store: Optional[JobStore] = None
+_job_store_lock = threading.Lock()
+
+
+def get_job_store() -> JobStore:
+    """전역 작업 저장소 인스턴스 반환 (싱글톤)"""
+    global _job_store
+    with _job_store_lock:
+        if _job_store is None:
+            _job_store = JobStore(JOB_STORE_PATH)
+        return _job_store
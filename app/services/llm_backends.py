@@ -0,0 +1,451 @@
+"""
+LLM 백엔드
+
+LLM 클라이언트(app.services.llm_client)가 실제 호출을 맡기는 구현입니다. LLM_BACKEND로 선택합니다.
+
+- ollama: Ollama 서버 (`ollama` 패키지, keep_alive와 generate context 지원)
+- openai: OpenAI 호환 HTTP 서버 (vLLM, llama.cpp server, Ollama의 /v1 등, `/chat/completions` SSE 스트리밍)
+- fake: 서버 없이 입력에서 결정적으로 응답을 만드는 가짜 (테스트/벤치마크용, LLM_FAKE_TOKEN_LATENCY로 토큰당 지연)
+
+백엔드는 응답을 Ollama 형식으로 맞춰 돌려줍니다. chat은 `{"message": {"role", "content"}, "done_reason", ...}`와
+구간별 소요 시간(load_duration, prompt_eval_duration, eval_duration, ns)과 eval_count를, stream은
+`{"content": 조각, "done": False}` 청크들과 마지막 `{"content": "", "done": True, 통계}` 청크를 돌려주며
+제너레이터를 닫으면 연결을 끊어 서버가 생성을 멈춥니다. 서버가 주지 않는 통계는 빠지고 클라이언트가 청크 시간으로 계산합니다.
+"""
+import json
+import time
+import base64
+import hashlib
+import logging
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from app.core.config import LLM_API_KEY, LLM_BASE_URL, LLM_FAKE_TOKEN_LATENCY, OLLAMA_HOST
+
+logger = logging.getLogger(__name__)
+
+# OpenAI 호환 API로 그대로 옮길 수 있는 Ollama 생성 옵션 (num_predict는 max_tokens로 변환)
+_OPENAI_OPTIONS = ("temperature", "top_p", "seed", "stop", "presence_penalty", "frequency_penalty")
+# 제한 시간별로 보관하는 ollama.Client 수 (작업 마감이 있으면 호출마다 제한 시간이 달라짐)
+_MAX_OLLAMA_CLIENTS = 8
+
+
+class LLMBackend:
+    """LLM 백엔드 공통 인터페이스"""
+
+    name = "base"
+    # generate context(앞부분 KV 캐시) 재사용 지원 여부
+    supports_context = False
+
+    def chat(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        timeout: float,
+        options: Optional[Dict[str, Any]] = None,
+        format: Optional[Any] = None
+    ) -> Any:
+        """
+        chat 호출
+
+        Args:
+            model: 모델 이름
+            messages: 메시지 목록 (Ollama 형식, 이미지는 base64 문자열 목록 "images")
+            timeout: 호출 제한 시간 (초)
+            options: Ollama 생성 옵션 (num_predict 등)
+            format: 출력 형식 ("json" 또는 JSON 스키마)
+
+        Returns:
+            Ollama chat 응답 형식
+        """
+        raise NotImplementedError
+
+    def stream(
+        self,
+        model: str,
+        timeout: float,
+        messages: Optional[List[Dict[str, Any]]] = None,
+        prompt: Optional[str] = None,
+        context: Optional[List[int]] = None,
+        options: Optional[Dict[str, Any]] = None,
+        format: Optional[Any] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        스트리밍 호출 (messages면 chat, prompt면 generate)
+
+        Returns:
+            `{"content", "done", ...통계}` 청크 제너레이터 (닫으면 생성 중단)
+        """
+        raise NotImplementedError
+
+    def generate(
+        self,
+        model: str,
+        prompt: str,
+        timeout: float,
+        options: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        generate 호출 (지시문 context 생성용)
+
+        Returns:
+            response, context(지원하지 않으면 None)와 통계
+        """
+        raise NotImplementedError
+
+    def preload(self, model: str, timeout: float) -> Optional[float]:
+        """
+        모델 미리 로드
+
+        Returns:
+            로드 시간 (초, 백엔드가 알려주지 않으면 None → 호출 시간 사용)
+        """
+        raise NotImplementedError
+
+
+class OllamaBackend(LLMBackend):
+    """
+    Ollama 서버 (모든 호출에 keep_alive 전달)
+
+    ollama.Client는 호출마다 제한 시간을 받지 않으므로 제한 시간별로 만들되, 모두 httpx 연결 풀(transport) 하나를
+    공유하고 최근에 쓴 몇 개만 보관합니다. 작업 마감으로 제한 시간이 호출마다 달라져도 연결과 클라이언트가 쌓이지 않습니다.
+    """
+
+    name = "ollama"
+    supports_context = True
+
+    def __init__(self, host: str = OLLAMA_HOST, keep_alive: Union[str, float] = "30m"):
+        """
+        Args:
+            host: Ollama 서버 URL
+            keep_alive: 모델 유지 시간
+        """
+        self.host = host
+        self.keep_alive = keep_alive
+        self._transport = None
+        self._clients: "OrderedDict[float, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def client(self, timeout: float):
+        """제한 시간별 ollama.Client (연결 풀 공유, 최근 _MAX_OLLAMA_CLIENTS개만 보관)"""
+        with self._lock:
+            client = self._clients.get(timeout)
+            if client is not None:
+                self._clients.move_to_end(timeout)
+                return client
+            import httpx
+            import ollama
+            if self._transport is None:
+                self._transport = httpx.HTTPTransport()
+            client = self._clients[timeout] = ollama.Client(host=self.host, timeout=timeout, transport=self._transport)
+            while len(self._clients) > _MAX_OLLAMA_CLIENTS:
+                # 연결 풀은 공유하므로 닫지 않고 버림 (닫으면 다른 클라이언트의 연결도 닫힘)
+                self._clients.popitem(last=False)
+            return client
+
+    def chat(self, model, messages, timeout, options=None, format=None):
+        return self.client(timeout).chat(
+            model=model, messages=messages, options=options, format=format, keep_alive=self.keep_alive
+        )
+
+    def stream(self, model, timeout, messages=None, prompt=None, context=None, options=None, format=None):
+        if messages is not None:
+            stream = self.client(timeout).chat(
+                model=model, messages=messages, options=options, format=format,
+                keep_alive=self.keep_alive, stream=True
+            )
+        else:
+            stream = self.client(timeout).generate(
+                model=model, prompt=prompt, context=context, options=options, format=format,
+                keep_alive=self.keep_alive, stream=True
+            )
+        try:
+            for chunk in stream:
+                piece = chunk["message"]["content"] if messages is not None else chunk["response"]
+                if not chunk.get("done"):
+                    yield {"content": piece or "", "done": False}
+                    continue
+                final = {
+                    field: chunk.get(field)
+                    for field in ("done_reason", "load_duration", "prompt_eval_duration", "eval_duration", "eval_count")
+                }
+                if messages is None:
+                    final["context"] = chunk.get("context")
+                yield {"content": piece or "", "done": True, **final}
+                return
+        finally:
+            stream.close()
+
+    def generate(self, model, prompt, timeout, options=None):
+        return self.client(timeout).generate(model=model, prompt=prompt, options=options, keep_alive=self.keep_alive)
+
+    def preload(self, model, timeout):
+        # 빈 프롬프트 generate는 모델만 로드하고 끝남
+        response = self.client(timeout).generate(model=model, prompt="", keep_alive=self.keep_alive)
+        load = response.get("load_duration")
+        return load / 1e9 if load is not None else None
+
+
+class OpenAICompatibleBackend(LLMBackend):
+    """
+    OpenAI 호환 HTTP 서버 (`/chat/completions`)
+
+    num_predict는 max_tokens로, format은 response_format(json_schema / json_object)으로,
+    Ollama 형식 이미지는 data URI image_url로 바꿔 보냅니다. generate context는 지원하지 않으므로
+    (vLLM/llama.cpp는 서버가 접두 캐시를 자동으로 재사용) 지시문을 매번 함께 보냅니다.
+    llama.cpp server가 주는 timings가 있으면 구간별 소요 시간으로 옮깁니다.
+    """
+
+    name = "openai"
+
+    def __init__(self, base_url: str = LLM_BASE_URL, api_key: str = LLM_API_KEY):
+        """
+        Args:
+            base_url: 서버 URL (/v1까지 포함)
+            api_key: API 키 (빈 문자열이면 인증 헤더 생략)
+        """
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self._client = None
+        self._lock = threading.Lock()
+
+    def client(self):
+        """공유 httpx.Client (제한 시간은 요청마다 지정)"""
+        with self._lock:
+            if self._client is None:
+                import httpx
+                headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+                self._client = httpx.Client(base_url=self.base_url, headers=headers)
+            return self._client
+
+    @staticmethod
+    def _messages(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Ollama 메시지 → OpenAI 메시지 (images → image_url 내용 조각)"""
+        converted = []
+        for message in messages:
+            images = message.get("images")
+            if not images:
+                converted.append({"role": message["role"], "content": message.get("content", "")})
+                continue
+            content: List[Dict[str, Any]] = [{"type": "text", "text": message.get("content", "")}]
+            for image in images:
+                if isinstance(image, bytes):
+                    image = base64.b64encode(image).decode()
+                content.append({"type": "image_url", "image_url": {"url": f"data:image/png;base64,{image}"}})
+            converted.append({"role": message["role"], "content": content})
+        return converted
+
+    def _body(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        options: Optional[Dict[str, Any]],
+        format: Optional[Any]
+    ) -> Dict[str, Any]:
+        body: Dict[str, Any] = {"model": model, "messages": self._messages(messages)}
+        options = options or {}
+        if options.get("num_predict", 0) > 0:
+            body["max_tokens"] = options["num_predict"]
+        for key in _OPENAI_OPTIONS:
+            if key in options:
+                body[key] = options[key]
+        if format == "json":
+            body["response_format"] = {"type": "json_object"}
+        elif isinstance(format, dict):
+            body["response_format"] = {"type": "json_schema", "json_schema": {"name": "response", "schema": format}}
+        return body
+
+    @staticmethod
+    def _stats(data: Dict[str, Any]) -> Dict[str, Any]:
+        """usage / llama.cpp timings → Ollama 통계 필드"""
+        stats: Dict[str, Any] = {}
+        usage = data.get("usage") or {}
+        if usage.get("completion_tokens") is not None:
+            stats["eval_count"] = usage["completion_tokens"]
+        timings = data.get("timings") or {}
+        if timings.get("prompt_ms") is not None:
+            stats["prompt_eval_duration"] = int(timings["prompt_ms"] * 1e6)
+        if timings.get("predicted_ms") is not None:
+            stats["eval_duration"] = int(timings["predicted_ms"] * 1e6)
+            stats.setdefault("eval_count", timings.get("predicted_n"))
+        return stats
+
+    def chat(self, model, messages, timeout, options=None, format=None):
+        response = self.client().post(
+            "/chat/completions", json=self._body(model, messages, options, format), timeout=timeout
+        )
+        response.raise_for_status()
+        data = response.json()
+        choice = data["choices"][0]
+        return {
+            "model": model,
+            "message": {"role": "assistant", "content": choice["message"].get("content") or ""},
+            "done": True,
+            "done_reason": choice.get("finish_reason"),
+            **self._stats(data),
+        }
+
+    def stream(self, model, timeout, messages=None, prompt=None, context=None, options=None, format=None):
+        if messages is None:
+            messages = [{"role": "user", "content": prompt or ""}]
+        body = self._body(model, messages, options, format)
+        body["stream"] = True
+        body["stream_options"] = {"include_usage": True}
+        final: Dict[str, Any] = {}
+        with self.client().stream("POST", "/chat/completions", json=body, timeout=timeout) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line.startswith("data:"):
+                    continue
+                payload = line[5:].strip()
+                if payload == "[DONE]":
+                    break
+                data = json.loads(payload)
+                final.update(self._stats(data))
+                for choice in data.get("choices") or []:
+                    if choice.get("finish_reason"):
+                        final["done_reason"] = choice["finish_reason"]
+                    piece = (choice.get("delta") or {}).get("content")
+                    if piece:
+                        yield {"content": piece, "done": False}
+        yield {"content": "", "done": True, "context": None, **final}
+
+    def generate(self, model, prompt, timeout, options=None):
+        response = self.chat(model, [{"role": "user", "content": prompt}], timeout, options)
+        return {"response": response["message"]["content"], "context": None, **response}
+
+    def preload(self, model, timeout):
+        # 로드 API가 없으므로 1토큰 생성으로 모델/연결을 데움
+        self.chat(model, [{"role": "user", "content": "ping"}], timeout, {"num_predict": 1})
+        return None
+
+
+class FakeLLMBackend(LLMBackend):
+    """
+    결정적 가짜 LLM (서버 없이 테스트/벤치마크)
+
+    요청의 "User request:" 줄(없으면 마지막 줄)과 그 해시로 고른 스타일 구절로 프롬프트를 만듭니다.
+    format이 있으면 `{"prompt": ...}` JSON으로, format 스키마에 prompts가 있으면 번호 붙은 줄마다
+    `{"prompts": [{"id": n, "prompt": ...}]}` 항목으로 응답합니다. 단어 하나를 토큰 하나로 보고
+    options.num_predict에서 자르며, 토큰마다 `token_latency`만큼 기다립니다.
+    """
+
+    name = "fake"
+    supports_context = True
+
+    STYLES = (
+        "soft rim light", "85mm lens", "shallow depth of field", "seamless white backdrop",
+        "wet slate surface", "golden hour glow", "crisp reflections", "studio softbox lighting",
+        "minimalist composition", "premium editorial mood", "subtle film grain", "high detail texture",
+    )
+    FEEDBACK = "The subject is sharp and well lit; reduce background clutter and add contrast to the product edges."
+
+    def __init__(self, token_latency: float = LLM_FAKE_TOKEN_LATENCY):
+        """
+        Args:
+            token_latency: 토큰당 지연 (초)
+        """
+        self.token_latency = token_latency
+        self.calls = 0
+        self.tokens = 0
+        self._lock = threading.Lock()
+
+    def _prompt_for(self, request: str) -> str:
+        digest = hashlib.sha256(request.encode()).digest()
+        styles = [self.STYLES[b % len(self.STYLES)] for b in digest[:4]]
+        return ", ".join([" ".join(request.split()[:8])] + list(dict.fromkeys(styles)))
+
+    def _reply(self, text: str, format: Optional[Any], vision: bool) -> str:
+        if vision:
+            return self.FEEDBACK
+        if isinstance(format, dict) and "prompts" in format.get("properties", {}):
+            items = re.findall(r"^(\d+)\. (.+)$", text, re.MULTILINE)
+            return json.dumps({"prompts": [{"id": int(i), "prompt": self._prompt_for(line)} for i, line in items]})
+        match = re.search(r"User request:\s*(.+)", text)
+        lines = [line for line in text.strip().splitlines() if line.strip()]
+        prompt = self._prompt_for(match.group(1) if match else (lines[-1] if lines else ""))
+        return json.dumps({"prompt": prompt}) if format else prompt
+
+    def _pieces(
+        self,
+        messages: Optional[List[Dict[str, Any]]],
+        prompt: Optional[str],
+        options: Optional[Dict[str, Any]],
+        format: Optional[Any]
+    ) -> List[str]:
+        text = messages[-1].get("content", "") if messages else prompt or ""
+        vision = bool(messages and messages[-1].get("images"))
+        words = self._reply(text, format, vision).split(" ")
+        pieces = [word if i == 0 else " " + word for i, word in enumerate(words)]
+        num_predict = (options or {}).get("num_predict")
+        pieces = pieces[:num_predict] if num_predict and num_predict > 0 else pieces
+        with self._lock:
+            self.calls += 1
+        return pieces
+
+    def _emit(self, count: int):
+        with self._lock:
+            self.tokens += count
+        if self.token_latency:
+            time.sleep(self.token_latency * count)
+
+    def chat(self, model, messages, timeout, options=None, format=None):
+        pieces = self._pieces(messages, None, options, format)
+        started = time.perf_counter()
+        self._emit(len(pieces))
+        return {
+            "model": model,
+            "message": {"role": "assistant", "content": "".join(pieces)},
+            "done": True,
+            "done_reason": "stop",
+            "eval_count": len(pieces),
+            "eval_duration": int((time.perf_counter() - started) * 1e9),
+        }
+
+    def stream(self, model, timeout, messages=None, prompt=None, context=None, options=None, format=None):
+        pieces = self._pieces(messages, prompt, options, format)
+        started = time.perf_counter()
+        for piece in pieces:
+            self._emit(1)
+            yield {"content": piece, "done": False}
+        yield {
+            "content": "",
+            "done": True,
+            "done_reason": "stop",
+            "eval_count": len(pieces),
+            "eval_duration": int((time.perf_counter() - started) * 1e9),
+            "context": [len(pieces)] if prompt is not None else None,
+        }
+
+    def generate(self, model, prompt, timeout, options=None):
+        pieces = self._pieces(None, prompt, options, None)
+        self._emit(len(pieces))
+        # Ollama처럼 context는 프롬프트 토큰 뒤에 생성한 토큰까지 포함
+        context = [len(prompt)] + [len(piece) for piece in pieces]
+        return {"response": "".join(pieces), "context": context, "done": True, "eval_count": len(pieces)}
+
+    def preload(self, model, timeout):
+        return 0.0
+
+
+def create_backend(name: str, url: Optional[str] = None, keep_alive: Union[str, float] = "30m") -> LLMBackend:
+    """
+    이름으로 LLM 백엔드 생성
+
+    Args:
+        name: ollama, openai, fake
+        url: 서버 URL (None이면 OLLAMA_HOST / LLM_BASE_URL)
+        keep_alive: Ollama 모델 유지 시간
+
+    Raises:
+        ValueError: 알 수 없는 백엔드
+    """
+    if name == "ollama":
+        return OllamaBackend(url or OLLAMA_HOST, keep_alive)
+    if name == "openai":
+        return OpenAICompatibleBackend(url or LLM_BASE_URL)
+    if name == "fake":
+        return FakeLLMBackend()
+    raise ValueError(f"알 수 없는 LLM 백엔드입니다: {name} (가능: ollama, openai, fake)")
@@ -0,0 +1,336 @@
+"""
+LLM 클라이언트 관리
+
+실제 호출은 LLM_BACKEND로 고른 백엔드(app.services.llm_backends: ollama, openai, fake)가 맡습니다.
+Ollama 백엔드는 프로세스마다 httpx 연결 풀 하나를 모든 `ollama.Client`가 공유해 재사용하고,
+모든 호출에 keep_alive(OLLAMA_KEEP_ALIVE)를 넘겨 텍스트 모델과 비전 모델이 번갈아 쓰여도 내려가지 않게 합니다.
+시작 시 두 모델을 미리 로드하며(OLLAMA_PRELOAD), 두 모델을 동시에 유지하려면 Ollama 서버의
+OLLAMA_MAX_LOADED_MODELS가 2 이상이어야 합니다.
+
+응답의 load_duration / prompt_eval_duration / eval_duration을 지표(그룹 llm, 키 모델 이름)로 기록해
+모델 로드 시간과 생성 시간을 구분해 볼 수 있습니다. 스트리밍 호출은 첫 토큰까지의 시간(first_token)과
+초당 생성 토큰 수(tokens_per_second, 초가 아닌 비율 값)도 기록하며, 호출자가 정한 조건에서 스트림을 닫아
+생성을 중간에 멈출 수 있습니다 (Ollama와 OpenAI 호환 서버는 연결이 끊기면 생성을 중단합니다).
+여러 요청이 같은 지시문을 앞에 붙이는 경우 지시문을 한 번 처리한 context를 캐시해 재사용할 수 있습니다
+(context를 지원하지 않는 백엔드는 지시문을 매번 함께 보냄).
+작업 마감(app.services.deadline)이 있으면 호출 제한 시간을 남은 시간까지로 줄이고, 스트리밍 호출은 청크마다
+마감/취소를 확인해 넘기면 스트림을 닫습니다. 연결 끊김/시간 초과/5xx로 실패한 chat/스트리밍 호출은
+재시도 정책(app.services.retry)으로 다시 시도합니다.
+ollama/httpx 패키지는 임포트 비용이 커서 첫 호출 시 로드합니다.
+"""
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from app.core.config import (
+    LLM_BACKEND, OLLAMA_HOST, OLLAMA_KEEP_ALIVE, OLLAMA_TIMEOUT, OLLAMA_VISION_TIMEOUT, OLLAMA_MODEL,
+    OLLAMA_VISION_MODEL
+)
+from app.services.deadline import bounded_timeout, current_deadline
+from app.services.llm_backends import LLMBackend, OllamaBackend, create_backend
+from app.services.metrics import get_metrics
+from app.services.retry import get_retry_policy
+
+logger = logging.getLogger(__name__)
+
+# 지시문 context를 만들지 못했을 때 다시 시도하기까지의 시간 (초)
+_CONTEXT_RETRY_AFTER = 30.0
+
+
+def parse_keep_alive(value: str) -> Union[str, float]:
+    """keep_alive 설정 값 변환 (숫자면 초, 아니면 "30m" 같은 Ollama 기간 문자열 그대로)"""
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+class LLMClient:
+    """공유 LLM 클라이언트 (호출은 LLM 백엔드에 맡기고 지표/스트림 중단을 처리)"""
+
+    def __init__(
+        self,
+        backend: Optional[LLMBackend] = None,
+        host: str = OLLAMA_HOST,
+        keep_alive: str = OLLAMA_KEEP_ALIVE,
+        timeout: float = OLLAMA_TIMEOUT
+    ):
+        """
+        Args:
+            backend: LLM 백엔드 (None이면 host의 Ollama)
+            host: Ollama 서버 URL
+            keep_alive: 모델 유지 시간
+            timeout: 기본 호출 제한 시간 (초)
+        """
+        self.keep_alive = parse_keep_alive(keep_alive)
+        self.backend = backend or OllamaBackend(host, self.keep_alive)
+        self.timeout = timeout
+        self._contexts: Dict[tuple, Optional[List[int]]] = {}
+        self._context_failures: Dict[tuple, float] = {}
+        self._context_locks: Dict[tuple, threading.Lock] = {}
+        self._context_lock = threading.Lock()
+
+    @staticmethod
+    def _observe(model: str, response: Any, seconds: float, ok: bool = True):
+        """응답의 구간별 소요 시간(ns)을 지표로 기록"""
+        metrics = get_metrics()
+        metrics.observe("llm", model, "total", seconds, ok)
+        if response is None:
+            return
+        for field, stage in (
+            ("load_duration", "load"),
+            ("prompt_eval_duration", "prompt_eval"),
+            ("eval_duration", "generate"),
+        ):
+            value = response.get(field)
+            if value is not None:
+                metrics.observe("llm", model, stage, value / 1e9)
+
+    def chat(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        timeout: Optional[float] = None,
+        options: Optional[Dict[str, Any]] = None,
+        format: Optional[Any] = None
+    ) -> Any:
+        """
+        chat 호출
+
+        Args:
+            model: 모델 이름
+            messages: 메시지 목록
+            timeout: 호출 제한 시간 (None이면 기본값)
+            options: Ollama 생성 옵션
+            format: 출력 형식 ("json" 또는 JSON 스키마)
+
+        Returns:
+            Ollama chat 응답 형식 (message.content)
+        """
+        started = time.perf_counter()
+        try:
+            response = get_retry_policy("llm").call(
+                f"{self.backend.name}.chat",
+                lambda _: self.backend.chat(model, messages, bounded_timeout(timeout or self.timeout), options, format)
+            )
+        except Exception:
+            self._observe(model, None, time.perf_counter() - started, ok=False)
+            raise
+        self._observe(model, response, time.perf_counter() - started)
+        return response
+
+    def _stream(
+        self,
+        model: str,
+        stop: Optional[Callable[[str], bool]],
+        timeout: Optional[float],
+        **kwargs
+    ) -> Dict[str, Any]:
+        """스트리밍 chat/generate 호출 공통 처리 (stop이 True를 반환하거나 작업 마감이 지나면 스트림을 닫음)"""
+        metrics = get_metrics()
+        deadline = current_deadline()
+        started = time.perf_counter()
+
+        def attempt(_: int) -> tuple:
+            # 다시 시도하면 받은 내용을 버리고 처음부터 받음
+            parts: List[str] = []
+            chunks = 0
+            first_token: Optional[float] = None
+            final = None
+            stream = None
+            try:
+                stream = self.backend.stream(model, bounded_timeout(timeout or self.timeout), **kwargs)
+                for chunk in stream:
+                    if deadline is not None:
+                        deadline.check()
+                    piece = chunk["content"]
+                    if piece:
+                        if first_token is None:
+                            first_token = time.perf_counter()
+                        parts.append(piece)
+                        chunks += 1
+                    if chunk.get("done"):
+                        final = chunk
+                        break
+                    if piece and stop is not None and stop("".join(parts)):
+                        break
+            finally:
+                if stream is not None:
+                    stream.close()
+            return parts, chunks, first_token, final
+
+        try:
+            parts, chunks, first_token, final = get_retry_policy("llm").call(f"{self.backend.name}.stream", attempt)
+        except Exception:
+            self._observe(model, None, time.perf_counter() - started, ok=False)
+            raise
+        ended = time.perf_counter()
+
+        self._observe(model, final, ended - started)
+        if first_token is not None:
+            metrics.observe("llm", model, "first_token", first_token - started)
+        eval_count = final.get("eval_count") if final is not None else None
+        eval_duration = final.get("eval_duration") if final is not None else None
+        if eval_count and eval_duration:
+            tokens_per_second = eval_count / (eval_duration / 1e9)
+        elif first_token is not None and ended > first_token and chunks > 1:
+            # 중간에 멈췄거나 백엔드가 생성 시간을 주지 않으면 청크(≈토큰) 수로 계산
+            eval_count = eval_count or chunks
+            tokens_per_second = (chunks - 1) / (ended - first_token)
+            metrics.observe("llm", model, "generate", ended - first_token)
+        else:
+            eval_count = eval_count or chunks
+            tokens_per_second = None
+        if tokens_per_second is not None:
+            metrics.observe("llm", model, "tokens_per_second", tokens_per_second)
+
+        return {
+            "content": "".join(parts),
+            "stopped": final is None,
+            "done_reason": final.get("done_reason") if final is not None else "stop_condition",
+            "eval_count": eval_count,
+            "tokens_per_second": tokens_per_second,
+            "first_token": first_token - started if first_token is not None else None,
+            "context": final.get("context") if final is not None else None,
+        }
+
+    def stream_chat(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        stop: Optional[Callable[[str], bool]] = None,
+        timeout: Optional[float] = None,
+        options: Optional[Dict[str, Any]] = None,
+        format: Optional[Any] = None
+    ) -> Dict[str, Any]:
+        """
+        스트리밍 chat 호출
+
+        Args:
+            model: 모델 이름
+            messages: 메시지 목록
+            stop: 지금까지 받은 내용을 받아 True를 반환하면 스트림을 닫고 생성을 멈춤
+            timeout: 호출 제한 시간 (None이면 기본값)
+            options: Ollama 생성 옵션 (num_predict 등)
+            format: 출력 형식 ("json" 또는 JSON 스키마)
+
+        Returns:
+            content, stopped(stop으로 멈췄는지), done_reason, eval_count(생성 토큰 수), tokens_per_second,
+            first_token(첫 토큰까지 초)
+        """
+        return self._stream(model, stop, timeout, messages=messages, options=options, format=format)
+
+    def stream_generate(
+        self,
+        model: str,
+        prompt: str,
+        context: Optional[List[int]] = None,
+        stop: Optional[Callable[[str], bool]] = None,
+        timeout: Optional[float] = None,
+        options: Optional[Dict[str, Any]] = None,
+        format: Optional[Any] = None
+    ) -> Dict[str, Any]:
+        """
+        스트리밍 generate 호출 (context를 넘기면 그 뒤에 이어서 생성)
+
+        Returns:
+            stream_chat과 같고, 끝까지 받은 경우 context 포함
+        """
+        return self._stream(model, stop, timeout, prompt=prompt, context=context, options=options, format=format)
+
+    def prefix_context(self, model: str, prefix: str, timeout: Optional[float] = None) -> Optional[List[int]]:
+        """
+        공통 지시문을 한 번 처리한 context (모델/지시문별로 캐시)
+
+        같은 지시문 뒤에 요청마다 다른 내용을 붙일 때 이 context를 generate에 넘기면
+        Ollama가 지시문 부분의 KV 캐시를 다시 계산하지 않고 재사용합니다.
+        만드는 호출은 (모델, 지시문)별로 한 번만 하고 다른 지시문의 조회는 기다리게 하지 않으며,
+        실패하면 _CONTEXT_RETRY_AFTER초 동안은 다시 시도하지 않고 None을 돌려줍니다.
+
+        Returns:
+            context 토큰 (얻지 못하면 None)
+        """
+        if not self.backend.supports_context:
+            return None
+        key = (model, prefix)
+        with self._context_lock:
+            if key in self._contexts:
+                return self._contexts[key]
+            if self._context_failures.get(key, 0) > time.monotonic():
+                return None
+            lock = self._context_locks.setdefault(key, threading.Lock())
+
+        # 같은 지시문을 동시에 처음 요청해도 한 번만 처리
+        with lock:
+            with self._context_lock:
+                if key in self._contexts:
+                    return self._contexts[key]
+                if self._context_failures.get(key, 0) > time.monotonic():
+                    return None
+            started = time.perf_counter()
+            try:
+                response = self.backend.generate(model, prefix, bounded_timeout(timeout or self.timeout), {"num_predict": 1})
+            except Exception as e:
+                self._observe(model, None, time.perf_counter() - started, ok=False)
+                logger.warning(f"지시문 context를 만들 수 없습니다 ({model}): {e}")
+                with self._context_lock:
+                    self._context_failures[key] = time.monotonic() + _CONTEXT_RETRY_AFTER
+                return None
+            self._observe(model, response, time.perf_counter() - started)
+            context = list(response.get("context") or [])
+            # num_predict=0은 Ollama에서 길이 제한 없음이므로 1토큰 생성 후 생성된 토큰을 context에서 뺌
+            generated = response.get("eval_count") or 0
+            if generated and len(context) > generated:
+                context = context[:-generated]
+            with self._context_lock:
+                self._contexts[key] = context or None
+                self._context_failures.pop(key, None)
+                self._context_locks.pop(key, None)
+            return self._contexts[key]
+
+    def preload(self, models: List[str], timeout: Optional[float] = None) -> Dict[str, Optional[float]]:
+        """
+        모델 미리 로드
+
+        Returns:
+            모델 → 로드 시간 (초, 실패하면 None)
+        """
+        results: Dict[str, Optional[float]] = {}
+        for model in dict.fromkeys(models):
+            started = time.perf_counter()
+            try:
+                load = self.backend.preload(model, timeout or OLLAMA_VISION_TIMEOUT)
+            except Exception as e:
+                logger.warning(f"LLM 모델을 미리 로드할 수 없습니다 ({self.backend.name}, {model}): {e}")
+                results[model] = None
+                continue
+            results[model] = load if load is not None else time.perf_counter() - started
+            get_metrics().observe("llm", model, "load", results[model])
+            logger.info(f"LLM 모델 로드: {model} ({self.backend.name}, {results[model]:.2f}초)")
+        return results
+
+    def preload_in_background(self, models: Optional[List[str]] = None) -> threading.Thread:
+        """백그라운드에서 모델 미리 로드 (기본: 텍스트 모델과 비전 모델)"""
+        thread = threading.Thread(
+            target=self.preload,
+            args=(models or [OLLAMA_MODEL, OLLAMA_VISION_MODEL],),
+            daemon=True,
+            name="llm-preload"
+        )
+        thread.start()
+        return thread
+
+
+# 전역 LLM 클라이언트 인스턴스
+_llm_client: Optional[LLMClient] = None
+_llm_client_lock = threading.Lock()
+
+
+def get_llm_client() -> LLMClient:
+    """전역 LLM 클라이언트 인스턴스 반환 (싱글톤)"""
+    global _llm_client
+    with _llm_client_lock:
+        if _llm_client is None:
+            _llm_client = LLMClient(create_backend(LLM_BACKEND, keep_alive=parse_keep_alive(OLLAMA_KEEP_ALIVE)))
+        return _llm_client
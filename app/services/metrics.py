@@ -0,0 +1,118 @@
+"""
+구간별 소요 시간 지표
+
+그룹(profiles, llm, prompt_expansion, gpu, placement) → 키(프로필 이름, 모델 이름, 확장 방식, 백엔드 URL) →
+구간(total, prompt, comfyui, load, generate, vram_free_gb 등)별로
+횟수, 실패 수, 합계/최소/최대와 최근 METRICS_WINDOW개 기준 p50/p95를 집계합니다.
+소요 시간이 아닌 값(llm의 tokens_per_second, gpu의 VRAM GB 등)도 같은 방식으로 집계합니다.
+지표는 프로세스별로 집계되므로 멀티 워커 모드에서는 워커마다 따로 보입니다.
+"""
+import os
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, Optional
+
+from app.core.config import METRICS_WINDOW
+
+
+class TimingStats:
+    """한 구간의 소요 시간 통계"""
+
+    def __init__(self, window: int):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.recent: Deque[float] = deque(maxlen=max(1, window))
+
+    def add(self, seconds: float, ok: bool = True):
+        self.count += 1
+        if not ok:
+            self.errors += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+        self.recent.append(seconds)
+
+    @staticmethod
+    def _percentile(ordered, q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def to_dict(self) -> Dict[str, Any]:
+        ordered = sorted(self.recent)
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "mean": round(self.total / self.count, 4) if self.count else None,
+            "min": round(self.min, 4) if self.min is not None else None,
+            "max": round(self.max, 4) if self.max is not None else None,
+            "p50": round(self._percentile(ordered, 0.5), 4) if ordered else None,
+            "p95": round(self._percentile(ordered, 0.95), 4) if ordered else None,
+        }
+
+
+class Metrics:
+    """그룹/키/구간별 소요 시간 집계"""
+
+    def __init__(self, window: int = METRICS_WINDOW):
+        self.window = window
+        self.started_at = time.time()
+        self._stats: Dict[str, Dict[str, Dict[str, TimingStats]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, group: str, key: str, stage: str, seconds: float, ok: bool = True):
+        """소요 시간 기록"""
+        with self._lock:
+            stats = self._stats.setdefault(group, {}).setdefault(key, {})
+            if stage not in stats:
+                stats[stage] = TimingStats(self.window)
+            stats[stage].add(seconds, ok)
+
+    @contextmanager
+    def timer(self, group: str, key: str, stage: str) -> Iterator[None]:
+        """블록 소요 시간 기록 (예외가 나면 실패로 집계)"""
+        started = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.observe(group, key, stage, time.perf_counter() - started, ok)
+
+    def snapshot(self, group: Optional[str] = None) -> Dict[str, Any]:
+        """
+        집계 결과
+
+        Args:
+            group: 특정 그룹만 조회 (None이면 전체)
+        """
+        with self._lock:
+            groups = {group: self._stats.get(group, {})} if group else self._stats
+            return {
+                name: {
+                    key: {stage: stats.to_dict() for stage, stats in stages.items()}
+                    for key, stages in keys.items()
+                }
+                for name, keys in groups.items()
+            }
+
+    def info(self) -> Dict[str, Any]:
+        """집계 범위 (프로세스, 시작 시각, 분위수 계산 구간)"""
+        return {"pid": os.getpid(), "since": self.started_at, "window": self.window}
+
+
+# 전역 지표 인스턴스
+_metrics: Optional[Metrics] = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> Metrics:
+    """전역 지표 인스턴스 반환 (싱글톤)"""
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = Metrics()
+        return _metrics
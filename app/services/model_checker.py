@@ -1,11 +1,17 @@
 """
 모델 파일 검증 및 확인 서비스
+
+파일 정보와 헤더 분석 결과는 모델 인덱스(app.services.model_index)에서 가져오므로
+요청마다 디렉토리를 훑거나 파일을 다시 열지 않습니다.
+백그라운드 검증(app.services.model_verifier)이 해시나 레이아웃이 틀렸다고 기록한 파일은 무효로 봅니다.
 """
-import os
-import requests
 from pathlib import Path
 from typing import List, Dict, Optional
 from app.core.config import COMFYUI_URL, COMFYUI_PATH
+from app.services.model_index import get_model_index
+
+# 헤더가 없는 .ckpt 파일의 최소 크기 (MB)
+MIN_CKPT_SIZE_MB = 100
 
 
 class ModelChecker:
@@ -14,80 +20,70 @@ class ModelChecker:
     def __init__(self):
         self.comfy_url = COMFYUI_URL
         self.comfy_path = Path(COMFYUI_PATH) if COMFYUI_PATH else None
+        self.index = get_model_index()
     
-    def get_available_models(self) -> List[str]:
+    def get_available_models(self, model_type: str = "checkpoints") -> List[str]:
         """
-        사용 가능한 체크포인트 모델 목록 조회
+        사용 가능한 모델 목록 조회 (하위 폴더 포함)
         
+        Args:
+            model_type: 모델 유형 (checkpoints, loras, vae, upscale_models 등)
+            
         Returns:
-            모델 파일명 목록
+            모델 이름 목록 (모델 디렉토리 기준 상대 경로)
         """
-        if not self.comfy_path:
-            return []
-        
-        checkpoints_dir = self.comfy_path / "models" / "checkpoints"
-        if not checkpoints_dir.exists():
-            return []
-        
-        models = []
-        for file in checkpoints_dir.glob("*.safetensors"):
-            models.append(file.name)
-        for file in checkpoints_dir.glob("*.ckpt"):
-            models.append(file.name)
+        return self.index.names(model_type)
+    
+    def find_models(self, architecture: str) -> List[str]:
+        """
+        아키텍처별 모델 목록 조회 (safetensors 헤더 기준, 파일명과 무관)
         
-        return sorted(models)
+        Args:
+            architecture: sdxl_base, sdxl_refiner, sd15, sd2, unknown
+            
+        Returns:
+            모델 파일명 목록
+        """
+        return self.index.find(architecture)
     
-    def check_model_exists(self, model_name: str) -> bool:
+    def check_model_exists(self, model_name: str, model_type: str = "checkpoints") -> bool:
         """
         모델 파일 존재 여부 확인
         
         Args:
-            model_name: 모델 파일명
+            model_name: 모델 이름
+            model_type: 모델 유형
             
         Returns:
             존재 여부
         """
-        if not self.comfy_path:
-            return False
-        
-        checkpoints_dir = self.comfy_path / "models" / "checkpoints"
-        model_path = checkpoints_dir / model_name
-        
-        return model_path.exists() and model_path.is_file()
+        return self.index.get(model_name, model_type) is not None
     
-    def get_model_info(self, model_name: str) -> Optional[Dict]:
+    def get_model_info(self, model_name: str, model_type: str = "checkpoints") -> Optional[Dict]:
         """
         모델 파일 정보 조회
         
         Args:
-            model_name: 모델 파일명
+            model_name: 모델 이름
+            model_type: 모델 유형
             
         Returns:
-            모델 정보 (크기, 수정일 등)
+            모델 정보 (크기, 수정일, 아키텍처, dtype, 텐서 수, 부분 해시 등)
         """
-        if not self.comfy_path:
+        entry = self.index.get(model_name, model_type)
+        if entry is None:
             return None
-        
-        checkpoints_dir = self.comfy_path / "models" / "checkpoints"
-        model_path = checkpoints_dir / model_name
-        
-        if not model_path.exists():
-            return None
-        
-        stat = model_path.stat()
-        return {
-            "name": model_name,
-            "size": stat.st_size,
-            "size_mb": round(stat.st_size / (1024 * 1024), 2),
-            "modified": stat.st_mtime
-        }
+        entry.pop("mtime_ns", None)
+        entry.pop("path", None)
+        return entry
     
-    def validate_model_file(self, model_name: str) -> Dict[str, any]:
+    def validate_model_file(self, model_name: str, model_type: str = "checkpoints") -> Dict[str, any]:
         """
         모델 파일 검증
         
         Args:
-            model_name: 모델 파일명
+            model_name: 모델 이름
+            model_type: 모델 유형
             
         Returns:
             검증 결과
@@ -99,18 +95,29 @@ class ModelChecker:
             "info": None
         }
         
-        if not self.check_model_exists(model_name):
+        info = self.get_model_info(model_name, model_type)
+        if info is None:
             result["error"] = f"모델 파일을 찾을 수 없습니다: {model_name}"
             return result
         
         result["exists"] = True
-        result["info"] = self.get_model_info(model_name)
+        result["info"] = info
+        
+        if info["format"] == "safetensors":
+            # safetensors는 헤더 파싱 결과로 판단
+            if not info.get("header_valid"):
+                result["error"] = info.get("error") or "safetensors 헤더를 읽을 수 없습니다"
+                return result
+        elif model_type == "checkpoints" and info["size_mb"] < MIN_CKPT_SIZE_MB:
+            # 헤더가 없는 ckpt는 크기로만 판단
+            result["error"] = f"모델 파일이 너무 작습니다: {info['size_mb']}MB (최소 {MIN_CKPT_SIZE_MB}MB 필요)"
+            return result
         
-        # 파일 크기 검증 (최소 100MB 이상이어야 함)
-        if result["info"] and result["info"]["size_mb"] < 100:
-            result["error"] = f"모델 파일이 너무 작습니다: {result['info']['size_mb']}MB (최소 100MB 필요)"
+        # 현재 파일(크기/수정 시각이 같은 파일)에 대한 검증 결과가 실패면 무효
+        verification = info.get("verification")
+        if verification and (verification.get("sha256_match") is False or verification.get("layout_valid") is False):
+            result["error"] = verification.get("error") or "모델 파일 검증에 실패했습니다"
             return result
         
         result["valid"] = True
         return result
-
@@ -0,0 +1,710 @@
+"""
+ComfyUI 모델 인벤토리
+
+체크포인트, LoRA, VAE, 업스케일러 등 ComfyUI 모델 유형별 디렉토리(하위 폴더와 extra_model_paths.yaml 포함)를
+스레드 풀에서 병렬로 재귀 탐색하고, 디렉토리 mtime이 바뀐 곳만 다시 나열합니다.
+
+각 모델 파일의 safetensors 헤더를 한 번만 메모리 매핑으로 읽어 아키텍처(SDXL base/refiner, SD1.5 등),
+dtype, 텐서 수, 부분 해시를 추출하고 작은 JSON 인덱스 파일에 저장합니다.
+항목은 (크기, mtime)이 바뀔 때만 다시 읽으므로 목록 조회와 검증은 요청마다 파일을 다시 열지 않습니다.
+헤더를 읽을 때 텐서 오프셋 표를 파일 크기와 대조하므로 잘리거나 손상된 파일도 바로 걸러집니다.
+"""
+import os
+import json
+import mmap
+import time
+import struct
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import (
+    COMFYUI_PATH, COMFYUI_EXTRA_MODEL_PATHS,
+    MODEL_INDEX_PATH, MODEL_INDEX_TTL, MODEL_SCAN_WORKERS
+)
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 3
+MODEL_EXTENSIONS = (".safetensors", ".sft", ".ckpt", ".pt", ".pth", ".bin")
+
+# 모델 유형 → ComfyUI models/ 아래 폴더 이름 (extra_model_paths.yaml 키로도 사용)
+MODEL_TYPES = {
+    "checkpoints": ("checkpoints",),
+    "loras": ("loras",),
+    "vae": ("vae",),
+    "upscale_models": ("upscale_models",),
+    "embeddings": ("embeddings",),
+    "controlnet": ("controlnet", "t2i_adapter"),
+    "clip": ("clip", "text_encoders"),
+    "clip_vision": ("clip_vision",),
+    "unet": ("unet", "diffusion_models"),
+}
+_FOLDER_TYPES = {folder: model_type for model_type, folders in MODEL_TYPES.items() for folder in folders}
+
+# 워크플로 노드 입력 → 모델 유형 (제출 전 누락 모델 확인용)
+GRAPH_MODEL_INPUTS = {
+    ("CheckpointLoaderSimple", "ckpt_name"): "checkpoints",
+    ("LoraLoader", "lora_name"): "loras",
+    ("LoraLoaderModelOnly", "lora_name"): "loras",
+    ("VAELoader", "vae_name"): "vae",
+    ("UpscaleModelLoader", "model_name"): "upscale_models",
+    ("ControlNetLoader", "control_net_name"): "controlnet",
+    ("CLIPLoader", "clip_name"): "clip",
+    ("CLIPVisionLoader", "clip_name"): "clip_vision",
+    ("UNETLoader", "unet_name"): "unet",
+}
+
+# safetensors 헤더 최대 크기 (이보다 크면 손상된 파일로 간주)
+MAX_HEADER_BYTES = 100 * 1024 * 1024
+# 부분 해시에 사용하는 텐서 데이터 앞/뒤 구간 크기
+PARTIAL_HASH_BYTES = 1024 * 1024
+
+# safetensors dtype별 원소 크기 (bytes)
+DTYPE_SIZES = {
+    "F64": 8, "F32": 4, "F16": 2, "BF16": 2, "F8_E4M3": 1, "F8_E5M2": 1,
+    "I64": 8, "I32": 4, "I16": 2, "I8": 1,
+    "U64": 8, "U32": 4, "U16": 2, "U8": 1, "BOOL": 1,
+}
+
+# 아키텍처별 판별 키 접두사 (위에서부터 순서대로 확인)
+ARCHITECTURE_MARKERS = (
+    ("sdxl_base", "conditioner.embedders.1."),
+    ("sdxl_refiner", "conditioner.embedders.0.model."),
+    ("sd15", "cond_stage_model.transformer."),
+    ("sd2", "cond_stage_model.model."),
+)
+
+
+def read_safetensors_header(mm: mmap.mmap) -> Dict[str, Any]:
+    """
+    safetensors 헤더 파싱
+
+    Args:
+        mm: 파일 전체 메모리 맵
+
+    Returns:
+        헤더 JSON (텐서 이름 → dtype/shape/data_offsets, 선택적으로 __metadata__)
+
+    Raises:
+        ValueError: 헤더가 손상된 경우
+    """
+    if len(mm) < 8:
+        raise ValueError("파일이 safetensors 헤더보다 작습니다")
+    (header_len,) = struct.unpack("<Q", mm[:8])
+    if header_len > MAX_HEADER_BYTES or 8 + header_len > len(mm):
+        raise ValueError(f"safetensors 헤더 길이가 유효하지 않습니다: {header_len}")
+    header = json.loads(mm[8:8 + header_len])
+    if not isinstance(header, dict):
+        raise ValueError("safetensors 헤더가 JSON 객체가 아닙니다")
+    return header
+
+
+def _is_count(value: Any) -> bool:
+    """0 이상의 정수인지 (헤더 JSON은 신뢰할 수 없으므로 bool/float/null 제외)"""
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+
+
+def tensor_offsets(tensor: Any) -> Tuple[int, int]:
+    """
+    텐서 항목의 데이터 오프셋
+
+    Raises:
+        ValueError: data_offsets가 0 이상의 정수 두 개가 아니거나 begin > end인 경우
+    """
+    offsets = tensor.get("data_offsets") if isinstance(tensor, dict) else None
+    if not isinstance(offsets, list) or len(offsets) != 2 or not all(_is_count(v) for v in offsets):
+        raise ValueError(f"텐서 오프셋이 유효하지 않습니다: {offsets!r}")
+    begin, end = offsets
+    if begin > end:
+        raise ValueError(f"텐서 오프셋이 유효하지 않습니다: [{begin}, {end}]")
+    return begin, end
+
+
+def tensor_elements(tensor: Dict[str, Any]) -> int:
+    """
+    텐서 원소 수 (shape의 곱)
+
+    Raises:
+        ValueError: shape가 0 이상의 정수 목록이 아닌 경우
+    """
+    shape = tensor.get("shape", [])
+    if not isinstance(shape, list) or not all(_is_count(dim) for dim in shape):
+        raise ValueError(f"텐서 shape가 유효하지 않습니다: {shape!r}")
+    count = 1
+    for dim in shape:
+        count *= dim
+    return count
+
+
+def check_layout(tensors: Dict[str, Any], data_bytes: int) -> Optional[str]:
+    """
+    텐서 오프셋 표 검증 (파일을 읽지 않고 헤더와 파일 크기만 사용)
+
+    텐서 데이터가 빈틈 없이 이어지고, 각 텐서 크기가 dtype × shape와 일치하며,
+    마지막 텐서가 파일 끝에서 끝나는지 확인합니다.
+
+    Args:
+        tensors: 헤더의 텐서 항목 (__metadata__ 제외)
+        data_bytes: 헤더 뒤 데이터 영역 크기 (파일 크기 - 8 - 헤더 길이)
+
+    Returns:
+        오류 메시지 (정상이면 None)
+    """
+    spans = []
+    for name, tensor in tensors.items():
+        try:
+            begin, end = tensor_offsets(tensor)
+            dtype = tensor.get("dtype")
+            itemsize = DTYPE_SIZES.get(dtype) if isinstance(dtype, str) else None
+            count = tensor_elements(tensor) if itemsize is not None else None
+        except ValueError as e:
+            return f"{e} ({name})"
+        if itemsize is not None and end - begin != count * itemsize:
+            return f"텐서 크기가 dtype/shape와 다릅니다: {name}"
+        spans.append((begin, end, name))
+
+    position = 0
+    for begin, end, name in sorted(spans):
+        if begin != position:
+            return f"텐서 데이터가 연속적이지 않습니다: {name} (예상 오프셋 {position}, 실제 {begin})"
+        position = end
+
+    if position > data_bytes:
+        return f"파일이 잘렸습니다 (헤더 기준 데이터 {position} bytes, 실제 {data_bytes} bytes)"
+    if position < data_bytes:
+        return f"파일 끝에 알 수 없는 데이터가 있습니다 ({data_bytes - position} bytes)"
+    return None
+
+
+def detect_architecture(tensor_names: List[str]) -> str:
+    """텐서 이름으로 모델 아키텍처 판별 (파일명과 무관)"""
+    for architecture, prefix in ARCHITECTURE_MARKERS:
+        if any(name.startswith(prefix) for name in tensor_names):
+            return architecture
+    return "unknown"
+
+
+def inspect_model(path: str) -> Dict[str, Any]:
+    """
+    모델 파일 하나 분석
+
+    Returns:
+        format, architecture, dtype, dtypes, tensor_count, header_bytes, partial_hash, header_valid, error
+    """
+    info: Dict[str, Any] = {
+        "format": "safetensors" if path.lower().endswith((".safetensors", ".sft")) else Path(path).suffix.lower().lstrip("."),
+        "architecture": "unknown",
+        "dtype": None,
+        "dtypes": {},
+        "tensor_count": None,
+        "header_bytes": None,
+        "partial_hash": None,
+        "header_valid": None,
+        "error": None,
+    }
+
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            info["header_valid"] = False
+            info["error"] = "빈 파일입니다"
+            return info
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            data_start = 0
+            if info["format"] == "safetensors":
+                try:
+                    header = read_safetensors_header(mm)
+                except (ValueError, UnicodeDecodeError) as e:
+                    info["header_valid"] = False
+                    info["error"] = f"safetensors 헤더 오류: {e}"
+                else:
+                    tensors = {k: v for k, v in header.items() if k != "__metadata__"}
+                    dtype_bytes: Dict[str, int] = {}
+                    dtype_counts: Dict[str, int] = {}
+                    for tensor in tensors.values():
+                        if not isinstance(tensor, dict):
+                            continue
+                        try:
+                            begin, end = tensor_offsets(tensor)
+                        except ValueError:
+                            # 잘못된 오프셋은 check_layout이 오류로 보고
+                            begin = end = 0
+                        nbytes = end - begin
+                        dtype = tensor.get("dtype", "?")
+                        if not isinstance(dtype, str):
+                            dtype = "?"
+                        dtype_bytes[dtype] = dtype_bytes.get(dtype, 0) + nbytes
+                        dtype_counts[dtype] = dtype_counts.get(dtype, 0) + 1
+
+                    data_start = 8 + struct.unpack("<Q", mm[:8])[0]
+                    layout_error = check_layout(tensors, size - data_start)
+                    info.update(
+                        architecture=detect_architecture(list(tensors)),
+                        dtype=max(dtype_bytes, key=dtype_bytes.get) if dtype_bytes else None,
+                        dtypes=dtype_counts,
+                        tensor_count=len(tensors),
+                        header_bytes=data_start,
+                        header_valid=layout_error is None,
+                        error=layout_error,
+                    )
+
+            # 부분 해시: 크기 + 헤더 + 텐서 데이터 앞/뒤 1MB (파일 전체를 읽지 않음)
+            digest = hashlib.sha256(str(size).encode())
+            digest.update(mm[:data_start])
+            digest.update(mm[data_start:data_start + PARTIAL_HASH_BYTES])
+            digest.update(mm[max(data_start, size - PARTIAL_HASH_BYTES):])
+            info["partial_hash"] = digest.hexdigest()
+
+    return info
+
+
+class MissingModelsError(ValueError):
+    """워크플로가 참조하는 모델 파일이 인벤토리에 없음 (ComfyUI에 제출하기 전에 거절)"""
+
+    def __init__(self, missing: List[Dict[str, str]]):
+        self.missing = missing
+        names = ", ".join(f"{item['type']}/{item['name']}" for item in missing)
+        super().__init__(f"모델 파일을 찾을 수 없습니다: {names}")
+
+
+def load_extra_model_paths(config_path: str) -> Dict[str, List[str]]:
+    """
+    ComfyUI extra_model_paths.yaml 읽기
+
+    섹션마다 base_path와 폴더 이름별 경로(여러 줄 가능)를 가지는 ComfyUI 형식을 따릅니다.
+    상대 base_path는 설정 파일 위치 기준입니다. PyYAML이 없으면 경고 후 무시합니다.
+
+    Returns:
+        모델 유형 → 추가 디렉토리 목록
+    """
+    if not config_path or not os.path.isfile(config_path):
+        return {}
+    try:
+        import yaml
+    except ImportError:
+        logger.warning(f"PyYAML이 설치되지 않아 추가 모델 경로를 무시합니다: {config_path}")
+        return {}
+
+    try:
+        with open(config_path, "r", encoding="utf-8") as f:
+            config = yaml.safe_load(f) or {}
+    except (OSError, yaml.YAMLError) as e:
+        logger.warning(f"추가 모델 경로 설정을 읽을 수 없습니다 ({config_path}): {e}")
+        return {}
+
+    config_dir = os.path.dirname(os.path.abspath(config_path))
+    paths: Dict[str, List[str]] = {}
+    for section in config.values():
+        if not isinstance(section, dict):
+            continue
+        base_path = os.path.expandvars(os.path.expanduser(str(section.get("base_path", ""))))
+        base_path = os.path.join(config_dir, base_path)
+        for folder, value in section.items():
+            model_type = _FOLDER_TYPES.get(folder)
+            if model_type is None or value is None:
+                continue
+            for line in str(value).splitlines():
+                line = line.strip()
+                if line:
+                    directory = os.path.join(base_path, os.path.expandvars(os.path.expanduser(line)))
+                    paths.setdefault(model_type, []).append(os.path.normpath(directory))
+    return paths
+
+
+class ModelIndex:
+    """모델 유형별 디렉토리의 영속 인덱스"""
+
+    def __init__(
+        self,
+        roots: Dict[str, List[str]],
+        index_path: str,
+        ttl: float = MODEL_INDEX_TTL,
+        workers: int = MODEL_SCAN_WORKERS
+    ):
+        """
+        Args:
+            roots: 모델 유형 → 디렉토리 목록 (앞쪽 디렉토리가 같은 이름의 파일보다 우선)
+            index_path: 인덱스 JSON 파일 경로
+            ttl: 디렉토리 재확인 최소 간격 (초, 최상위 디렉토리 mtime이 바뀌면 즉시 재확인)
+            workers: 디렉토리를 동시에 훑는 스레드 수
+        """
+        self.roots = {model_type: [str(root) for root in dirs] for model_type, dirs in roots.items()}
+        self.index_path = index_path
+        self.ttl = ttl
+        self.workers = max(1, workers)
+        self._entries: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._dirs: Dict[str, Dict[str, Any]] = {}
+        self._checked_at = 0.0
+        self._root_mtimes: Optional[Tuple] = None
+        self._index_mtime: Optional[int] = None
+        # 저장하지 않은 검증 결과가 있는지, 마지막 저장 시각 (검증 결과는 모아서 저장)
+        self._dirty = False
+        self._saved_at = 0.0
+        self._lock = threading.Lock()
+        self._load()
+
+    # ------------------------------------------------------------------
+    # 디스크 인덱스
+    # ------------------------------------------------------------------
+    def _load(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                self._index_mtime = os.fstat(f.fileno()).st_mtime_ns
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        # 버전이나 디렉토리 구성이 다르면 버림
+        if data.get("version") == INDEX_VERSION and data.get("roots") == self.roots:
+            self._entries = data.get("models", {})
+            self._dirs = data.get("dirs", {})
+
+    def _save(self):
+        Path(self.index_path).parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"version": INDEX_VERSION, "roots": self.roots, "models": self._entries, "dirs": self._dirs},
+                f, ensure_ascii=False
+            )
+        os.replace(tmp_path, self.index_path)
+        self._index_mtime = os.stat(self.index_path).st_mtime_ns
+        self._dirty = False
+        self._saved_at = time.monotonic()
+
+    def _reload_if_changed(self):
+        """다른 프로세스(슈퍼바이저/다른 워커)가 인덱스 파일을 갱신했으면 다시 읽음 (저장 전 검증 결과가 있으면 유지)"""
+        if self._dirty:
+            return
+        try:
+            index_mtime = os.stat(self.index_path).st_mtime_ns
+        except OSError:
+            return
+        if index_mtime != self._index_mtime:
+            self._load()
+
+    # ------------------------------------------------------------------
+    # 갱신
+    # ------------------------------------------------------------------
+    def _scan_dir(self, model_type: str, root: str, directory: str):
+        """
+        디렉토리 하나 처리 (스레드 풀에서 실행, 공유 상태는 읽기만 함)
+
+        mtime이 그대로인 디렉토리는 캐시된 목록을 쓰고, 파일은 (크기, mtime)이 바뀐 것만 다시 분석합니다.
+
+        Returns:
+            (디렉토리 목록 캐시, 모델 항목 목록) 또는 디렉토리가 없으면 None
+        """
+        try:
+            dir_mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            return None
+
+        listing = self._dirs.get(directory)
+        if listing is None or listing["mtime_ns"] != dir_mtime:
+            files, subdirs = [], []
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        if entry.name.startswith("."):
+                            continue
+                        try:
+                            if entry.is_dir():
+                                subdirs.append(entry.name)
+                            elif entry.name.lower().endswith(MODEL_EXTENSIONS) and entry.is_file():
+                                files.append(entry.name)
+                        except OSError:
+                            continue
+            except OSError as e:
+                logger.warning(f"모델 디렉토리를 읽을 수 없습니다 ({directory}): {e}")
+                return None
+            listing = {"mtime_ns": dir_mtime, "files": sorted(files), "subdirs": sorted(subdirs)}
+
+        cached_entries = self._entries.get(model_type, {})
+        records = []
+        for filename in listing["files"]:
+            path = os.path.join(directory, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            name = os.path.relpath(path, root)
+            cached = cached_entries.get(name)
+            if (cached and cached.get("path") == path
+                    and cached["size"] == stat.st_size and cached["mtime_ns"] == stat.st_mtime_ns):
+                records.append(cached)
+                continue
+
+            record = {
+                "name": name,
+                "type": model_type,
+                "path": path,
+                "size": stat.st_size,
+                "size_mb": round(stat.st_size / (1024 * 1024), 2),
+                "modified": stat.st_mtime,
+                "mtime_ns": stat.st_mtime_ns,
+            }
+            try:
+                record.update(inspect_model(path))
+            except (OSError, ValueError, TypeError) as e:
+                record.update(header_valid=False, error=f"파일 읽기 오류: {e}")
+            records.append(record)
+            logger.info(f"모델 인덱싱: {model_type}/{name} ({record.get('architecture')}, {record.get('dtype')})")
+        return listing, records
+
+    def _walk(self) -> Tuple[Dict[str, Dict[str, Dict[str, Any]]], Dict[str, Dict[str, Any]]]:
+        """
+        모든 모델 디렉토리를 한 번의 병렬 재귀 탐색으로 훑음 (호출자는 _lock을 보유해야 함)
+
+        Returns:
+            (유형별 모델 항목, 디렉토리 목록 캐시)
+        """
+        entries: Dict[str, Dict[str, Dict[str, Any]]] = {model_type: {} for model_type in self.roots}
+        priorities: Dict[Tuple[str, str], int] = {}
+        dirs: Dict[str, Dict[str, Any]] = {}
+        visited = set()
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="model-scan") as pool:
+            pending = {}
+
+            def submit(model_type: str, priority: int, root: str, directory: str):
+                # 심볼릭 링크 순환 방지
+                key = (model_type, os.path.realpath(directory))
+                if key in visited:
+                    return
+                visited.add(key)
+                future = pool.submit(self._scan_dir, model_type, root, directory)
+                pending[future] = (model_type, priority, root, directory)
+
+            for model_type, roots in self.roots.items():
+                for priority, root in enumerate(roots):
+                    submit(model_type, priority, root, root)
+
+            while pending:
+                done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+                for future in done:
+                    model_type, priority, root, directory = pending.pop(future)
+                    result = future.result()
+                    if result is None:
+                        continue
+                    listing, records = result
+                    dirs[directory] = listing
+                    for record in records:
+                        # 같은 이름이 여러 디렉토리에 있으면 앞쪽 디렉토리 우선 (ComfyUI와 동일)
+                        key = (model_type, record["name"])
+                        if key not in priorities or priority < priorities[key]:
+                            priorities[key] = priority
+                            entries[model_type][record["name"]] = record
+                    for subdir in listing["subdirs"]:
+                        submit(model_type, priority, root, os.path.join(directory, subdir))
+
+        return entries, dirs
+
+    def _root_state(self) -> Tuple:
+        """최상위 디렉토리 mtime 목록 (바뀌면 TTL과 무관하게 재확인)"""
+        state = []
+        for model_type in sorted(self.roots):
+            for root in self.roots[model_type]:
+                try:
+                    state.append(os.stat(root).st_mtime_ns)
+                except OSError:
+                    state.append(None)
+        return tuple(state)
+
+    def refresh(self, force: bool = False):
+        """
+        필요하면 인덱스 갱신
+
+        TTL이 지났거나 최상위 디렉토리 mtime이 바뀐 경우에만 디렉토리를 다시 훑습니다.
+        """
+        if not self.roots:
+            return
+        with self._lock:
+            root_mtimes = self._root_state()
+            now = time.monotonic()
+            if not force and root_mtimes == self._root_mtimes and now - self._checked_at < self.ttl:
+                return
+
+            self._reload_if_changed()
+            entries, dirs = self._walk()
+            if entries != self._entries or dirs != self._dirs:
+                self._entries, self._dirs = entries, dirs
+                try:
+                    self._save()
+                except OSError as e:
+                    logger.warning(f"모델 인덱스 저장 실패: {e}")
+            self._root_mtimes = root_mtimes
+            self._checked_at = now
+
+    # ------------------------------------------------------------------
+    # 조회
+    # ------------------------------------------------------------------
+    def types(self) -> List[str]:
+        """인덱싱하는 모델 유형 목록"""
+        return list(self.roots)
+
+    def available_types(self) -> List[str]:
+        """디렉토리가 하나 이상 존재하는 모델 유형 목록"""
+        return [
+            model_type for model_type, roots in self.roots.items()
+            if any(os.path.isdir(root) for root in roots)
+        ]
+
+    def list(self, model_type: str = "checkpoints") -> List[Dict[str, Any]]:
+        """유형별 모델 항목 (이름순)"""
+        self.refresh()
+        with self._lock:
+            entries = self._entries.get(model_type, {})
+            return [dict(entries[name]) for name in sorted(entries)]
+
+    def inventory(self) -> Dict[str, List[Dict[str, Any]]]:
+        """모든 유형의 모델 항목 (유형 → 이름순 목록)"""
+        self.refresh()
+        with self._lock:
+            return {
+                model_type: [dict(entries[name]) for name in sorted(entries)]
+                for model_type, entries in self._entries.items()
+            }
+
+    def names(self, model_type: str = "checkpoints") -> List[str]:
+        """유형별 모델 이름 목록 (모델 디렉토리 기준 상대 경로, 이름순)"""
+        self.refresh()
+        with self._lock:
+            return sorted(self._entries.get(model_type, {}))
+
+    def get(self, name: str, model_type: str = "checkpoints") -> Optional[Dict[str, Any]]:
+        """모델 항목 조회"""
+        self.refresh()
+        with self._lock:
+            entry = self._entries.get(model_type, {}).get(name)
+            return dict(entry) if entry else None
+
+    def find(self, architecture: str, model_type: str = "checkpoints") -> List[str]:
+        """아키텍처가 일치하는 모델 이름 목록 (이름순)"""
+        return [entry["name"] for entry in self.list(model_type) if entry.get("architecture") == architecture]
+
+    def path_of(self, name: str, model_type: str = "checkpoints") -> Optional[Path]:
+        """모델 파일 경로"""
+        entry = self.get(name, model_type)
+        return Path(entry["path"]) if entry else None
+
+    def find_missing(self, references: Iterable[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        """
+        (유형, 이름) 목록 중 인벤토리에 없는 것 반환
+
+        디렉토리가 하나도 없는 유형(예: ComfyUI가 다른 호스트에 있는 경우)은 확인하지 않습니다.
+        누락이 있으면 방금 추가된 파일일 수 있으므로 한 번 강제로 다시 훑은 뒤 판단합니다.
+        """
+        checkable = set(self.available_types())
+        references = [(model_type, name) for model_type, name in references if model_type in checkable]
+        if not references:
+            return []
+
+        def missing() -> List[Tuple[str, str]]:
+            with self._lock:
+                return [
+                    (model_type, name) for model_type, name in references
+                    if name not in self._entries.get(model_type, {})
+                ]
+
+        self.refresh()
+        if missing():
+            self.refresh(force=True)
+        return missing()
+
+    def check_graph(self, graph: Dict[str, Any]):
+        """
+        ComfyUI 워크플로(API 형식)가 참조하는 모델이 모두 있는지 확인
+
+        Raises:
+            MissingModelsError: 누락된 모델이 있는 경우
+        """
+        references = []
+        for node_id, node in graph.items():
+            for (class_type, input_name), model_type in GRAPH_MODEL_INPUTS.items():
+                value = node.get("inputs", {}).get(input_name) if node.get("class_type") == class_type else None
+                if isinstance(value, str):
+                    references.append((node_id, class_type, input_name, model_type, value))
+
+        missing = set(self.find_missing((model_type, name) for _, _, _, model_type, name in references))
+        if missing:
+            raise MissingModelsError([
+                {"node": node_id, "class_type": class_type, "input": input_name, "type": model_type, "name": name}
+                for node_id, class_type, input_name, model_type, name in references
+                if (model_type, name) in missing
+            ])
+
+    def record_verification(
+        self,
+        name: str,
+        size: int,
+        mtime_ns: int,
+        result: Dict[str, Any],
+        model_type: str = "checkpoints"
+    ) -> bool:
+        """
+        검증 결과 기록 (검증하는 동안 파일이 바뀌었으면 버림)
+
+        인덱스 파일은 바로 쓰지 않고 flush()에서 모아서 저장합니다.
+
+        Returns:
+            기록 여부
+        """
+        with self._lock:
+            entry = self._entries.get(model_type, {}).get(name)
+            if entry is None or entry["size"] != size or entry["mtime_ns"] != mtime_ns:
+                return False
+            entry["verification"] = result
+            self._dirty = True
+            return True
+
+    def flush(self, min_interval: float = 0.0) -> bool:
+        """
+        기록한 검증 결과를 인덱스 파일에 저장
+
+        Args:
+            min_interval: 마지막 저장 후 이 시간(초)이 지나지 않았으면 저장하지 않음
+
+        Returns:
+            저장 여부
+        """
+        with self._lock:
+            if not self._dirty or time.monotonic() - self._saved_at < min_interval:
+                return False
+            try:
+                self._save()
+            except OSError as e:
+                logger.warning(f"모델 인덱스 저장 실패: {e}")
+                return False
+            return True
+
+
+def default_model_roots() -> Dict[str, List[str]]:
+    """COMFYUI_PATH/models/<폴더>와 extra_model_paths.yaml에서 유형별 모델 디렉토리 구성"""
+    roots: Dict[str, List[str]] = {}
+    if COMFYUI_PATH:
+        models_dir = Path(COMFYUI_PATH) / "models"
+        for model_type, folders in MODEL_TYPES.items():
+            roots[model_type] = [str(models_dir / folder) for folder in folders]
+    for model_type, dirs in load_extra_model_paths(COMFYUI_EXTRA_MODEL_PATHS).items():
+        existing = roots.setdefault(model_type, [])
+        existing.extend(d for d in dirs if d not in existing)
+    return roots
+
+
+# 전역 모델 인덱스 인스턴스
+_model_index: Optional[ModelIndex] = None
+_model_index_lock = threading.Lock()
+
+
+def get_model_index() -> ModelIndex:
+    """전역 모델 인덱스 인스턴스 반환 (싱글톤)"""
+    global _model_index
+    with _model_index_lock:
+        if _model_index is None:
+            _model_index = ModelIndex(default_model_roots(), MODEL_INDEX_PATH)
+        return _model_index
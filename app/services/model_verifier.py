@@ -0,0 +1,235 @@
+"""
+모델 파일 무결성 검증
+
+오프셋 표 검증(잘림/손상 감지)은 모델 인덱스가 헤더를 읽을 때 이미 수행하고, 여기서는 선택적으로
+파일 전체 SHA-256을 계산해 인덱스에 (크기, mtime)과 함께 저장합니다. 파일이 바뀌지 않으면 다시 계산하지 않습니다.
+모델 옆에 `<파일명>.sha256` 사이드카(sha256sum 형식, 첫 단어가 16진수 해시)가 있으면 계산한 해시와 비교해
+다르면 손상으로 보고하고, 없으면 해시는 캐시만 합니다 (sha256_match: None).
+검증 결과는 _FLUSH_INTERVAL초마다와 검증이 끝날 때 모아서 인덱스 파일에 저장합니다.
+
+해시는 메모리 맵을 청크 단위로 읽으며, 다음 청크를 미리 읽도록 커널에 요청(madvise)하고
+여러 파일을 스레드 풀에서 동시에 처리합니다 (hashlib은 해시 중 GIL을 놓음).
+"""
+import os
+import mmap
+import time
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.config import MODEL_VERIFY_WORKERS, MODEL_VERIFY_CHUNK_MB
+from app.services.model_index import ModelIndex, get_model_index
+
+logger = logging.getLogger(__name__)
+
+# 검증 중 인덱스 파일 저장 간격 (초)
+_FLUSH_INTERVAL = 30.0
+# 사이드카 해시 파일 확장자
+SIDECAR_SUFFIX = ".sha256"
+
+
+def read_sidecar_hash(path: str) -> Optional[str]:
+    """`<path>.sha256` 사이드카의 SHA-256 (없거나 형식이 다르면 None)"""
+    try:
+        with open(path + SIDECAR_SUFFIX, "r", encoding="utf-8") as f:
+            words = f.read(1024).split()
+    except OSError:
+        return None
+    digest = words[0].lower() if words else ""
+    if len(digest) != 64 or any(c not in "0123456789abcdef" for c in digest):
+        return None
+    return digest
+
+
+def sha256_file(path: str, chunk_bytes: int, on_chunk: Optional[Callable[[int], None]] = None) -> str:
+    """
+    메모리 맵 기반 청크 SHA-256
+
+    Args:
+        path: 파일 경로
+        chunk_bytes: 청크 크기
+        on_chunk: 청크를 해시할 때마다 처리한 바이트 수로 호출 (진행률 보고용)
+
+    Returns:
+        16진수 SHA-256
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # 빈 파일은 매핑할 수 없음
+            return digest.hexdigest()
+
+        with mm, memoryview(mm) as view:
+            size = len(mm)
+            can_prefetch = hasattr(mm, "madvise") and hasattr(mmap, "MADV_WILLNEED")
+            for offset in range(0, size, chunk_bytes):
+                end = min(offset + chunk_bytes, size)
+                if can_prefetch and end < size:
+                    # 다음 청크를 미리 읽어 두도록 요청 (해시와 디스크 읽기가 겹침)
+                    ahead = min(chunk_bytes, size - end)
+                    mm.madvise(mmap.MADV_WILLNEED, end - end % mmap.PAGESIZE, ahead + end % mmap.PAGESIZE)
+                digest.update(view[offset:end])
+                if on_chunk is not None:
+                    on_chunk(end - offset)
+    return digest.hexdigest()
+
+
+class ModelVerifier:
+    """백그라운드 검증 실행 및 진행률 관리"""
+
+    def __init__(self, index: ModelIndex, workers: int, chunk_bytes: int):
+        """
+        Args:
+            index: 모델 인덱스
+            workers: 동시에 해시하는 파일 수
+            chunk_bytes: 해시 청크 크기
+        """
+        self.index = index
+        self.workers = max(1, workers)
+        self.chunk_bytes = max(mmap.PAGESIZE, chunk_bytes)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._progress: Dict[str, Any] = {"running": False}
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, sha256: bool = False, force: bool = False) -> bool:
+        """
+        검증 시작
+
+        Args:
+            sha256: 전체 SHA-256 계산 여부 (False면 오프셋 표 검증 결과만 기록)
+            force: 이미 검증된 파일도 다시 검증
+
+        Returns:
+            시작 여부 (이미 실행 중이면 False)
+        """
+        with self._lock:
+            if self.running:
+                return False
+            targets = [
+                entry
+                for entries in self.index.inventory().values()
+                for entry in entries
+                if self._needs_verification(entry, sha256, force)
+            ]
+            self._progress = {
+                "running": True,
+                "sha256": sha256,
+                "total_files": len(targets),
+                "done_files": 0,
+                "total_bytes": sum(entry["size"] for entry in targets) if sha256 else 0,
+                "hashed_bytes": 0,
+                "current": [],
+                "failed": [],
+                "started_at": time.time(),
+                "finished_at": None
+            }
+            self._thread = threading.Thread(target=self._run, args=(targets, sha256), daemon=True, name="model-verify")
+            self._thread.start()
+        if targets:
+            logger.info(f"모델 검증 시작: {len(targets)}개 (SHA-256: {sha256})")
+        return True
+
+    @staticmethod
+    def _needs_verification(entry: Dict[str, Any], sha256: bool, force: bool) -> bool:
+        if force:
+            return True
+        verification = entry.get("verification")
+        if verification is None:
+            return True
+        return sha256 and not verification.get("sha256")
+
+    def _add_hashed(self, nbytes: int):
+        with self._lock:
+            self._progress["hashed_bytes"] += nbytes
+
+    def _verify_one(self, entry: Dict[str, Any], sha256: bool):
+        name = f"{entry['type']}/{entry['name']}"
+        with self._lock:
+            self._progress["current"].append(name)
+
+        started = time.monotonic()
+        result: Dict[str, Any] = {
+            "layout_valid": entry.get("header_valid"),
+            "error": entry.get("error"),
+            "sha256": None,
+            "sha256_match": None,
+            "verified_at": None,
+            "seconds": None
+        }
+        try:
+            if sha256:
+                result["sha256"] = sha256_file(entry["path"], self.chunk_bytes, self._add_hashed)
+                expected = read_sidecar_hash(entry["path"])
+                if expected is not None:
+                    result["sha256_match"] = expected == result["sha256"]
+                    if not result["sha256_match"]:
+                        result["layout_valid"] = False
+                        result["error"] = f"SHA-256이 {os.path.basename(entry['path'])}{SIDECAR_SUFFIX}와 다릅니다"
+        except OSError as e:
+            result["error"] = f"파일 읽기 오류: {e}"
+            result["layout_valid"] = False
+        result["verified_at"] = time.time()
+        result["seconds"] = round(time.monotonic() - started, 3)
+        self.index.record_verification(entry["name"], entry["size"], entry["mtime_ns"], result, entry["type"])
+        self.index.flush(min_interval=_FLUSH_INTERVAL)
+
+        with self._lock:
+            self._progress["current"].remove(name)
+            self._progress["done_files"] += 1
+            if result["layout_valid"] is False:
+                self._progress["failed"].append({"name": name, "error": result["error"]})
+        if result["layout_valid"] is False:
+            logger.warning(f"모델 파일 손상: {name} ({result['error']})")
+
+    def _run(self, targets: List[Dict[str, Any]], sha256: bool):
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="model-verify") as pool:
+                list(pool.map(lambda entry: self._verify_one(entry, sha256), targets))
+        except Exception as e:
+            logger.error(f"모델 검증 중 오류: {e}")
+        finally:
+            self.index.flush()
+            with self._lock:
+                self._progress["running"] = False
+                self._progress["finished_at"] = time.time()
+        if targets:
+            logger.info(f"모델 검증 완료: {len(targets)}개")
+
+    def progress(self) -> Dict[str, Any]:
+        """진행률 (처리한 파일/바이트, 현재 처리 중인 파일, 실패 목록)"""
+        with self._lock:
+            progress = dict(self._progress)
+            progress["current"] = list(progress.get("current", []))
+            progress["failed"] = list(progress.get("failed", []))
+        total_bytes = progress.get("total_bytes")
+        if total_bytes:
+            progress["percent"] = round(100 * progress["hashed_bytes"] / total_bytes, 1)
+        elif progress.get("total_files"):
+            progress["percent"] = round(100 * progress["done_files"] / progress["total_files"], 1)
+        return progress
+
+
+# 전역 검증기 인스턴스
+_model_verifier: Optional[ModelVerifier] = None
+_model_verifier_lock = threading.Lock()
+
+
+def get_model_verifier() -> ModelVerifier:
+    """전역 모델 검증기 인스턴스 반환 (싱글톤)"""
+    global _model_verifier
+    with _model_verifier_lock:
+        if _model_verifier is None:
+            _model_verifier = ModelVerifier(
+                get_model_index(),
+                MODEL_VERIFY_WORKERS,
+                MODEL_VERIFY_CHUNK_MB * 1024 * 1024
+            )
+        return _model_verifier
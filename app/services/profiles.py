@@ -0,0 +1,315 @@
+"""
+생성 프로필 레지스트리
+
+해상도, 스텝, 샘플러/스케줄러, 리파이너 분할, 업스케일 방식, VAE 타일 디코드, 배치 크기, 프로필별 동시 실행 한도,
+필요 VRAM(생략하면 추정)과 VRAM이 부족할 때 대신 쓸 프로필(fallback), 작업 시간 예산(timeout, 생략하면 JOB_TIMEOUT)을
+설정 파일(PROFILES_PATH, JSON)에서 읽습니다. 파일은 최소 간격(PROFILES_RELOAD_INTERVAL)마다 mtime을 확인해
+바뀌면 다시 읽으며, 잘못된 파일은 로그만 남기고 이전 프로필을 계속 사용합니다.
+파일이 없으면 내장 기본 프로필(fast, balanced, high_quality)을 사용합니다.
+
+    {
+      "profiles": {
+        "fast": {"width": 832, "height": 832, "steps": 28, "cfg": 6.5, "max_concurrency": 2},
+        ...
+      }
+    }
+"""
+import os
+import json
+import time
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+from app.core.config import PROFILES_PATH, PROFILES_RELOAD_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+# 업스케일 방식
+# - model: VAE 디코드 후 업스케일러 모델로 픽셀 업스케일 (scale을 주면 결과를 그 배율로 다시 맞춤)
+# - latent: 잠재 공간에서 키운 뒤 낮은 denoise로 한 번 더 샘플링하고 디코드
+UPSCALE_METHODS = ("model", "latent")
+# 방식별 옵션 기본값
+UPSCALE_DEFAULTS: Dict[str, Dict[str, Any]] = {
+    "model": {"model": None, "scale": None},
+    "latent": {"scale": 1.5, "denoise": 0.5, "steps": None, "latent_method": "nearest-exact"},
+}
+# LatentUpscaleBy 보간 방식
+LATENT_UPSCALE_METHODS = ("nearest-exact", "bilinear", "area", "bicubic", "bislerp")
+
+# 프로필 필드 기본값 (설정 파일에서 생략한 필드에 적용)
+PROFILE_DEFAULTS: Dict[str, Any] = {
+    "description": "",
+    "width": 1024,
+    "height": 1024,
+    "steps": 30,
+    "cfg": 7.0,
+    "sampler": "dpmpp_sde",
+    "scheduler": "karras",
+    "refiner_split": None,
+    "upscale": None,
+    "vae_tile_size": None,
+    "batch_size": 1,
+    "max_concurrency": None,
+    "vram_gb": None,
+    "fallback": None,
+    "timeout": None,
+}
+
+# 설정 파일이 없을 때 사용하는 기본 프로필
+DEFAULT_PROFILES: Dict[str, Dict[str, Any]] = {
+    "fast": {
+        "description": "빠른 미리보기 (리파이너/업스케일 없음)",
+        "width": 832,
+        "height": 832,
+        "steps": 28,
+        "cfg": 6.5,
+    },
+    "balanced": {
+        "description": "기본 품질 (마지막 20% 스텝을 리파이너가 처리)",
+        "width": 1024,
+        "height": 1024,
+        "steps": 40,
+        "cfg": 7.5,
+        "refiner_split": 0.8,
+        "fallback": "fast",
+    },
+    "high_quality": {
+        "description": "최고 품질 (리파이너 + 업스케일러)",
+        "width": 1024,
+        "height": 1024,
+        "steps": 50,
+        "cfg": 8.0,
+        "refiner_split": 0.8,
+        "upscale": {"method": "model", "model": None},
+        "fallback": "balanced",
+    },
+}
+
+
+def _check_upscale(name: str, upscale: Any) -> Dict[str, Any]:
+    """업스케일 설정 검증 후 방식별 기본값을 채운 설정 반환"""
+    if not isinstance(upscale, dict) or upscale.get("method") not in UPSCALE_METHODS:
+        raise ValueError(f"프로필 {name}: upscale.method는 {', '.join(UPSCALE_METHODS)} 중 하나여야 합니다")
+    method = upscale["method"]
+    defaults = UPSCALE_DEFAULTS[method]
+    unknown = set(upscale) - set(defaults) - {"method"}
+    if unknown:
+        raise ValueError(f"프로필 {name}: upscale({method})에 알 수 없는 필드 {', '.join(sorted(unknown))}")
+
+    upscale = {"method": method, **defaults, **upscale}
+    scale = upscale["scale"]
+    if scale is not None and (not isinstance(scale, (int, float)) or isinstance(scale, bool) or not 1 < scale <= 4):
+        raise ValueError(f"프로필 {name}: upscale.scale은 1보다 크고 4 이하인 숫자여야 합니다: {scale!r}")
+    if method == "model" and upscale["model"] is not None and not isinstance(upscale["model"], str):
+        raise ValueError(f"프로필 {name}: upscale.model은 문자열이어야 합니다")
+    if method == "latent":
+        if scale is None:
+            raise ValueError(f"프로필 {name}: latent 업스케일에는 scale이 필요합니다")
+        denoise = upscale["denoise"]
+        if not isinstance(denoise, (int, float)) or isinstance(denoise, bool) or not 0 < denoise <= 1:
+            raise ValueError(f"프로필 {name}: upscale.denoise는 0보다 크고 1 이하여야 합니다: {denoise!r}")
+        if upscale["steps"] is not None:
+            _check_int(name, "upscale.steps", upscale["steps"], 1, 1000)
+        if upscale["latent_method"] not in LATENT_UPSCALE_METHODS:
+            raise ValueError(
+                f"프로필 {name}: upscale.latent_method는 {', '.join(LATENT_UPSCALE_METHODS)} 중 하나여야 합니다"
+            )
+    return upscale
+
+
+def _check_int(name: str, field: str, value: Any, minimum: int, maximum: Optional[int] = None):
+    if not isinstance(value, int) or isinstance(value, bool) or value < minimum or (maximum is not None and value > maximum):
+        bound = f"{minimum} 이상" if maximum is None else f"{minimum}~{maximum}"
+        raise ValueError(f"프로필 {name}: {field}는 {bound} 정수여야 합니다: {value!r}")
+
+
+def build_profile(name: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    프로필 검증 후 기본값을 채운 프로필 반환
+
+    Raises:
+        ValueError: 알 수 없는 필드나 잘못된 값이 있는 경우
+    """
+    if not isinstance(fields, dict):
+        raise ValueError(f"프로필 {name}: 객체여야 합니다")
+    unknown = set(fields) - set(PROFILE_DEFAULTS)
+    if unknown:
+        raise ValueError(f"프로필 {name}: 알 수 없는 필드 {', '.join(sorted(unknown))}")
+
+    profile = {"name": name, **PROFILE_DEFAULTS, **fields}
+    for field in ("width", "height"):
+        _check_int(name, field, profile[field], 64, 8192)
+        if profile[field] % 8:
+            raise ValueError(f"프로필 {name}: {field}는 8의 배수여야 합니다: {profile[field]}")
+    _check_int(name, "steps", profile["steps"], 1, 1000)
+    _check_int(name, "batch_size", profile["batch_size"], 1, 64)
+    if profile["max_concurrency"] is not None:
+        _check_int(name, "max_concurrency", profile["max_concurrency"], 1)
+    vram = profile["vram_gb"]
+    if vram is not None and (not isinstance(vram, (int, float)) or isinstance(vram, bool) or vram <= 0):
+        raise ValueError(f"프로필 {name}: vram_gb는 0보다 큰 숫자여야 합니다: {vram!r}")
+    if profile["fallback"] is not None and (not isinstance(profile["fallback"], str) or profile["fallback"] == name):
+        raise ValueError(f"프로필 {name}: fallback은 다른 프로필 이름이어야 합니다: {profile['fallback']!r}")
+    timeout = profile["timeout"]
+    if timeout is not None and (not isinstance(timeout, (int, float)) or isinstance(timeout, bool) or timeout <= 0):
+        raise ValueError(f"프로필 {name}: timeout은 0보다 큰 숫자(초)여야 합니다: {timeout!r}")
+    if not isinstance(profile["cfg"], (int, float)) or isinstance(profile["cfg"], bool) or profile["cfg"] < 0:
+        raise ValueError(f"프로필 {name}: cfg는 0 이상의 숫자여야 합니다: {profile['cfg']!r}")
+    for field in ("sampler", "scheduler", "description"):
+        if not isinstance(profile[field], str):
+            raise ValueError(f"프로필 {name}: {field}는 문자열이어야 합니다")
+
+    split = profile["refiner_split"]
+    if split is not None and (not isinstance(split, (int, float)) or not 0 < split < 1):
+        raise ValueError(f"프로필 {name}: refiner_split은 0과 1 사이여야 합니다 (리파이너를 쓰지 않으면 null): {split!r}")
+
+    if profile["upscale"] is not None:
+        profile["upscale"] = _check_upscale(name, profile["upscale"])
+    if profile["vae_tile_size"] is not None:
+        _check_int(name, "vae_tile_size", profile["vae_tile_size"], 256, 4096)
+        if profile["vae_tile_size"] % 32:
+            raise ValueError(f"프로필 {name}: vae_tile_size는 32의 배수여야 합니다: {profile['vae_tile_size']}")
+    return profile
+
+
+def base_steps(profile: Dict[str, Any]) -> int:
+    """리파이너로 넘기기 전까지 기본 모델이 처리하는 스텝 수 (리파이너가 없으면 전체 스텝)"""
+    if profile["refiner_split"] is None:
+        return profile["steps"]
+    return min(profile["steps"] - 1, max(1, round(profile["steps"] * profile["refiner_split"])))
+
+
+def hires_steps(profile: Dict[str, Any]) -> int:
+    """latent 업스케일 후 두 번째 샘플링 스텝 수 (지정하지 않으면 전체 스텝의 denoise 비율만큼)"""
+    upscale = profile["upscale"]
+    if upscale["steps"] is not None:
+        return upscale["steps"]
+    return max(1, round(profile["steps"] * upscale["denoise"]))
+
+
+class ProfileRegistry:
+    """설정 파일 기반 프로필 레지스트리 (핫 리로드)"""
+
+    def __init__(self, path: Optional[str], reload_interval: float = PROFILES_RELOAD_INTERVAL):
+        """
+        Args:
+            path: 프로필 설정 파일 경로 (None이거나 파일이 없으면 기본 프로필)
+            reload_interval: 파일 변경 확인 최소 간격 (초)
+        """
+        self.path = path
+        self.reload_interval = reload_interval
+        self.version = 0
+        self.loaded_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._profiles: Dict[str, Dict[str, Any]] = {}
+        self._mtime: Optional[int] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.reload()
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        """설정 파일 읽기 (파일이 없으면 기본 프로필)"""
+        if not self.path or not os.path.exists(self.path):
+            source = DEFAULT_PROFILES
+        else:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            source = data.get("profiles") if isinstance(data, dict) else None
+            if not isinstance(source, dict) or not source:
+                raise ValueError("profiles 객체가 비어 있거나 없습니다")
+        profiles = {name: build_profile(name, fields) for name, fields in source.items()}
+        for name, profile in profiles.items():
+            if profile["fallback"] is not None and profile["fallback"] not in profiles:
+                raise ValueError(f"프로필 {name}: fallback 프로필이 없습니다: {profile['fallback']}")
+        return profiles
+
+    def reload(self) -> bool:
+        """
+        설정 파일 다시 읽기
+
+        Returns:
+            성공 여부 (실패하면 이전 프로필 유지, 오류는 last_error에 기록)
+        """
+        with self._lock:
+            self._checked_at = time.monotonic()
+            try:
+                mtime = os.stat(self.path).st_mtime_ns if self.path else None
+            except OSError:
+                mtime = None
+            try:
+                profiles = self._read()
+            except (OSError, ValueError) as e:
+                self.last_error = str(e)
+                logger.error(f"프로필 설정을 읽을 수 없어 이전 프로필을 유지합니다 ({self.path}): {e}")
+                if not self._profiles:
+                    self._profiles = {name: build_profile(name, fields) for name, fields in DEFAULT_PROFILES.items()}
+                self._mtime = mtime
+                return False
+
+            changed = profiles != self._profiles
+            self._profiles = profiles
+            self._mtime = mtime
+            self.last_error = None
+            self.loaded_at = time.time()
+            if changed:
+                self.version += 1
+                logger.info(f"생성 프로필 로드: {', '.join(profiles)} (v{self.version})")
+            return True
+
+    def _reload_if_changed(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_interval:
+            return
+        try:
+            mtime = os.stat(self.path).st_mtime_ns if self.path else None
+        except OSError:
+            mtime = None
+        if mtime != self._mtime:
+            self.reload()
+        else:
+            self._checked_at = now
+
+    def names(self) -> List[str]:
+        """프로필 이름 목록"""
+        self._reload_if_changed()
+        return list(self._profiles)
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        """프로필 조회 (없으면 None)"""
+        self._reload_if_changed()
+        profile = self._profiles.get(name)
+        return dict(profile) if profile else None
+
+    def all(self) -> Dict[str, Dict[str, Any]]:
+        """모든 프로필"""
+        self._reload_if_changed()
+        return {name: dict(profile) for name, profile in self._profiles.items()}
+
+    def fallbacks(self, name: str) -> List[str]:
+        """VRAM이 부족할 때 차례로 시도할 프로필 이름 (자기 자신 제외, 순환은 끊음)"""
+        chain: List[str] = []
+        profile = self.get(name)
+        while profile and profile["fallback"] and profile["fallback"] != name and profile["fallback"] not in chain:
+            chain.append(profile["fallback"])
+            profile = self._profiles.get(profile["fallback"])
+        return chain
+
+    def max_concurrency(self, name: str) -> Optional[int]:
+        """프로필별 동시 실행 한도 (파일 확인 없이 메모리 값 사용, 스케줄러 잠금 안에서 호출됨)"""
+        profile = self._profiles.get(name)
+        return profile["max_concurrency"] if profile else None
+
+
+# 전역 프로필 레지스트리 인스턴스
+_profile_registry: Optional[ProfileRegistry] = None
+_profile_registry_lock = threading.Lock()
+
+
+def get_profile_registry() -> ProfileRegistry:
+    """전역 프로필 레지스트리 인스턴스 반환 (싱글톤)"""
+    global _profile_registry
+    with _profile_registry_lock:
+        if _profile_registry is None:
+            _profile_registry = ProfileRegistry(PROFILES_PATH)
+        return _profile_registry
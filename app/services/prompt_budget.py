@@ -0,0 +1,167 @@
+"""
+SDXL 프롬프트 토큰 예산
+
+CLIP 텍스트 인코더는 한 번에 77토큰(시작/끝 토큰 제외 75토큰)만 보므로, LLM이 만든 프롬프트 중
+그 뒤의 내용은 잘려 나가고 생성 시간만 씁니다. 여기서는 프롬프트의 CLIP 토큰 수를 세고,
+스트리밍 중인 LLM 응답(JSON 구조화 출력 또는 일반 텍스트)에서 프롬프트만 뽑아냅니다.
+
+CLIP_TOKENIZER_PATH에 CLIP 토크나이저 파일(tokenizer.json, 예: openai/clip-vit-large-patch14)을 지정하고
+tokenizers 패키지가 설치되어 있으면 정확한 BPE 토큰 수를 쓰고, 아니면 CLIP의 사전 분리 규칙
+(단어, 숫자 한 자리씩, 구두점 묶음)으로 나눈 뒤 긴 단어를 여러 토큰으로 치는 근사값을 씁니다.
+근사값은 실제보다 약간 많게 세므로 예산을 넘기지 않습니다.
+"""
+import re
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import CLIP_TOKENIZER_PATH
+
+logger = logging.getLogger(__name__)
+
+# LLM 구조화 출력 스키마 (Ollama format)
+PROMPT_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {"prompt": {"type": "string"}},
+    "required": ["prompt"],
+}
+
+# CLIP 사전 분리 규칙 (\p{L}+ | \p{N} | [^\s\p{L}\p{N}]+ 와 같은 의미)
+_PIECE_PATTERN = re.compile(r"'(?:s|t|re|ve|m|ll|d)|[^\W\d_]+|\d|[^\s\w]+|_+", re.IGNORECASE)
+# BPE 어휘에 없는 긴 단어가 나뉘는 대략의 길이
+_CHARS_PER_TOKEN = 8
+
+_JSON_KEY = re.compile(r'"prompt"\s*:\s*"')
+_JSON_ESCAPES = {"n": " ", "t": " ", "r": " ", "b": "", "f": "", '"': '"', "\\": "\\", "/": "/"}
+_LABEL = re.compile(r"^\s*(?:\*\*)?\s*(?:improved\s+|final\s+|sdxl\s+)*prompt\s*(?:\*\*)?\s*:\s*(?:\*\*)?", re.IGNORECASE)
+
+
+class ClipTokenizer:
+    """CLIP 토큰 수 계산과 자르기"""
+
+    def __init__(self, path: str = CLIP_TOKENIZER_PATH):
+        """
+        Args:
+            path: tokenizer.json 경로 (빈 문자열이면 근사값 사용)
+        """
+        self._tokenizer = None
+        if path:
+            try:
+                from tokenizers import Tokenizer
+                self._tokenizer = Tokenizer.from_file(path)
+            except ImportError:
+                logger.warning("tokenizers 패키지가 없어 CLIP 토큰 수를 근사값으로 계산합니다")
+            except Exception as e:
+                logger.warning(f"CLIP 토크나이저를 읽을 수 없어 근사값으로 계산합니다 ({path}): {e}")
+
+    @property
+    def exact(self) -> bool:
+        """실제 BPE 토크나이저 사용 여부"""
+        return self._tokenizer is not None
+
+    def _spans(self, text: str) -> List[Tuple[int, int]]:
+        """토큰별 (시작, 끝) 위치 (근사값이면 긴 단어는 같은 위치가 여러 번 나옴)"""
+        if self._tokenizer is not None:
+            return list(self._tokenizer.encode(text, add_special_tokens=False).offsets)
+        spans = []
+        for match in _PIECE_PATTERN.finditer(text):
+            pieces = max(1, -(-len(match.group()) // _CHARS_PER_TOKEN))
+            spans.extend([match.span()] * pieces)
+        return spans
+
+    def count(self, text: str) -> int:
+        """CLIP 토큰 수 (시작/끝 토큰 제외)"""
+        return len(self._spans(text))
+
+    def truncate(self, text: str, budget: int) -> str:
+        """
+        앞에서부터 budget 토큰까지만 남기기 (단어 중간에서 자르지 않고 끝의 구분자 제거)
+
+        첫 단어 하나가 budget을 넘으면(띄어쓰기 없는 긴 문자열 등) 빈 프롬프트가 되지 않도록 단어 중간에서 자릅니다.
+
+        Args:
+            text: 프롬프트
+            budget: 최대 토큰 수
+        """
+        spans = self._spans(text)
+        if len(spans) <= budget:
+            return text.strip()
+        if budget <= 0:
+            return ""
+        end = spans[budget - 1][1]
+        # 다음 토큰이 같은 단어에 이어지면 그 단어는 버림
+        next_start = spans[budget][0]
+        if next_start < end or next_start == end and text[end - 1:end].isalnum() and text[end:end + 1].isalnum():
+            word_start = spans[budget - 1][0]
+            while word_start > 0 and text[word_start - 1].isalnum():
+                word_start -= 1
+            end = word_start
+        truncated = text[:end].rstrip(" \t\n,;:-(")
+        if truncated.strip():
+            return truncated
+        end = spans[budget - 1][1]
+        if self._tokenizer is None:
+            # 근사값은 긴 단어를 _CHARS_PER_TOKEN 글자씩 토큰으로 세므로 budget 안에 든 글자까지만
+            start = spans[budget - 1][0]
+            used = sum(1 for span in spans[:budget] if span[0] == start)
+            end = min(end, start + used * _CHARS_PER_TOKEN)
+        return text[:end].strip()
+
+
+def extract_prompt(text: str) -> str:
+    """
+    LLM 응답에서 프롬프트만 추출 (스트리밍 중인 미완성 응답도 처리)
+
+    `{"prompt": "..."}` 형태면 prompt 값(닫히지 않았으면 지금까지 받은 부분)을,
+    일반 텍스트면 "Improved Prompt:" 같은 머리말과 따옴표를 떼고 첫 문단을 반환합니다.
+    """
+    stripped = text.lstrip()
+    if stripped.startswith("{") or stripped.startswith("```json"):
+        match = _JSON_KEY.search(stripped)
+        if not match:
+            return ""
+        chars = []
+        i = match.end()
+        while i < len(stripped):
+            c = stripped[i]
+            if c == '"':
+                break
+            if c == "\\":
+                if i + 1 >= len(stripped):
+                    break
+                escape = stripped[i + 1]
+                if escape == "u":
+                    code = stripped[i + 2:i + 6]
+                    if len(code) < 4:
+                        break
+                    try:
+                        chars.append(chr(int(code, 16)))
+                    except ValueError:
+                        pass
+                    i += 6
+                    continue
+                chars.append(_JSON_ESCAPES.get(escape, escape))
+                i += 2
+                continue
+            chars.append(c)
+            i += 1
+        return "".join(chars).strip()
+
+    body = stripped.replace("```", "")
+    body = _LABEL.sub("", body, count=1).lstrip()
+    body = body.split("\n\n", 1)[0]
+    return body.strip().strip('"\'').strip()
+
+
+# 전역 CLIP 토크나이저 인스턴스
+_clip_tokenizer: Optional[ClipTokenizer] = None
+_clip_tokenizer_lock = threading.Lock()
+
+
+def get_clip_tokenizer() -> ClipTokenizer:
+    """전역 CLIP 토크나이저 인스턴스 반환 (싱글톤)"""
+    global _clip_tokenizer
+    with _clip_tokenizer_lock:
+        if _clip_tokenizer is None:
+            _clip_tokenizer = ClipTokenizer()
+        return _clip_tokenizer
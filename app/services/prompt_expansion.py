@@ -0,0 +1,285 @@
+"""
+배치 프롬프트 확장
+
+대량 배치에서 요청마다 같은 긴 지시문으로 LLM을 따로 호출하지 않도록 기본 프롬프트를 묶어서 만듭니다.
+
+- grouped: PROMPT_EXPANSION_GROUP_SIZE개 요청에 번호를 붙여 LLM 호출 하나로 보내고,
+  `{"prompts": [{"id": 1, "prompt": "..."}, ...]}` 구조화 출력에서 요청별 프롬프트를 꺼냄
+- concurrent: 요청마다 호출하되 지시문을 한 번 처리한 Ollama context를 재사용
+  (동시 호출 수는 배치 워커 수와 LLM 동시성 제한을 따름)
+- off: 작업마다 이미지 생성 서비스가 직접 생성
+
+배치에서는 그룹의 프롬프트가 처음 필요한 작업이 그룹 전체를 확장하므로 확장이 이미지 생성 속도에 맞춰 진행되고,
+같은 그룹의 다른 작업은 그 결과를 씁니다. grouped 모드에서는 다음 그룹을 미리 확장해 두어
+그룹이 바뀔 때 작업이 LLM 호출을 기다리지 않게 합니다. 응답에서 빠졌거나 실패한 요청은 작업이 개별 생성으로 대신합니다.
+소요 시간은 지표 그룹 prompt_expansion(키: 모드, 구간: call, per_prompt)에 기록됩니다.
+"""
+import json
+import re
+import time
+import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, TypeVar
+
+from app.core.config import (
+    OLLAMA_MODEL, OLLAMA_PROMPT_NUM_PREDICT, OLLAMA_STRUCTURED_OUTPUT, PROMPT_EXPANSION_MODE,
+    PROMPT_EXPANSION_GROUP_SIZE
+)
+from app.core.tracing import span
+from app.services.admission import AdmissionRejected, get_limiter
+from app.services.deadline import sleep
+from app.services.image_generation import CREATIVE_DIRECTOR, base_prompt_budget, prompt_rules
+from app.services.llm_client import get_llm_client
+from app.services.metrics import get_metrics
+from app.services.prompt_budget import PROMPT_SCHEMA, extract_prompt, get_clip_tokenizer
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# grouped 모드 구조화 출력 스키마
+GROUP_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "prompts": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"id": {"type": "integer"}, "prompt": {"type": "string"}},
+                "required": ["id", "prompt"],
+            },
+        }
+    },
+    "required": ["prompts"],
+}
+
+# 응답이 num_predict에서 잘려 JSON이 닫히지 않아도 완성된 항목은 꺼낼 수 있도록 항목 단위로 찾음
+_GROUP_ITEM = re.compile(r'\{\s*"id"\s*:\s*(\d+)\s*,\s*"prompt"\s*:\s*"((?:[^"\\]|\\.)*)"')
+# 그룹 응답의 요청당 LLM 토큰 상한 (CLIP 토큰당 약 2토큰 + JSON 항목 구조)
+_GROUP_TOKENS_PER_CLIP_TOKEN = 2
+_GROUP_ITEM_OVERHEAD = 16
+
+
+class PromptExpander:
+    """사용자 입력 여러 개 → 기본 프롬프트"""
+
+    def __init__(
+        self,
+        mode: str = PROMPT_EXPANSION_MODE,
+        group_size: int = PROMPT_EXPANSION_GROUP_SIZE,
+        model: str = OLLAMA_MODEL
+    ):
+        """
+        Args:
+            mode: 확장 방식 (grouped, concurrent, off)
+            group_size: grouped 모드에서 호출 하나에 묶는 요청 수
+            model: 텍스트 모델 이름
+        """
+        self.mode = mode
+        self.group_size = max(1, group_size)
+        self.model = model
+        self.budget = base_prompt_budget()
+        self._prefetcher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="prompt-prefetch")
+
+    def prefetch(self, fn: Callable[..., object], *args):
+        """
+        백그라운드에서 미리 실행 (호출한 작업의 마감/트레이스 컨텍스트를 그대로 가져감)
+
+        Returns:
+            Future
+        """
+        return self._prefetcher.submit(contextvars.copy_context().run, fn, *args)
+
+    @staticmethod
+    def _call(fn: Callable[[], T]) -> T:
+        """
+        LLM 동시성 제한 안에서 호출 (입장 거절 시 Retry-After만큼 기다렸다가 다시 시도)
+
+        Raises:
+            DeadlineExceeded: 기다리는 사이 작업 마감이 지난 경우
+        """
+        limiter = get_limiter("llm")
+        while True:
+            try:
+                limiter.acquire()
+            except AdmissionRejected as e:
+                sleep(e.retry_after, "llm_queue")
+                continue
+            started = time.monotonic()
+            try:
+                return fn()
+            finally:
+                limiter.release(time.monotonic() - started)
+
+    def _observe(self, started: float, count: int, ok: bool):
+        metrics = get_metrics()
+        elapsed = time.perf_counter() - started
+        metrics.observe("prompt_expansion", self.mode, "call", elapsed, ok)
+        if ok and count:
+            metrics.observe("prompt_expansion", self.mode, "per_prompt", elapsed / count)
+
+    def expand_group(self, texts: List[str]) -> Dict[str, str]:
+        """
+        요청 여러 개를 LLM 호출 하나로 확장
+
+        Returns:
+            입력 → 프롬프트 (응답에서 빠진 입력은 포함하지 않음)
+        """
+        numbered = "\n".join(f"{i}. {' '.join(text.split())}" for i, text in enumerate(texts, 1))
+        instruction = (
+            CREATIVE_DIRECTOR + prompt_rules(self.budget, structured=False)
+            + f"\nWrite one prompt for each of the {len(texts)} numbered user requests below."
+            + ' Respond only with JSON: {"prompts": [{"id": <request number>, "prompt": "<prompt>"}, ...]}.'
+            + "\n\nUser requests:\n" + numbered
+        )
+        num_predict = len(texts) * (self.budget * _GROUP_TOKENS_PER_CLIP_TOKEN + _GROUP_ITEM_OVERHEAD)
+
+        started = time.perf_counter()
+        try:
+            with span("prompt_expansion.group", {"llm.model": self.model, "prompt_expansion.count": len(texts)}):
+                response = self._call(lambda: get_llm_client().chat(
+                    model=self.model,
+                    messages=[{"role": "user", "content": instruction}],
+                    options={"num_predict": num_predict},
+                    format=GROUP_SCHEMA
+                ))
+        except Exception:
+            self._observe(started, len(texts), ok=False)
+            raise
+        self._observe(started, len(texts), ok=True)
+
+        tokenizer = get_clip_tokenizer()
+        results: Dict[str, str] = {}
+        for match in _GROUP_ITEM.finditer(response["message"]["content"]):
+            index = int(match.group(1)) - 1
+            if not 0 <= index < len(texts) or texts[index] in results:
+                continue
+            try:
+                prompt = json.loads(f'"{match.group(2)}"')
+            except ValueError:
+                continue
+            prompt = tokenizer.truncate(" ".join(prompt.split()), self.budget)
+            if prompt:
+                results[texts[index]] = prompt
+        if len(results) < len(texts):
+            logger.warning(f"묶음 프롬프트 응답에서 {len(texts) - len(results)}/{len(texts)}개가 빠졌습니다")
+        return results
+
+    def expand_one(self, text: str) -> str:
+        """요청 하나 확장 (지시문을 처리한 context를 재사용하고 CLIP 토큰 예산에서 생성을 멈춤)"""
+        client = get_llm_client()
+        tokenizer = get_clip_tokenizer()
+        prefix = CREATIVE_DIRECTOR + prompt_rules(self.budget)
+        context = self._call(lambda: client.prefix_context(self.model, prefix))
+        prompt = ("User request: " if context else prefix + "\nUser request: ") + text
+
+        started = time.perf_counter()
+        try:
+            with span("prompt_expansion.one", {"llm.model": self.model, "prompt_expansion.cached_prefix": bool(context)}):
+                response = self._call(lambda: client.stream_generate(
+                    model=self.model,
+                    prompt=prompt,
+                    context=context,
+                    stop=lambda content: tokenizer.count(extract_prompt(content)) > self.budget,
+                    options={"num_predict": OLLAMA_PROMPT_NUM_PREDICT},
+                    format=PROMPT_SCHEMA if OLLAMA_STRUCTURED_OUTPUT else None
+                ))
+        except Exception:
+            self._observe(started, 1, ok=False)
+            raise
+        self._observe(started, 1, ok=True)
+        return tokenizer.truncate(extract_prompt(response["content"]) or text, self.budget)
+
+    def expand(self, texts: List[str]) -> Dict[str, str]:
+        """
+        여러 요청 확장 (grouped면 그룹별 호출, 아니면 요청별 호출)
+
+        Returns:
+            입력 → 프롬프트 (실패했거나 응답에서 빠진 입력은 포함하지 않음)
+        """
+        expansion = BatchPromptExpansion(self, texts)
+        results: Dict[str, str] = {}
+        for text in dict.fromkeys(texts):
+            prompt = expansion.get(text)
+            if prompt is not None:
+                results[text] = prompt
+        return results
+
+    def for_batch(self, texts: List[str]) -> Optional["BatchPromptExpansion"]:
+        """배치용 확장 상태 (off 모드면 None)"""
+        if self.mode == "off":
+            return None
+        return BatchPromptExpansion(self, texts)
+
+
+class BatchPromptExpansion:
+    """배치 하나의 프롬프트 확장 상태 (그룹별로 처음 필요한 작업이 그룹 전체를 확장)"""
+
+    def __init__(self, expander: PromptExpander, texts: List[str]):
+        self.expander = expander
+        unique = list(dict.fromkeys(texts))
+        size = expander.group_size if expander.mode == "grouped" else 1
+        self._groups = [unique[i:i + size] for i in range(0, len(unique), size)]
+        self._group_of = {text: i for i, group in enumerate(self._groups) for text in group}
+        self._locks = [threading.Lock() for _ in self._groups]
+        self._done = [False] * len(self._groups)
+        self._prefetched = [False] * len(self._groups)
+        self._prefetch_lock = threading.Lock()
+        self._results: Dict[str, str] = {}
+
+    def _expand(self, group: List[str]) -> Dict[str, str]:
+        if len(group) == 1:
+            return {group[0]: self.expander.expand_one(group[0])}
+        return self.expander.expand_group(group)
+
+    def get(self, text: str) -> Optional[str]:
+        """
+        입력의 프롬프트 (그룹이 아직 확장되지 않았으면 지금 확장)
+
+        Returns:
+            프롬프트 (실패했거나 응답에서 빠졌으면 None → 개별 생성)
+        """
+        index = self._group_of.get(text)
+        if index is None:
+            return None
+        if self.expander.mode == "grouped":
+            self._prefetch(index + 1)
+        self._ensure(index)
+        return self._results.get(text)
+
+    def _ensure(self, index: int):
+        """그룹 확장 (이미 확장되었으면 그대로)"""
+        with self._locks[index]:
+            if self._done[index]:
+                return
+            try:
+                self._results.update(self._expand(self._groups[index]))
+            except Exception as e:
+                logger.warning(f"프롬프트 확장 실패 ({len(self._groups[index])}개, 개별 생성으로 대체): {e}")
+            self._done[index] = True
+
+    def _prefetch(self, index: int):
+        """다음 그룹을 백그라운드에서 미리 확장"""
+        if index >= len(self._groups):
+            return
+        with self._prefetch_lock:
+            if self._prefetched[index]:
+                return
+            self._prefetched[index] = True
+        self.expander.prefetch(self._ensure, index)
+
+
+# 전역 프롬프트 확장기 인스턴스
+_prompt_expander: Optional[PromptExpander] = None
+_prompt_expander_lock = threading.Lock()
+
+
+def get_prompt_expander() -> PromptExpander:
+    """전역 프롬프트 확장기 인스턴스 반환 (싱글톤)"""
+    global _prompt_expander
+    with _prompt_expander_lock:
+        if _prompt_expander is None:
+            _prompt_expander = PromptExpander()
+        return _prompt_expander
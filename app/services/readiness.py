@@ -0,0 +1,87 @@
+"""
+liveness / readiness / 상세 상태 판단
+
+백엔드에 HTTP 확인을 하지 않고, 헬스체크 루프가 캐시한 서비스 상태와 스케줄러/입장 제어의
+여유만으로 판단하므로 ComfyUI가 바빠도 응답 시간이 일정합니다.
+"""
+import os
+import time
+from typing import Any, Dict, Optional
+
+from app.core.config import API_ROLE, READINESS_MAX_STATUS_AGE
+from app.services.admission import get_admission_status
+from app.services.gpu_placement import get_gpu_placement
+from app.services.scheduler import get_scheduler
+
+_STARTED_AT = time.time()
+
+
+def status_age(cached: Dict[str, Any], now: Optional[float] = None) -> Optional[float]:
+    """캐시된 서비스 상태의 나이 (초, 아직 확인 전이면 None)"""
+    checked_at = cached.get("checked_at")
+    if checked_at is None:
+        return None
+    return (now or time.time()) - checked_at
+
+
+def evaluate_readiness(cached: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    요청을 받을 준비가 되었는지 판단
+
+    준비 조건: 최근 헬스체크에서 로컬 ComfyUI가 실행 중이거나 최근 /system_stats에 응답한 ComfyUI 백엔드
+    (COMFYUI_URLS)가 있고(생성 요청과 같은 기준), 스케줄러 대기열에 여유가 있음
+
+    Args:
+        cached: 서비스 매니저의 get_cached_status() 결과 (조회 실패 시 None)
+
+    Returns:
+        ready 여부와 판단 근거 (reasons: 준비되지 않은 이유 목록)
+    """
+    reasons = []
+    age = None
+
+    if cached is None:
+        reasons.append("서비스 매니저 상태를 조회할 수 없습니다")
+    elif cached.get("services") is None:
+        reasons.append("아직 헬스체크 결과가 없습니다")
+    else:
+        age = status_age(cached)
+        if age > READINESS_MAX_STATUS_AGE:
+            reasons.append(f"헬스체크 결과가 오래되었습니다 ({age:.0f}초 전)")
+        if not cached["services"].get("comfyui", {}).get("running") and not get_gpu_placement().healthy():
+            reasons.append("실행 중인 ComfyUI 백엔드가 없습니다")
+
+    headroom = get_scheduler().headroom()
+    if headroom <= 0:
+        reasons.append("ComfyUI 작업 대기열이 가득 찼습니다")
+
+    return {
+        "ready": not reasons,
+        "reasons": reasons,
+        "status_age_seconds": round(age, 3) if age is not None else None,
+        "queue_headroom": headroom
+    }
+
+
+def build_status(cached: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """상세 상태 (readiness + 서비스 상태 + 스케줄러/입장 제어 요약)"""
+    scheduler = get_scheduler().snapshot()
+    return {
+        "readiness": evaluate_readiness(cached),
+        "process": {
+            "pid": os.getpid(),
+            "role": API_ROLE,
+            "uptime_seconds": round(time.time() - _STARTED_AT, 3)
+        },
+        "services": cached.get("services") if cached else None,
+        "health_check": cached.get("health_check") if cached else None,
+        "scheduler": {
+            "limit": scheduler["limit"],
+            "max_queue": scheduler["max_queue"],
+            "running": len(scheduler["running"]),
+            "pending": len(scheduler["pending"]),
+            "admitted": scheduler["admitted"],
+            "rejected": scheduler["rejected"]
+        },
+        "resources": get_admission_status()
+    }
@@ -0,0 +1,297 @@
+"""
+결과 이미지 보관 정책 (용량/기간 기반 정리)
+
+이미지 저장소의 해시별 전체 용량(원본 + 변형), 생성 시각, 마지막 접근 시각을 SQLite 접근 색인에 기록하고,
+주기적으로(IMAGE_RETENTION_INTERVAL) 다음 순서로 정리합니다.
+
+1. 생성된 지 IMAGE_RETENTION_MAX_AGE초가 지난 이미지 삭제
+2. 전체 용량이 IMAGE_RETENTION_MAX_BYTES를 넘으면 마지막 접근이 오래된 이미지부터(LRU)
+   한도의 IMAGE_RETENTION_LOW_WATERMARK 비율 아래가 될 때까지 삭제
+
+이미지 제공 API의 접근 기록은 바로 색인에 쓰되, 같은 해시는 프로세스마다 _TOUCH_INTERVAL에 한 번만 씁니다
+(모아 두었다가 나중에 쓰면 접근이 뜸한 워커 프로세스의 기록이 정리 때까지 반영되지 않음).
+정리는 서비스 매니저를 가진 프로세스(단일 프로세스 또는 슈퍼바이저)에서 한 번만 실행되며,
+시작 시 디렉토리를 한 번 훑어 색인에 없는 파일을 등록하고 예전 평면 구조 파일을 해시 접두사 디렉토리로 옮깁니다.
+"""
+import time
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.core.config import (
+    IMAGE_INDEX_PATH, IMAGE_RETENTION_MAX_BYTES, IMAGE_RETENTION_MAX_AGE, IMAGE_RETENTION_INTERVAL,
+    IMAGE_RETENTION_LOW_WATERMARK
+)
+
+logger = logging.getLogger(__name__)
+
+# 방금 저장되었거나 접근된 이미지는 정리하지 않음 (응답이 나가기 전에 지워지지 않도록)
+_GRACE_SECONDS = 60
+# 같은 해시의 접근 기록을 다시 쓰기까지의 최소 간격 (초, 정리 유예 시간보다 짧아야 함)
+_TOUCH_INTERVAL = 30
+# 최근에 쓴 해시를 기억하는 최대 개수 (넘으면 간격이 지난 항목을 비움)
+_MAX_TOUCHED = 10000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    hash TEXT PRIMARY KEY,
+    bytes INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_images_accessed ON images(accessed_at);
+CREATE INDEX IF NOT EXISTS idx_images_created ON images(created_at);
+"""
+
+
+class AccessIndex:
+    """해시별 용량/생성/접근 시각 색인 (SQLite WAL, 프로세스 간 공유)"""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: SQLite 파일 경로
+        """
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._lock = threading.Lock()
+        self._touched: Dict[str, float] = {}
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA busy_timeout=30000")
+            self._conn.executescript(_SCHEMA)
+
+    def record(self, image_hash: str, size: int, created_at: Optional[float] = None):
+        """
+        이미지 등록 또는 용량 갱신 (변형이 추가된 경우)
+
+        Args:
+            image_hash: 이미지 해시
+            size: 원본 + 변형 전체 바이트
+            created_at: 생성 시각 (None이면 현재, 이미 있으면 유지)
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO images (hash, bytes, created_at, accessed_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(hash) DO UPDATE SET bytes = excluded.bytes, accessed_at = excluded.accessed_at",
+                (image_hash, size, created_at or now, created_at or now)
+            )
+
+    def touch(self, image_hash: str):
+        """접근 기록 (같은 해시는 _TOUCH_INTERVAL에 한 번만 씀)"""
+        now = time.monotonic()
+        with self._lock:
+            last = self._touched.get(image_hash)
+            if last is not None and now - last < _TOUCH_INTERVAL:
+                return
+            if len(self._touched) >= _MAX_TOUCHED:
+                self._touched = {h: t for h, t in self._touched.items() if now - t < _TOUCH_INTERVAL}
+            self._touched[image_hash] = now
+            self._conn.execute(
+                "UPDATE images SET accessed_at = MAX(accessed_at, ?) WHERE hash = ?", (time.time(), image_hash)
+            )
+
+    def remove(self, image_hash: str):
+        """색인에서 삭제"""
+        with self._lock:
+            self._conn.execute("DELETE FROM images WHERE hash = ?", (image_hash,))
+
+    def hashes(self) -> set:
+        """등록된 해시 전체"""
+        with self._lock:
+            return {row[0] for row in self._conn.execute("SELECT hash FROM images")}
+
+    def expired(self, created_before: float, limit: int = 1000) -> List[str]:
+        """생성 시각이 기준보다 오래된 해시"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT hash FROM images WHERE created_at < ? ORDER BY created_at LIMIT ?", (created_before, limit)
+            )
+            return [row[0] for row in rows]
+
+    def least_recent(self, accessed_before: float, limit: int = 1000) -> List[tuple]:
+        """마지막 접근이 오래된 순서로 (해시, 바이트)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT hash, bytes FROM images WHERE accessed_at < ? ORDER BY accessed_at LIMIT ?",
+                (accessed_before, limit)
+            )
+            return [(row[0], row[1]) for row in rows]
+
+    def totals(self) -> Dict[str, int]:
+        """이미지 수와 전체 바이트"""
+        with self._lock:
+            count, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM images").fetchone()
+        return {"images": count, "bytes": size}
+
+
+class RetentionManager:
+    """주기적 정리 실행"""
+
+    def __init__(
+        self,
+        store,
+        index: AccessIndex,
+        max_bytes: int = IMAGE_RETENTION_MAX_BYTES,
+        max_age: float = IMAGE_RETENTION_MAX_AGE,
+        interval: float = IMAGE_RETENTION_INTERVAL,
+        low_watermark: float = IMAGE_RETENTION_LOW_WATERMARK
+    ):
+        """
+        Args:
+            store: ImageStore
+            index: 접근 색인
+            max_bytes: 전체 용량 한도 (0이면 제한 없음)
+            max_age: 보관 기간 (초, 0이면 제한 없음)
+            interval: 정리 간격 (초)
+            low_watermark: 용량 초과 시 이 비율 아래까지 정리
+        """
+        self.store = store
+        self.index = index
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.interval = interval
+        self.low_watermark = low_watermark
+        self.last_sweep: Optional[Dict[str, Any]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._sweep_lock = threading.Lock()
+
+    def _delete(self, image_hash: str) -> int:
+        freed = self.store.delete(image_hash)
+        self.index.remove(image_hash)
+        return freed
+
+    def reconcile(self) -> Dict[str, int]:
+        """
+        디렉토리와 색인 맞추기 (예전 평면 구조 파일 이동, 색인에 없는 파일 등록, 파일이 없는 항목 삭제)
+
+        Returns:
+            이동/등록/삭제한 수
+        """
+        moved = self.store.migrate_flat()
+        on_disk = self.store.scan()
+        indexed = self.index.hashes()
+        for image_hash in on_disk.keys() - indexed:
+            size, mtime = on_disk[image_hash]
+            self.index.record(image_hash, size, created_at=mtime)
+        for image_hash in indexed - on_disk.keys():
+            self.index.remove(image_hash)
+        return {"moved": moved, "added": len(on_disk.keys() - indexed), "removed": len(indexed - on_disk.keys())}
+
+    def sweep(self) -> Dict[str, Any]:
+        """
+        정리 한 번 실행
+
+        Returns:
+            삭제한 이미지 수, 확보한 바이트, 정리 후 전체 용량
+        """
+        with self._sweep_lock:
+            started = time.time()
+            deleted = freed = 0
+
+            if self.max_age > 0:
+                while True:
+                    batch = self.index.expired(started - self.max_age)
+                    if not batch:
+                        break
+                    for image_hash in batch:
+                        freed += self._delete(image_hash)
+                        deleted += 1
+
+            total = self.index.totals()["bytes"]
+            if self.max_bytes > 0 and total > self.max_bytes:
+                target = self.max_bytes * self.low_watermark
+                while total > target:
+                    batch = self.index.least_recent(started - _GRACE_SECONDS)
+                    if not batch:
+                        logger.warning("용량 한도를 넘었지만 최근에 접근된 이미지만 남아 더 정리할 수 없습니다")
+                        break
+                    for image_hash, size in batch:
+                        freed += self._delete(image_hash)
+                        deleted += 1
+                        total -= size
+                        if total <= target:
+                            break
+
+            self.last_sweep = {
+                "at": started,
+                "seconds": round(time.time() - started, 3),
+                "deleted": deleted,
+                "freed_bytes": freed,
+                **self.index.totals(),
+            }
+            if deleted:
+                logger.info(f"이미지 {deleted}개 정리 ({freed / 1024 ** 2:.1f}MB 확보)")
+            return self.last_sweep
+
+    def _run(self):
+        try:
+            result = self.reconcile()
+            if any(result.values()):
+                logger.info(f"이미지 색인 정리: {result}")
+        except Exception as e:
+            logger.error(f"이미지 색인 정리 실패: {e}")
+        while not self._stop.is_set():
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"이미지 정리 실패: {e}")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """백그라운드 정리 시작 (시작 시 디렉토리와 색인을 한 번 맞춤)"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True, name="image-retention")
+        self._thread.start()
+
+    def stop(self):
+        """백그라운드 정리 중지"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def stats(self) -> Dict[str, Any]:
+        """색인 합계와 정책, 마지막 정리 결과"""
+        return {
+            **self.index.totals(),
+            "max_bytes": self.max_bytes,
+            "max_age": self.max_age,
+            "interval": self.interval,
+            "running": self._thread is not None and self._thread.is_alive(),
+            "last_sweep": self.last_sweep,
+        }
+
+
+# 전역 접근 색인 / 보관 정책 인스턴스
+_access_index: Optional[AccessIndex] = None
+_retention_manager: Optional[RetentionManager] = None
+_retention_lock = threading.Lock()
+
+
+def get_access_index() -> AccessIndex:
+    """전역 접근 색인 인스턴스 반환 (싱글톤)"""
+    global _access_index
+    with _retention_lock:
+        if _access_index is None:
+            _access_index = AccessIndex(IMAGE_INDEX_PATH)
+        return _access_index
+
+
+def get_retention_manager() -> RetentionManager:
+    """전역 보관 정책 인스턴스 반환 (싱글톤)"""
+    global _retention_manager
+    from app.services.image_store import get_image_store
+
+    store = get_image_store()
+    index = get_access_index()
+    with _retention_lock:
+        if _retention_manager is None:
+            _retention_manager = RetentionManager(store, index)
+        return _retention_manager
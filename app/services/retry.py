@@ -0,0 +1,248 @@
+"""
+ComfyUI / LLM 호출 재시도 정책
+
+실패한 호출의 오류를 분류해 일시적인 것만 다시 시도합니다.
+
+- connection: 연결 거부/끊김 (백엔드 재시작 중 등)
+- timeout: 연결/읽기 시간 초과
+- server: 5xx, 429
+- invalid: 그 밖의 4xx (워크플로 검증 오류, 없는 모델 등) → 재시도하지 않음
+- other: 분류할 수 없는 오류 (응답 형식 오류 등) → 재시도하지 않음
+
+재시도 간격은 지터를 넣은 지수 백오프(0 ~ min(RETRY_MAX_DELAY, RETRY_BASE_DELAY × 2^(n-1)) 균등 분포)이며,
+작업 마감(app.services.deadline)의 남은 시간보다 길게 기다리지 않습니다.
+연결 오류인데 서비스 매니저가 백엔드를 재시작하는 중이면(register_readiness로 등록한 준비 신호가 꺼져 있으면)
+백오프로 두드리지 않고 준비 신호를 기다렸다가(RETRY_READY_WAIT) 바로 다시 시도합니다.
+재시도는 호출당 시도 수(RETRY_MAX_ATTEMPTS)와 백엔드별 재시도 예산(성공한 호출마다 RETRY_BUDGET_RATIO만큼 적립,
+최대 RETRY_BUDGET_CAPACITY)을 모두 넘지 않아야 하므로, 백엔드가 오래 죽어 있어도 재시도가 부하를 몇 배로 키우지 않습니다.
+
+재시도는 지표 그룹 retry(키: 호출 대상, 구간: 오류 종류, 값은 기다린 시간)에, 포기한 호출은 구간 gave_up(값은 시도 수)에 기록됩니다.
+requests/httpx는 이미 임포트된 경우에만 예외 타입을 확인합니다 (분류를 위해 임포트하지 않음).
+"""
+import sys
+import time
+import random
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from app.core.config import (
+    RETRY_MAX_ATTEMPTS, RETRY_BASE_DELAY, RETRY_MAX_DELAY, RETRY_BUDGET_RATIO, RETRY_BUDGET_CAPACITY,
+    RETRY_READY_WAIT
+)
+from app.services.deadline import DeadlineExceeded, bounded_timeout, check_deadline, sleep
+from app.services.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# 오류 종류
+CONNECTION = "connection"
+TIMEOUT = "timeout"
+SERVER = "server"
+INVALID = "invalid"
+OTHER = "other"
+RETRYABLE = (CONNECTION, TIMEOUT, SERVER)
+
+# 준비 신호를 기다릴 때 마감/취소를 확인하는 간격 (초)
+_READY_SLICE = 0.5
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    """예외에 담긴 HTTP 상태 코드 (ComfyUIError, ollama.ResponseError, requests/httpx 응답 오류)"""
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status if isinstance(status, int) and status >= 100 else None
+
+
+def _classify_one(exc: BaseException) -> Optional[str]:
+    status = _status_code(exc)
+    if status is not None:
+        return SERVER if status >= 500 or status == 429 else INVALID
+    requests = sys.modules.get("requests")
+    if requests is not None:
+        if isinstance(exc, requests.exceptions.Timeout):
+            return TIMEOUT
+        if isinstance(exc, (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError)):
+            return CONNECTION
+    httpx = sys.modules.get("httpx")
+    if httpx is not None:
+        if isinstance(exc, httpx.TimeoutException):
+            return TIMEOUT
+        if isinstance(exc, (httpx.NetworkError, httpx.RemoteProtocolError)):
+            return CONNECTION
+    if isinstance(exc, TimeoutError):
+        return TIMEOUT
+    if isinstance(exc, ConnectionError):
+        return CONNECTION
+    return None
+
+
+def classify(exc: BaseException) -> str:
+    """
+    오류 종류 판별 (감싼 예외는 원인 예외까지 확인)
+
+    Returns:
+        connection, timeout, server, invalid, other 중 하나
+    """
+    seen = 0
+    current: Optional[BaseException] = exc
+    while current is not None and seen < 5:
+        if isinstance(current, DeadlineExceeded):
+            return OTHER
+        category = _classify_one(current)
+        if category is not None:
+            return category
+        current = current.__cause__ or current.__context__
+        seen += 1
+    return OTHER
+
+
+class RetryBudget:
+    """재시도 예산 (성공한 호출마다 ratio만큼 적립, 재시도마다 1 사용)"""
+
+    def __init__(self, ratio: float = RETRY_BUDGET_RATIO, capacity: float = RETRY_BUDGET_CAPACITY):
+        self.ratio = ratio
+        self.capacity = capacity
+        self.tokens = capacity
+        self.spent = 0
+        self.denied = 0
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        """재시도 한 번 허락 (예산이 없으면 False)"""
+        with self._lock:
+            if self.tokens < 1:
+                self.denied += 1
+                return False
+            self.tokens -= 1
+            self.spent += 1
+            return True
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"tokens": round(self.tokens, 2), "spent": self.spent, "denied": self.denied}
+
+
+# 백엔드 URL → 준비 신호 (is_comfyui_ready(), wait_for_comfyui(timeout)을 가진 서비스 매니저)
+_readiness: Dict[str, Any] = {}
+
+
+def register_readiness(url: str, manager: Any):
+    """서비스 매니저가 관리하는 백엔드의 준비 신호 등록 (재시도가 재시작을 기다리는 데 사용)"""
+    _readiness[url.rstrip("/")] = manager
+
+
+def get_readiness(url: str) -> Optional[Any]:
+    """백엔드의 준비 신호 (관리하지 않는 백엔드면 None)"""
+    return _readiness.get(url.rstrip("/"))
+
+
+class RetryPolicy:
+    """오류 분류 + 지터 지수 백오프 + 재시도 예산"""
+
+    def __init__(
+        self,
+        name: str,
+        max_attempts: int = RETRY_MAX_ATTEMPTS,
+        base_delay: float = RETRY_BASE_DELAY,
+        max_delay: float = RETRY_MAX_DELAY,
+        budget: Optional[RetryBudget] = None
+    ):
+        """
+        Args:
+            name: 정책 이름 (백엔드 종류, 로그용)
+            max_attempts: 호출당 최대 시도 수 (1이면 재시도 없음)
+            base_delay: 첫 재시도 백오프 상한 (초)
+            max_delay: 백오프 상한 (초)
+            budget: 재시도 예산 (None이면 새로 만듦)
+        """
+        self.name = name
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget or RetryBudget()
+
+    def backoff(self, attempt: int) -> float:
+        """attempt번째 실패 뒤 기다릴 시간 (full jitter)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def pause(self, target: str, category: str, attempt: int, readiness: Optional[Any] = None) -> float:
+        """
+        재시도 전 대기 (재시작 중이면 준비 신호, 아니면 백오프)
+
+        Returns:
+            기다린 시간 (초)
+
+        Raises:
+            DeadlineExceeded: 기다리는 사이 작업 마감이 지난 경우
+        """
+        started = time.perf_counter()
+        if category == CONNECTION and readiness is not None and not readiness.is_comfyui_ready():
+            end = time.monotonic() + bounded_timeout(RETRY_READY_WAIT)
+            while time.monotonic() < end:
+                if readiness.wait_for_comfyui(min(_READY_SLICE, max(0.0, end - time.monotonic()))):
+                    waited = time.perf_counter() - started
+                    get_metrics().observe("retry", target, "ready_wait", waited)
+                    return waited
+                check_deadline()
+            # 준비 신호가 오지 않았으면 백오프 후 한 번 더 시도
+        sleep(self.backoff(attempt))
+        waited = time.perf_counter() - started
+        get_metrics().observe("retry", target, category, waited)
+        return waited
+
+    def call(self, target: str, fn: Callable[[int], T], readiness: Optional[Any] = None) -> T:
+        """
+        재시도하며 호출
+
+        Args:
+            target: 호출 대상 이름 (지표 키, 예: comfyui.submit)
+            fn: 시도 번호(1부터)를 받아 호출하는 함수
+            readiness: 백엔드 준비 신호 (get_readiness)
+
+        Returns:
+            fn의 결과
+
+        Raises:
+            재시도할 수 없거나 시도/예산을 다 쓴 경우 마지막 예외, 작업 마감이 지나면 DeadlineExceeded
+        """
+        attempt = 1
+        while True:
+            try:
+                result = fn(attempt)
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                category = classify(e)
+                if category not in RETRYABLE:
+                    raise
+                if attempt >= self.max_attempts or not self.budget.withdraw():
+                    get_metrics().observe("retry", target, "gave_up", attempt, ok=False)
+                    logger.warning(f"{target}: {attempt}번 시도 후 포기합니다 ({category}: {e})")
+                    raise
+                logger.info(f"{target}: {category} 오류로 다시 시도합니다 ({attempt}/{self.max_attempts}): {e}")
+                self.pause(target, category, attempt, readiness)
+                attempt += 1
+                continue
+            self.budget.deposit()
+            return result
+
+
+# 백엔드 종류별 재시도 정책 (예산을 따로 씀)
+_policies: Dict[str, RetryPolicy] = {}
+_policies_lock = threading.Lock()
+
+
+def get_retry_policy(name: str) -> RetryPolicy:
+    """백엔드 종류별 재시도 정책 반환 (comfyui, llm)"""
+    with _policies_lock:
+        if name not in _policies:
+            _policies[name] = RetryPolicy(name)
+        return _policies[name]
@@ -0,0 +1,329 @@
+"""
+생성 작업 스케줄러 (ComfyUI 제출 앞단)
+
+작업마다 우선순위 클래스(모드/API 키 기준)를 정하고, 가중 공정 큐잉(WFQ)으로 다음에 ComfyUI에
+제출할 작업을 고릅니다. 오래 기다린 작업은 에이징으로 점수가 좋아지므로 배치 작업도 굶지 않으며,
+urgent 클래스는 항상 먼저 나가고 ComfyUI의 `front` 옵션으로 큐 맨 앞에 들어갑니다.
+생성 프로필에 동시 실행 한도(max_concurrency)가 있으면 한도에 걸린 작업은 건너뛰고 다음 작업을 보냅니다.
+멀티 워커 모드에서는 슈퍼바이저의 스케줄러 하나가 모든 워커의 작업을 고릅니다 (app.services.supervisor.RemoteScheduler).
+"""
+import time
+import uuid
+import hashlib
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+from app.core.config import (
+    COMFYUI_MAX_CONCURRENCY,
+    ADMISSION_MAX_QUEUE,
+    ADMISSION_MAX_WAIT,
+    SCHEDULER_CLASS_WEIGHTS,
+    SCHEDULER_MODE_CLASSES,
+    SCHEDULER_TENANT_CLASSES,
+    SCHEDULER_AGING_RATE
+)
+from app.core.tracing import span
+from app.services.admission import AdmissionRejected
+from app.services.deadline import bounded_timeout, check_deadline, wait_event
+from app.services.profiles import get_profile_registry
+
+URGENT = "urgent"
+DEFAULT_CLASS = "interactive"
+
+
+class Ticket:
+    """스케줄링 대상 작업"""
+
+    def __init__(self, mode: str, tenant: str, priority: str, weight: float, cost: float):
+        self.id = uuid.uuid4().hex[:12]
+        self.mode = mode
+        self.tenant = tenant
+        self.priority = priority
+        self.weight = weight
+        self.cost = cost
+        self.enqueued_at = time.monotonic()
+        self.started_at: Optional[float] = None
+        self.virtual_start = 0.0
+        self.virtual_finish = 0.0
+        self.front = priority == URGENT
+        self.granted = threading.Event()
+
+    @property
+    def flow(self) -> str:
+        return f"{self.priority}:{self.tenant}"
+
+    def waited(self, now: Optional[float] = None) -> float:
+        end = self.started_at if self.started_at is not None else (now or time.monotonic())
+        return end - self.enqueued_at
+
+    def to_dict(self, now: Optional[float] = None) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "mode": self.mode,
+            "tenant": self.tenant,
+            "priority": self.priority,
+            "weight": self.weight,
+            "cost": round(self.cost, 3),
+            "virtual_finish": round(self.virtual_finish, 3),
+            "waited_seconds": round(self.waited(now), 3),
+            "front": self.front
+        }
+
+
+class GenerationScheduler:
+    """
+    가중 공정 큐잉 + 에이징 스케줄러
+
+    각 흐름(우선순위 클래스 × 테넌트)은 가상 시간 태그를 가지며, 작업의 가상 종료 시각은
+    `max(전역 가상 시각, 흐름의 마지막 종료 시각) + 비용 / 가중치`입니다. 디스패치 시에는
+    `가상 종료 시각 - 대기 시간 × aging_rate`가 가장 작은 작업을 고릅니다.
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        max_queue: int,
+        max_wait: float,
+        class_weights: Dict[str, float],
+        mode_classes: Dict[str, str],
+        tenant_classes: Dict[str, str],
+        aging_rate: float,
+        mode_limit: Optional[Callable[[str], Optional[int]]] = None
+    ):
+        """
+        Args:
+            mode_limit: 모드(프로필)별 동시 실행 한도 조회 함수 (None을 반환하면 전체 한도만 적용)
+        """
+        self.limit = max(1, limit)
+        self.max_queue = max(0, max_queue)
+        self.max_wait = max_wait
+        self.class_weights = class_weights
+        self.mode_classes = mode_classes
+        self.tenant_classes = tenant_classes
+        self.aging_rate = aging_rate
+        self.mode_limit = mode_limit
+
+        self.running: Dict[str, Ticket] = {}
+        self.pending: List[Ticket] = []
+        self.decisions: Deque[Dict[str, Any]] = deque(maxlen=100)
+        self.admitted = 0
+        self.rejected = 0
+        self._vtime = 0.0
+        self._flow_finish: Dict[str, float] = {}
+        self._avg_hold = 1.0
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # 분류
+    # ------------------------------------------------------------------
+    @staticmethod
+    def tenant_id(api_key: Optional[str]) -> str:
+        """API 키를 노출하지 않는 테넌트 식별자"""
+        if not api_key:
+            return "anonymous"
+        return "t-" + hashlib.sha256(api_key.encode()).hexdigest()[:10]
+
+    def classify(self, mode: str, api_key: Optional[str] = None, priority: Optional[str] = None) -> str:
+        """우선순위 클래스 결정 (API 키 설정 > 호출자 지정 클래스 > 모드 설정)"""
+        if api_key and api_key in self.tenant_classes:
+            return self.tenant_classes[api_key]
+        if priority:
+            return priority
+        return self.mode_classes.get(mode, DEFAULT_CLASS)
+
+    def _make_ticket(self, mode: str, api_key: Optional[str], cost: float, priority: Optional[str]) -> Ticket:
+        priority = self.classify(mode, api_key, priority)
+        weight = float(self.class_weights.get(priority, 1.0))
+        return Ticket(mode, self.tenant_id(api_key), priority, max(weight, 0.001), max(cost, 0.001))
+
+    # ------------------------------------------------------------------
+    # 큐 조작 (호출자는 _lock을 보유해야 함)
+    # ------------------------------------------------------------------
+    def _tag(self, ticket: Ticket):
+        ticket.virtual_start = max(self._vtime, self._flow_finish.get(ticket.flow, 0.0))
+        ticket.virtual_finish = ticket.virtual_start + ticket.cost / ticket.weight
+        self._flow_finish[ticket.flow] = ticket.virtual_finish
+
+    def _score(self, ticket: Ticket, now: float) -> float:
+        return ticket.virtual_finish - self.aging_rate * (now - ticket.enqueued_at)
+
+    def _ordered(self, now: float) -> List[Ticket]:
+        """디스패치 순서 (urgent는 도착 순서대로 항상 먼저)"""
+        return sorted(
+            self.pending,
+            key=lambda t: (t.priority != URGENT, t.enqueued_at if t.priority == URGENT else self._score(t, now))
+        )
+
+    def _has_room(self, mode: str) -> bool:
+        """모드별 동시 실행 한도에 여유가 있는지"""
+        limit = self.mode_limit(mode) if self.mode_limit else None
+        if limit is None:
+            return True
+        return sum(1 for t in self.running.values() if t.mode == mode) < limit
+
+    def _start(self, ticket: Ticket, now: float, queued: bool):
+        ticket.started_at = now
+        self.running[ticket.id] = ticket
+        self._vtime = max(self._vtime, ticket.virtual_start)
+        self.admitted += 1
+        self.decisions.append({
+            **ticket.to_dict(now),
+            "score": round(self._score(ticket, now), 3),
+            "queued": queued,
+            "pending_after": len(self.pending),
+            "at": time.time()
+        })
+        ticket.granted.set()
+
+    def _dispatch(self):
+        now = time.monotonic()
+        while len(self.running) < self.limit and self.pending:
+            # 모드별 한도에 걸린 작업은 건너뛰고 다음 순서의 작업을 보냄
+            ticket = next((t for t in self._ordered(now) if self._has_room(t.mode)), None)
+            if ticket is None:
+                break
+            self.pending.remove(ticket)
+            self._start(ticket, now, queued=True)
+
+    def _retry_after(self) -> int:
+        return max(1, int(self._avg_hold * (len(self.pending) + 1) / self.limit + 0.999))
+
+    # ------------------------------------------------------------------
+    # 공개 API
+    # ------------------------------------------------------------------
+    def check(self):
+        """
+        대기열 여유 확인 (슬롯은 점유하지 않음)
+
+        Raises:
+            AdmissionRejected: 대기열이 가득 찬 경우
+        """
+        with self._lock:
+            if len(self.running) >= self.limit and len(self.pending) >= self.max_queue:
+                self.rejected += 1
+                raise AdmissionRejected("comfyui", "queue full", self._retry_after())
+
+    def acquire(self, mode: str, api_key: Optional[str] = None, cost: float = 1.0,
+                timeout: Optional[float] = None, priority: Optional[str] = None) -> Ticket:
+        """
+        ComfyUI 제출 슬롯 획득
+
+        Args:
+            mode: 생성 모드
+            api_key: 요청자 API 키 (테넌트 구분용)
+            cost: 작업 비용 추정치 (balanced 모드 = 1.0)
+            timeout: 최대 대기 시간 (None이면 max_wait)
+            priority: 우선순위 클래스 직접 지정 (None이면 모드로 결정)
+
+        Returns:
+            슬롯을 획득한 티켓
+
+        Raises:
+            AdmissionRejected: 대기열이 가득 찼거나 대기 시간이 초과된 경우
+            DeadlineExceeded: 작업 마감이 먼저 지난 경우
+        """
+        check_deadline("queue")
+        timeout = bounded_timeout(self.max_wait if timeout is None else timeout)
+        ticket = self._make_ticket(mode, api_key, cost, priority)
+
+        with self._lock:
+            if len(self.pending) >= self.max_queue and len(self.running) >= self.limit:
+                self.rejected += 1
+                raise AdmissionRejected("comfyui", "queue full", self._retry_after())
+            self._tag(ticket)
+            # 대기 중인 작업이 모두 모드별 한도에 걸려 있으면 새 작업이 바로 나갈 수 있음
+            if (len(self.running) < self.limit and self._has_room(mode)
+                    and not any(self._has_room(t.mode) for t in self.pending)):
+                self._start(ticket, time.monotonic(), queued=False)
+                return ticket
+            self.pending.append(ticket)
+
+        if not wait_event(ticket.granted, timeout):
+            with self._lock:
+                if ticket in self.pending:
+                    self.pending.remove(ticket)
+                    self.rejected += 1
+                    check_deadline("queue")
+                    raise AdmissionRejected("comfyui", "wait timeout", self._retry_after())
+        return ticket
+
+    def release(self, ticket: Ticket):
+        """슬롯 반납 후 다음 작업 디스패치"""
+        with self._lock:
+            if self.running.pop(ticket.id, None) is not None and ticket.started_at is not None:
+                held = time.monotonic() - ticket.started_at
+                self._avg_hold = 0.8 * self._avg_hold + 0.2 * held
+            self._dispatch()
+
+    @contextmanager
+    def slot(self, mode: str, api_key: Optional[str] = None, cost: float = 1.0,
+             timeout: Optional[float] = None, priority: Optional[str] = None) -> Iterator[Ticket]:
+        """슬롯을 점유하는 컨텍스트 매니저 (대기 구간은 트레이스 스팬으로 기록)"""
+        with span("scheduler.wait", {"scheduler.mode": mode}) as s:
+            ticket = self.acquire(mode, api_key, cost, timeout, priority)
+            if s is not None:
+                s.set_attribute("scheduler.priority", ticket.priority)
+                s.set_attribute("scheduler.front", ticket.front)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def headroom(self) -> int:
+        """추가로 받아들일 수 있는 작업 수"""
+        with self._lock:
+            return (self.limit - len(self.running)) + (self.max_queue - len(self.pending))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """큐 상태 (디스패치 예정 순서와 최근 결정 포함)"""
+        with self._lock:
+            now = time.monotonic()
+            return {
+                "limit": self.limit,
+                "max_queue": self.max_queue,
+                "aging_rate": self.aging_rate,
+                "class_weights": dict(self.class_weights),
+                "virtual_time": round(self._vtime, 3),
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "mode_limits": {
+                    mode: self.mode_limit(mode)
+                    for mode in {t.mode for t in self.running.values()} | {t.mode for t in self.pending}
+                } if self.mode_limit else {},
+                "running": [t.to_dict(now) for t in self.running.values()],
+                "pending": [
+                    {**t.to_dict(now), "score": round(self._score(t, now), 3)}
+                    for t in self._ordered(now)
+                ],
+                "recent_decisions": list(self.decisions)[-20:]
+            }
+
+
+def _profile_limit(mode: str) -> Optional[int]:
+    """프로필의 동시 실행 한도"""
+    return get_profile_registry().max_concurrency(mode)
+
+
+# 전역 스케줄러 인스턴스
+_scheduler: Optional[GenerationScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> GenerationScheduler:
+    """전역 스케줄러 인스턴스 반환 (싱글톤)"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = GenerationScheduler(
+                limit=COMFYUI_MAX_CONCURRENCY,
+                max_queue=ADMISSION_MAX_QUEUE,
+                max_wait=ADMISSION_MAX_WAIT,
+                class_weights=SCHEDULER_CLASS_WEIGHTS,
+                mode_classes=SCHEDULER_MODE_CLASSES,
+                tenant_classes=SCHEDULER_TENANT_CLASSES,
+                aging_rate=SCHEDULER_AGING_RATE,
+                mode_limit=_profile_limit
+            )
+        return _scheduler
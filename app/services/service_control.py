@@ -1,14 +1,16 @@
 """
 서비스 제어 서비스
 """
-from typing import Dict, Any
-from service_manager import ServiceManager
+from typing import TYPE_CHECKING, Dict, Any
+
+if TYPE_CHECKING:
+    from service_manager import ServiceManager
 
 
 class ServiceControlService:
     """서비스 제어 서비스"""
     
-    def __init__(self, service_manager: ServiceManager):
+    def __init__(self, service_manager: "ServiceManager"):
         self.service_manager = service_manager
     
     def get_status(self) -> Dict[str, Any]:
@@ -0,0 +1,536 @@
+"""
+멀티 워커 모드의 서비스 매니저 공유
+
+`API_WORKERS > 1`이면 슈퍼바이저 프로세스 하나만 ServiceManager(ComfyUI/WebUI 프로세스와 헬스체크)를
+소유하고, uvicorn 워커 프로세스들은 Unix 소켓으로 상태 조회와 서비스 제어를 요청합니다.
+작업 상태는 SQLite 작업 저장소(WAL)를 통해 모든 프로세스가 공유합니다.
+
+프로토콜은 한 줄짜리 JSON 요청/응답입니다.
+
+    → {"method": "get_status"}
+    ← {"result": {...}}  또는  {"error": "..."}
+
+ComfyUI 제출 슬롯(스케줄러)과 LLM/비전 슬롯(리미터)도 슈퍼바이저의 인스턴스 하나가 전체 한도로 관리하므로
+워커 수와 관계없이 동시 실행 수와 우선순위/공정성이 모든 워커에 걸쳐 적용됩니다.
+워커는 slot_acquire로 슬롯을 받은 뒤 연결을 열어 둔 채 작업하고, 한 줄을 보내거나 연결을 닫으면
+슬롯이 반납됩니다 (워커가 죽어도 연결이 끊기므로 슬롯이 새지 않음).
+
+    → {"method": "slot_acquire", "params": {"resource": "comfyui", "mode": "balanced", "timeout": 30}}
+    ← {"result": {"priority": "interactive", "front": false}}
+      또는 {"error": "...", "rejected": {"reason": "queue full", "retry_after": 3}}
+    → {"method": "slot_release"}
+"""
+import os
+import json
+import select
+import socket
+import logging
+import time
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.core.config import (
+    ADMISSION_MAX_WAIT,
+    SCHEDULER_MODE_CLASSES,
+    SCHEDULER_TENANT_CLASSES
+)
+from app.core.tracing import span
+from app.services.admission import AdmissionRejected, get_limiter
+from app.services.deadline import (
+    Deadline,
+    DeadlineExceeded,
+    activate,
+    bounded_timeout,
+    check_deadline,
+    current_deadline
+)
+from app.services.scheduler import DEFAULT_CLASS, get_scheduler
+
+logger = logging.getLogger(__name__)
+
+# 워커가 호출할 수 있는 ServiceManager 메서드
+_METHODS = (
+    "get_status",
+    "get_cached_status",
+    "start_comfyui",
+    "stop_comfyui",
+    "start_webui",
+    "stop_webui",
+    "start_all",
+    "stop_all",
+    "is_comfyui_ready",
+)
+
+# 워커가 조회할 수 있는 슬롯 메서드 (slot_<메서드> → 스케줄러/리미터의 같은 이름 메서드)
+_SLOT_METHODS = ("slot_check", "slot_headroom", "slot_snapshot")
+
+# 슬롯 대기 중 연결 끊김/마감을 확인하는 간격 (초)
+_SLOT_POLL = 0.25
+
+# 슈퍼바이저의 대기 시간 초과 응답을 받을 때까지 더 기다리는 여유 (초)
+_SLOT_GRACE = 5.0
+
+
+def _slot_resource(name: str):
+    """슬롯 리소스 (comfyui → 스케줄러, 그 외 → 리소스 리미터)"""
+    if name == "comfyui":
+        return get_scheduler()
+    return get_limiter(name)
+
+
+class SupervisorServer:
+    """ServiceManager를 Unix 소켓으로 노출하는 서버 (슈퍼바이저 프로세스에서 실행)"""
+
+    def __init__(self, manager, socket_path: str):
+        """
+        Args:
+            manager: 실제 ServiceManager 인스턴스
+            socket_path: Unix 소켓 경로
+        """
+        self.manager = manager
+        self.socket_path = socket_path
+        self._sock: Optional[socket.socket] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "SupervisorServer":
+        """소켓 바인드 후 요청 처리 스레드 시작"""
+        Path(self.socket_path).parent.mkdir(parents=True, exist_ok=True)
+        # 이전 실행에서 남은 소켓 파일 제거
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        self._sock.listen(64)
+
+        self._thread = threading.Thread(target=self._accept_loop, daemon=True, name="supervisor")
+        self._thread.start()
+        logger.info(f"슈퍼바이저 소켓 대기 중: {self.socket_path}")
+        return self
+
+    def stop(self):
+        """소켓 닫기"""
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def _accept_loop(self):
+        while self._sock is not None:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                # stop()으로 소켓이 닫힘
+                return
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        method = request.get("method")
+        if method == "health_check_running":
+            return {"result": self.manager.running}
+        if method in _SLOT_METHODS:
+            params = request.get("params") or {}
+            try:
+                return {"result": getattr(_slot_resource(params.get("resource", "")), method[len("slot_"):])()}
+            except AdmissionRejected as e:
+                return {"error": str(e), "rejected": {"reason": e.reason, "retry_after": e.retry_after}}
+            except Exception as e:
+                logger.error(f"슈퍼바이저 요청 처리 오류 ({method}): {e}")
+                return {"error": str(e)}
+        if method not in _METHODS:
+            return {"error": f"지원하지 않는 메서드: {method}"}
+        try:
+            return {"result": getattr(self.manager, method)()}
+        except Exception as e:
+            logger.error(f"슈퍼바이저 요청 처리 오류 ({method}): {e}")
+            return {"error": str(e)}
+
+    def _serve(self, conn: socket.socket):
+        with conn, conn.makefile("rwb") as stream:
+            for line in stream:
+                try:
+                    request = json.loads(line)
+                except ValueError as e:
+                    request = None
+                    response = {"error": f"잘못된 요청: {e}"}
+                if request is not None and request.get("method") == "slot_acquire":
+                    # 슬롯을 쥔 동안 연결을 점유하므로 이 연결의 요청은 여기서 끝남
+                    self._hold_slot(conn, stream, request.get("params") or {})
+                    return
+                if request is not None:
+                    response = self._handle(request)
+                stream.write(json.dumps(response, ensure_ascii=False).encode() + b"\n")
+                stream.flush()
+
+    @staticmethod
+    def _watch_disconnect(conn: socket.socket, deadline: Deadline, done: threading.Event):
+        """슬롯 대기 중 워커가 연결을 닫으면(작업 취소/종료) 대기를 취소"""
+        while not done.is_set():
+            try:
+                readable, _, _ = select.select([conn], [], [], _SLOT_POLL)
+                if readable and not conn.recv(1, socket.MSG_PEEK):
+                    deadline.cancel()
+                    return
+            except OSError:
+                deadline.cancel()
+                return
+            if readable:
+                # 대기 중에는 워커가 보내는 데이터가 없어야 함 (있으면 더 확인하지 않음)
+                return
+
+    def _hold_slot(self, conn: socket.socket, stream, params: Dict[str, Any]):
+        """슬롯 획득 → 응답 → 워커가 반납(한 줄 또는 연결 종료)할 때까지 점유"""
+        name = params.get("resource", "")
+        try:
+            resource = _slot_resource(name)
+        except KeyError:
+            conn.sendall(json.dumps({"error": f"알 수 없는 리소스: {name}"}, ensure_ascii=False).encode() + b"\n")
+            return
+
+        timeout = max(0.0, float(params.get("timeout") or 0))
+        deadline = Deadline(timeout)
+        done = threading.Event()
+        watcher = threading.Thread(target=self._watch_disconnect, args=(conn, deadline, done), daemon=True)
+        watcher.start()
+        ticket = None
+        try:
+            with activate(deadline):
+                if name == "comfyui":
+                    ticket = resource.acquire(
+                        params.get("mode", ""),
+                        api_key=params.get("api_key"),
+                        cost=float(params.get("cost", 1.0)),
+                        timeout=timeout,
+                        priority=params.get("priority")
+                    )
+                    response = {"result": {"priority": ticket.priority, "front": ticket.front}}
+                else:
+                    resource.acquire(timeout)
+                    ticket = True
+                    response = {"result": {}}
+        except AdmissionRejected as e:
+            response = {"error": str(e), "rejected": {"reason": e.reason, "retry_after": e.retry_after}}
+        except DeadlineExceeded as e:
+            # 워커의 작업 마감에 맞춘 대기 시간이 지났거나 워커가 연결을 닫음
+            response = {"error": str(e), "rejected": {"reason": "wait timeout", "retry_after": 1}}
+        except Exception as e:
+            logger.error(f"슈퍼바이저 슬롯 처리 오류 ({name}): {e}")
+            response = {"error": str(e)}
+        finally:
+            done.set()
+            watcher.join()
+
+        started = time.monotonic()
+        try:
+            # 버퍼 없이 바로 보냄 (워커가 이미 끊었으면 스트림을 닫을 때 다시 쓰다 실패하지 않도록)
+            conn.sendall(json.dumps(response, ensure_ascii=False).encode() + b"\n")
+            if ticket is not None:
+                stream.readline()
+        except OSError:
+            pass
+        finally:
+            if ticket is True:
+                resource.release(time.monotonic() - started)
+            elif ticket is not None:
+                resource.release(ticket)
+
+
+def _connect(socket_path: str, timeout: float) -> socket.socket:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(socket_path)
+    except OSError as e:
+        sock.close()
+        raise RuntimeError(f"슈퍼바이저에 연결할 수 없습니다 ({socket_path}): {e}")
+    return sock
+
+
+def _send(sock: socket.socket, method: str, params: Optional[Dict[str, Any]] = None):
+    request: Dict[str, Any] = {"method": method}
+    if params is not None:
+        request["params"] = params
+    sock.sendall(json.dumps(request).encode() + b"\n")
+
+
+def _result(line: bytes, resource: str = "") -> Any:
+    """
+    응답 줄 해석
+
+    Raises:
+        AdmissionRejected: 슈퍼바이저의 슬롯 대기열/대기 시간에 걸린 경우
+        RuntimeError: 그 밖의 오류
+    """
+    if not line:
+        raise RuntimeError("슈퍼바이저가 응답 없이 연결을 닫았습니다")
+    response = json.loads(line)
+    if "rejected" in response:
+        rejected = response["rejected"]
+        raise AdmissionRejected(resource, rejected["reason"], int(rejected["retry_after"]))
+    if "error" in response:
+        raise RuntimeError(response["error"])
+    return response["result"]
+
+
+def _call(socket_path: str, timeout: float, method: str, params: Optional[Dict[str, Any]] = None) -> Any:
+    """요청 하나를 보내고 응답을 받음 (연결은 요청마다 새로 엶)"""
+    with _connect(socket_path, timeout) as sock:
+        _send(sock, method, params)
+        with sock.makefile("rb") as stream:
+            line = stream.readline()
+    return _result(line, (params or {}).get("resource", ""))
+
+
+class RemoteServiceManager:
+    """
+    워커 프로세스용 ServiceManager 프록시
+
+    라우터가 사용하는 ServiceManager 인터페이스를 그대로 제공하며, 모든 호출을 슈퍼바이저에 위임합니다.
+    프로세스 실행과 헬스체크는 슈퍼바이저가 담당하므로 헬스체크 시작/중지는 아무 일도 하지 않습니다.
+    """
+
+    def __init__(self, socket_path: str, timeout: float = 300):
+        """
+        Args:
+            socket_path: 슈퍼바이저 Unix 소켓 경로
+            timeout: 요청당 최대 대기 시간 (초, 서비스 시작은 오래 걸릴 수 있음)
+        """
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    def _call(self, method: str) -> Any:
+        return _call(self.socket_path, self.timeout, method)
+
+    @property
+    def running(self) -> bool:
+        """슈퍼바이저의 헬스체크 실행 여부"""
+        return self._call("health_check_running")
+
+    def get_status(self) -> Dict[str, Any]:
+        return self._call("get_status")
+
+    def get_cached_status(self) -> Dict[str, Any]:
+        return self._call("get_cached_status")
+
+    def is_comfyui_ready(self) -> bool:
+        return self._call("is_comfyui_ready")
+
+    def wait_for_comfyui(self, timeout: float, interval: float = 0.5) -> bool:
+        """슈퍼바이저의 ComfyUI 준비 신호를 interval마다 확인하며 대기 (프로세스 사이에는 이벤트를 공유할 수 없음)"""
+        end = time.monotonic() + timeout
+        while not self.is_comfyui_ready():
+            left = end - time.monotonic()
+            if left <= 0:
+                return False
+            time.sleep(min(interval, left))
+        return True
+
+    def start_comfyui(self) -> bool:
+        return self._call("start_comfyui")
+
+    def stop_comfyui(self):
+        self._call("stop_comfyui")
+
+    def start_webui(self) -> bool:
+        return self._call("start_webui")
+
+    def stop_webui(self):
+        self._call("stop_webui")
+
+    def start_all(self) -> Dict[str, bool]:
+        return self._call("start_all")
+
+    def stop_all(self):
+        self._call("stop_all")
+
+    def start_health_check(self):
+        pass
+
+    def stop_health_check(self):
+        pass
+
+
+class RemoteTicket:
+    """슈퍼바이저 스케줄러가 내준 ComfyUI 슬롯 (scheduler.Ticket에서 라우터가 쓰는 속성만 제공)"""
+
+    def __init__(self, mode: str, priority: str, front: bool, enqueued_at: float, started_at: float):
+        self.mode = mode
+        self.priority = priority
+        self.front = front
+        self.enqueued_at = enqueued_at
+        self.started_at = started_at
+
+    def waited(self, now: Optional[float] = None) -> float:
+        return self.started_at - self.enqueued_at
+
+
+class _RemoteSlots:
+    """
+    슈퍼바이저의 스케줄러/리미터 슬롯 프록시 (워커 프로세스용)
+
+    슬롯 하나마다 연결 하나를 열어 두고, 반납할 때 닫습니다.
+    대기 중에는 짧게 나눠 응답을 기다리며 작업 마감이 지나거나 취소되면 연결을 닫아 슈퍼바이저의 대기도 끝냅니다.
+    """
+
+    def __init__(self, resource: str, socket_path: str, stage: str, max_wait: float = ADMISSION_MAX_WAIT,
+                 timeout: float = 10):
+        """
+        Args:
+            resource: 슬롯 리소스 (comfyui, llm, vision)
+            socket_path: 슈퍼바이저 Unix 소켓 경로
+            stage: 대기 중 마감을 넘겼을 때 보고할 단계
+            max_wait: 기본 최대 대기 시간 (초)
+            timeout: 조회 요청 제한 시간 (초)
+        """
+        self.name = resource
+        self.socket_path = socket_path
+        self.stage = stage
+        self.max_wait = max_wait
+        self.timeout = timeout
+
+    def _query(self, method: str) -> Any:
+        return _call(self.socket_path, self.timeout, method, {"resource": self.name})
+
+    def _open(self, params: Dict[str, Any], timeout: Optional[float]) -> Tuple[socket.socket, Dict[str, Any]]:
+        """
+        슬롯을 받을 때까지 대기 (받은 연결은 반납할 때까지 열어 둠)
+
+        Raises:
+            AdmissionRejected: 대기열이 가득 찼거나 대기 시간이 초과된 경우
+            DeadlineExceeded: 작업 마감이 먼저 지났거나 취소된 경우
+        """
+        check_deadline(self.stage)
+        timeout = bounded_timeout(self.max_wait if timeout is None else timeout)
+        deadline = current_deadline()
+        end = time.monotonic() + timeout + _SLOT_GRACE
+
+        sock = _connect(self.socket_path, self.timeout)
+        try:
+            _send(sock, "slot_acquire", {"resource": self.name, "timeout": timeout, **params})
+            sock.settimeout(_SLOT_POLL)
+            buffer = b""
+            while not buffer.endswith(b"\n"):
+                try:
+                    chunk = sock.recv(4096)
+                except socket.timeout:
+                    if deadline is not None and deadline.expired:
+                        raise deadline.error(self.stage)
+                    if time.monotonic() > end:
+                        raise AdmissionRejected(self.name, "wait timeout", 1)
+                    continue
+                if not chunk:
+                    break
+                buffer += chunk
+            result = _result(buffer, self.name)
+        except BaseException:
+            sock.close()
+            raise
+        # 반납 신호는 한 줄이므로 슬롯을 쥔 동안에는 제한 시간 없이 연결만 유지
+        sock.settimeout(self.timeout)
+        return sock, result
+
+    @staticmethod
+    def _close(sock: socket.socket):
+        """슬롯 반납 (반납 줄이 못 가도 연결이 닫히면 슈퍼바이저가 반납함)"""
+        try:
+            _send(sock, "slot_release")
+        except OSError:
+            pass
+        finally:
+            sock.close()
+
+    def check(self):
+        """
+        대기열 여유 확인 (슬롯은 점유하지 않음)
+
+        Raises:
+            AdmissionRejected: 대기열이 가득 찬 경우
+        """
+        self._query("slot_check")
+
+    def headroom(self) -> int:
+        """추가로 받아들일 수 있는 작업 수 (모든 워커 합계)"""
+        return self._query("slot_headroom")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """슈퍼바이저의 현재 상태"""
+        return self._query("slot_snapshot")
+
+
+class RemoteLimiter(_RemoteSlots):
+    """ResourceLimiter 프록시 (acquire/release는 같은 스레드에서 짝을 이뤄 호출)"""
+
+    def __init__(self, resource: str, socket_path: str):
+        super().__init__(resource, socket_path, f"{resource}_queue")
+        self._held = threading.local()
+
+    def _stack(self) -> List[socket.socket]:
+        stack = getattr(self._held, "socks", None)
+        if stack is None:
+            stack = self._held.socks = []
+        return stack
+
+    def acquire(self, timeout: Optional[float] = None):
+        """
+        슬롯 획득 (슈퍼바이저의 FIFO 대기열)
+
+        Raises:
+            AdmissionRejected: 대기열이 가득 찼거나 대기 시간이 초과된 경우
+            DeadlineExceeded: 작업 마감이 먼저 지난 경우
+        """
+        sock, _ = self._open({}, timeout)
+        self._stack().append(sock)
+
+    def release(self, held: Optional[float] = None):
+        """이 스레드가 마지막으로 받은 슬롯 반납 (점유 시간은 슈퍼바이저가 잼)"""
+        stack = self._stack()
+        if stack:
+            self._close(stack.pop())
+
+    @contextmanager
+    def slot(self, timeout: Optional[float] = None) -> Iterator[None]:
+        """슬롯을 점유하는 컨텍스트 매니저"""
+        with span(f"admission.{self.name}", {"admission.remote": True}):
+            sock, _ = self._open({}, timeout)
+        try:
+            yield
+        finally:
+            self._close(sock)
+
+
+class RemoteScheduler(_RemoteSlots):
+    """GenerationScheduler 프록시 (분류는 설정만 보면 되므로 워커에서 직접 함)"""
+
+    def __init__(self, socket_path: str):
+        super().__init__("comfyui", socket_path, "queue")
+
+    def classify(self, mode: str, api_key: Optional[str] = None, priority: Optional[str] = None) -> str:
+        """우선순위 클래스 결정 (GenerationScheduler.classify와 같은 규칙)"""
+        if api_key and api_key in SCHEDULER_TENANT_CLASSES:
+            return SCHEDULER_TENANT_CLASSES[api_key]
+        if priority:
+            return priority
+        return SCHEDULER_MODE_CLASSES.get(mode, DEFAULT_CLASS)
+
+    @contextmanager
+    def slot(self, mode: str, api_key: Optional[str] = None, cost: float = 1.0,
+             timeout: Optional[float] = None, priority: Optional[str] = None) -> Iterator[RemoteTicket]:
+        """ComfyUI 제출 슬롯을 점유하는 컨텍스트 매니저 (대기 구간은 트레이스 스팬으로 기록)"""
+        enqueued_at = time.monotonic()
+        with span("scheduler.wait", {"scheduler.mode": mode, "scheduler.remote": True}) as s:
+            sock, result = self._open(
+                {"mode": mode, "api_key": api_key, "cost": cost, "priority": priority},
+                timeout
+            )
+            ticket = RemoteTicket(mode, result["priority"], result["front"], enqueued_at, time.monotonic())
+            if s is not None:
+                s.set_attribute("scheduler.priority", ticket.priority)
+                s.set_attribute("scheduler.front", ticket.front)
+        try:
+            yield ticket
+        finally:
+            self._close(sock)
@@ -0,0 +1,292 @@
+"""
+ComfyUI 워크플로 구성
+
+생성 프로필(app.services.profiles)로 API 형식 워크플로를 만듭니다.
+리파이너 분할이 있으면 기본 모델이 앞쪽 스텝을 노이즈를 남긴 채 처리하고(KSamplerAdvanced),
+리파이너 모델이 나머지 스텝을 이어서 처리합니다. 출력 노드 ID는 항상 "save"입니다.
+
+업스케일 방식:
+- model: VAE 디코드 → 업스케일러 모델(보통 2x/4x) → (scale 지정 시) 목표 크기로 리사이즈
+- latent: 잠재 이미지를 scale배로 키운 뒤(LatentUpscaleBy) 기본 모델로 낮은 denoise 샘플링 → VAE 디코드.
+  픽셀 업스케일러를 거치지 않아 VRAM 사용이 가장 큰 단계를 피하고 배율을 자유롭게 고를 수 있습니다.
+프로필에 vae_tile_size가 있으면 VAE 디코드를 타일 단위(VAEDecodeTiled)로 처리해 큰 이미지의 VRAM 최대치를 낮춥니다.
+"""
+from typing import Any, Dict, Optional, Tuple
+
+from app.services.profiles import base_steps, hires_steps
+
+NEGATIVE_PROMPT = "blurry, low-resolution, messy, smudged"
+DEFAULT_SEED = 1234
+
+# VRAM 추정 계수 (SDXL fp16, GB, 메가픽셀은 1024x1024 기준)
+_VRAM_BASE_WEIGHTS = 7.0  # UNet + CLIP + VAE
+_VRAM_REFINER_WEIGHTS = 4.5
+_VRAM_SAMPLING_PER_MP = 1.0
+_VRAM_DECODE_PER_MP = 2.5
+_VRAM_UPSCALE_MODEL = 1.0  # 업스케일러 가중치 + 타일 처리
+
+
+def _advanced_sampler(
+    profile: Dict[str, Any],
+    model: list,
+    positive: list,
+    negative: list,
+    latent: list,
+    seed: int,
+    start: int,
+    end: int,
+    first: bool
+) -> Dict[str, Any]:
+    return {
+        "class_type": "KSamplerAdvanced",
+        "inputs": {
+            "model": model,
+            "add_noise": "enable" if first else "disable",
+            "noise_seed": seed,
+            "steps": profile["steps"],
+            "cfg": profile["cfg"],
+            "sampler_name": profile["sampler"],
+            "scheduler": profile["scheduler"],
+            "positive": positive,
+            "negative": negative,
+            "latent_image": latent,
+            "start_at_step": start,
+            "end_at_step": end,
+            "return_with_leftover_noise": "enable" if first else "disable"
+        }
+    }
+
+
+def _sampler(
+    profile: Dict[str, Any],
+    latent: list,
+    seed: int,
+    steps: int,
+    denoise: float
+) -> Dict[str, Any]:
+    return {
+        "class_type": "KSampler",
+        "inputs": {
+            "model": ["base_model", 0],
+            "seed": seed,
+            "steps": steps,
+            "cfg": profile["cfg"],
+            "scheduler": profile["scheduler"],
+            "sampler_name": profile["sampler"],
+            "denoise": denoise,
+            "latent_image": latent,
+            "positive": ["positive", 0],
+            "negative": ["negative", 0]
+        }
+    }
+
+
+def _scaled(value: int, scale: float) -> int:
+    """배율을 적용한 변 길이 (8의 배수)"""
+    return max(8, int(round(value * scale / 8)) * 8)
+
+
+def output_size(profile: Dict[str, Any], model_scale: int = 2) -> Tuple[int, int]:
+    """
+    최종 출력 이미지 크기
+
+    Args:
+        profile: 생성 프로필
+        model_scale: model 방식에서 scale이 없을 때 업스케일러 모델의 배율
+    """
+    width, height = profile["width"], profile["height"]
+    upscale = profile["upscale"]
+    if upscale is None:
+        return width, height
+    scale = upscale["scale"] or model_scale
+    if upscale["method"] == "latent" or upscale["scale"] is not None:
+        return _scaled(width, scale), _scaled(height, scale)
+    return width * model_scale, height * model_scale
+
+
+def build_workflow(
+    profile: Dict[str, Any],
+    prompt: str,
+    base_model: str,
+    refiner_model: Optional[str] = None,
+    upscale_model: Optional[str] = None,
+    prefix: str = "hyperwise",
+    negative: str = NEGATIVE_PROMPT,
+    seed: int = DEFAULT_SEED
+) -> Dict[str, Any]:
+    """
+    프로필로 워크플로 구성
+
+    Args:
+        profile: 생성 프로필
+        prompt: 긍정 프롬프트
+        base_model: 기본 체크포인트 이름
+        refiner_model: 리파이너 체크포인트 이름 (None이면 프로필에 리파이너 분할이 있어도 기본 모델만 사용)
+        upscale_model: 업스케일러 모델 이름 (프로필에 모델이 지정되지 않은 경우 사용)
+        prefix: 출력 파일명 접두사
+        negative: 부정 프롬프트
+        seed: 시드
+
+    Returns:
+        노드 ID → {"class_type", "inputs"}
+    """
+    graph: Dict[str, Any] = {
+        "base_model": {
+            "class_type": "CheckpointLoaderSimple",
+            "inputs": {"ckpt_name": base_model}
+        },
+        "latent": {
+            "class_type": "EmptyLatentImage",
+            "inputs": {
+                "width": profile["width"],
+                "height": profile["height"],
+                "batch_size": profile["batch_size"]
+            }
+        },
+        "positive": {
+            "class_type": "CLIPTextEncode",
+            "inputs": {"text": prompt, "clip": ["base_model", 1]}
+        },
+        "negative": {
+            "class_type": "CLIPTextEncode",
+            "inputs": {"text": negative, "clip": ["base_model", 1]}
+        },
+    }
+
+    if profile["refiner_split"] is not None and refiner_model:
+        switch = base_steps(profile)
+        graph.update({
+            "refiner_model": {
+                "class_type": "CheckpointLoaderSimple",
+                "inputs": {"ckpt_name": refiner_model}
+            },
+            # 리파이너는 자체 텍스트 인코더를 사용하므로 조건을 따로 인코딩
+            "refiner_positive": {
+                "class_type": "CLIPTextEncode",
+                "inputs": {"text": prompt, "clip": ["refiner_model", 1]}
+            },
+            "refiner_negative": {
+                "class_type": "CLIPTextEncode",
+                "inputs": {"text": negative, "clip": ["refiner_model", 1]}
+            },
+            "sampler_base": _advanced_sampler(
+                profile, ["base_model", 0], ["positive", 0], ["negative", 0], ["latent", 0],
+                seed, 0, switch, first=True
+            ),
+            "sampler_refiner": _advanced_sampler(
+                profile, ["refiner_model", 0], ["refiner_positive", 0], ["refiner_negative", 0], ["sampler_base", 0],
+                seed, switch, profile["steps"], first=False
+            ),
+        })
+        samples = ["sampler_refiner", 0]
+    else:
+        graph["sampler_base"] = _sampler(profile, ["latent", 0], seed, profile["steps"], 1.0)
+        samples = ["sampler_base", 0]
+
+    upscale = profile["upscale"]
+    if upscale is not None and upscale["method"] == "latent":
+        graph["latent_upscale"] = {
+            "class_type": "LatentUpscaleBy",
+            "inputs": {
+                "samples": samples,
+                "upscale_method": upscale["latent_method"],
+                "scale_by": upscale["scale"]
+            }
+        }
+        # 키운 잠재 이미지의 디테일을 기본 모델로 다시 그림 (구도는 denoise가 낮아 유지됨)
+        graph["sampler_hires"] = _sampler(
+            profile, ["latent_upscale", 0], seed, hires_steps(profile), upscale["denoise"]
+        )
+        samples = ["sampler_hires", 0]
+
+    if profile["vae_tile_size"] is not None:
+        tile_size = profile["vae_tile_size"]
+        graph["decode"] = {
+            "class_type": "VAEDecodeTiled",
+            "inputs": {
+                "samples": samples,
+                "vae": ["base_model", 2],
+                "tile_size": tile_size,
+                "overlap": tile_size // 8,
+                "temporal_size": 64,
+                "temporal_overlap": 8
+            }
+        }
+    else:
+        graph["decode"] = {
+            "class_type": "VAEDecode",
+            "inputs": {"samples": samples, "vae": ["base_model", 2]}
+        }
+    images = ["decode", 0]
+
+    if upscale is not None and upscale["method"] == "model":
+        graph["upscale_model"] = {
+            "class_type": "UpscaleModelLoader",
+            "inputs": {"model_name": upscale["model"] or upscale_model}
+        }
+        graph["upscale"] = {
+            "class_type": "ImageUpscaleWithModel",
+            "inputs": {"upscale_model": ["upscale_model", 0], "image": images}
+        }
+        images = ["upscale", 0]
+        if upscale["scale"] is not None:
+            # 업스케일러 모델의 고정 배율(2x/4x) 결과를 원하는 배율로 맞춤
+            width, height = output_size(profile)
+            graph["upscale_resize"] = {
+                "class_type": "ImageScale",
+                "inputs": {
+                    "image": images,
+                    "upscale_method": "lanczos",
+                    "width": width,
+                    "height": height,
+                    "crop": "disabled"
+                }
+            }
+            images = ["upscale_resize", 0]
+
+    graph["save"] = {
+        "class_type": "SaveImage",
+        "inputs": {"images": images, "filename_prefix": prefix}
+    }
+    return graph
+
+
+def estimate_cost(profile: Dict[str, Any]) -> float:
+    """상대적인 GPU 작업량 추정 (1024x1024, 40 steps, 1장 = 1.0)"""
+    pixels = (profile["width"] * profile["height"]) / (1024 * 1024) * profile["batch_size"]
+    cost = pixels * profile["steps"] / 40
+    upscale = profile["upscale"]
+    if upscale is not None and upscale["method"] == "model":
+        cost *= 1.5
+    elif upscale is not None:
+        # 두 번째 샘플링은 키운 해상도에서 진행됨
+        cost += pixels * upscale["scale"] ** 2 * hires_steps(profile) / 40
+    return cost
+
+
+def estimate_vram(profile: Dict[str, Any]) -> float:
+    """
+    프로필 실행에 필요한 VRAM 추정 (GB, 프로필에 vram_gb가 있으면 그 값)
+
+    모델 가중치 + 샘플링 활성값 + VAE 디코드 최대치로 계산한 대략값이므로 GPU 배치 판단에만 씁니다.
+    """
+    if profile.get("vram_gb") is not None:
+        return float(profile["vram_gb"])
+    megapixels = profile["width"] * profile["height"] / (1024 * 1024)
+    upscale = profile["upscale"]
+    if upscale is not None and upscale["method"] == "latent":
+        # 키운 해상도에서 다시 샘플링하고 디코드함
+        megapixels *= upscale["scale"] ** 2
+    decode = megapixels
+    if profile["vae_tile_size"] is not None:
+        decode = min(decode, (profile["vae_tile_size"] / 1024) ** 2)
+
+    vram = _VRAM_BASE_WEIGHTS + profile["batch_size"] * (
+        megapixels * _VRAM_SAMPLING_PER_MP + decode * _VRAM_DECODE_PER_MP
+    )
+    if profile["refiner_split"] is not None:
+        vram += _VRAM_REFINER_WEIGHTS
+    if upscale is not None and upscale["method"] == "model":
+        vram += _VRAM_UPSCALE_MODEL
+    return round(vram, 2)
+
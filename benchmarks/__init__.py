@@ -0,0 +1,3 @@
+"""
+벤치마크 및 부하 테스트 도구
+"""
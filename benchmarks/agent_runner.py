@@ -0,0 +1,63 @@
+"""
+벤치마크용 에이전트 실행기
+
+실제 FastAPI 앱(`app.main:app`)을 그대로 띄우되, 서비스 매니저는 ComfyUI를 직접 실행하지 않고
+이미 떠 있는 (가짜) 백엔드에 붙도록 교체합니다. 부하 테스트 드라이버가 별도 프로세스로 실행하므로
+에이전트 프로세스만의 CPU/RSS를 측정할 수 있습니다.
+
+    python -m benchmarks.agent_runner --port 8000
+"""
+import argparse
+from typing import Dict
+
+import uvicorn
+
+import service_manager as service_manager_module
+from service_manager import ServiceManager
+
+
+class AttachedServiceManager(ServiceManager):
+    """외부에서 실행 중인 백엔드에 붙는 서비스 매니저 (프로세스를 띄우거나 종료하지 않음)"""
+
+    def start_comfyui(self) -> bool:
+        return self._check_service_health(f"http://127.0.0.1:{self.comfyui_port}")
+
+    def start_webui(self) -> bool:
+        return False
+
+    def stop_comfyui(self):
+        pass
+
+    def stop_webui(self):
+        pass
+
+    def get_status(self) -> Dict[str, any]:
+        return {
+            "comfyui": {
+                "running": self._check_service_health(f"http://127.0.0.1:{self.comfyui_port}"),
+                "port": self.comfyui_port,
+                "url": f"http://127.0.0.1:{self.comfyui_port}"
+            },
+            "webui": {
+                "running": False,
+                "port": self.webui_port,
+                "url": f"http://127.0.0.1:{self.webui_port}"
+            }
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="벤치마크용 에이전트 실행기")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    # 앱 임포트 전에 싱글톤을 교체해야 lifespan에서 이 인스턴스를 사용함
+    service_manager_module._service_manager = AttachedServiceManager(auto_start=False)
+
+    from app.main import app
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
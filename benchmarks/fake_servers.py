@@ -0,0 +1,727 @@
+"""
+벤치마크용 가짜 ComfyUI / Ollama 서버
+
+실제 GPU나 모델 없이 에이전트의 처리량과 지연 시간을 측정할 수 있도록
+ComfyUI(`/prompt`, `/history`, `/view`, `/ws`, `/queue`, `/object_info`, `/system_stats`, `/free`)와 Ollama(`/api/chat`, `/api/generate`)를
+같은 프로세스 안에서 흉내 냅니다. 각 호출의 소요 시간은 시드가 고정된 지연 분포에서 뽑으므로
+같은 설정이면 같은 결과가 재현됩니다.
+"""
+import re
+import json
+import math
+import time
+import uuid
+import zlib
+import random
+import socket
+import struct
+import asyncio
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+import uvicorn
+from fastapi import FastAPI, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+class LatencyModel:
+    """
+    지연 분포
+
+    스펙 문자열 형식:
+        const:0.5              항상 0.5초
+        uniform:0.2,1.0        0.2~1.0초 균등 분포
+        normal:1.0,0.2         평균 1.0초, 표준편차 0.2초 (0 미만은 0)
+        lognormal:1.0,0.3      중앙값 1.0초, 로그 표준편차 0.3
+        exp:0.5                평균 0.5초 지수 분포
+    """
+
+    def __init__(self, spec: str = "const:0", seed: int = 0):
+        self.spec = spec
+        kind, _, args = spec.partition(":")
+        self.kind = kind
+        self.args = [float(a) for a in args.split(",") if a]
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+        expected = {"const": 1, "uniform": 2, "normal": 2, "lognormal": 2, "exp": 1}
+        if kind not in expected or len(self.args) != expected[kind]:
+            raise ValueError(f"지연 분포 스펙이 유효하지 않습니다: {spec}")
+
+    def sample(self) -> float:
+        """지연 시간 (초) 샘플링"""
+        with self._lock:
+            if self.kind == "const":
+                value = self.args[0]
+            elif self.kind == "uniform":
+                value = self._rng.uniform(self.args[0], self.args[1])
+            elif self.kind == "normal":
+                value = self._rng.gauss(self.args[0], self.args[1])
+            elif self.kind == "lognormal":
+                value = self.args[0] * math.exp(self._rng.gauss(0.0, self.args[1]))
+            else:
+                value = self._rng.expovariate(1.0 / self.args[0]) if self.args[0] > 0 else 0.0
+        return max(0.0, value)
+
+
+def make_png(width: int = 64, height: int = 64, seed: int = 0) -> bytes:
+    """노이즈로 채운 PNG 생성 (압축이 거의 안 되므로 크기가 예측 가능)"""
+    rng = random.Random(seed)
+    raw = b"".join(
+        b"\x00" + bytes(rng.getrandbits(8) for _ in range(width * 3))
+        for _ in range(height)
+    )
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(raw, 6))
+        + chunk(b"IEND", b"")
+    )
+
+
+def write_fake_checkpoint(path: str, architecture: str = "sdxl_base", size_mb: int = 101):
+    """
+    유효한 safetensors 헤더를 가진 희소(sparse) 체크포인트 파일 생성
+
+    실제 디스크 공간은 거의 쓰지 않으면서 ModelChecker의 크기/헤더 검증을 통과합니다.
+    """
+    keys = {
+        "sdxl_base": [
+            "conditioner.embedders.0.transformer.text_model.final_layer_norm.weight",
+            "conditioner.embedders.1.model.ln_final.weight",
+            "model.diffusion_model.out.2.weight",
+        ],
+        "sdxl_refiner": [
+            "conditioner.embedders.0.model.ln_final.weight",
+            "model.diffusion_model.out.2.weight",
+        ],
+        "sd15": [
+            "cond_stage_model.transformer.text_model.final_layer_norm.weight",
+            "model.diffusion_model.out.2.weight",
+        ],
+    }[architecture]
+
+    total = size_mb * 1024 * 1024
+
+    def build_header(data_size: int) -> bytes:
+        per_tensor = data_size // len(keys) // 2 * 2
+        header = {"__metadata__": {"format": "pt"}}
+        offset = 0
+        for i, key in enumerate(keys):
+            size = per_tensor if i < len(keys) - 1 else data_size - offset
+            header[key] = {"dtype": "F16", "shape": [size // 2], "data_offsets": [offset, offset + size]}
+            offset += size
+        encoded = json.dumps(header, separators=(",", ":")).encode()
+        return encoded + b" " * (-len(encoded) % 8)
+
+    # 헤더 길이가 데이터 크기에 영향을 주므로 두 번 계산
+    header = build_header(total - 8 - 1024)
+    header = build_header(total - 8 - len(header))
+
+    with open(path, "wb") as f:
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        f.truncate(total)
+
+
+SAMPLERS = ["euler", "euler_ancestral", "heun", "dpm_2", "dpmpp_2m", "dpmpp_sde", "dpmpp_2m_sde", "ddim", "uni_pc"]
+SCHEDULERS = ["normal", "karras", "exponential", "sgm_uniform", "simple", "ddim_uniform"]
+
+
+def build_object_info(checkpoints: List[str], upscale_models: List[str]) -> Dict[str, Any]:
+    """에이전트가 사용하는 노드만 담은 ComfyUI `/object_info` 응답"""
+    def node(required: Dict[str, Any], output: List[str], output_node: bool = False) -> Dict[str, Any]:
+        return {
+            "input": {"required": required, "optional": {}, "hidden": {}},
+            "output": output,
+            "output_name": output,
+            "output_node": output_node,
+        }
+
+    seed = ["INT", {"default": 0, "min": 0, "max": 0xffffffffffffffff}]
+    steps = ["INT", {"default": 20, "min": 1, "max": 10000}]
+    cfg = ["FLOAT", {"default": 8.0, "min": 0.0, "max": 100.0}]
+    size = ["INT", {"default": 1024, "min": 16, "max": 16384, "step": 8}]
+    return {
+        "CheckpointLoaderSimple": node({"ckpt_name": [checkpoints]}, ["MODEL", "CLIP", "VAE"]),
+        "EmptyLatentImage": node(
+            {"width": size, "height": size, "batch_size": ["INT", {"default": 1, "min": 1, "max": 4096}]},
+            ["LATENT"]
+        ),
+        "CLIPTextEncode": node({"text": ["STRING", {"multiline": True}], "clip": ["CLIP"]}, ["CONDITIONING"]),
+        "KSampler": node({
+            "model": ["MODEL"], "seed": seed, "steps": steps, "cfg": cfg,
+            "sampler_name": [SAMPLERS], "scheduler": [SCHEDULERS],
+            "positive": ["CONDITIONING"], "negative": ["CONDITIONING"], "latent_image": ["LATENT"],
+            "denoise": ["FLOAT", {"default": 1.0, "min": 0.0, "max": 1.0}],
+        }, ["LATENT"]),
+        "KSamplerAdvanced": node({
+            "model": ["MODEL"], "add_noise": [["enable", "disable"]], "noise_seed": seed, "steps": steps, "cfg": cfg,
+            "sampler_name": [SAMPLERS], "scheduler": [SCHEDULERS],
+            "positive": ["CONDITIONING"], "negative": ["CONDITIONING"], "latent_image": ["LATENT"],
+            "start_at_step": ["INT", {"default": 0, "min": 0, "max": 10000}],
+            "end_at_step": ["INT", {"default": 10000, "min": 0, "max": 10000}],
+            "return_with_leftover_noise": [["disable", "enable"]],
+        }, ["LATENT"]),
+        "LatentUpscaleBy": node({
+            "samples": ["LATENT"],
+            "upscale_method": [["nearest-exact", "bilinear", "area", "bicubic", "bislerp"]],
+            "scale_by": ["FLOAT", {"default": 1.5, "min": 0.01, "max": 8.0, "step": 0.01}],
+        }, ["LATENT"]),
+        "VAEDecode": node({"samples": ["LATENT"], "vae": ["VAE"]}, ["IMAGE"]),
+        "VAEDecodeTiled": node({
+            "samples": ["LATENT"], "vae": ["VAE"],
+            "tile_size": ["INT", {"default": 512, "min": 64, "max": 4096, "step": 32}],
+            "overlap": ["INT", {"default": 64, "min": 0, "max": 4096, "step": 32}],
+            "temporal_size": ["INT", {"default": 64, "min": 8, "max": 4096, "step": 4}],
+            "temporal_overlap": ["INT", {"default": 8, "min": 4, "max": 4096, "step": 4}],
+        }, ["IMAGE"]),
+        "UpscaleModelLoader": node({"model_name": [upscale_models]}, ["UPSCALE_MODEL"]),
+        "ImageUpscaleWithModel": node({"upscale_model": ["UPSCALE_MODEL"], "image": ["IMAGE"]}, ["IMAGE"]),
+        "ImageScale": node({
+            "image": ["IMAGE"],
+            "upscale_method": [["nearest-exact", "bilinear", "area", "bicubic", "lanczos"]],
+            "width": ["INT", {"default": 512, "min": 0, "max": 16384, "step": 1}],
+            "height": ["INT", {"default": 512, "min": 0, "max": 16384, "step": 1}],
+            "crop": [["disabled", "center"]],
+        }, ["IMAGE"]),
+        "SaveImage": node({"images": ["IMAGE"], "filename_prefix": ["STRING", {"default": "ComfyUI"}]}, [], True),
+    }
+
+
+def find_free_port() -> int:
+    """사용 가능한 로컬 포트 반환"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class ServerThread:
+    """uvicorn 서버를 백그라운드 스레드에서 실행"""
+
+    def __init__(self, app: FastAPI, port: Optional[int] = None):
+        self.port = port or find_free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        config = uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning", lifespan="off")
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def start(self) -> "ServerThread":
+        self.thread.start()
+        deadline = time.time() + 10
+        while not self.server.started:
+            if time.time() > deadline:
+                raise RuntimeError(f"서버 시작 시간 초과: {self.url}")
+            time.sleep(0.01)
+        return self
+
+    def stop(self):
+        self.server.should_exit = True
+        self.thread.join(timeout=5)
+
+
+class FakeComfyUI:
+    """
+    가짜 ComfyUI
+
+    제출된 프롬프트는 FIFO 큐에 쌓이고 `workers`개의 실행 슬롯(GPU)이 하나씩 꺼내
+    `latency`만큼 걸려 처리합니다. 완료되면 `/history`에 결과가 나타납니다.
+    `/system_stats`는 `vram_gb` GPU에서 다른 프로세스가 `external_vram_gb`를 쓰고, 첫 실행 뒤 모델 가중치 7GB와
+    실행 중인 프롬프트마다 6GB를 ComfyUI(torch)가 잡고 있는 것처럼 보고합니다 (`external_vram_gb`는 실행 중에 바꿀 수 있음).
+    끝난 프롬프트의 6GB는 torch 캐시로 남으므로(최대 동시 실행 수만큼) `torch_vram_free`로 보고하고,
+    ComfyUI처럼 `vram_free`에도 더해 보고합니다.
+    `/interrupt`는 실행 중인 프롬프트를 바로 끝내고(출력 없이 execution_interrupted), `POST /queue`의 delete는 대기 중인 프롬프트를 지웁니다.
+    재시도 확인용으로 `/prompt`의 `submit_error_rate` 비율은 큐에 넣지 않고 503을, `lost_response_rate` 비율은
+    큐에 넣은 뒤 503을 돌려줍니다 (응답 유실). 같은 prompt_id가 다시 제출되면 `duplicates`로 셉니다.
+    """
+
+    def __init__(
+        self,
+        latency: LatencyModel,
+        workers: int = 1,
+        image_size: int = 64,
+        object_info: Optional[Dict[str, Any]] = None,
+        vram_gb: float = 24,
+        external_vram_gb: float = 0,
+        submit_error_rate: float = 0,
+        lost_response_rate: float = 0,
+        seed: int = 0
+    ):
+        self.latency = latency
+        self.submit_error_rate = submit_error_rate
+        self.lost_response_rate = lost_response_rate
+        self._rng = random.Random(seed)
+        self.vram_gb = vram_gb
+        self.external_vram_gb = external_vram_gb
+        self.object_info = object_info or build_object_info([], [])
+        self.workers = workers
+        self.image = make_png(image_size, image_size)
+        self.queue: Deque[str] = deque()
+        self.running: Dict[str, Dict[str, Any]] = {}
+        self.peak_running = 0
+        self.prompts: Dict[str, Dict[str, Any]] = {}
+        self.history: Dict[str, Dict[str, Any]] = {}
+        self.counter = 0
+        self.submitted = 0
+        self.interrupted = 0
+        self.deleted = 0
+        self.submit_errors = 0
+        self.duplicates = 0
+        self._interrupt: Set[str] = set()
+        self._cond = threading.Condition()
+        self._stop = False
+        self._listeners: List[tuple] = []
+        self._threads = [threading.Thread(target=self._worker, daemon=True) for _ in range(workers)]
+        self.app = self._build_app()
+
+    def start(self):
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+
+    def _broadcast(self, message: Dict[str, Any]):
+        for loop, queue in list(self._listeners):
+            loop.call_soon_threadsafe(queue.put_nowait, message)
+
+    def _queue_remaining(self) -> int:
+        return len(self.queue) + len(self.running)
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self.queue and not self._stop:
+                    self._cond.wait()
+                if self._stop:
+                    return
+                prompt_id = self.queue.popleft()
+                self.running[prompt_id] = self.prompts[prompt_id]
+                self.peak_running = max(self.peak_running, len(self.running))
+            self._broadcast({"type": "executing", "data": {"node": "sampler", "prompt_id": prompt_id}})
+
+            finish = time.monotonic() + self.latency.sample()
+            with self._cond:
+                # /interrupt가 오면 실행 시간을 다 채우지 않고 끝냄
+                while prompt_id not in self._interrupt and not self._stop and time.monotonic() < finish:
+                    self._cond.wait(finish - time.monotonic())
+                interrupted = prompt_id in self._interrupt
+                self._interrupt.discard(prompt_id)
+                self.counter += 1
+                filename = f"hyperwise_{self.counter:05d}_.png"
+                entry = self.running.pop(prompt_id)
+                if interrupted:
+                    self.interrupted += 1
+                    self.history[prompt_id] = {
+                        "prompt": [self.counter, prompt_id, entry["prompt"], entry.get("extra_data", {}), ["save"]],
+                        "outputs": {},
+                        "status": {"status_str": "error", "completed": False, "messages": [
+                            ["execution_interrupted", {"prompt_id": prompt_id}]
+                        ]},
+                    }
+                else:
+                    self.history[prompt_id] = {
+                        "prompt": [self.counter, prompt_id, entry["prompt"], entry.get("extra_data", {}), ["save"]],
+                        "outputs": {"save": {"images": [{"filename": filename, "subfolder": "", "type": "output"}]}},
+                        "status": {"status_str": "success", "completed": True, "messages": []},
+                    }
+            self._broadcast({"type": "executing", "data": {"node": None, "prompt_id": prompt_id}})
+            self._broadcast({"type": "status", "data": {"status": {"exec_info": {"queue_remaining": self._queue_remaining()}}}})
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI()
+
+        @app.get("/")
+        def index():
+            return Response("ComfyUI (fake)", media_type="text/html")
+
+        @app.get("/object_info")
+        def object_info():
+            return self.object_info
+
+        @app.get("/system_stats")
+        def system_stats():
+            gb = 1024 ** 3
+            with self._cond:
+                loaded = 7 if self.counter or self.running else 0
+                torch_reserved = (loaded + self.peak_running * 6) * gb
+                torch_free = (self.peak_running - len(self.running)) * 6 * gb
+            vram_total = int(self.vram_gb * gb)
+            # ComfyUI의 vram_free는 CUDA 여유 메모리 + torch 캐시 여유분
+            vram_free = max(0, vram_total - int(self.external_vram_gb * gb) - torch_reserved) + torch_free
+            return {
+                "system": {"os": "fake", "comfyui_version": "fake", "python_version": "", "embedded_python": False},
+                "devices": [{
+                    "name": "fake:0", "type": "cuda", "index": 0,
+                    "vram_total": vram_total, "vram_free": vram_free,
+                    "torch_vram_total": torch_reserved, "torch_vram_free": torch_free,
+                }],
+            }
+
+        @app.post("/free")
+        def free():
+            return Response(status_code=200)
+
+        @app.post("/prompt")
+        async def submit(request: Request):
+            body = await request.json()
+            if not isinstance(body.get("prompt"), dict):
+                return JSONResponse({"error": {"type": "invalid_prompt", "message": "no prompt"}, "node_errors": {}}, status_code=400)
+            prompt_id = str(body.get("prompt_id") or uuid.uuid4())
+            with self._cond:
+                roll = self._rng.random()
+                if roll < self.submit_error_rate:
+                    self.submit_errors += 1
+                    return JSONResponse({"error": {"type": "unavailable", "message": "busy"}}, status_code=503)
+                if prompt_id in self.prompts:
+                    self.duplicates += 1
+                self.submitted += 1
+                self.prompts[prompt_id] = body
+                if body.get("front"):
+                    self.queue.appendleft(prompt_id)
+                else:
+                    self.queue.append(prompt_id)
+                number = self.submitted
+                self._cond.notify_all()
+                if roll < self.submit_error_rate + self.lost_response_rate:
+                    self.submit_errors += 1
+                    return JSONResponse({"error": {"type": "unavailable", "message": "lost"}}, status_code=503)
+            return {"prompt_id": prompt_id, "number": number, "node_errors": {}}
+
+        @app.get("/history/{prompt_id}")
+        def history(prompt_id: str):
+            with self._cond:
+                entry = self.history.get(prompt_id)
+            return {prompt_id: entry} if entry else {}
+
+        @app.get("/queue")
+        def queue():
+            with self._cond:
+                running = [[0, pid, self.prompts[pid]["prompt"], {}, []] for pid in self.running]
+                pending = [[i + 1, pid, self.prompts[pid]["prompt"], {}, []] for i, pid in enumerate(self.queue)]
+            return {"queue_running": running, "queue_pending": pending}
+
+        @app.post("/queue")
+        async def modify_queue(request: Request):
+            body = await request.json()
+            with self._cond:
+                if body.get("clear"):
+                    self.queue.clear()
+                for prompt_id in body.get("delete", []):
+                    if prompt_id in self.queue:
+                        self.queue.remove(prompt_id)
+                        self.deleted += 1
+            return Response(status_code=200)
+
+        @app.post("/interrupt")
+        async def interrupt(request: Request):
+            body = await request.json() if await request.body() else {}
+            with self._cond:
+                # prompt_id가 있으면 그 프롬프트만, 없으면 실행 중인 모든 프롬프트 중단
+                targets = [body["prompt_id"]] if body.get("prompt_id") else list(self.running)
+                self._interrupt.update(pid for pid in targets if pid in self.running)
+                self._cond.notify_all()
+            return Response(status_code=200)
+
+        @app.get("/view")
+        def view_query(filename: str = ""):
+            return Response(self.image, media_type="image/png")
+
+        @app.get("/view/{filename}")
+        def view_path(filename: str):
+            return Response(self.image, media_type="image/png")
+
+        @app.websocket("/ws")
+        async def ws(websocket: WebSocket):
+            await websocket.accept()
+            queue: asyncio.Queue = asyncio.Queue()
+            listener = (asyncio.get_running_loop(), queue)
+            self._listeners.append(listener)
+            try:
+                sid = websocket.query_params.get("clientId") or uuid.uuid4().hex
+                await websocket.send_json({
+                    "type": "status",
+                    "data": {"status": {"exec_info": {"queue_remaining": self._queue_remaining()}}, "sid": sid}
+                })
+                while True:
+                    await websocket.send_json(await queue.get())
+            except WebSocketDisconnect:
+                pass
+            finally:
+                self._listeners.remove(listener)
+
+        return app
+
+
+class FakeOllama:
+    """
+    가짜 Ollama
+
+    `/api/chat`, `/api/generate`와 OpenAI 호환 `/v1/chat/completions`(SSE 스트리밍, usage 포함)를 지원하며
+    응답 내용은 입력에서 결정적으로 만들어집니다.
+    동시에 처리하는 요청 수는 `parallel`로 제한합니다 (OLLAMA_NUM_PARALLEL과 동일한 의미).
+    모델은 처음 쓰일 때 `load_latency`만큼 걸려 로드되고 keep_alive가 지나거나 `max_loaded`개를 넘으면
+    내려가므로(OLLAMA_MAX_LOADED_MODELS), 응답의 load_duration으로 모델 교체 비용을 확인할 수 있습니다.
+    빈 프롬프트 요청은 로드만 하고 끝납니다 (실제 Ollama의 미리 로드 방식).
+
+    응답은 단어를 토큰 하나로 보고, 스트리밍이면 생성 시간을 단어마다 나눠 조금씩 보냅니다.
+    `latency`는 기본 응답(REPLY) 한 번의 시간이며 그중 1/4이 프롬프트 처리, 나머지가 생성이고
+    생성 시간은 응답 단어 수에 비례합니다. context를 넘기면 앞부분 KV 캐시를 재사용한 것으로 보고 프롬프트 처리 시간을 1/4로 줄입니다.
+    `reply_words`로 장황한 응답을 흉내 낼 수 있고, options.num_predict는 단어 수 상한으로,
+    format이 있으면 `{"prompt": ...}` JSON으로, format 스키마에 prompts가 있으면 요청의 번호 붙은 줄마다
+    `{"prompts": [{"id": n, "prompt": ...}]}` 항목으로 응답합니다. 클라이언트가 스트림을 닫으면 남은 단어를 만들지 않으므로
+    `tokens`(실제로 만든 단어 수)로 생성을 중간에 멈춘 효과를 확인할 수 있습니다.
+    """
+
+    REPLY = (
+        "frosted glass bottle on wet slate, soft rim light, 100mm macro lens, "
+        "shallow depth of field, condensation droplets, premium studio mood"
+    )
+
+    def __init__(
+        self,
+        latency: LatencyModel,
+        parallel: int = 4,
+        load_latency: Optional[LatencyModel] = None,
+        max_loaded: int = 3,
+        reply_words: int = 0
+    ):
+        self.latency = latency
+        self.reply_words = reply_words
+        self.load_latency = load_latency or LatencyModel("const:0")
+        self.max_loaded = max_loaded
+        self.calls = 0
+        self.loads = 0
+        self.tokens = 0
+        self.loaded: "OrderedDict[str, float]" = OrderedDict()  # 모델 → 내려갈 시각 (inf면 계속 유지)
+        self._slots = threading.BoundedSemaphore(parallel)
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self.app = self._build_app()
+
+    @staticmethod
+    def _keep_alive_seconds(value: Any) -> float:
+        """keep_alive 값(초 숫자 또는 "30s", "5m", "1h")을 초로 변환 (음수는 계속 유지)"""
+        if value is None:
+            return 300.0
+        if isinstance(value, (int, float)):
+            seconds = float(value)
+        else:
+            text = str(value).strip()
+            units = {"s": 1, "m": 60, "h": 3600}
+            seconds = float(text[:-1]) * units[text[-1]] if text and text[-1] in units else float(text)
+        return math.inf if seconds < 0 else seconds
+
+    def _load(self, model: str, keep_alive: Any) -> int:
+        """모델 로드 (이미 로드되어 있으면 0, 로드에 걸린 시간 ns 반환)"""
+        keep = self._keep_alive_seconds(keep_alive)
+        with self._load_lock:
+            now = time.monotonic()
+            for name in [name for name, expires in self.loaded.items() if expires <= now]:
+                del self.loaded[name]
+            if model in self.loaded:
+                self.loaded.move_to_end(model)
+                self.loaded[model] = now + keep
+                return 0
+            while len(self.loaded) >= self.max_loaded:
+                self.loaded.popitem(last=False)
+            started = time.perf_counter()
+            time.sleep(self.load_latency.sample())
+            self.loads += 1
+            self.loaded[model] = time.monotonic() + keep
+            return int((time.perf_counter() - started) * 1e9)
+
+    def _pieces(self, body: Dict[str, Any]) -> List[str]:
+        """응답 조각 (단어 하나 = 토큰 하나, num_predict에서 잘림)"""
+        words = self.REPLY.split(" ")
+        if self.reply_words:
+            words = [words[i % len(words)] for i in range(self.reply_words)]
+        text = " ".join(words)
+        format = body.get("format")
+        if isinstance(format, dict) and "prompts" in format.get("properties", {}):
+            messages = body.get("messages") or []
+            request = messages[-1].get("content", "") if messages else body.get("prompt", "")
+            count = len(re.findall(r"^\d+\. ", request, re.MULTILINE)) or 1
+            text = json.dumps({"prompts": [{"id": i, "prompt": text} for i in range(1, count + 1)]})
+        elif format:
+            text = json.dumps({"prompt": text})
+        pieces = [word if i == 0 else " " + word for i, word in enumerate(text.split(" "))]
+        num_predict = (body.get("options") or {}).get("num_predict")
+        return pieces[:num_predict] if num_predict and num_predict > 0 else pieces
+
+    def _durations(self, body: Dict[str, Any], tokens: int) -> Tuple[float, float]:
+        """프롬프트 처리/생성 시간 (초)"""
+        sample = self.latency.sample()
+        prompt_eval = sample / 4 / (4 if body.get("context") else 1)
+        return prompt_eval, sample * 3 / 4 * tokens / len(self.REPLY.split(" "))
+
+    def _complete(
+        self,
+        model: str = "",
+        keep_alive: Any = None,
+        body: Optional[Dict[str, Any]] = None,
+        pieces: Optional[List[str]] = None,
+        load_only: bool = False
+    ) -> Dict[str, int]:
+        tokens = len(pieces or [])
+        with self._lock:
+            self.calls += 1
+            self.tokens += tokens
+        started = time.perf_counter()
+        prompt_eval = generation = 0.0
+        with self._slots:
+            load = self._load(model, keep_alive)
+            if not load_only:
+                prompt_eval, generation = self._durations(body or {}, tokens)
+                time.sleep(prompt_eval + generation)
+        elapsed = int((time.perf_counter() - started) * 1e9)
+        if load_only:
+            return {"total_duration": elapsed, "load_duration": load}
+        return {
+            "total_duration": elapsed,
+            "load_duration": load,
+            "prompt_eval_count": 64,
+            "prompt_eval_duration": int(prompt_eval * 1e9),
+            "eval_count": tokens,
+            "eval_duration": int(generation * 1e9),
+        }
+
+    async def _stream(self, model: str, kind: str, body: Dict[str, Any], pieces: List[str]):
+        """
+        프롬프트 처리 후 생성 시간을 조각마다 나눠 보냄
+
+        클라이언트가 연결을 끊으면 대기 중인 sleep에서 취소되어 남은 조각을 만들지 않고 슬롯을 돌려줍니다.
+        """
+        with self._lock:
+            self.calls += 1
+        started = time.perf_counter()
+        while not self._slots.acquire(blocking=False):
+            await asyncio.sleep(0.005)
+        try:
+            load = await asyncio.to_thread(self._load, model, body.get("keep_alive"))
+            prompt_eval, generation = self._durations(body, len(pieces))
+            await asyncio.sleep(prompt_eval)
+            eval_started = time.perf_counter()
+            for piece in pieces:
+                await asyncio.sleep(generation / len(pieces))
+                with self._lock:
+                    self.tokens += 1
+                body = {"message": {"role": "assistant", "content": piece}} if kind == "chat" else {"response": piece}
+                yield json.dumps({"model": model, "done": False, **body}) + "\n"
+            ended = time.perf_counter()
+        finally:
+            self._slots.release()
+        stats = {
+            "total_duration": int((ended - started) * 1e9),
+            "load_duration": load,
+            "prompt_eval_count": 64,
+            "prompt_eval_duration": int(prompt_eval * 1e9),
+            "eval_count": len(pieces),
+            "eval_duration": int((ended - eval_started) * 1e9),
+        }
+        final = {"message": {"role": "assistant", "content": ""}} if kind == "chat" else {"response": "", "context": [1, 2, 3]}
+        yield json.dumps({"model": model, "done": True, "done_reason": "stop", **final, **stats}) + "\n"
+
+    async def _sse(self, model: str, body: Dict[str, Any], pieces: List[str]):
+        """_stream의 청크를 OpenAI chat.completion.chunk SSE 이벤트로 변환"""
+        async for line in self._stream(model, "chat", body, pieces):
+            chunk = json.loads(line)
+            if chunk["done"]:
+                choice = {"index": 0, "delta": {}, "finish_reason": "stop"}
+                yield f"data: {json.dumps({'model': model, 'choices': [choice]})}\n\n"
+                usage = {"prompt_tokens": chunk["prompt_eval_count"], "completion_tokens": chunk["eval_count"]}
+                yield f"data: {json.dumps({'model': model, 'choices': [], 'usage': usage})}\n\n"
+                break
+            choice = {"index": 0, "delta": {"content": chunk["message"]["content"]}, "finish_reason": None}
+            yield f"data: {json.dumps({'model': model, 'choices': [choice]})}\n\n"
+        yield "data: [DONE]\n\n"
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI()
+
+        @app.get("/")
+        def index():
+            return Response("Ollama is running")
+
+        @app.get("/api/tags")
+        def tags():
+            return {"models": []}
+
+        @app.post("/api/chat")
+        def chat(body: Dict[str, Any]):
+            model = body.get("model", "")
+            if not body.get("messages"):
+                stats = self._complete(model, body.get("keep_alive"), load_only=True)
+                return {"model": model, "message": {"role": "assistant", "content": ""},
+                        "done": True, "done_reason": "load", **stats}
+            pieces = self._pieces(body)
+            if body.get("stream", True):
+                return StreamingResponse(
+                    self._stream(model, "chat", body, pieces), media_type="application/x-ndjson"
+                )
+            stats = self._complete(model, body.get("keep_alive"), body, pieces)
+            return {
+                "model": model,
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "message": {"role": "assistant", "content": "".join(pieces)},
+                "done": True,
+                "done_reason": "stop",
+                **stats,
+            }
+
+        @app.post("/v1/chat/completions")
+        def chat_completions(body: Dict[str, Any]):
+            model = body.get("model", "")
+            response_format = body.get("response_format") or {}
+            ollama_body = {
+                "messages": body.get("messages") or [],
+                "format": (response_format.get("json_schema") or {}).get("schema")
+                or ("json" if response_format.get("type") == "json_object" else None),
+                "options": {"num_predict": body.get("max_tokens")},
+            }
+            pieces = self._pieces(ollama_body)
+            if body.get("stream"):
+                return StreamingResponse(self._sse(model, ollama_body, pieces), media_type="text/event-stream")
+            stats = self._complete(model, None, ollama_body, pieces)
+            return {
+                "object": "chat.completion",
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(pieces)},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": stats["prompt_eval_count"], "completion_tokens": stats["eval_count"]},
+            }
+
+        @app.post("/api/generate")
+        def generate(body: Dict[str, Any]):
+            model = body.get("model", "")
+            if not body.get("prompt"):
+                stats = self._complete(model, body.get("keep_alive"), load_only=True)
+                return {"model": model, "response": "", "done": True, "done_reason": "load", **stats}
+            pieces = self._pieces(body)
+            if body.get("stream", True):
+                return StreamingResponse(
+                    self._stream(model, "generate", body, pieces), media_type="application/x-ndjson"
+                )
+            stats = self._complete(model, body.get("keep_alive"), body, pieces)
+            return {
+                "model": model,
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "response": "".join(pieces),
+                "context": [1, 2, 3],
+                "done": True,
+                "done_reason": "stop",
+                **stats,
+            }
+
+        return app
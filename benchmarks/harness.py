@@ -0,0 +1,228 @@
+"""
+벤치마크 실행 환경
+
+가짜 ComfyUI/Ollama를 띄우고, 가짜 체크포인트가 들어 있는 임시 ComfyUI 디렉토리를 만든 뒤
+에이전트를 별도 프로세스로 실행합니다.
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+import threading
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import requests
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+from benchmarks.fake_servers import (
+    FakeComfyUI,
+    FakeOllama,
+    LatencyModel,
+    ServerThread,
+    build_object_info,
+    find_free_port,
+    write_fake_checkpoint
+)
+
+PROJECT_ROOT = Path(__file__).parent.parent.absolute()
+
+# 가짜 ComfyUI 디렉토리에 만드는 모델 (파일명 → 아키텍처)
+FAKE_CHECKPOINTS = {
+    "sdxl_base_1.0.safetensors": "sdxl_base",
+    "sdxl_refiner_1.0.safetensors": "sdxl_refiner",
+}
+FAKE_UPSCALE_MODELS = ("RealESRGAN_x2plus.pth",)
+
+
+class FakeStack:
+    """가짜 백엔드 + 에이전트 프로세스 묶음"""
+
+    def __init__(
+        self,
+        comfy_latency: str = "const:0.5",
+        ollama_latency: str = "const:0.05",
+        comfy_workers: int = 1,
+        ollama_parallel: int = 4,
+        ollama_load_latency: str = "const:0",
+        ollama_max_loaded: int = 3,
+        ollama_reply_words: int = 0,
+        comfy_backends: int = 1,
+        comfy_vram_gb: Optional[List[float]] = None,
+        comfy_external_vram_gb: Optional[List[float]] = None,
+        comfy_submit_error_rate: float = 0,
+        comfy_lost_response_rate: float = 0,
+        seed: int = 0,
+        extra_env: Optional[Dict[str, str]] = None
+    ):
+        vram = comfy_vram_gb or [24.0]
+        external = comfy_external_vram_gb or [0.0]
+        # 첫 번째가 서비스 매니저가 관리하는 로컬 ComfyUI, 나머지는 COMFYUI_URLS로만 알려 주는 원격 백엔드
+        self.comfys = [
+            FakeComfyUI(
+                LatencyModel(comfy_latency, seed=seed + 10 * i),
+                workers=comfy_workers,
+                object_info=build_object_info(list(FAKE_CHECKPOINTS), list(FAKE_UPSCALE_MODELS)),
+                vram_gb=vram[min(i, len(vram) - 1)],
+                external_vram_gb=external[min(i, len(external) - 1)],
+                submit_error_rate=comfy_submit_error_rate,
+                lost_response_rate=comfy_lost_response_rate,
+                seed=seed + 10 * i
+            )
+            for i in range(max(1, comfy_backends))
+        ]
+        self.comfy = self.comfys[0]
+        self.ollama = FakeOllama(
+            LatencyModel(ollama_latency, seed=seed + 1),
+            parallel=ollama_parallel,
+            load_latency=LatencyModel(ollama_load_latency, seed=seed + 2),
+            max_loaded=ollama_max_loaded,
+            reply_words=ollama_reply_words
+        )
+        self.extra_env = extra_env or {}
+        self.workdir = tempfile.mkdtemp(prefix="hyperwise-bench-")
+        self.agent_port = find_free_port()
+        self.agent_url = f"http://127.0.0.1:{self.agent_port}"
+        self.agent: Optional[subprocess.Popen] = None
+        self.startup_seconds: Optional[float] = None
+        self._servers: List[ServerThread] = []
+
+    def _prepare_comfyui_dir(self) -> str:
+        comfy_dir = Path(self.workdir) / "ComfyUI"
+        checkpoints = comfy_dir / "models" / "checkpoints"
+        checkpoints.mkdir(parents=True)
+        upscale_models = comfy_dir / "models" / "upscale_models"
+        upscale_models.mkdir(parents=True)
+        for name, architecture in FAKE_CHECKPOINTS.items():
+            write_fake_checkpoint(str(checkpoints / name), architecture)
+        for name in FAKE_UPSCALE_MODELS:
+            (upscale_models / name).write_bytes(b"\0" * 1024)
+        return str(comfy_dir)
+
+    def env(self) -> Dict[str, str]:
+        """에이전트 프로세스 환경 변수"""
+        *comfy_servers, ollama_server = self._servers
+        comfy_server = comfy_servers[0]
+        env = os.environ.copy()
+        env.update({
+            "COMFYUI_PATH": self._prepare_comfyui_dir(),
+            "COMFYUI_PORT": str(comfy_server.port),
+            "COMFYUI_URL": comfy_server.url,
+            "COMFYUI_URLS": ",".join(server.url for server in comfy_servers),
+            "WEBUI_PATH": self.workdir,
+            "WEBUI_PORT": str(find_free_port()),
+            "OLLAMA_HOST": ollama_server.url,
+            "DOWNLOAD_DIR": str(Path(self.workdir) / "downloads"),
+            "JOB_STORE_PATH": str(Path(self.workdir) / "jobs.db"),
+            "MODEL_INDEX_PATH": str(Path(self.workdir) / "model_index.json"),
+            "AUTO_START_SERVICES": "false",
+            "PYTHONPATH": str(PROJECT_ROOT),
+        })
+        env.update(self.extra_env)
+        return env
+
+    def start(self, timeout: float = 30) -> "FakeStack":
+        """
+        가짜 백엔드와 에이전트 시작 (에이전트가 응답할 때까지 대기)
+
+        프로세스 실행부터 `/api/v1/`이 처음 200을 반환할 때까지의 시간을 startup_seconds에 기록합니다.
+        """
+        for comfy in self.comfys:
+            comfy.start()
+        self._servers = [ServerThread(comfy.app).start() for comfy in self.comfys]
+        self._servers.append(ServerThread(self.ollama.app).start())
+        env = self.env()
+
+        started = time.perf_counter()
+        self.agent = subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.agent_runner", "--port", str(self.agent_port)],
+            cwd=str(PROJECT_ROOT),
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=open(Path(self.workdir) / "agent.log", "w"),
+        )
+        wait_for_http(f"{self.agent_url}/api/v1/", timeout, process=self.agent)
+        self.startup_seconds = time.perf_counter() - started
+        return self
+
+    def stop(self):
+        if self.agent and self.agent.poll() is None:
+            self.agent.terminate()
+            try:
+                self.agent.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.agent.kill()
+        for server in self._servers:
+            server.stop()
+        for comfy in self.comfys:
+            comfy.stop()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+def wait_for_http(url: str, timeout: float, process: Optional[subprocess.Popen] = None) -> float:
+    """
+    URL이 200을 반환할 때까지 대기
+
+    Returns:
+        대기한 시간 (초)
+    """
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"에이전트 프로세스가 종료되었습니다 (exit code: {process.returncode})")
+        try:
+            if requests.get(url, timeout=1).status_code == 200:
+                return time.perf_counter() - started
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(0.01)
+    raise TimeoutError(f"응답 대기 시간 초과: {url}")
+
+
+class ProcessSampler:
+    """대상 프로세스의 CPU 시간과 RSS를 주기적으로 샘플링"""
+
+    def __init__(self, pid: int, interval: float = 0.1):
+        if psutil is None:
+            raise RuntimeError("프로세스 측정에는 psutil이 필요합니다")
+        self.process = psutil.Process(pid)
+        self.interval = interval
+        self.peak_rss = 0
+        self.rss_samples: List[int] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _cpu_seconds(self) -> float:
+        times = self.process.cpu_times()
+        return times.user + times.system
+
+    def _run(self):
+        while not self._stop.is_set():
+            rss = self.process.memory_info().rss
+            self.rss_samples.append(rss)
+            self.peak_rss = max(self.peak_rss, rss)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._cpu_start = self._cpu_seconds()
+        self._wall_start = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._stop.set()
+        self._thread.join()
+        self.cpu_seconds = self._cpu_seconds() - self._cpu_start
+        self.wall_seconds = time.perf_counter() - self._wall_start
@@ -0,0 +1,93 @@
+"""
+API 프로세스 임포트 시간 점검
+
+`python -X importtime`으로 `app.main` 임포트 비용을 측정하고, 예산을 넘거나 시작 시 로드되면 안 되는
+무거운 모듈(ollama, httpx, requests, psutil)이 로드되면 실패(종료 코드 1)합니다.
+CI에서 시작 시간 회귀를 잡는 용도로 사용합니다.
+
+    python -m benchmarks.import_time --budget-ms 600
+"""
+import re
+import sys
+import json
+import argparse
+import subprocess
+from typing import Any, Dict, List
+
+from benchmarks.harness import PROJECT_ROOT
+
+# 시작 시 임포트하지 않고 첫 사용 시 로드해야 하는 모듈
+DEFAULT_FORBIDDEN = ("ollama", "httpx", "requests", "psutil", "service_manager")
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)\s*$")
+
+
+def measure_imports(module: str = "app.main") -> Dict[str, Any]:
+    """
+    새 인터프리터에서 모듈을 임포트하고 importtime 출력을 파싱
+
+    Returns:
+        total_ms (대상 모듈 누적 시간), modules ({이름: 누적 ms}), packages (최상위 패키지별 누적 ms, 큰 순)
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=str(PROJECT_ROOT),
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{module} 임포트 실패:\n{result.stderr[-2000:]}")
+
+    modules: Dict[str, float] = {}
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            modules[match.group(3)] = int(match.group(2)) / 1000
+
+    packages: List[Dict[str, Any]] = [
+        {"package": name, "cumulative_ms": round(ms, 1)}
+        for name, ms in modules.items()
+        if "." not in name and name != module
+    ]
+    return {
+        "total_ms": modules.get(module, 0.0),
+        "modules": modules,
+        "packages": sorted(packages, key=lambda p: p["cumulative_ms"], reverse=True),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API 프로세스 임포트 시간 점검")
+    parser.add_argument("--module", default="app.main", help="측정할 모듈")
+    parser.add_argument("--budget-ms", type=float, default=600, help="임포트 시간 예산 (ms)")
+    parser.add_argument("--repeat", type=int, default=5, help="측정 반복 횟수 (최솟값 사용)")
+    parser.add_argument("--forbid", default=",".join(DEFAULT_FORBIDDEN), help="시작 시 로드되면 안 되는 모듈 (쉼표 구분)")
+    parser.add_argument("--top", type=int, default=10, help="보고할 무거운 패키지 수")
+    args = parser.parse_args()
+
+    runs = [measure_imports(args.module) for _ in range(max(1, args.repeat))]
+    best = min(runs, key=lambda r: r["total_ms"])
+    forbidden = [name for name in args.forbid.split(",") if name and name in best["modules"]]
+
+    report = {
+        "module": args.module,
+        "total_ms": round(best["total_ms"], 1),
+        "runs_ms": [round(r["total_ms"], 1) for r in runs],
+        "budget_ms": args.budget_ms,
+        "forbidden_loaded": forbidden,
+        "heaviest_packages": best["packages"][:args.top],
+    }
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+    failures = []
+    if best["total_ms"] > args.budget_ms:
+        failures.append(f"임포트 시간 {best['total_ms']:.1f}ms가 예산 {args.budget_ms:.0f}ms를 초과했습니다")
+    if forbidden:
+        failures.append(f"시작 시 로드되면 안 되는 모듈이 로드되었습니다: {', '.join(forbidden)}")
+    for failure in failures:
+        print(f"❌ {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+LLM 백엔드 비교 벤치마크
+
+같은 사용자 입력 목록으로 백엔드마다 이미지 생성 서비스의 프롬프트 생성 호출(스트리밍 chat, CLIP 토큰 예산에서 중단)을
+반복하고 전체 시간, 프롬프트당 시간(p50/p95), 첫 토큰까지의 시간, 초당 생성 토큰 수, 프롬프트의 CLIP 토큰 수를 비교합니다.
+
+    python -m benchmarks.llm_backends --backend ollama=http://127.0.0.1:11434 \\
+        --backend openai=http://127.0.0.1:8000/v1 --model llama3.1 --count 32 --json backends.json
+
+--backend는 `이름` 또는 `이름=URL`이며 여러 번 지정할 수 있습니다 (이름: ollama, openai, fake).
+ollama/openai에 URL을 생략하면 가짜 Ollama(`/api`와 `/v1/chat/completions`를 모두 제공)로 실행하므로
+두 프로토콜의 클라이언트 처리 비용과 스트림 중단 동작을 서버 없이 비교할 수 있습니다.
+fake는 서버 없이 프로세스 안에서 응답하며 --fake-token-latency로 토큰당 지연을 줍니다.
+"""
+import os
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from benchmarks.fake_servers import FakeOllama, LatencyModel, ServerThread
+from benchmarks.load_test import percentile
+from benchmarks.prompt_expansion import user_texts
+
+BACKENDS = ("ollama", "openai", "fake")
+
+
+def parse_backend(spec: str) -> Tuple[str, Optional[str]]:
+    """`이름` 또는 `이름=URL` → (이름, URL)"""
+    name, _, url = spec.partition("=")
+    name = name.strip().lower()
+    if name not in BACKENDS:
+        raise ValueError(f"알 수 없는 백엔드입니다: {name} (가능: {', '.join(BACKENDS)})")
+    return name, url.strip() or None
+
+
+def bench_backend(backend: Any, model: str, texts: List[str], concurrency: int) -> Dict[str, Any]:
+    """백엔드 하나로 프롬프트 생성 반복"""
+    from app.core.config import OLLAMA_PROMPT_NUM_PREDICT, OLLAMA_STRUCTURED_OUTPUT
+    from app.services.admission import get_limiter
+    from app.services.image_generation import CREATIVE_DIRECTOR, base_prompt_budget, prompt_rules
+    from app.services.llm_client import LLMClient
+    from app.services.prompt_budget import PROMPT_SCHEMA, extract_prompt, get_clip_tokenizer
+
+    client = LLMClient(backend)
+    budget = base_prompt_budget()
+    tokenizer = get_clip_tokenizer()
+
+    def build(text: str) -> Dict[str, Any]:
+        started = time.perf_counter()
+        with get_limiter("llm").slot():
+            response = client.stream_chat(
+                model=model,
+                messages=[{"role": "user", "content": CREATIVE_DIRECTOR + prompt_rules(budget) + "\nUser request: " + text}],
+                stop=lambda content: tokenizer.count(extract_prompt(content)) > budget,
+                options={"num_predict": OLLAMA_PROMPT_NUM_PREDICT},
+                format=PROMPT_SCHEMA if OLLAMA_STRUCTURED_OUTPUT else None
+            )
+        prompt = tokenizer.truncate(extract_prompt(response["content"]) or text, budget)
+        return {"seconds": time.perf_counter() - started, "prompt": prompt, **response}
+
+    client.preload([model])
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(build, texts))
+    wall = time.perf_counter() - started
+
+    seconds = [r["seconds"] for r in results]
+    first_tokens = [r["first_token"] for r in results if r["first_token"] is not None]
+    rates = [r["tokens_per_second"] for r in results if r["tokens_per_second"]]
+    clip_tokens = [tokenizer.count(r["prompt"]) for r in results]
+    return {
+        "wall_seconds": round(wall, 3),
+        "prompts_per_second": round(len(texts) / wall, 2) if wall > 0 else None,
+        "per_prompt_seconds": {"p50": round(percentile(seconds, 0.5), 4), "p95": round(percentile(seconds, 0.95), 4)},
+        "first_token_seconds": {"p50": round(percentile(first_tokens, 0.5), 4)} if first_tokens else None,
+        "tokens_per_second": {"p50": round(percentile(rates, 0.5), 1)} if rates else None,
+        "llm_tokens": sum(r["eval_count"] or 0 for r in results),
+        "stopped": sum(1 for r in results if r["stopped"]),
+        "clip_tokens": {"p50": percentile(clip_tokens, 0.5), "max": max(clip_tokens)},
+        "sample": results[0]["prompt"] if results else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM 백엔드 비교 벤치마크 (프롬프트 생성)")
+    parser.add_argument("--backend", action="append", dest="backends",
+                        help="비교할 백엔드 (이름 또는 이름=URL, 여러 번 지정, 기본: fake, ollama, openai 모두 가짜로)")
+    parser.add_argument("--model", help="텍스트 모델 (생략하면 OLLAMA_MODEL)")
+    parser.add_argument("--count", type=int, default=32, help="사용자 입력 수")
+    parser.add_argument("--concurrency", type=int, default=4, help="동시 워커 수 (LLM_MAX_CONCURRENCY도 같게 설정)")
+    parser.add_argument("--fake-token-latency", type=float, default=0.01, help="fake 백엔드의 토큰당 지연 (초)")
+    parser.add_argument("--ollama-latency", default="const:0.5", help="가짜 Ollama 기본 응답 시간 분포")
+    parser.add_argument("--ollama-parallel", type=int, default=4, help="가짜 Ollama 동시 처리 수")
+    parser.add_argument("--json", dest="json_path", help="결과를 JSON으로 저장할 경로")
+    args = parser.parse_args()
+
+    try:
+        specs = [parse_backend(spec) for spec in (args.backends or BACKENDS)]
+    except ValueError as e:
+        parser.error(str(e))
+
+    os.environ["LLM_MAX_CONCURRENCY"] = str(args.concurrency)
+    if args.model:
+        os.environ["OLLAMA_MODEL"] = args.model
+    from app.core.config import OLLAMA_KEEP_ALIVE, OLLAMA_MODEL
+    from app.services.llm_backends import FakeLLMBackend, create_backend
+    from app.services.llm_client import parse_keep_alive
+
+    server = None
+    texts = user_texts(args.count)
+    results: Dict[str, Any] = {}
+    try:
+        for name, url in specs:
+            label = f"{name}={url}" if url else name
+            if name == "fake":
+                backend = FakeLLMBackend(token_latency=args.fake_token_latency)
+            else:
+                if not url:
+                    if server is None:
+                        ollama = FakeOllama(LatencyModel(args.ollama_latency), parallel=args.ollama_parallel)
+                        server = ServerThread(ollama.app).start()
+                    url = server.url + ("/v1" if name == "openai" else "")
+                backend = create_backend(name, url, keep_alive=parse_keep_alive(OLLAMA_KEEP_ALIVE))
+            results[label] = bench_backend(backend, OLLAMA_MODEL, texts, args.concurrency)
+    finally:
+        if server:
+            server.stop()
+
+    report = {
+        "model": OLLAMA_MODEL,
+        "count": args.count,
+        "concurrency": args.concurrency,
+        "backends": results,
+    }
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
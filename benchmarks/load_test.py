@@ -0,0 +1,160 @@
+"""
+에이전트 부하 테스트
+
+가짜 ComfyUI/Ollama 위에서 `/api/v1/generate`를 지정한 동시성으로 호출하고
+지연 시간 분위수(p50/p95/p99), 처리량, 에이전트 프로세스의 CPU/RSS를 보고합니다.
+
+    python -m benchmarks.load_test --requests 200 --concurrency 16 --mode fast \\
+        --comfy-latency lognormal:0.5,0.3 --ollama-latency const:0.05 --seed 42
+"""
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from benchmarks.harness import FakeStack, ProcessSampler
+
+
+def percentile(values: List[float], q: float) -> float:
+    """선형 보간 분위수"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * q
+    lower = int(k)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (k - lower)
+
+
+def run_load(url: str, total: int, concurrency: int, mode: str, timeout: float,
+             job_timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    고정된 요청 수를 동시성 제한 하에 실행
+
+    Returns:
+        요청별 지연 시간과 상태 코드 집계
+    """
+    local = threading.local()
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    lock = threading.Lock()
+
+    def one(i: int):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        payload: Dict[str, Any] = {"prompt": f"benchmark product {i % 50}", "mode": mode}
+        if job_timeout:
+            payload["timeout"] = job_timeout
+        started = time.perf_counter()
+        try:
+            code = session.post(f"{url}/api/v1/generate", json=payload, timeout=timeout).status_code
+        except requests.exceptions.RequestException:
+            code = 0
+        elapsed = time.perf_counter() - started
+        with lock:
+            statuses[code] = statuses.get(code, 0) + 1
+            if code == 200:
+                latencies.append(elapsed)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+    wall = time.perf_counter() - started
+
+    return {"latencies": latencies, "statuses": statuses, "wall_seconds": wall}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="가짜 백엔드 기반 에이전트 부하 테스트")
+    parser.add_argument("--requests", type=int, default=100, help="총 요청 수")
+    parser.add_argument("--concurrency", type=int, default=8, help="동시 요청 수")
+    parser.add_argument("--warmup", type=int, default=4, help="측정 전 워밍업 요청 수")
+    parser.add_argument("--mode", default="fast", help="생성 모드")
+    parser.add_argument("--comfy-latency", default="lognormal:0.5,0.25", help="ComfyUI 실행 시간 분포")
+    parser.add_argument("--comfy-workers", type=int, default=1, help="가짜 ComfyUI 동시 실행 슬롯 (GPU 수)")
+    parser.add_argument("--ollama-latency", default="const:0.05", help="Ollama 호출 시간 분포")
+    parser.add_argument("--ollama-parallel", type=int, default=4, help="가짜 Ollama 동시 처리 수")
+    parser.add_argument("--ollama-load-latency", default="const:0", help="Ollama 모델 로드 시간 분포")
+    parser.add_argument("--ollama-max-loaded", type=int, default=3, help="가짜 Ollama가 동시에 유지하는 모델 수")
+    parser.add_argument("--ollama-reply-words", type=int, default=0, help="가짜 Ollama 응답 단어 수 (0이면 기본 응답, 장황한 응답 재현용)")
+    parser.add_argument("--comfy-backends", type=int, default=1, help="가짜 ComfyUI 백엔드 수 (COMFYUI_URLS)")
+    parser.add_argument("--comfy-vram", default="24", help="백엔드별 GPU VRAM (GB, 쉼표 구분, 모자라면 마지막 값 반복)")
+    parser.add_argument("--comfy-external-vram", default="0",
+                        help="백엔드별 다른 프로세스가 쓰는 VRAM (GB, 쉼표 구분, 같은 GPU의 Ollama 등)")
+    parser.add_argument("--comfy-submit-errors", type=float, default=0,
+                        help="가짜 ComfyUI /prompt가 503을 돌려주는 비율 (큐에 넣지 않음)")
+    parser.add_argument("--comfy-lost-responses", type=float, default=0,
+                        help="가짜 ComfyUI /prompt가 큐에 넣은 뒤 503을 돌려주는 비율 (응답 유실, 중복 제출 확인용)")
+    parser.add_argument("--timeout", type=float, default=600, help="요청별 HTTP 타임아웃 (초)")
+    parser.add_argument("--job-timeout", type=float, help="요청 본문의 작업 시간 예산 (초, 넘으면 504)")
+    parser.add_argument("--seed", type=int, default=0, help="지연 분포 시드")
+    parser.add_argument("--json", dest="json_path", help="결과를 JSON으로 저장할 경로")
+    args = parser.parse_args()
+
+    stack = FakeStack(
+        comfy_latency=args.comfy_latency,
+        ollama_latency=args.ollama_latency,
+        comfy_workers=args.comfy_workers,
+        ollama_parallel=args.ollama_parallel,
+        ollama_load_latency=args.ollama_load_latency,
+        ollama_max_loaded=args.ollama_max_loaded,
+        ollama_reply_words=args.ollama_reply_words,
+        comfy_backends=args.comfy_backends,
+        comfy_vram_gb=[float(v) for v in args.comfy_vram.split(",")],
+        comfy_external_vram_gb=[float(v) for v in args.comfy_external_vram.split(",")],
+        comfy_submit_error_rate=args.comfy_submit_errors,
+        comfy_lost_response_rate=args.comfy_lost_responses,
+        seed=args.seed,
+    )
+    with stack:
+        if args.warmup:
+            run_load(stack.agent_url, args.warmup, min(args.warmup, args.concurrency), args.mode, args.timeout)
+
+        with ProcessSampler(stack.agent.pid) as sampler:
+            result = run_load(stack.agent_url, args.requests, args.concurrency, args.mode, args.timeout, args.job_timeout)
+
+    latencies = result["latencies"]
+    report = {
+        "config": vars(args),
+        "ok": len(latencies),
+        "statuses": result["statuses"],
+        "latency_seconds": {
+            "p50": round(percentile(latencies, 0.50), 4),
+            "p95": round(percentile(latencies, 0.95), 4),
+            "p99": round(percentile(latencies, 0.99), 4),
+            "mean": round(sum(latencies) / len(latencies), 4) if latencies else 0.0,
+            "max": round(max(latencies), 4) if latencies else 0.0,
+        },
+        "throughput_rps": round(len(latencies) / result["wall_seconds"], 3),
+        "wall_seconds": round(result["wall_seconds"], 3),
+        "agent": {
+            "cpu_seconds": round(sampler.cpu_seconds, 3),
+            "cpu_percent": round(100 * sampler.cpu_seconds / sampler.wall_seconds, 1),
+            "cpu_ms_per_request": round(1000 * sampler.cpu_seconds / max(1, args.requests), 2),
+            "peak_rss_mb": round(sampler.peak_rss / (1024 * 1024), 1),
+        },
+        "backend_calls": {
+            "comfyui_prompts": sum(comfy.submitted for comfy in stack.comfys),
+            "comfyui_prompts_per_backend": [comfy.submitted for comfy in stack.comfys],
+            "comfyui_cancelled": sum(comfy.interrupted + comfy.deleted for comfy in stack.comfys),
+            "comfyui_submit_errors": sum(comfy.submit_errors for comfy in stack.comfys),
+            "comfyui_duplicate_prompts": sum(comfy.duplicates for comfy in stack.comfys),
+            "ollama_calls": stack.ollama.calls,
+            "ollama_model_loads": stack.ollama.loads,
+            "ollama_tokens": stack.ollama.tokens,
+        },
+    }
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
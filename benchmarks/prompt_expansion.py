@@ -0,0 +1,163 @@
+"""
+배치 프롬프트 확장 방식 비교 벤치마크
+
+같은 사용자 입력 목록을 방식별로 기본 프롬프트로 확장하고 전체 시간, 프롬프트당 시간, LLM 호출 수를 비교합니다.
+
+- single: 작업마다 개별 생성 (이미지 생성 서비스의 `_build_prompt`와 같은 스트리밍 호출)
+- grouped: --group-size개씩 LLM 호출 하나로 (구조화 출력)
+- concurrent: 요청별 호출 + 지시문 context 재사용
+
+    python -m benchmarks.prompt_expansion --ollama-url http://127.0.0.1:11434 --count 32 --json expansion.json
+
+--ollama-url을 생략하면 가짜 Ollama로 실행합니다 (가짜는 생성 시간이 응답 단어 수에 비례하고
+context를 넘기면 프롬프트 처리 시간을 줄이므로 방식 간 차이의 방향만 확인할 수 있습니다).
+설정은 환경 변수에서 읽으므로 app 모듈은 OLLAMA_HOST/LLM_MAX_CONCURRENCY를 정한 뒤 불러옵니다.
+"""
+import os
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+from benchmarks.fake_servers import FakeOllama, LatencyModel, ServerThread
+from benchmarks.load_test import percentile
+
+MODES = ("single", "grouped", "concurrent")
+
+PRODUCTS = [
+    "vegan shampoo bottle", "matte black wireless earbuds", "ceramic pour-over coffee dripper",
+    "leather weekender bag", "stainless steel water bottle", "organic lavender soap bar",
+    "mechanical keyboard with walnut case", "linen throw pillow", "titanium camping spork",
+    "glass perfume flacon", "running shoe with knit upper", "bamboo cutting board",
+]
+
+
+def user_texts(count: int) -> List[str]:
+    """제품 카탈로그 흉내 입력 (서로 다른 문장)"""
+    return [f"{PRODUCTS[i % len(PRODUCTS)]}, catalogue shot #{i + 1}" for i in range(count)]
+
+
+def run_single(texts: List[str], concurrency: int) -> Dict[str, str]:
+    """작업마다 개별 생성 (LLM 동시성 제한 안에서 concurrency개 동시)"""
+    from app.core.config import OLLAMA_MODEL, OLLAMA_PROMPT_NUM_PREDICT, OLLAMA_STRUCTURED_OUTPUT
+    from app.services.admission import get_limiter
+    from app.services.image_generation import CREATIVE_DIRECTOR, base_prompt_budget, prompt_rules
+    from app.services.llm_client import get_llm_client
+    from app.services.prompt_budget import PROMPT_SCHEMA, extract_prompt, get_clip_tokenizer
+
+    budget = base_prompt_budget()
+    tokenizer = get_clip_tokenizer()
+
+    def build(text: str) -> str:
+        with get_limiter("llm").slot():
+            response = get_llm_client().stream_chat(
+                model=OLLAMA_MODEL,
+                messages=[{"role": "user", "content": CREATIVE_DIRECTOR + prompt_rules(budget) + "\nUser request: " + text}],
+                stop=lambda content: tokenizer.count(extract_prompt(content)) > budget,
+                options={"num_predict": OLLAMA_PROMPT_NUM_PREDICT},
+                format=PROMPT_SCHEMA if OLLAMA_STRUCTURED_OUTPUT else None
+            )
+        return tokenizer.truncate(extract_prompt(response["content"]) or text, budget)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return dict(zip(texts, executor.map(build, texts)))
+
+
+def run_expander(mode: str, texts: List[str], concurrency: int, group_size: int) -> Dict[str, str]:
+    """배치처럼 concurrency개 워커가 각자 자기 입력의 프롬프트를 요청"""
+    from app.services.prompt_expansion import PromptExpander
+
+    expansion = PromptExpander(mode=mode, group_size=group_size).for_batch(texts)
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        prompts = list(executor.map(expansion.get, texts))
+    return {text: prompt for text, prompt in zip(texts, prompts) if prompt is not None}
+
+
+def bench_mode(mode: str, texts: List[str], concurrency: int, group_size: int, ollama: Any) -> Dict[str, Any]:
+    """방식 하나 실행"""
+    from app.services.prompt_budget import get_clip_tokenizer
+
+    calls = ollama.calls if ollama else None
+    tokens = ollama.tokens if ollama else None
+    started = time.perf_counter()
+    if mode == "single":
+        prompts = run_single(texts, concurrency)
+    else:
+        prompts = run_expander(mode, texts, concurrency, group_size)
+    wall = time.perf_counter() - started
+
+    clip_tokens = [get_clip_tokenizer().count(prompt) for prompt in prompts.values()]
+    result: Dict[str, Any] = {
+        "wall_seconds": round(wall, 3),
+        "per_prompt_seconds": round(wall / len(texts), 4),
+        "prompts": len(prompts),
+        "missing": len(texts) - len(prompts),
+        "clip_tokens": {
+            "p50": percentile(clip_tokens, 0.5) if clip_tokens else None,
+            "max": max(clip_tokens) if clip_tokens else None,
+        },
+        "sample": next(iter(prompts.values()), None),
+    }
+    if ollama:
+        result["llm_calls"] = ollama.calls - calls
+        result["llm_tokens"] = ollama.tokens - tokens
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="배치 프롬프트 확장 방식 비교 벤치마크")
+    parser.add_argument("--ollama-url", help="Ollama URL (생략하면 가짜 Ollama)")
+    parser.add_argument("--model", help="텍스트 모델 (생략하면 OLLAMA_MODEL)")
+    parser.add_argument("--modes", default=",".join(MODES), help="비교할 방식 (쉼표 구분)")
+    parser.add_argument("--count", type=int, default=32, help="사용자 입력 수")
+    parser.add_argument("--concurrency", type=int, default=4, help="동시 워커 수 (LLM_MAX_CONCURRENCY도 같게 설정)")
+    parser.add_argument("--group-size", type=int, default=8, help="grouped 모드의 묶음 크기")
+    parser.add_argument("--ollama-latency", default="const:0.5", help="가짜 Ollama 기본 응답 시간 분포")
+    parser.add_argument("--ollama-parallel", type=int, default=4, help="가짜 Ollama 동시 처리 수 (OLLAMA_NUM_PARALLEL)")
+    parser.add_argument("--json", dest="json_path", help="결과를 JSON으로 저장할 경로")
+    args = parser.parse_args()
+
+    modes = [mode.strip() for mode in args.modes.split(",")]
+    for mode in modes:
+        if mode not in MODES:
+            parser.error(f"알 수 없는 방식입니다: {mode} (가능: {', '.join(MODES)})")
+
+    server = ollama = None
+    url = args.ollama_url
+    if not url:
+        ollama = FakeOllama(LatencyModel(args.ollama_latency), parallel=args.ollama_parallel)
+        server = ServerThread(ollama.app).start()
+        url = server.url
+    os.environ["OLLAMA_HOST"] = url
+    os.environ["LLM_MAX_CONCURRENCY"] = str(args.concurrency)
+    if args.model:
+        os.environ["OLLAMA_MODEL"] = args.model
+
+    texts = user_texts(args.count)
+    try:
+        from app.core.config import OLLAMA_MODEL
+        from app.services.llm_client import get_llm_client
+
+        get_llm_client().preload([OLLAMA_MODEL])
+        results = {mode: bench_mode(mode, texts, args.concurrency, args.group_size, ollama) for mode in modes}
+    finally:
+        if server:
+            server.stop()
+
+    report = {
+        "ollama_url": args.ollama_url or "fake",
+        "model": OLLAMA_MODEL,
+        "count": args.count,
+        "concurrency": args.concurrency,
+        "group_size": args.group_size,
+        "modes": results,
+    }
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+에이전트 시작 시간 벤치마크
+
+가짜 백엔드 위에서 에이전트 프로세스를 반복 실행해 프로세스 시작부터 `/api/v1/`이 처음 200을
+반환할 때까지의 시간(time-to-first-200)을 측정합니다.
+
+    python -m benchmarks.startup --runs 5 --budget 3.0
+"""
+import sys
+import json
+import argparse
+
+from benchmarks.harness import FakeStack
+from benchmarks.import_time import measure_imports
+from benchmarks.load_test import percentile
+
+
+def main():
+    parser = argparse.ArgumentParser(description="에이전트 시작 시간 벤치마크")
+    parser.add_argument("--runs", type=int, default=5, help="반복 횟수")
+    parser.add_argument("--timeout", type=float, default=60, help="실행당 최대 대기 시간 (초)")
+    parser.add_argument("--budget", type=float, default=None, help="p50 시작 시간 예산 (초, 넘으면 종료 코드 1)")
+    parser.add_argument("--json", dest="json_path", help="결과를 JSON으로 저장할 경로")
+    args = parser.parse_args()
+
+    samples = []
+    for _ in range(max(1, args.runs)):
+        stack = FakeStack()
+        try:
+            stack.start(timeout=args.timeout)
+            samples.append(stack.startup_seconds)
+        finally:
+            stack.stop()
+
+    report = {
+        "runs": len(samples),
+        "time_to_first_200_seconds": {
+            "min": round(min(samples), 4),
+            "p50": round(percentile(samples, 0.50), 4),
+            "max": round(max(samples), 4),
+        },
+        "import_app_main_ms": round(measure_imports("app.main")["total_ms"], 1),
+        "budget_seconds": args.budget,
+    }
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    if args.budget is not None and report["time_to_first_200_seconds"]["p50"] > args.budget:
+        print(f"❌ 시작 시간 p50이 예산 {args.budget}초를 초과했습니다", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
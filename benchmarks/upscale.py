@@ -0,0 +1,244 @@
+"""
+업스케일 방식 비교 벤치마크
+
+같은 프롬프트/시드로 업스케일 방식(없음, 업스케일러 모델, latent 업스케일, 타일 VAE 디코드)별 워크플로를
+만들어 ComfyUI에서 실행하고 방식별 실행 시간, VRAM 최대 사용량, 출력 이미지 크기/용량을 비교합니다.
+
+    python -m benchmarks.upscale --comfy-url http://127.0.0.1:8188 --runs 3 --json upscale.json
+
+VRAM은 실행 중 `/system_stats`의 vram_free를 주기적으로 읽어 (vram_total - 최소 vram_free)로 계산합니다.
+방식마다 `/free`로 모델과 캐시를 내린 뒤 워밍업을 한 번 실행하고 측정하므로, 측정값에는 로드된 모델 가중치가 포함됩니다.
+--comfy-url을 생략하면 가짜 ComfyUI로 스크립트 동작만 확인합니다 (수치는 의미 없음).
+"""
+import json
+import time
+import struct
+import argparse
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+from benchmarks.fake_servers import FakeComfyUI, LatencyModel, ServerThread, build_object_info
+from benchmarks.harness import FAKE_CHECKPOINTS, FAKE_UPSCALE_MODELS
+from benchmarks.load_test import percentile
+from app.services.graph_validator import validate_graph
+from app.services.profiles import build_profile, get_profile_registry
+from app.services.workflow import build_workflow, estimate_cost, output_size
+
+# 비교할 방식 (이름 → 기준 프로필에 덮어쓸 필드)
+STRATEGIES: Dict[str, Dict[str, Any]] = {
+    "none": {"upscale": None},
+    "model": {"upscale": {"method": "model"}},
+    "model_1.5x": {"upscale": {"method": "model", "scale": 1.5}},
+    "model_tiled": {"upscale": {"method": "model"}, "vae_tile_size": 512},
+    "latent_1.5x": {"upscale": {"method": "latent", "scale": 1.5, "denoise": 0.5}},
+    "latent_2x": {"upscale": {"method": "latent", "scale": 2.0, "denoise": 0.5}},
+    "latent_2x_tiled": {"upscale": {"method": "latent", "scale": 2.0, "denoise": 0.5}, "vae_tile_size": 512},
+}
+
+PROMPT = "frosted glass vegan shampoo bottle on wet slate, soft rim light, product commercial"
+
+
+def png_size(data: bytes) -> Optional[Tuple[int, int]]:
+    """PNG 헤더(IHDR)의 가로/세로 (PNG가 아니면 None)"""
+    if len(data) < 24 or not data.startswith(b"\x89PNG\r\n\x1a\n"):
+        return None
+    return struct.unpack(">II", data[16:24])
+
+
+def _choices(object_info: Dict[str, Any], node: str, name: str) -> List[str]:
+    spec = object_info.get(node, {}).get("input", {}).get("required", {}).get(name)
+    return list(spec[0]) if spec and isinstance(spec[0], list) else []
+
+
+class VramSampler:
+    """실행 중 /system_stats를 주기적으로 읽어 VRAM 최대 사용량 기록"""
+
+    def __init__(self, session: requests.Session, url: str, interval: float = 0.1):
+        self.session = session
+        self.url = url
+        self.interval = interval
+        self.peak_used: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _sample(self):
+        try:
+            devices = self.session.get(f"{self.url}/system_stats", timeout=2).json().get("devices") or []
+        except (requests.exceptions.RequestException, ValueError):
+            return
+        if devices and devices[0].get("vram_total"):
+            used = devices[0]["vram_total"] - devices[0]["vram_free"]
+            self.peak_used = used if self.peak_used is None else max(self.peak_used, used)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._sample()
+            self._stop.wait(self.interval)
+
+    def __enter__(self) -> "VramSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+
+def run_graph(session: requests.Session, url: str, graph: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+    """
+    워크플로 한 번 실행
+
+    Returns:
+        wall_seconds, vram_peak_mb, output_bytes, output_size (실패하면 error)
+    """
+    with VramSampler(session, url) as vram:
+        started = time.perf_counter()
+        response = session.post(f"{url}/prompt", json={"prompt": graph}, timeout=30)
+        if response.status_code != 200:
+            return {"error": response.text[:500]}
+        prompt_id = response.json()["prompt_id"]
+
+        deadline = time.time() + timeout
+        entry = None
+        while time.time() < deadline:
+            entry = session.get(f"{url}/history/{prompt_id}", timeout=10).json().get(prompt_id)
+            if entry and entry.get("status", {}).get("completed") is not None:
+                break
+            time.sleep(0.1)
+        wall = time.perf_counter() - started
+
+    if not entry:
+        return {"error": f"{timeout}초 안에 완료되지 않았습니다"}
+    if entry.get("status", {}).get("status_str") != "success":
+        return {"error": json.dumps(entry.get("status"), ensure_ascii=False)[:500]}
+
+    image = entry["outputs"]["save"]["images"][0]
+    data = session.get(
+        f"{url}/view",
+        params={"filename": image["filename"], "subfolder": image.get("subfolder", ""), "type": image.get("type", "output")},
+        timeout=60
+    ).content
+    return {
+        "wall_seconds": wall,
+        "vram_peak_mb": round(vram.peak_used / 1024 ** 2) if vram.peak_used is not None else None,
+        "output_bytes": len(data),
+        "output_size": png_size(data),
+    }
+
+
+def bench_strategy(
+    session: requests.Session,
+    url: str,
+    profile: Dict[str, Any],
+    models: Dict[str, Optional[str]],
+    object_info: Dict[str, Any],
+    runs: int,
+    warmup: int,
+    timeout: float
+) -> Dict[str, Any]:
+    """방식 하나의 워크플로를 검증한 뒤 워밍업과 측정 실행"""
+    graph = build_workflow(
+        profile, PROMPT, models["base"], refiner_model=models["refiner"],
+        upscale_model=models["upscale"], prefix="upscale_bench"
+    )
+    result: Dict[str, Any] = {
+        "upscale": profile["upscale"],
+        "vae_tile_size": profile["vae_tile_size"],
+        "nodes": len(graph),
+        "estimated_cost": round(estimate_cost(profile), 3),
+        "expected_size": output_size(profile),
+    }
+    errors = validate_graph(graph, object_info)
+    if errors:
+        result["error"] = "; ".join(error["message"] for error in errors[:3])
+        return result
+
+    session.post(f"{url}/free", json={"unload_models": True, "free_memory": True}, timeout=30)
+    samples = []
+    for i in range(warmup + runs):
+        sample = run_graph(session, url, graph, timeout)
+        if "error" in sample:
+            result["error"] = sample["error"]
+            return result
+        if i >= warmup:
+            samples.append(sample)
+
+    walls = [s["wall_seconds"] for s in samples]
+    peaks = [s["vram_peak_mb"] for s in samples if s["vram_peak_mb"] is not None]
+    result.update({
+        "runs": len(samples),
+        "wall_seconds": {"p50": round(percentile(walls, 0.5), 3), "max": round(max(walls), 3)},
+        "vram_peak_mb": max(peaks) if peaks else None,
+        "output_bytes": samples[-1]["output_bytes"],
+        "output_size": samples[-1]["output_size"],
+    })
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="업스케일 방식 비교 벤치마크")
+    parser.add_argument("--comfy-url", help="ComfyUI URL (생략하면 가짜 ComfyUI)")
+    parser.add_argument("--profile", default="high_quality", help="기준 프로필 (해상도/스텝/리파이너)")
+    parser.add_argument("--strategies", default=",".join(STRATEGIES), help="비교할 방식 (쉼표 구분)")
+    parser.add_argument("--base-model", help="기본 체크포인트 (생략하면 /object_info의 첫 번째)")
+    parser.add_argument("--refiner-model", help="리파이너 체크포인트 (생략하면 리파이너 없이 실행)")
+    parser.add_argument("--upscale-model", help="업스케일러 모델 (생략하면 /object_info의 첫 번째)")
+    parser.add_argument("--runs", type=int, default=3, help="방식별 측정 횟수")
+    parser.add_argument("--warmup", type=int, default=1, help="방식별 워밍업 횟수 (모델 로드 포함, 측정 제외)")
+    parser.add_argument("--timeout", type=float, default=600, help="실행당 최대 대기 시간 (초)")
+    parser.add_argument("--json", dest="json_path", help="결과를 JSON으로 저장할 경로")
+    args = parser.parse_args()
+
+    base = get_profile_registry().get(args.profile)
+    if base is None:
+        parser.error(f"알 수 없는 프로필입니다: {args.profile}")
+    fields = {key: value for key, value in base.items() if key != "name"}
+
+    server = comfy = None
+    url = args.comfy_url
+    if not url:
+        comfy = FakeComfyUI(
+            LatencyModel("const:0.2"),
+            object_info=build_object_info(list(FAKE_CHECKPOINTS), list(FAKE_UPSCALE_MODELS))
+        )
+        comfy.start()
+        server = ServerThread(comfy.app).start()
+        url = server.url
+
+    session = requests.Session()
+    try:
+        object_info = session.get(f"{url}/object_info", timeout=30).json()
+        models = {
+            "base": args.base_model or next(iter(_choices(object_info, "CheckpointLoaderSimple", "ckpt_name")), None),
+            "refiner": args.refiner_model,
+            "upscale": args.upscale_model or next(iter(_choices(object_info, "UpscaleModelLoader", "model_name")), None),
+        }
+        results = {}
+        for name in args.strategies.split(","):
+            name = name.strip()
+            if name not in STRATEGIES:
+                parser.error(f"알 수 없는 방식입니다: {name} (가능: {', '.join(STRATEGIES)})")
+            profile = build_profile(f"{args.profile}:{name}", {**fields, "vae_tile_size": None, **STRATEGIES[name]})
+            results[name] = bench_strategy(session, url, profile, models, object_info, args.runs, args.warmup, args.timeout)
+    finally:
+        if server:
+            server.stop()
+            comfy.stop()
+
+    report = {
+        "comfy_url": args.comfy_url or "fake",
+        "profile": args.profile,
+        "models": models,
+        "strategies": results,
+    }
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,16 +5,11 @@ import os
 import sys
 import subprocess
 import time
-import requests
 import signal
 import logging
 from pathlib import Path
 from typing import Optional, Dict
-from threading import Thread
-try:
-    import psutil
-except ImportError:
-    psutil = None
+from threading import Event, Thread
 
 # 로깅 설정
 logging.basicConfig(
@@ -95,11 +90,19 @@ class ServiceManager:
         # 프로세스 관리
         self.comfyui_process: Optional[subprocess.Popen] = None
         self.webui_process: Optional[subprocess.Popen] = None
+        # ComfyUI가 마지막으로 시작된 시각 (API가 노드 정의 캐시를 백엔드 시작마다 갱신하는 기준)
+        self.comfyui_started_at: Optional[float] = None
+        # ComfyUI 준비 신호 (시작/헬스체크 성공 시 설정, 중지/응답 없음 시 해제, 재시도가 재시작을 기다리는 데 사용)
+        self.comfyui_ready = Event()
         
         # 헬스체크
         self.health_check_thread: Optional[Thread] = None
         self.running = False
         
+        # 헬스체크 루프가 마지막으로 확인한 상태 (readiness 조회는 HTTP 확인 없이 이 값을 사용)
+        self.last_status: Optional[Dict[str, any]] = None
+        self.last_status_at: Optional[float] = None
+        
         # health_check_interval이 None이면 기본값 설정
         if self.health_check_interval is None:
             self.health_check_interval = 10
@@ -136,6 +139,8 @@ class ServiceManager:
     
     def _check_service_health(self, url: str, timeout: int = 5) -> bool:
         """서비스 헬스체크"""
+        import requests
+        
         try:
             response = requests.get(url, timeout=timeout, allow_redirects=True)
             # 200-299 범위의 상태 코드를 성공으로 간주
@@ -198,6 +203,8 @@ class ServiceManager:
             while wait_time < max_wait:
                 if self._check_service_health(f"http://127.0.0.1:{self.comfyui_port}"):
                     logger.info(f"✅ ComfyUI가 성공적으로 시작되었습니다 (포트: {self.comfyui_port})")
+                    self.comfyui_started_at = time.time()
+                    self.comfyui_ready.set()
                     return True
                 if self.comfyui_process.poll() is not None:
                     # 프로세스가 종료됨
@@ -341,6 +348,8 @@ class ServiceManager:
                 logger.error(f"ComfyUI 중지 중 오류: {e}")
             finally:
                 self.comfyui_process = None
+                self.comfyui_started_at = None
+                self.comfyui_ready.clear()
     
     def stop_webui(self):
         """Stable Diffusion WebUI 서버 중지"""
@@ -424,7 +433,8 @@ class ServiceManager:
             "comfyui": {
                 "running": comfyui_running,
                 "port": self.comfyui_port,
-                "url": f"http://127.0.0.1:{self.comfyui_port}"
+                "url": f"http://127.0.0.1:{self.comfyui_port}",
+                "started_at": self.comfyui_started_at
             },
             "webui": {
                 "running": webui_running,
@@ -433,11 +443,47 @@ class ServiceManager:
             }
         }
     
+    def get_cached_status(self) -> Dict[str, any]:
+        """
+        헬스체크 루프가 마지막으로 확인한 상태 (HTTP 확인 없이 즉시 반환)
+        
+        Returns:
+            services (아직 확인 전이면 None), checked_at (epoch), health_check (루프 실행 여부)
+        """
+        return {
+            "services": self.last_status,
+            "checked_at": self.last_status_at,
+            "health_check": self.running
+        }
+    
+    def is_comfyui_ready(self) -> bool:
+        """ComfyUI 준비 신호 (마지막 시작/헬스체크에서 응답했는지)"""
+        return self.comfyui_ready.is_set()
+    
+    def wait_for_comfyui(self, timeout: float) -> bool:
+        """
+        ComfyUI가 준비될 때까지 대기 (재시작 중인 ComfyUI에 재시도가 두드리지 않도록)
+        
+        자동 시작이 꺼져 있거나 ComfyUI 경로가 없어 이 매니저가 ComfyUI를 다시 띄우지 않으면 기다리지 않습니다.
+        
+        Returns:
+            준비되었는지
+        """
+        if not self.comfyui_ready.is_set() and not (self.auto_start and self.comfyui_path):
+            return False
+        return self.comfyui_ready.wait(timeout)
+    
     def _health_check_loop(self):
         """헬스체크 루프 (백그라운드 스레드)"""
         while self.running:
             try:
                 status = self.get_status()
+                self.last_status = status
+                self.last_status_at = time.time()
+                if status["comfyui"]["running"]:
+                    self.comfyui_ready.set()
+                else:
+                    self.comfyui_ready.clear()
                 
                 # ComfyUI 자동 재시작 (프로세스가 실행 중이지만 응답하지 않는 경우만)
                 if not status["comfyui"]["running"] and self.auto_start: